@@ -0,0 +1,60 @@
+# -*- coding: utf-8 -*-
+
+"""
+Lazy attribute loading for the public API modules (PEP 562).
+
+The ``api.py`` modules of this package re-export many names. Some of them
+live in modules that import heavy dependencies such as ``s3pathlib`` and
+``boto3``, which dominates the cold start time of a Lambda function that
+only needs :class:`~aws_textract.better_boto.async_api.TextractEvent`.
+With :func:`lazy_module_attributes`, those modules are imported on the
+first attribute access instead.
+"""
+
+import typing as T
+import importlib
+
+
+def lazy_module_attributes(
+    module_globals: T.Dict[str, T.Any],
+    attributes: T.Dict[str, T.Tuple[str, T.Optional[str]]],
+) -> T.Tuple[T.Callable[[str], T.Any], T.Callable[[], T.List[str]]]:
+    """
+    Create the module level ``__getattr__`` and ``__dir__`` functions.
+
+    Usage example, in ``my_package/api.py``::
+
+        __getattr__, __dir__ = lazy_module_attributes(
+            globals(),
+            {
+                # import my_package/heavy.py and return the ``heavy_func`` attribute
+                "heavy_func": (".heavy", "heavy_func"),
+                # import my_package/sub/api.py and return the module itself
+                "sub": (".sub.api", None),
+            },
+        )
+
+    :param module_globals: the ``globals()`` of the public API module.
+    :param attributes: attribute name -> (relative module name, attribute name
+        in that module or None for the module itself).
+    """
+    package = module_globals["__package__"]
+    module_name = module_globals["__name__"]
+
+    def __getattr__(name: str) -> T.Any:
+        try:
+            relative_module, attr = attributes[name]
+        except KeyError:
+            raise AttributeError(
+                f"module {module_name!r} has no attribute {name!r}"
+            ) from None
+        module = importlib.import_module(relative_module, package)
+        value = module if attr is None else getattr(module, attr)
+        # cache it, so the next access doesn't go through __getattr__
+        module_globals[name] = value
+        return value
+
+    def __dir__() -> T.List[str]:
+        return sorted(set(module_globals) | set(attributes))
+
+    return __getattr__, __dir__
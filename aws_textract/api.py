@@ -11,7 +11,28 @@ Usage example::
 
 See full list of public APIs at
 https://github.com/MacHu-GWU/aws_textract-project/blob/main/tests/test_api.py
+
+The sub modules are imported on first attribute access, so
+``import aws_textract.api`` is cheap in cold start sensitive environments
+like AWS Lambda.
 """
 
-from .better_boto import api as better_boto
-from .response import api as res
+import typing as T
+
+from ._lazy import lazy_module_attributes
+
+if T.TYPE_CHECKING:  # pragma: no cover
+    from .better_boto import api as better_boto
+    from .response import api as res
+    from . import instrumentation
+    from . import clients
+
+__getattr__, __dir__ = lazy_module_attributes(
+    globals(),
+    {
+        "better_boto": (".better_boto.api", None),
+        "res": (".response.api", None),
+        "instrumentation": (".instrumentation", None),
+        "clients": (".clients", None),
+    },
+)
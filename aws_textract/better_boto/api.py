@@ -1,10 +1,15 @@
 # -*- coding: utf-8 -*-
 
+import typing as T
+
 from .async_api import preprocess_input_output_config
 from .async_api import get_document_analysis
 from .async_api import get_document_text_detection
 from .async_api import get_expense_analysis
 from .async_api import get_lending_analysis
+from .async_api import iter_lending_analysis
+from .async_api import iter_document_analysis_pages
+from .async_api import iter_document_text_detection_pages
 from .async_api import JobStatusEnum
 from .async_api import wait_document_analysis_job_to_succeed
 from .async_api import wait_document_text_detection_job_to_succeed
@@ -13,3 +18,82 @@ from .async_api import wait_lending_analysis_job_to_succeed
 from .async_api import wait_for_lending_analysis_job_to_succeed
 from .async_api import TextractDocumentLocation
 from .async_api import TextractEvent
+from .sync_api import to_document_param
+from .sync_api import analyze_document
+from .sync_api import detect_document_text
+from .sync_api import analyze_expense
+from .sync_api import SyncBatchResult
+from .sync_api import batch_analyze_document
+from .sync_api import batch_detect_document_text
+from .sync_api import batch_analyze_expense
+from .._lazy import lazy_module_attributes
+
+# the following modules import sqlite3 and the concurrent.futures machinery,
+# import them on demand
+if T.TYPE_CHECKING:  # pragma: no cover
+    from .router import RoutePathEnum
+    from .router import RoutableApiEnum
+    from .router import guess_document_format
+    from .router import DocumentInfo
+    from .router import RouteResult
+    from .router import TextractRouter
+    from .sharding import ShardableApiEnum
+    from .sharding import split_pdf
+    from .sharding import Shard
+    from .sharding import ShardedJob
+    from .sharding import start_sharded_job
+    from .sharding import wait_sharded_job_to_succeed
+    from .sharding import merge_sharded_responses
+    from .sharding import get_sharded_result
+    from .job_registry import JobApiEnum
+    from .job_registry import JobRecord
+    from .job_registry import BaseJobRegistry
+    from .job_registry import SqliteJobRegistry
+    from .pipeline import QueueMessage
+    from .pipeline import BaseQueue
+    from .pipeline import InMemoryQueue
+    from .pipeline import SqliteQueue
+    from .pipeline import SqsQueue
+    from .pipeline import BaseLedger
+    from .pipeline import InMemoryLedger
+    from .pipeline import SqliteLedger
+    from .pipeline import parse_textract_event
+    from .pipeline import StageStats
+    from .pipeline import Stage
+    from .pipeline import Pipeline
+
+__getattr__, __dir__ = lazy_module_attributes(
+    globals(),
+    {
+        "RoutePathEnum": (".router", "RoutePathEnum"),
+        "RoutableApiEnum": (".router", "RoutableApiEnum"),
+        "guess_document_format": (".router", "guess_document_format"),
+        "DocumentInfo": (".router", "DocumentInfo"),
+        "RouteResult": (".router", "RouteResult"),
+        "TextractRouter": (".router", "TextractRouter"),
+        "ShardableApiEnum": (".sharding", "ShardableApiEnum"),
+        "split_pdf": (".sharding", "split_pdf"),
+        "Shard": (".sharding", "Shard"),
+        "ShardedJob": (".sharding", "ShardedJob"),
+        "start_sharded_job": (".sharding", "start_sharded_job"),
+        "wait_sharded_job_to_succeed": (".sharding", "wait_sharded_job_to_succeed"),
+        "merge_sharded_responses": (".sharding", "merge_sharded_responses"),
+        "get_sharded_result": (".sharding", "get_sharded_result"),
+        "JobApiEnum": (".job_registry", "JobApiEnum"),
+        "JobRecord": (".job_registry", "JobRecord"),
+        "BaseJobRegistry": (".job_registry", "BaseJobRegistry"),
+        "SqliteJobRegistry": (".job_registry", "SqliteJobRegistry"),
+        "QueueMessage": (".pipeline", "QueueMessage"),
+        "BaseQueue": (".pipeline", "BaseQueue"),
+        "InMemoryQueue": (".pipeline", "InMemoryQueue"),
+        "SqliteQueue": (".pipeline", "SqliteQueue"),
+        "SqsQueue": (".pipeline", "SqsQueue"),
+        "BaseLedger": (".pipeline", "BaseLedger"),
+        "InMemoryLedger": (".pipeline", "InMemoryLedger"),
+        "SqliteLedger": (".pipeline", "SqliteLedger"),
+        "parse_textract_event": (".pipeline", "parse_textract_event"),
+        "StageStats": (".pipeline", "StageStats"),
+        "Stage": (".pipeline", "Stage"),
+        "Pipeline": (".pipeline", "Pipeline"),
+    },
+)
@@ -6,10 +6,13 @@ Human friendly version of Amazon Textract async operations.
 
 import typing as T
 import enum
+import time
 import dataclasses
 
 from ..vendor.waiter import Waiter
 from ..vendor.better_dataclasses import DataClass
+from .. import instrumentation as instr
+from ..instrumentation import EventNameEnum
 
 
 if T.TYPE_CHECKING:  # pragma: no cover
@@ -18,6 +21,10 @@ if T.TYPE_CHECKING:  # pragma: no cover
     from mypy_boto3_textract.type_defs import GetDocumentTextDetectionResponseTypeDef
     from mypy_boto3_textract.type_defs import GetExpenseAnalysisResponseTypeDef
     from mypy_boto3_textract.type_defs import GetLendingAnalysisResponseTypeDef
+    from mypy_boto3_textract.type_defs import LendingResultTypeDef
+    from ..response.lending import LendingPageIndex
+    from ..response.projection import Projection
+    from ..response.pages import PageOutput
 
 
 def preprocess_input_output_config(
@@ -83,12 +90,51 @@ def preprocess_input_output_config(
     return document_location, output_config
 
 
+def _iter_result(
+    api: T.Callable,
+    job_id: str,
+    max_results: T.Optional[int] = None,
+    all_pages: bool = True,
+) -> T.Iterator[dict]:
+    """
+    Call the ``get_xyz()`` paginator API and yield the response of each
+    page as soon as it arrives, until there is no ``NextToken``.
+    """
+    operation = getattr(api, "__name__", "unknown")
+    next_token = None
+    while True:
+        kwargs = dict(JobId=job_id)
+        if max_results:
+            kwargs["MaxResults"] = max_results
+        if next_token:
+            kwargs["NextToken"] = next_token
+        res = instr.call_with_instrumentation(
+            api,
+            latency_event=EventNameEnum.API_CALL_LATENCY,
+            throttle_event=EventNameEnum.API_THROTTLE,
+            operation=operation,
+            **kwargs,
+        )
+        instr.emit_counter(EventNameEnum.GET_RESULT_PAGES, operation=operation)
+        yield res
+
+        if all_pages is False:  # immediately exit
+            return
+
+        next_token = res.get("NextToken")
+        if next_token:
+            pass
+        else:
+            break
+
+
 def _get_result(
     api: T.Callable,
     job_id: str,
     key: str,
     max_results: T.Optional[int] = None,
     all_pages: bool = True,
+    projection: T.Optional["Projection"] = None,
 ):  # pragma: no cover
     """
     The Textract async API will return a JobId, then you can use the JobId to get
@@ -100,33 +146,28 @@ def _get_result(
     (See, https://docs.aws.amazon.com/textract/latest/dg/API_GetDocumentTextDetection.html)
     After that, you cannot get the response from the Textract API. You should
     consider getting the response from S3 directly.
+
+    :param projection: if given, each page is projected right after it arrives,
+        see :class:`~aws_textract.response.projection.Projection`.
     """
     final_res = None
-    next_token = None
-    while True:
-        kwargs = dict(JobId=job_id)
-        if max_results:
-            kwargs["MaxResults"] = max_results
-        if next_token:
-            kwargs["NextToken"] = next_token
-        res = api(**kwargs)
-
+    for res in _iter_result(
+        api=api,
+        job_id=job_id,
+        max_results=max_results,
+        all_pages=all_pages,
+    ):
+        if projection is not None and key in res:
+            res[key] = projection.project_items(key, res[key])
         if final_res is None:
             final_res = res
         else:
             final_res.get(key, []).extend(res.get(key, []))
 
-        if all_pages is False:  # immediately exit
-            return final_res
-
-        next_token = res.get("NextToken")
-        if next_token:
-            pass
-        else:
-            break
-
-    if "NextToken" in res:
-        del final_res["NextToken"]
+    if all_pages:
+        # the first page carries the NextToken of the second page,
+        # the merged result should not have it
+        final_res.pop("NextToken", None)
 
     return final_res
 
@@ -136,6 +177,7 @@ def get_document_analysis(
     job_id: str,
     max_results: T.Optional[int] = 1000,
     all_pages: bool = True,
+    projection: T.Optional["Projection"] = None,
 ) -> "GetDocumentAnalysisResponseTypeDef":  # pragma: no cover
     """
     Get all the blocks from the document analysis job. Automatically iterate through
@@ -145,6 +187,8 @@ def get_document_analysis(
     :param job_id: job id.
     :param max_results: maximum number of results in the paginator to return.
     :param all_pages: whether to get all pages. if False, only get the first page.
+    :param projection: the fields and block types to keep, unwanted ones are
+        dropped as each page arrives, see :class:`~aws_textract.response.projection.Projection`.
     """
     return _get_result(
         api=textract_client.get_document_analysis,
@@ -152,6 +196,7 @@ def get_document_analysis(
         key="Blocks",
         max_results=max_results,
         all_pages=all_pages,
+        projection=projection,
     )
 
 
@@ -160,6 +205,7 @@ def get_document_text_detection(
     job_id: str,
     max_results: T.Optional[int] = 1000,
     all_pages: bool = True,
+    projection: T.Optional["Projection"] = None,
 ) -> "GetDocumentTextDetectionResponseTypeDef":  # pragma: no cover
     """
     Get all the blocks from the document text detection job.
@@ -169,6 +215,8 @@ def get_document_text_detection(
     :param job_id: job id.
     :param max_results: maximum number of results in the paginator to return.
     :param all_pages: whether to get all pages. if False, only get the first page.
+    :param projection: the fields and block types to keep, unwanted ones are
+        dropped as each page arrives, see :class:`~aws_textract.response.projection.Projection`.
     """
     return _get_result(
         api=textract_client.get_document_text_detection,
@@ -176,6 +224,7 @@ def get_document_text_detection(
         key="Blocks",
         max_results=max_results,
         all_pages=all_pages,
+        projection=projection,
     )
 
 
@@ -184,6 +233,7 @@ def get_expense_analysis(
     job_id: str,
     max_results: T.Optional[int] = 20,
     all_pages: bool = True,
+    projection: T.Optional["Projection"] = None,
 ) -> "GetExpenseAnalysisResponseTypeDef":  # pragma: no cover
     """
     Get all the blocks from the expense analysis job.
@@ -193,6 +243,8 @@ def get_expense_analysis(
     :param job_id: job id.
     :param max_results: maximum number of results in the paginator to return.
     :param all_pages: whether to get all pages. if False, only get the first page.
+    :param projection: the fields and block types to keep, unwanted ones are
+        dropped as each page arrives, see :class:`~aws_textract.response.projection.Projection`.
     """
     return _get_result(
         api=textract_client.get_expense_analysis,
@@ -200,6 +252,7 @@ def get_expense_analysis(
         key="ExpenseDocuments",
         max_results=max_results,
         all_pages=all_pages,
+        projection=projection,
     )
 
 
@@ -227,6 +280,111 @@ def get_lending_analysis(
     )
 
 
+def iter_lending_analysis(
+    textract_client: "TextractClient",
+    job_id: str,
+    max_results: T.Optional[int] = 30,
+    index: T.Optional["LendingPageIndex"] = None,
+) -> T.Iterator["LendingResultTypeDef"]:
+    """
+    Streaming version of :func:`get_lending_analysis`. Yield the classification
+    and extraction result of each page (the items of ``response["Results"]``)
+    as soon as the paginator page that contains it arrives, instead of waiting
+    for all pages to be merged. Downstream stages can start working on the
+    early classified pages before the retrieval finishes.
+
+    Usage example::
+
+        index = LendingPageIndex()
+        for result in iter_lending_analysis(textract_client, job_id, index=index):
+            if index.get_page_type(result["Page"]) == "W2":
+                process_w2_page(result)
+        index.pages("BANK_STATEMENT")  # [3, 4, 5]
+
+    :param textract_client: boto3.client("textract") object.
+    :param job_id: job id.
+    :param max_results: maximum number of results in the paginator to return.
+    :param index: if given, each result is added to the
+        :class:`~aws_textract.response.lending.LendingPageIndex` before it is yielded.
+    """
+    for res in _iter_result(
+        api=textract_client.get_lending_analysis,
+        job_id=job_id,
+        max_results=max_results,
+    ):
+        for result in res.get("Results", []):
+            if index is not None:
+                index.add(result)
+            yield result
+
+
+def _iter_result_pages(
+    api: T.Callable,
+    job_id: str,
+    max_results: T.Optional[int] = None,
+    projection: T.Optional["Projection"] = None,
+) -> T.Iterator["PageOutput"]:
+    from ..response.pages import iter_pages
+
+    def iter_blocks():
+        for res in _iter_result(api=api, job_id=job_id, max_results=max_results):
+            blocks = res.get("Blocks", [])
+            if projection is not None:
+                blocks = projection.project_items("Blocks", blocks)
+            yield from blocks
+
+    return iter_pages(iter_blocks())
+
+
+def iter_document_analysis_pages(
+    textract_client: "TextractClient",
+    job_id: str,
+    max_results: T.Optional[int] = 1000,
+    projection: T.Optional["Projection"] = None,
+) -> T.Iterator["PageOutput"]:
+    """
+    Streaming version of :func:`get_document_analysis`. Yield the text and
+    blocks of each document page as soon as it is complete, that is when
+    the paginator page that has the first block of the next document page
+    arrives, see :func:`~aws_textract.response.pages.iter_pages`.
+
+    Usage example::
+
+        for page in iter_document_analysis_pages(textract_client, job_id):
+            ui.show_preview(page.page, page.text)
+
+    :param textract_client: boto3.client("textract") object.
+    :param job_id: job id.
+    :param max_results: maximum number of results in the paginator to return.
+    :param projection: the fields and block types to keep, unwanted ones are
+        dropped as each page arrives, see :class:`~aws_textract.response.projection.Projection`.
+    """
+    return _iter_result_pages(
+        api=textract_client.get_document_analysis,
+        job_id=job_id,
+        max_results=max_results,
+        projection=projection,
+    )
+
+
+def iter_document_text_detection_pages(
+    textract_client: "TextractClient",
+    job_id: str,
+    max_results: T.Optional[int] = 1000,
+    projection: T.Optional["Projection"] = None,
+) -> T.Iterator["PageOutput"]:
+    """
+    Streaming version of :func:`get_document_text_detection`, see
+    :func:`iter_document_analysis_pages`.
+    """
+    return _iter_result_pages(
+        api=textract_client.get_document_text_detection,
+        job_id=job_id,
+        max_results=max_results,
+        projection=projection,
+    )
+
+
 class JobStatusEnum(str, enum.Enum):
     IN_PROGRESS = "IN_PROGRESS"
     SUCCEEDED = "SUCCEEDED"
@@ -240,19 +398,41 @@ def _wait_job_to_succeed(
     delays: int = 5,
     timeout: int = 60,
     verbose: bool = True,
-):  # pragma: no cover
+):
     """
     Wait for the async job to succeed.
     """
-    for _ in Waiter(delays=delays, timeout=timeout, verbose=verbose):
-        res = api(JobId=job_id)
-        job_status = res["JobStatus"]
-        if job_status in [JobStatusEnum.SUCCEEDED]:
-            return res
-        elif job_status in [JobStatusEnum.FAILED]:
-            raise Exception(f"Job failed: {res}")
-        else:
-            pass
+    operation = getattr(api, "__name__", "unknown")
+    start = time.perf_counter()
+    job_status = JobStatusEnum.IN_PROGRESS.value
+    try:
+        for _ in Waiter(delays=delays, timeout=timeout, verbose=verbose):
+            res = instr.call_with_instrumentation(
+                api,
+                latency_event=EventNameEnum.API_CALL_LATENCY,
+                throttle_event=EventNameEnum.API_THROTTLE,
+                operation=operation,
+                JobId=job_id,
+            )
+            instr.emit_counter(EventNameEnum.WAIT_POLL, operation=operation)
+            job_status = res["JobStatus"]
+            if job_status in [JobStatusEnum.SUCCEEDED]:
+                return res
+            elif job_status in [JobStatusEnum.FAILED]:
+                raise Exception(f"Job failed: {res}")
+            else:
+                pass
+    except TimeoutError:
+        job_status = "TIMEOUT"
+        raise
+    finally:
+        # also on timeout and error, the slow jobs are the interesting ones
+        instr.emit_timing(
+            EventNameEnum.WAIT_TIME,
+            time.perf_counter() - start,
+            operation=operation,
+            status=job_status,
+        )
 
 
 def wait_document_analysis_job_to_succeed(
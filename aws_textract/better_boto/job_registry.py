@@ -0,0 +1,580 @@
+# -*- coding: utf-8 -*-
+
+"""
+A persistent registry of Textract async jobs, shared by many processes.
+
+When several workers call ``wait_xyz_job_to_succeed()`` on the same job id,
+each of them polls the ``get_xyz()`` API and all of them count against the
+same transactions per second quota. The job registry keeps the submitted
+jobs, their parameters, the output directory and the last known
+:class:`~aws_textract.better_boto.async_api.JobStatusEnum`:
+
+- any process reads the cached status with :meth:`BaseJobRegistry.get`.
+- :meth:`BaseJobRegistry.wait_job_to_succeed` only calls the ``get_xyz()``
+  API if it holds the poller lease of the job, the other waiters read the
+  status written by the poller. When the poller dies, its lease expires and
+  another waiter takes over.
+- :meth:`BaseJobRegistry.update_from_event` writes the status of an SNS
+  :class:`~aws_textract.better_boto.async_api.TextractEvent`, so no one needs
+  to poll at all if the notification arrives first.
+
+:class:`SqliteJobRegistry` stores the jobs in a local SQLite file. Implement
+the abstract methods of :class:`BaseJobRegistry` for other backends, for
+example a DynamoDB table with conditional writes for the lease.
+
+Usage example::
+
+    registry = SqliteJobRegistry("/tmp/textract-jobs.sqlite")
+    record = registry.start_job(
+        textract_client,
+        api=JobApiEnum.document_analysis,
+        DocumentLocation=document_location,
+        OutputConfig=output_config,
+        FeatureTypes=["TABLES", "FORMS"],
+    )
+    # in any process
+    record = registry.wait_job_to_succeed(textract_client, record.job_id)
+    print(record.output_s3uri)
+"""
+
+import typing as T
+import os
+import abc
+import enum
+import json
+import time
+import uuid
+import socket
+import sqlite3
+import threading
+import dataclasses
+
+from ..vendor.waiter import Waiter
+from .. import instrumentation as instr
+from ..instrumentation import EventNameEnum
+from .async_api import JobStatusEnum
+
+if T.TYPE_CHECKING:  # pragma: no cover
+    from mypy_boto3_textract import TextractClient
+    from .async_api import TextractEvent
+
+
+class JobApiEnum(str, enum.Enum):
+    """
+    The Textract async APIs, the value is the suffix of ``start_xyz()``
+    and ``get_xyz()``.
+    """
+
+    document_analysis = "document_analysis"
+    document_text_detection = "document_text_detection"
+    expense_analysis = "expense_analysis"
+    lending_analysis = "lending_analysis"
+
+    @classmethod
+    def from_event_api(cls, api: str) -> "JobApiEnum":
+        """
+        Convert the ``API`` field of the SNS notification, for example
+        ``StartDocumentAnalysis``, to the enum.
+        """
+        return _EVENT_API_MAPPER[api]
+
+
+_EVENT_API_MAPPER = {
+    "StartDocumentAnalysis": JobApiEnum.document_analysis,
+    "StartDocumentTextDetection": JobApiEnum.document_text_detection,
+    "StartExpenseAnalysis": JobApiEnum.expense_analysis,
+    "StartLendingAnalysis": JobApiEnum.lending_analysis,
+}
+
+#: the job status that will not change anymore.
+FINISHED_STATUS = frozenset(
+    {
+        JobStatusEnum.SUCCEEDED.value,
+        JobStatusEnum.FAILED.value,
+        JobStatusEnum.PARTIAL_SUCCESS.value,
+    }
+)
+
+
+#: the SNS notification status that is not a :class:`JobStatusEnum` value.
+_EVENT_STATUS_MAPPER = {
+    "ERROR": JobStatusEnum.FAILED.value,
+}
+
+
+def to_job_status(status: str) -> str:
+    """
+    Convert the ``get_xyz()`` ``JobStatus`` or the SNS notification ``Status``
+    to the :class:`JobStatusEnum` value, the notification reports a failed
+    job as ``ERROR``.
+    """
+    return JobStatusEnum(_EVENT_STATUS_MAPPER.get(status, status)).value
+
+
+def get_default_owner() -> str:
+    """
+    An identifier of the current process and thread, used as the poller name.
+    """
+    return f"{socket.gethostname()}-{os.getpid()}-{threading.get_ident()}"
+
+
+@dataclasses.dataclass
+class JobRecord:
+    """
+    A registered Textract async job.
+
+    :param job_id: the ``JobId``.
+    :param api: the :class:`JobApiEnum` value.
+    :param status: the last known :class:`JobStatusEnum` value.
+    :param params: the ``start_xyz()`` keyword arguments.
+    :param output_s3uri: the output directory ``s3://bucket/prefix/job_id/``,
+        None if the job has no ``OutputConfig``.
+    :param status_message: the ``StatusMessage`` of a failed job.
+    :param poller: the owner of the poller lease, None if no one holds it.
+    :param lease_expires_at: the epoch seconds when the poller lease expires.
+    :param created_at: the epoch seconds when the job is registered.
+    :param updated_at: the epoch seconds of the last status update.
+    """
+
+    job_id: str = dataclasses.field()
+    api: str = dataclasses.field()
+    status: str = dataclasses.field(default=JobStatusEnum.IN_PROGRESS.value)
+    params: dict = dataclasses.field(default_factory=dict)
+    output_s3uri: T.Optional[str] = dataclasses.field(default=None)
+    status_message: T.Optional[str] = dataclasses.field(default=None)
+    poller: T.Optional[str] = dataclasses.field(default=None)
+    lease_expires_at: float = dataclasses.field(default=0.0)
+    created_at: float = dataclasses.field(default=0.0)
+    updated_at: float = dataclasses.field(default=0.0)
+
+    @property
+    def is_finished(self) -> bool:
+        return self.status in FINISHED_STATUS
+
+
+def get_output_s3uri(params: dict, job_id: str) -> T.Optional[str]:
+    """
+    The output directory of the job from the ``OutputConfig`` parameter.
+    """
+    output_config = params.get("OutputConfig")
+    if not output_config:
+        return None
+    prefix = output_config.get("S3Prefix", "").strip("/")
+    if prefix:
+        return f"s3://{output_config['S3Bucket']}/{prefix}/{job_id}/"
+    return f"s3://{output_config['S3Bucket']}/{job_id}/"
+
+
+class BaseJobRegistry(abc.ABC):
+    """
+    The job registry interface. A backend implements the storage methods,
+    the status refresh logic is shared.
+
+    :param clock: the time source of the lease, for testing.
+    """
+
+    def __init__(self, clock: T.Callable[[], float] = time.time):
+        self.clock = clock
+
+    # --- storage, implemented by the backend ---
+    @abc.abstractmethod
+    def put(self, record: JobRecord):  # pragma: no cover
+        """
+        Insert or replace a job record, for deliberate overwrites.
+        """
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def put_if_absent(self, record: JobRecord) -> bool:  # pragma: no cover
+        """
+        Atomically insert the record if the job is not registered yet.
+        Return True if the record is inserted.
+        """
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def set_params(
+        self,
+        job_id: str,
+        params: dict,
+        output_s3uri: T.Optional[str] = None,
+    ) -> bool:  # pragma: no cover
+        """
+        Set the ``start_xyz()`` parameters of a registered job, the status is
+        kept, the ``output_s3uri`` is only set if it is unknown. Return True
+        if the record is updated.
+        """
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def get(self, job_id: str) -> T.Optional[JobRecord]:  # pragma: no cover
+        """
+        Get the job record, None if the job is not registered.
+        """
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def list_jobs(
+        self,
+        status: T.Optional[str] = None,
+    ) -> T.List[JobRecord]:  # pragma: no cover
+        """
+        List the registered jobs, optionally filtered by status.
+        """
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def update_status(
+        self,
+        job_id: str,
+        status: str,
+        status_message: T.Optional[str] = None,
+    ) -> bool:  # pragma: no cover
+        """
+        Update the status of a registered job, see :func:`to_job_status`.
+        A finished status is never overwritten. Return True if the record
+        is updated.
+        """
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def try_acquire_poller(
+        self,
+        job_id: str,
+        owner: str,
+        lease_seconds: float,
+    ) -> bool:  # pragma: no cover
+        """
+        Atomically become the poller of the job, if no one holds the lease,
+        the lease expired, or the owner already holds it (the lease is then
+        extended). Return True if the owner is the poller.
+        """
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def release_poller(self, job_id: str, owner: str):  # pragma: no cover
+        """
+        Release the lease if the owner holds it.
+        """
+        raise NotImplementedError
+
+    # --- shared logic ---
+    def register_job(
+        self,
+        job_id: str,
+        api: T.Union[JobApiEnum, str],
+        params: T.Optional[dict] = None,
+        output_s3uri: T.Optional[str] = None,
+    ) -> JobRecord:
+        """
+        Register a submitted job, the ``output_s3uri`` is derived from
+        the ``OutputConfig`` in ``params`` if not given.
+
+        If another process already registered the job, for example from the
+        SNS notification, its status is kept and only the ``params`` are set.
+        """
+        params = dict() if params is None else params
+        if output_s3uri is None:
+            output_s3uri = get_output_s3uri(params, job_id)
+        record = self._new_record(job_id, api, params, output_s3uri)
+        if self.put_if_absent(record):
+            return record
+        if params:
+            self.set_params(job_id, params, output_s3uri)
+        return self.get(job_id)
+
+    def _new_record(
+        self,
+        job_id: str,
+        api: T.Union[JobApiEnum, str],
+        params: dict,
+        output_s3uri: T.Optional[str] = None,
+    ) -> JobRecord:
+        now = self.clock()
+        return JobRecord(
+            job_id=job_id,
+            api=JobApiEnum(api).value,
+            params=params,
+            output_s3uri=output_s3uri,
+            created_at=now,
+            updated_at=now,
+        )
+
+    def start_job(
+        self,
+        textract_client: "TextractClient",
+        api: T.Union[JobApiEnum, str],
+        **kwargs,
+    ) -> JobRecord:
+        """
+        Call the ``start_xyz()`` API and register the job.
+
+        :param kwargs: the ``start_xyz()`` keyword arguments.
+        """
+        api = JobApiEnum(api)
+        operation = f"start_{api.value}"
+        res = instr.call_with_instrumentation(
+            getattr(textract_client, operation),
+            latency_event=EventNameEnum.API_CALL_LATENCY,
+            throttle_event=EventNameEnum.API_THROTTLE,
+            operation=operation,
+            **kwargs,
+        )
+        return self.register_job(res["JobId"], api=api, params=kwargs)
+
+    def update_from_event(self, event: "TextractEvent") -> bool:
+        """
+        Write the job status of a Textract SNS notification. A job not
+        registered yet is registered from the event.
+
+        :return: True if the record is created or updated.
+        """
+        # never overwrite the params written by start_job()
+        self.put_if_absent(
+            self._new_record(
+                event.JobId,
+                api=JobApiEnum.from_event_api(event.API),
+                params={"JobTag": event.JobTag} if event.JobTag else {},
+            )
+        )
+        return self.update_status(event.JobId, event.Status)
+
+    def refresh(
+        self,
+        textract_client: "TextractClient",
+        job_id: str,
+    ) -> JobRecord:
+        """
+        Poll the ``get_xyz()`` API once and write the status, regardless of
+        the poller lease.
+        """
+        record = self.get(job_id)
+        if record is None:
+            raise KeyError(f"job {job_id!r} is not registered")
+        operation = f"get_{record.api}"
+        res = instr.call_with_instrumentation(
+            getattr(textract_client, operation),
+            latency_event=EventNameEnum.API_CALL_LATENCY,
+            throttle_event=EventNameEnum.API_THROTTLE,
+            operation=operation,
+            JobId=job_id,
+            MaxResults=1,
+        )
+        instr.emit_counter(EventNameEnum.WAIT_POLL, operation=operation)
+        self.update_status(job_id, res["JobStatus"], res.get("StatusMessage"))
+        return self.get(job_id)
+
+    def wait_job_to_succeed(
+        self,
+        textract_client: "TextractClient",
+        job_id: str,
+        api: T.Optional[T.Union[JobApiEnum, str]] = None,
+        delays: int = 5,
+        timeout: int = 60,
+        lease_seconds: T.Optional[float] = None,
+        owner: T.Optional[str] = None,
+        verbose: bool = True,
+    ) -> JobRecord:
+        """
+        Wait for the job to finish. Only the waiter that holds the poller
+        lease calls the ``get_xyz()`` API, the others read the cached status.
+
+        :param job_id: the job id, it is registered if ``api`` is given and
+            the job is unknown.
+        :param delays: seconds between two checks.
+        :param timeout: seconds to wait.
+        :param lease_seconds: the poller lease duration, default is 3 times
+            ``delays``, another waiter takes over if the poller stops
+            renewing it.
+        :param owner: the poller name, default is the host, process and
+            thread id.
+
+        :return: the finished job record, ``SUCCEEDED`` or ``PARTIAL_SUCCESS``.
+            Raise an exception if the job failed.
+        """
+        record = self.get(job_id)
+        if record is None:
+            if api is None:
+                raise KeyError(f"job {job_id!r} is not registered")
+            record = self.register_job(job_id, api=api)
+        if lease_seconds is None:
+            lease_seconds = max(delays * 3, 1)
+        if owner is None:
+            owner = get_default_owner()
+        start = time.perf_counter()
+        status = JobStatusEnum.IN_PROGRESS.value
+        try:
+            for _ in Waiter(delays=delays, timeout=timeout, verbose=verbose):
+                record = self.get(job_id)
+                if not record.is_finished and self.try_acquire_poller(
+                    job_id, owner, lease_seconds
+                ):
+                    record = self.refresh(textract_client, job_id)
+                status = record.status
+                if record.is_finished:
+                    if record.status == JobStatusEnum.FAILED.value:
+                        raise Exception(f"Job failed: {record}")
+                    return record
+        except TimeoutError:
+            status = "TIMEOUT"
+            raise
+        finally:
+            instr.emit_timing(
+                EventNameEnum.WAIT_TIME,
+                time.perf_counter() - start,
+                operation=f"get_{record.api}",
+                status=status,
+            )
+            self.release_poller(job_id, owner)
+
+
+_COLUMNS = [field.name for field in dataclasses.fields(JobRecord)]
+
+
+class SqliteJobRegistry(BaseJobRegistry):
+    """
+    A :class:`BaseJobRegistry` backed by a SQLite file. The processes on one
+    machine share the file, the threads in one process share the connection.
+
+    :param path: the SQLite database file, ``:memory:`` for a private registry.
+    :param table: the table name.
+    :param timeout: seconds to wait for the database lock of another process.
+    """
+
+    def __init__(
+        self,
+        path: str = ":memory:",
+        table: str = "textract_jobs",
+        timeout: float = 30.0,
+        clock: T.Callable[[], float] = time.time,
+    ):
+        super().__init__(clock=clock)
+        self.path = str(path)
+        self.table = table
+        self._lock = threading.Lock()
+        # autocommit mode, each statement is its own transaction
+        self._conn = sqlite3.connect(
+            self.path,
+            timeout=timeout,
+            isolation_level=None,
+            check_same_thread=False,
+        )
+        if self.path != ":memory:":
+            self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            f"CREATE TABLE IF NOT EXISTS {table} ("
+            "job_id TEXT PRIMARY KEY, "
+            "api TEXT NOT NULL, "
+            "status TEXT NOT NULL, "
+            "params TEXT NOT NULL, "
+            "output_s3uri TEXT, "
+            "status_message TEXT, "
+            "poller TEXT, "
+            "lease_expires_at REAL NOT NULL DEFAULT 0, "
+            "created_at REAL NOT NULL, "
+            "updated_at REAL NOT NULL)"
+        )
+        self._conn.execute(
+            f"CREATE INDEX IF NOT EXISTS {table}_status ON {table} (status)"
+        )
+
+    def close(self):
+        self._conn.close()
+
+    def _execute(self, sql: str, args: tuple = ()) -> sqlite3.Cursor:
+        with self._lock:
+            return self._conn.execute(sql, args)
+
+    @staticmethod
+    def _to_record(row: tuple) -> JobRecord:
+        kwargs = dict(zip(_COLUMNS, row))
+        kwargs["params"] = json.loads(kwargs["params"])
+        return JobRecord(**kwargs)
+
+    @staticmethod
+    def _to_row(record: JobRecord) -> tuple:
+        row = dataclasses.astuple(record)
+        return row[:3] + (json.dumps(record.params),) + row[4:]
+
+    def put(self, record: JobRecord):
+        self._execute(
+            f"INSERT OR REPLACE INTO {self.table} ({', '.join(_COLUMNS)}) "
+            f"VALUES ({', '.join('?' * len(_COLUMNS))})",
+            self._to_row(record),
+        )
+
+    def put_if_absent(self, record: JobRecord) -> bool:
+        cursor = self._execute(
+            f"INSERT OR IGNORE INTO {self.table} ({', '.join(_COLUMNS)}) "
+            f"VALUES ({', '.join('?' * len(_COLUMNS))})",
+            self._to_row(record),
+        )
+        return cursor.rowcount == 1
+
+    def set_params(
+        self,
+        job_id: str,
+        params: dict,
+        output_s3uri: T.Optional[str] = None,
+    ) -> bool:
+        cursor = self._execute(
+            f"UPDATE {self.table} "
+            "SET params = ?, output_s3uri = COALESCE(output_s3uri, ?) "
+            "WHERE job_id = ?",
+            (json.dumps(params), output_s3uri, job_id),
+        )
+        return cursor.rowcount == 1
+
+    def get(self, job_id: str) -> T.Optional[JobRecord]:
+        row = self._execute(
+            f"SELECT {', '.join(_COLUMNS)} FROM {self.table} WHERE job_id = ?",
+            (job_id,),
+        ).fetchone()
+        return None if row is None else self._to_record(row)
+
+    def list_jobs(self, status: T.Optional[str] = None) -> T.List[JobRecord]:
+        sql = f"SELECT {', '.join(_COLUMNS)} FROM {self.table}"
+        args = ()
+        if status is not None:
+            sql += " WHERE status = ?"
+            args = (to_job_status(status),)
+        rows = self._execute(sql + " ORDER BY created_at", args).fetchall()
+        return [self._to_record(row) for row in rows]
+
+    def update_status(
+        self,
+        job_id: str,
+        status: str,
+        status_message: T.Optional[str] = None,
+    ) -> bool:
+        finished = tuple(FINISHED_STATUS)
+        cursor = self._execute(
+            f"UPDATE {self.table} "
+            "SET status = ?, status_message = ?, updated_at = ? "
+            f"WHERE job_id = ? AND status NOT IN ({', '.join('?' * len(finished))})",
+            (to_job_status(status), status_message, self.clock(), job_id)
+            + finished,
+        )
+        return cursor.rowcount == 1
+
+    def try_acquire_poller(
+        self,
+        job_id: str,
+        owner: str,
+        lease_seconds: float,
+    ) -> bool:
+        now = self.clock()
+        cursor = self._execute(
+            f"UPDATE {self.table} SET poller = ?, lease_expires_at = ? "
+            "WHERE job_id = ? "
+            "AND (poller IS NULL OR poller = ? OR lease_expires_at <= ?)",
+            (owner, now + lease_seconds, job_id, owner, now),
+        )
+        return cursor.rowcount == 1
+
+    def release_poller(self, job_id: str, owner: str):
+        self._execute(
+            f"UPDATE {self.table} SET poller = NULL, lease_expires_at = 0 "
+            "WHERE job_id = ? AND poller = ?",
+            (job_id, owner),
+        )
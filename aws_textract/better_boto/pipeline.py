@@ -0,0 +1,821 @@
+# -*- coding: utf-8 -*-
+
+"""
+A queue backed pipeline to spread the Textract work across many nodes.
+
+Each :class:`Stage` consumes messages from its input queue, calls its handler
+and sends the handler output to the output queue, which is the input queue of
+the next stage, for example ``submit -> wait -> merge -> post-process``. The
+queue is a :class:`BaseQueue`, with SQS semantics:
+
+- a received message is invisible to the other consumers for the
+  visibility timeout. While the handler runs, a heartbeat thread extends the
+  timeout, so a slow handler doesn't let another consumer receive the message.
+  The message is deleted after the handler succeeds, otherwise it becomes
+  visible again after the retry delay and another consumer (maybe on another
+  node) retries it.
+- after ``max_receive_count`` failed attempts, the message is moved to the
+  dead letter queue of the stage, or dropped if it has none.
+
+The handlers are idempotent per key, the ``JobId`` by default. The
+:class:`BaseLedger` records the output of each ``(stage, key)`` once the
+handler succeeds, a duplicated or redelivered message with the same key
+re-sends the recorded output instead of calling the handler again. The key is
+only recorded once the handler completes, two messages with the same key
+received at the same time both run the handler, so the handler itself must
+tolerate that, for example Textract's ``ClientRequestToken``.
+
+Backends:
+
+- :class:`InMemoryQueue` and :class:`InMemoryLedger`: threads of one process,
+  for tests.
+- :class:`SqliteQueue` and :class:`SqliteLedger`: processes of one machine
+  sharing a SQLite file.
+- :class:`SqsQueue`: Amazon SQS, the nodes of a fleet. Implement
+  :class:`BaseLedger` on a shared store, for example a DynamoDB table.
+
+Scale out by running :meth:`Pipeline.run` with the same queues and ledger on
+more nodes, and scale one stage up with its ``concurrency``.
+
+Usage example::
+
+    submit_queue = SqsQueue(sqs_client, submit_queue_url)
+    # the Textract SNS topic is subscribed to this queue
+    done_queue = SqsQueue(sqs_client, done_queue_url)
+    merged_queue = SqsQueue(sqs_client, merged_queue_url)
+
+    def submit(body: dict):
+        res = textract_client.start_document_text_detection(...)
+        return None  # the SNS notification is the next message
+
+    def merge(body: dict):
+        event = parse_textract_event(body)
+        ...
+        return {"JobId": event.JobId, "merged": path}
+
+    pipeline = Pipeline(
+        stages=[
+            Stage("submit", submit, submit_queue, key=lambda body: body["key"]),
+            Stage("merge", merge, done_queue, merged_queue, concurrency=8),
+        ],
+        ledger=my_dynamodb_ledger,
+    )
+    pipeline.run()  # on every node
+"""
+
+import typing as T
+import abc
+import json
+import time
+import uuid
+import sqlite3
+import contextlib
+import threading
+import collections
+import dataclasses
+
+from .async_api import TextractEvent
+
+if T.TYPE_CHECKING:  # pragma: no cover
+    from mypy_boto3_sqs import SQSClient
+
+
+@dataclasses.dataclass
+class QueueMessage:
+    """
+    A received message.
+
+    :param message_id: the message id.
+    :param body: the JSON message body.
+    :param receipt_handle: identifies this receive, it is required to delete
+        the message or change its visibility.
+    :param receive_count: how many times the message has been received,
+        including this one.
+    """
+
+    message_id: str = dataclasses.field()
+    body: dict = dataclasses.field()
+    receipt_handle: str = dataclasses.field()
+    receive_count: int = dataclasses.field(default=1)
+
+
+class BaseQueue(abc.ABC):
+    """
+    The queue interface, a subset of the SQS API.
+    """
+
+    @abc.abstractmethod
+    def send(self, body: dict, delay_seconds: float = 0) -> str:  # pragma: no cover
+        """
+        Send a JSON message, return the message id.
+        """
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def receive(
+        self,
+        max_messages: int = 1,
+        visibility_timeout: float = 30,
+    ) -> T.List[QueueMessage]:  # pragma: no cover
+        """
+        Receive up to ``max_messages`` visible messages and hide them for
+        ``visibility_timeout`` seconds.
+        """
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def delete(self, message: QueueMessage) -> bool:  # pragma: no cover
+        """
+        Delete a received message. Return False if the receipt is stale,
+        the message has been received again by another consumer.
+        """
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def change_visibility(
+        self,
+        message: QueueMessage,
+        visibility_timeout: float,
+    ) -> bool:  # pragma: no cover
+        """
+        Hide a received message for another ``visibility_timeout`` seconds
+        from now, 0 makes it visible right away.
+        """
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def count(self) -> int:  # pragma: no cover
+        """
+        The number of messages in the queue, visible or not.
+        """
+        raise NotImplementedError
+
+
+class InMemoryQueue(BaseQueue):
+    """
+    A thread safe :class:`BaseQueue` in the current process.
+
+    :param clock: the time source of the visibility timeout, for testing.
+    """
+
+    def __init__(self, clock: T.Callable[[], float] = time.time):
+        self.clock = clock
+        self._lock = threading.Lock()
+        # message id -> [body, visible_at, receipt_handle, receive_count]
+        self._messages: T.Dict[str, list] = collections.OrderedDict()
+
+    def send(self, body: dict, delay_seconds: float = 0) -> str:
+        message_id = uuid.uuid4().hex
+        # round trip, the same as a real queue
+        body = json.loads(json.dumps(body))
+        with self._lock:
+            self._messages[message_id] = [body, self.clock() + delay_seconds, None, 0]
+        return message_id
+
+    def receive(
+        self,
+        max_messages: int = 1,
+        visibility_timeout: float = 30,
+    ) -> T.List[QueueMessage]:
+        messages = list()
+        with self._lock:
+            now = self.clock()
+            for message_id, item in self._messages.items():
+                if len(messages) >= max_messages:
+                    break
+                if item[1] > now:
+                    continue
+                item[1] = now + visibility_timeout
+                item[2] = uuid.uuid4().hex
+                item[3] += 1
+                messages.append(
+                    QueueMessage(
+                        message_id=message_id,
+                        body=item[0],
+                        receipt_handle=item[2],
+                        receive_count=item[3],
+                    )
+                )
+        return messages
+
+    def delete(self, message: QueueMessage) -> bool:
+        with self._lock:
+            item = self._messages.get(message.message_id)
+            if item is None or item[2] != message.receipt_handle:
+                return False
+            del self._messages[message.message_id]
+            return True
+
+    def change_visibility(
+        self,
+        message: QueueMessage,
+        visibility_timeout: float,
+    ) -> bool:
+        with self._lock:
+            item = self._messages.get(message.message_id)
+            if item is None or item[2] != message.receipt_handle:
+                return False
+            item[1] = self.clock() + visibility_timeout
+            return True
+
+    def count(self) -> int:
+        with self._lock:
+            return len(self._messages)
+
+
+class _SqliteTable:
+    """
+    A SQLite connection shared by the threads of one process, in autocommit
+    mode, see :class:`~aws_textract.better_boto.job_registry.SqliteJobRegistry`.
+    """
+
+    def __init__(self, path: str, timeout: float):
+        self.path = str(path)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(
+            self.path,
+            timeout=timeout,
+            isolation_level=None,
+            check_same_thread=False,
+        )
+        if self.path != ":memory:":
+            self._conn.execute("PRAGMA journal_mode=WAL")
+
+    def close(self):
+        self._conn.close()
+
+    def _execute(self, sql: str, args: tuple = ()) -> sqlite3.Cursor:
+        with self._lock:
+            return self._conn.execute(sql, args)
+
+
+class SqliteQueue(_SqliteTable, BaseQueue):
+    """
+    A :class:`BaseQueue` backed by a SQLite file, the processes on one machine
+    share it. Many queues can live in one table, identified by ``name``.
+
+    :param path: the SQLite database file, ``:memory:`` for a private queue.
+    :param name: the queue name.
+    :param table: the table name.
+    :param timeout: seconds to wait for the database lock of another process.
+    :param clock: the time source of the visibility timeout, for testing.
+    """
+
+    def __init__(
+        self,
+        path: str = ":memory:",
+        name: str = "default",
+        table: str = "pipeline_messages",
+        timeout: float = 30.0,
+        clock: T.Callable[[], float] = time.time,
+    ):
+        super().__init__(path=path, timeout=timeout)
+        self.name = name
+        self.table = table
+        self.clock = clock
+        self._execute(
+            f"CREATE TABLE IF NOT EXISTS {table} ("
+            "seq INTEGER PRIMARY KEY AUTOINCREMENT, "
+            "message_id TEXT NOT NULL UNIQUE, "
+            "queue TEXT NOT NULL, "
+            "body TEXT NOT NULL, "
+            "visible_at REAL NOT NULL, "
+            "receipt_handle TEXT, "
+            "receive_count INTEGER NOT NULL DEFAULT 0)"
+        )
+        self._execute(
+            f"CREATE INDEX IF NOT EXISTS {table}_visible "
+            f"ON {table} (queue, visible_at)"
+        )
+
+    def send(self, body: dict, delay_seconds: float = 0) -> str:
+        message_id = uuid.uuid4().hex
+        self._execute(
+            f"INSERT INTO {self.table} (message_id, queue, body, visible_at) "
+            "VALUES (?, ?, ?, ?)",
+            (message_id, self.name, json.dumps(body), self.clock() + delay_seconds),
+        )
+        return message_id
+
+    def receive(
+        self,
+        max_messages: int = 1,
+        visibility_timeout: float = 30,
+    ) -> T.List[QueueMessage]:
+        now = self.clock()
+        receipt_handle = uuid.uuid4().hex
+        # one statement is atomic across processes, no two consumers
+        # can claim the same message
+        self._execute(
+            f"UPDATE {self.table} "
+            "SET visible_at = ?, receipt_handle = ?, "
+            "receive_count = receive_count + 1 "
+            f"WHERE seq IN (SELECT seq FROM {self.table} "
+            "WHERE queue = ? AND visible_at <= ? ORDER BY seq LIMIT ?)",
+            (now + visibility_timeout, receipt_handle, self.name, now, max_messages),
+        )
+        rows = self._execute(
+            f"SELECT message_id, body, receive_count FROM {self.table} "
+            "WHERE receipt_handle = ? ORDER BY seq",
+            (receipt_handle,),
+        ).fetchall()
+        return [
+            QueueMessage(
+                message_id=message_id,
+                body=json.loads(body),
+                receipt_handle=receipt_handle,
+                receive_count=receive_count,
+            )
+            for message_id, body, receive_count in rows
+        ]
+
+    def delete(self, message: QueueMessage) -> bool:
+        cursor = self._execute(
+            f"DELETE FROM {self.table} WHERE message_id = ? AND receipt_handle = ?",
+            (message.message_id, message.receipt_handle),
+        )
+        return cursor.rowcount == 1
+
+    def change_visibility(
+        self,
+        message: QueueMessage,
+        visibility_timeout: float,
+    ) -> bool:
+        cursor = self._execute(
+            f"UPDATE {self.table} SET visible_at = ? "
+            "WHERE message_id = ? AND receipt_handle = ?",
+            (
+                self.clock() + visibility_timeout,
+                message.message_id,
+                message.receipt_handle,
+            ),
+        )
+        return cursor.rowcount == 1
+
+    def count(self) -> int:
+        return self._execute(
+            f"SELECT COUNT(*) FROM {self.table} WHERE queue = ?",
+            (self.name,),
+        ).fetchone()[0]
+
+
+#: the SQS error codes of a receipt handle that is no longer valid, the
+#: message has been received again or is not in flight anymore.
+_STALE_RECEIPT_ERROR_CODES = {
+    "ReceiptHandleIsInvalid",
+    "AWS.SimpleQueueService.ReceiptHandleIsInvalid",
+    "MessageNotInflight",
+    "AWS.SimpleQueueService.MessageNotInflight",
+}
+
+
+def _is_stale_receipt(e: Exception) -> bool:
+    try:
+        return e.response["Error"]["Code"] in _STALE_RECEIPT_ERROR_CODES
+    except (AttributeError, KeyError, TypeError):
+        return False
+
+
+class SqsQueue(BaseQueue):
+    """
+    A :class:`BaseQueue` on an Amazon SQS standard queue.
+
+    :param sqs_client: the boto3 SQS client.
+    :param queue_url: the queue URL.
+    :param wait_time_seconds: the long polling time of ``receive_message``,
+        0 ~ 20 seconds.
+    """
+
+    def __init__(
+        self,
+        sqs_client: "SQSClient",
+        queue_url: str,
+        wait_time_seconds: int = 0,
+    ):
+        self.sqs_client = sqs_client
+        self.queue_url = queue_url
+        self.wait_time_seconds = wait_time_seconds
+
+    def send(self, body: dict, delay_seconds: float = 0) -> str:
+        res = self.sqs_client.send_message(
+            QueueUrl=self.queue_url,
+            MessageBody=json.dumps(body),
+            DelaySeconds=int(delay_seconds),
+        )
+        return res["MessageId"]
+
+    def receive(
+        self,
+        max_messages: int = 1,
+        visibility_timeout: float = 30,
+    ) -> T.List[QueueMessage]:
+        res = self.sqs_client.receive_message(
+            QueueUrl=self.queue_url,
+            MaxNumberOfMessages=min(max_messages, 10),
+            VisibilityTimeout=int(visibility_timeout),
+            WaitTimeSeconds=self.wait_time_seconds,
+            AttributeNames=["ApproximateReceiveCount"],
+        )
+        return [
+            QueueMessage(
+                message_id=message["MessageId"],
+                body=json.loads(message["Body"]),
+                receipt_handle=message["ReceiptHandle"],
+                receive_count=int(
+                    message.get("Attributes", {}).get("ApproximateReceiveCount", 1)
+                ),
+            )
+            for message in res.get("Messages", [])
+        ]
+
+    def delete(self, message: QueueMessage) -> bool:
+        try:
+            self.sqs_client.delete_message(
+                QueueUrl=self.queue_url,
+                ReceiptHandle=message.receipt_handle,
+            )
+        except Exception as e:
+            if _is_stale_receipt(e):
+                return False
+            raise
+        return True
+
+    def change_visibility(
+        self,
+        message: QueueMessage,
+        visibility_timeout: float,
+    ) -> bool:
+        try:
+            self.sqs_client.change_message_visibility(
+                QueueUrl=self.queue_url,
+                ReceiptHandle=message.receipt_handle,
+                VisibilityTimeout=int(visibility_timeout),
+            )
+        except Exception as e:
+            if _is_stale_receipt(e):
+                return False
+            raise
+        return True
+
+    def count(self) -> int:
+        res = self.sqs_client.get_queue_attributes(
+            QueueUrl=self.queue_url,
+            AttributeNames=[
+                "ApproximateNumberOfMessages",
+                "ApproximateNumberOfMessagesNotVisible",
+            ],
+        )
+        return sum(int(value) for value in res["Attributes"].values())
+
+
+class BaseLedger(abc.ABC):
+    """
+    Records the output of each successful ``(stage, key)``, it makes the
+    stage handlers idempotent.
+    """
+
+    @abc.abstractmethod
+    def get(
+        self,
+        stage: str,
+        key: str,
+    ) -> T.Optional[T.List[dict]]:  # pragma: no cover
+        """
+        The recorded output messages, None if the key is not done yet.
+        """
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def put(self, stage: str, key: str, outputs: T.List[dict]):  # pragma: no cover
+        """
+        Record the output messages of a done key.
+        """
+        raise NotImplementedError
+
+
+class InMemoryLedger(BaseLedger):
+    """
+    A :class:`BaseLedger` in the current process.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._records: T.Dict[T.Tuple[str, str], T.List[dict]] = dict()
+
+    def get(self, stage: str, key: str) -> T.Optional[T.List[dict]]:
+        with self._lock:
+            return self._records.get((stage, key))
+
+    def put(self, stage: str, key: str, outputs: T.List[dict]):
+        with self._lock:
+            self._records[(stage, key)] = outputs
+
+
+class SqliteLedger(_SqliteTable, BaseLedger):
+    """
+    A :class:`BaseLedger` backed by a SQLite file, it can share the file of
+    the :class:`SqliteQueue`.
+
+    :param path: the SQLite database file, ``:memory:`` for a private ledger.
+    :param table: the table name.
+    :param timeout: seconds to wait for the database lock of another process.
+    """
+
+    def __init__(
+        self,
+        path: str = ":memory:",
+        table: str = "pipeline_ledger",
+        timeout: float = 30.0,
+    ):
+        super().__init__(path=path, timeout=timeout)
+        self.table = table
+        self._execute(
+            f"CREATE TABLE IF NOT EXISTS {table} ("
+            "stage TEXT NOT NULL, "
+            "key TEXT NOT NULL, "
+            "outputs TEXT NOT NULL, "
+            "PRIMARY KEY (stage, key))"
+        )
+
+    def get(self, stage: str, key: str) -> T.Optional[T.List[dict]]:
+        row = self._execute(
+            f"SELECT outputs FROM {self.table} WHERE stage = ? AND key = ?",
+            (stage, key),
+        ).fetchone()
+        return None if row is None else json.loads(row[0])
+
+    def put(self, stage: str, key: str, outputs: T.List[dict]):
+        self._execute(
+            f"INSERT OR REPLACE INTO {self.table} (stage, key, outputs) "
+            "VALUES (?, ?, ?)",
+            (stage, key, json.dumps(outputs)),
+        )
+
+
+def parse_textract_event(body: dict) -> TextractEvent:
+    """
+    Parse the Textract job notification from a message body, either the raw
+    notification or the SNS envelope of an SNS to SQS subscription.
+    """
+    if body.get("Type") == "Notification" and "Message" in body:
+        body = json.loads(body["Message"])
+    return TextractEvent.from_dict(body)
+
+
+def get_job_id(body: dict) -> str:
+    """
+    The default idempotency key, the ``JobId`` of the message body or of the
+    Textract notification in the SNS envelope.
+    """
+    if "JobId" in body:
+        return body["JobId"]
+    return parse_textract_event(body).JobId
+
+
+#: the stage handler takes the message body, returns None, one output message
+#: or a list of output messages
+T_HANDLER = T.Callable[[dict], T.Union[None, dict, T.List[dict]]]
+
+
+@dataclasses.dataclass
+class StageStats:
+    """
+    The message counters of a stage in the current process.
+
+    :param succeeded: the handler succeeded.
+    :param skipped: the key was already done, the handler was not called.
+    :param failed: the handler raised, the message will be retried.
+    :param dead_lettered: gave up after ``max_receive_count`` attempts.
+    """
+
+    succeeded: int = dataclasses.field(default=0)
+    skipped: int = dataclasses.field(default=0)
+    failed: int = dataclasses.field(default=0)
+    dead_lettered: int = dataclasses.field(default=0)
+
+
+@dataclasses.dataclass
+class Stage:
+    """
+    One step of the pipeline.
+
+    :param name: the stage name, also the ledger namespace.
+    :param handler: see :data:`T_HANDLER`.
+    :param input_queue: the queue to consume.
+    :param output_queue: the queue to send the handler output to, None if
+        this is the last stage.
+    :param key: the idempotency key, a body field name or a callable that
+        takes the body, default is :func:`get_job_id`.
+    :param concurrency: number of consumer threads of this stage on each node.
+    :param batch_size: max number of messages per receive.
+    :param visibility_timeout: seconds a received message is hidden from
+        the other consumers.
+    :param heartbeat_interval: while the handler runs, hide the message for
+        another ``visibility_timeout`` every this many seconds. None means
+        half of the visibility timeout, 0 disables the heartbeat.
+    :param retry_delay: seconds a failed message stays hidden before the
+        retry, doubled on each attempt and capped by the visibility timeout.
+        0 retries right away.
+    :param max_receive_count: the message is dead lettered after this many
+        failed attempts.
+    :param dead_letter_queue: where to send the given up messages, None to
+        drop them.
+    """
+
+    name: str = dataclasses.field()
+    handler: T_HANDLER = dataclasses.field()
+    input_queue: BaseQueue = dataclasses.field()
+    output_queue: T.Optional[BaseQueue] = dataclasses.field(default=None)
+    key: T.Union[str, T.Callable[[dict], str]] = dataclasses.field(default=get_job_id)
+    concurrency: int = dataclasses.field(default=1)
+    batch_size: int = dataclasses.field(default=1)
+    visibility_timeout: float = dataclasses.field(default=300)
+    heartbeat_interval: T.Optional[float] = dataclasses.field(default=None)
+    retry_delay: float = dataclasses.field(default=0)
+    max_receive_count: int = dataclasses.field(default=5)
+    dead_letter_queue: T.Optional[BaseQueue] = dataclasses.field(default=None)
+    stats: StageStats = dataclasses.field(default_factory=StageStats)
+
+    def get_key(self, body: dict) -> str:
+        if isinstance(self.key, str):
+            return str(body[self.key])
+        return self.key(body)
+
+    def get_heartbeat_interval(self) -> float:
+        if self.heartbeat_interval is None:
+            return self.visibility_timeout / 2
+        return self.heartbeat_interval
+
+    def get_retry_delay(self, receive_count: int) -> float:
+        delay = self.retry_delay * (2 ** max(receive_count - 1, 0))
+        return min(delay, self.visibility_timeout)
+
+
+class Pipeline:
+    """
+    Run the stages, see the module docstring.
+
+    :param stages: the stages, in the order of the data flow.
+    :param ledger: the idempotency ledger shared by all nodes.
+    """
+
+    def __init__(
+        self,
+        stages: T.List[Stage],
+        ledger: T.Optional[BaseLedger] = None,
+    ):
+        self.stages = stages
+        self.ledger = InMemoryLedger() if ledger is None else ledger
+        self._stats_lock = threading.Lock()
+
+    def _count(self, stage: Stage, field: str):
+        with self._stats_lock:
+            setattr(stage.stats, field, getattr(stage.stats, field) + 1)
+
+    def _send_outputs(self, stage: Stage, outputs: T.List[dict]):
+        if stage.output_queue is not None:
+            for output in outputs:
+                stage.output_queue.send(output)
+
+    @contextlib.contextmanager
+    def _heartbeat(self, stage: Stage, message: QueueMessage):
+        """
+        Keep the message hidden while the ``with`` block runs.
+        """
+        interval = stage.get_heartbeat_interval()
+        if interval <= 0 or stage.visibility_timeout <= 0:
+            yield
+            return
+        done = threading.Event()
+
+        def beat():
+            while not done.wait(interval):
+                try:
+                    if not stage.input_queue.change_visibility(
+                        message, stage.visibility_timeout
+                    ):
+                        return  # the receipt is stale, someone else has it
+                except Exception:  # pragma: no cover
+                    pass  # try again on the next beat
+
+        thread = threading.Thread(target=beat, daemon=True)
+        thread.start()
+        try:
+            yield
+        finally:
+            done.set()
+            thread.join()
+
+    def process_message(self, stage: Stage, message: QueueMessage) -> bool:
+        """
+        Process one received message of the stage.
+
+        :return: True if the message is done (succeeded, skipped or dead
+            lettered) and deleted.
+        """
+        body = message.body
+        try:
+            key = stage.get_key(body)
+            outputs = self.ledger.get(stage.name, key)
+            if outputs is None:
+                with self._heartbeat(stage, message):
+                    result = stage.handler(body)
+                if result is None:
+                    outputs = []
+                elif isinstance(result, dict):
+                    outputs = [result]
+                else:
+                    outputs = list(result)
+                # record before sending, a crash in between re-sends the
+                # same outputs, the next stage is idempotent too
+                self.ledger.put(stage.name, key, outputs)
+                self._count(stage, "succeeded")
+            else:
+                self._count(stage, "skipped")
+            self._send_outputs(stage, outputs)
+        except Exception:
+            self._count(stage, "failed")
+            if message.receive_count < stage.max_receive_count:
+                # don't wait for the rest of the visibility timeout
+                stage.input_queue.change_visibility(
+                    message, stage.get_retry_delay(message.receive_count)
+                )
+                return False
+            if stage.dead_letter_queue is not None:
+                stage.dead_letter_queue.send(body)
+            self._count(stage, "dead_lettered")
+        stage.input_queue.delete(message)
+        return True
+
+    def process_batch(self, stage: Stage) -> int:
+        """
+        Receive one batch of messages of the stage and process them in the
+        current thread.
+
+        :return: number of received messages.
+        """
+        messages = stage.input_queue.receive(
+            max_messages=stage.batch_size,
+            visibility_timeout=stage.visibility_timeout,
+        )
+        for message in messages:
+            self.process_message(stage, message)
+        return len(messages)
+
+    def drain(self, max_rounds: T.Optional[int] = None) -> int:
+        """
+        Process the stages in order in the current thread, until a round
+        receives nothing. The failed messages that are still invisible are
+        left in the queues.
+
+        :return: number of received messages.
+        """
+        total = 0
+        rounds = 0
+        while max_rounds is None or rounds < max_rounds:
+            rounds += 1
+            n = sum(self.process_batch(stage) for stage in self.stages)
+            total += n
+            if n == 0:
+                break
+        return total
+
+    def _consume(self, stage: Stage, stop: threading.Event, poll_interval: float):
+        while not stop.is_set():
+            try:
+                n = self.process_batch(stage)
+            except Exception:  # pragma: no cover
+                # the queue is not reachable, try again later
+                n = 0
+            if n == 0:
+                stop.wait(poll_interval)
+
+    def run(
+        self,
+        stop: T.Optional[threading.Event] = None,
+        poll_interval: float = 1.0,
+    ):
+        """
+        Start ``stage.concurrency`` consumer threads for each stage, block
+        until ``stop`` is set.
+
+        :param stop: set it to stop the consumers, for example from a signal
+            handler. None means run forever.
+        :param poll_interval: seconds to sleep after an empty receive.
+        """
+        if stop is None:  # pragma: no cover
+            stop = threading.Event()
+        threads = [
+            threading.Thread(
+                target=self._consume,
+                args=(stage, stop, poll_interval),
+                name=f"pipeline-{stage.name}-{i}",
+                daemon=True,
+            )
+            for stage in self.stages
+            for i in range(stage.concurrency)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
@@ -0,0 +1,496 @@
+# -*- coding: utf-8 -*-
+
+"""
+Latency aware router between the Textract sync and async APIs.
+
+A single page image comes back from the sync ``analyze_document`` API in
+about a second, while the async ``start_xyz()`` -> poll -> ``get_xyz()``
+round trip takes several seconds or more. But only the async API accepts
+multi page documents, large files and ``OutputConfig``. :class:`TextractRouter`
+inspects the input (page count, size, format, whether an S3 output location
+is required), finds the allowed paths, dispatches to the one with the lowest
+observed latency, and returns a uniform :class:`RouteResult` either way.
+
+The latency of every call is recorded as an exponentially weighted moving
+average per API and path, so when the sync API is throttled (and retried by
+the client) heavily, the router gradually moves the eligible documents to the
+async API.
+
+Usage example::
+
+    router = TextractRouter(textract_client=boto3.client("textract"))
+    result = router.analyze_document(
+        input_bucket="my-bucket",
+        input_key="receipts/1.png",
+        feature_types=["TABLES", "FORMS"],
+    )
+    print(result.path, result.latency)
+    blocks_to_text(result.response["Blocks"])
+"""
+
+import typing as T
+import enum
+import time
+import threading
+import dataclasses
+
+from .async_api import preprocess_input_output_config
+from .async_api import get_document_analysis
+from .async_api import get_document_text_detection
+from .async_api import get_expense_analysis
+from .async_api import wait_document_analysis_job_to_succeed
+from .async_api import wait_document_text_detection_job_to_succeed
+from .async_api import wait_expense_analysis_job_to_succeed
+from . import sync_api
+from .. import instrumentation as instr
+
+if T.TYPE_CHECKING:  # pragma: no cover
+    from mypy_boto3_s3 import S3Client
+    from mypy_boto3_textract import TextractClient
+    from ..response.projection import Projection
+
+
+class RoutePathEnum(str, enum.Enum):
+    sync = "sync"
+    async_ = "async"
+
+
+class RoutableApiEnum(str, enum.Enum):
+    document_analysis = "document_analysis"
+    document_text_detection = "document_text_detection"
+    expense_analysis = "expense_analysis"
+
+
+#: file extension -> format name, the sync API accepts all of them as long
+#: as the document has one page.
+DOCUMENT_FORMATS = {
+    "png": "png",
+    "jpg": "jpeg",
+    "jpeg": "jpeg",
+    "pdf": "pdf",
+    "tif": "tiff",
+    "tiff": "tiff",
+}
+
+#: the formats that always have one page.
+SINGLE_PAGE_FORMATS = {"png", "jpeg"}
+
+#: the max document size of the sync API.
+SYNC_MAX_BYTES = 10 * 1024 * 1024
+
+
+def guess_document_format(key: str) -> T.Optional[str]:
+    """
+    Guess the document format by the file extension, None if unknown.
+    """
+    if "." not in key:
+        return None
+    return DOCUMENT_FORMATS.get(key.rsplit(".", 1)[-1].lower())
+
+
+_SYNC_API = {
+    RoutableApiEnum.document_analysis: sync_api.analyze_document,
+    RoutableApiEnum.document_text_detection: sync_api.detect_document_text,
+    RoutableApiEnum.expense_analysis: sync_api.analyze_expense,
+}
+
+_GET_RESULT = {
+    RoutableApiEnum.document_analysis: get_document_analysis,
+    RoutableApiEnum.document_text_detection: get_document_text_detection,
+    RoutableApiEnum.expense_analysis: get_expense_analysis,
+}
+
+_WAIT_JOB = {
+    RoutableApiEnum.document_analysis: wait_document_analysis_job_to_succeed,
+    RoutableApiEnum.document_text_detection: wait_document_text_detection_job_to_succeed,
+    RoutableApiEnum.expense_analysis: wait_expense_analysis_job_to_succeed,
+}
+
+
+def _is_path_failure(e: Exception) -> bool:
+    """
+    Check if the exception tells that the path is unhealthy, i.e. throttling,
+    a 5xx server error, a connection error or a timeout. The caller errors
+    like ``InvalidParameterException`` or a bad S3 object are not.
+    """
+    if isinstance(e, TimeoutError) or instr.is_throttling_error(e):
+        return True
+    from botocore.exceptions import ConnectionError
+
+    if isinstance(e, ConnectionError):
+        return True
+    try:
+        return e.response["ResponseMetadata"]["HTTPStatusCode"] >= 500
+    except (AttributeError, KeyError, TypeError):
+        return False
+
+
+@dataclasses.dataclass
+class DocumentInfo:
+    """
+    What the router needs to know about the input document.
+
+    :param n_pages: number of pages, None if unknown.
+    :param size: file size in bytes, None if unknown.
+    :param format: "png" | "jpeg" | "pdf" | "tiff", None if unknown.
+    :param needs_s3_output: whether the Textract output has to be written to
+        S3 (``OutputConfig``), only the async API supports it.
+    """
+
+    n_pages: T.Optional[int] = dataclasses.field(default=None)
+    size: T.Optional[int] = dataclasses.field(default=None)
+    format: T.Optional[str] = dataclasses.field(default=None)
+    needs_s3_output: bool = dataclasses.field(default=False)
+
+    @property
+    def is_single_page(self) -> bool:
+        return self.n_pages == 1 or (
+            self.n_pages is None and self.format in SINGLE_PAGE_FORMATS
+        )
+
+
+@dataclasses.dataclass
+class LatencyStats:
+    """
+    The exponentially weighted moving average of the observed latency.
+    """
+
+    ewma: float = dataclasses.field()
+    count: int = dataclasses.field(default=0)
+
+    def observe(self, seconds: float, alpha: float):
+        if self.count == 0:
+            self.ewma = seconds
+        else:
+            self.ewma = alpha * seconds + (1 - alpha) * self.ewma
+        self.count += 1
+
+
+@dataclasses.dataclass
+class RouteResult:
+    """
+    The uniform result of :class:`TextractRouter`.
+
+    :param api: which API is called.
+    :param path: sync or async.
+    :param response: the response in the ``get_xyz()`` shape.
+    :param latency: the end to end seconds, including the job polling.
+    :param job_id: the job id of the async path, None for the sync path.
+    """
+
+    api: RoutableApiEnum = dataclasses.field()
+    path: RoutePathEnum = dataclasses.field()
+    response: dict = dataclasses.field()
+    latency: float = dataclasses.field()
+    job_id: T.Optional[str] = dataclasses.field(default=None)
+
+
+class TextractRouter:
+    """
+    Dispatch each document to the lowest latency Textract API path it is
+    allowed to use.
+
+    :param textract_client: the boto3 Textract client.
+    :param s3_client: the boto3 S3 client, used to get the object size when
+        it is not given. If None, an unknown size is considered as too large
+        for the sync API.
+    :param sync_max_bytes: the max document size for the sync API.
+    :param initial_latency: the assumed latency of each path before anything
+        is observed.
+    :param alpha: the weight of the newest observation in the moving average.
+    :param explore_every: every N-th document that can go either way is sent
+        to the slower path, so its latency estimate stays fresh. 0 to disable.
+    :param failure_penalty: the seconds added to the elapsed time of a call
+        that fails because of the path (throttling, 5xx, connection error or
+        timeout), for example the sync API still throttled after the client
+        retries, so the failing path looks slow and the router moves away.
+    :param delays: the polling interval of the async path.
+    :param timeout: the timeout of the async path.
+    """
+
+    def __init__(
+        self,
+        textract_client: "TextractClient",
+        s3_client: T.Optional["S3Client"] = None,
+        sync_max_bytes: int = SYNC_MAX_BYTES,
+        initial_latency: T.Optional[T.Dict[RoutePathEnum, float]] = None,
+        alpha: float = 0.2,
+        explore_every: int = 50,
+        failure_penalty: float = 30.0,
+        delays: float = 1,
+        timeout: float = 600,
+    ):
+        self.textract_client = textract_client
+        self.s3_client = s3_client
+        self.sync_max_bytes = sync_max_bytes
+        if initial_latency is None:
+            initial_latency = {RoutePathEnum.sync: 2.0, RoutePathEnum.async_: 15.0}
+        self.initial_latency = initial_latency
+        self.alpha = alpha
+        self.explore_every = explore_every
+        self.failure_penalty = failure_penalty
+        self.delays = delays
+        self.timeout = timeout
+        self.stats: T.Dict[T.Tuple[RoutableApiEnum, RoutePathEnum], LatencyStats] = (
+            dict()
+        )
+        self._n_choices = 0
+        self._lock = threading.Lock()
+
+    # --- latency bookkeeping ---
+    def record(self, api: RoutableApiEnum, path: RoutePathEnum, seconds: float):
+        """
+        Record an observed end to end latency.
+        """
+        with self._lock:
+            try:
+                stats = self.stats[(api, path)]
+            except KeyError:
+                stats = LatencyStats(ewma=self.initial_latency[path])
+                self.stats[(api, path)] = stats
+            stats.observe(seconds, self.alpha)
+
+    def expected_latency(self, api: RoutableApiEnum, path: RoutePathEnum) -> float:
+        """
+        The current latency estimate of a path.
+        """
+        stats = self.stats.get((api, path))
+        if stats is None:
+            return self.initial_latency[path]
+        return stats.ewma
+
+    # --- routing ---
+    def inspect(
+        self,
+        input_bucket: str,
+        input_key: str,
+        n_pages: T.Optional[int] = None,
+        size: T.Optional[int] = None,
+        needs_s3_output: bool = False,
+    ) -> DocumentInfo:
+        """
+        Collect the :class:`DocumentInfo`, the size is fetched by ``head_object``
+        when not given and the ``s3_client`` is available.
+        """
+        if size is None and self.s3_client is not None:
+            size = self.s3_client.head_object(Bucket=input_bucket, Key=input_key)[
+                "ContentLength"
+            ]
+        return DocumentInfo(
+            n_pages=n_pages,
+            size=size,
+            format=guess_document_format(input_key),
+            needs_s3_output=needs_s3_output,
+        )
+
+    def allowed_paths(self, info: DocumentInfo) -> T.List[RoutePathEnum]:
+        """
+        The paths that can process the document.
+        """
+        paths = [RoutePathEnum.async_]
+        if (
+            info.is_single_page
+            and not info.needs_s3_output
+            and info.size is not None
+            and info.size <= self.sync_max_bytes
+        ):
+            paths.append(RoutePathEnum.sync)
+        return paths
+
+    def choose(self, api: RoutableApiEnum, info: DocumentInfo) -> RoutePathEnum:
+        """
+        Choose the allowed path with the lowest expected latency.
+        """
+        paths = sorted(
+            self.allowed_paths(info),
+            key=lambda path: self.expected_latency(api, path),
+        )
+        if len(paths) == 1:
+            return paths[0]
+        with self._lock:
+            self._n_choices += 1
+            n_choices = self._n_choices
+        if self.explore_every and n_choices % self.explore_every == 0:
+            return paths[1]
+        return paths[0]
+
+    def _run(
+        self,
+        api: RoutableApiEnum,
+        input_bucket: str,
+        input_key: str,
+        input_version: T.Optional[str],
+        output_bucket: T.Optional[str],
+        output_prefix: T.Optional[str],
+        n_pages: T.Optional[int],
+        size: T.Optional[int],
+        projection: T.Optional["Projection"],
+        sync_kwargs: dict,
+        async_kwargs: dict,
+    ) -> RouteResult:
+        info = self.inspect(
+            input_bucket=input_bucket,
+            input_key=input_key,
+            n_pages=n_pages,
+            size=size,
+            needs_s3_output=output_bucket is not None,
+        )
+        path = self.choose(api, info)
+        start = time.perf_counter()
+        job_id = None
+        try:
+            if path is RoutePathEnum.sync:
+                s3object = dict(Bucket=input_bucket, Name=input_key)
+                if input_version:
+                    s3object["Version"] = input_version
+                response = _SYNC_API[api](
+                    self.textract_client,
+                    {"S3Object": s3object},
+                    projection=projection,
+                    **sync_kwargs,
+                )
+            else:
+                document_location, output_config = preprocess_input_output_config(
+                    input_bucket=input_bucket,
+                    input_key=input_key,
+                    input_version=input_version,
+                    output_bucket=output_bucket or "",
+                    output_prefix=output_prefix or "",
+                )
+                if output_bucket is not None:
+                    async_kwargs = dict(async_kwargs, OutputConfig=output_config)
+                start_api = getattr(self.textract_client, f"start_{api.value}")
+                res = start_api(DocumentLocation=document_location, **async_kwargs)
+                job_id = res["JobId"]
+                _WAIT_JOB[api](
+                    self.textract_client,
+                    job_id=job_id,
+                    delays=self.delays,
+                    timeout=self.timeout,
+                    verbose=False,
+                )
+                response = _GET_RESULT[api](
+                    self.textract_client,
+                    job_id,
+                    projection=projection,
+                )
+        except Exception as e:
+            # a throttled or unavailable path is an observation too, otherwise
+            # it keeps its old estimate and keeps receiving the documents.
+            # a caller error says nothing about the path, don't record it.
+            if _is_path_failure(e):
+                latency = time.perf_counter() - start + self.failure_penalty
+                self.record(api, path, latency)
+            raise
+        latency = time.perf_counter() - start
+        self.record(api, path, latency)
+        return RouteResult(
+            api=api,
+            path=path,
+            response=response,
+            latency=latency,
+            job_id=job_id,
+        )
+
+    def analyze_document(
+        self,
+        input_bucket: str,
+        input_key: str,
+        feature_types: T.Iterable[str] = ("TABLES", "FORMS"),
+        input_version: T.Optional[str] = None,
+        output_bucket: T.Optional[str] = None,
+        output_prefix: T.Optional[str] = None,
+        n_pages: T.Optional[int] = None,
+        size: T.Optional[int] = None,
+        projection: T.Optional["Projection"] = None,
+    ) -> RouteResult:
+        """
+        Run the document analysis through ``analyze_document`` or
+        ``start_document_analysis``.
+
+        :param input_bucket: input document bucket
+        :param input_key: input document key
+        :param feature_types: the ``FeatureTypes`` parameter.
+        :param input_version: if S3 bucket has versioning, specify the version id
+        :param output_bucket: if given, the Textract output is written to S3,
+            only the async path is allowed.
+        :param output_prefix: the output prefix.
+        :param n_pages: number of pages if known, a PDF or TIFF with unknown
+            page count goes to the async path.
+        :param size: the file size if known.
+        :param projection: see :class:`~aws_textract.response.projection.Projection`.
+        """
+        feature_types = list(feature_types)
+        return self._run(
+            api=RoutableApiEnum.document_analysis,
+            input_bucket=input_bucket,
+            input_key=input_key,
+            input_version=input_version,
+            output_bucket=output_bucket,
+            output_prefix=output_prefix,
+            n_pages=n_pages,
+            size=size,
+            projection=projection,
+            sync_kwargs=dict(feature_types=feature_types),
+            async_kwargs=dict(FeatureTypes=feature_types),
+        )
+
+    def detect_document_text(
+        self,
+        input_bucket: str,
+        input_key: str,
+        input_version: T.Optional[str] = None,
+        output_bucket: T.Optional[str] = None,
+        output_prefix: T.Optional[str] = None,
+        n_pages: T.Optional[int] = None,
+        size: T.Optional[int] = None,
+        projection: T.Optional["Projection"] = None,
+    ) -> RouteResult:
+        """
+        Run the text detection through ``detect_document_text`` or
+        ``start_document_text_detection``. See :meth:`analyze_document`
+        for the parameters.
+        """
+        return self._run(
+            api=RoutableApiEnum.document_text_detection,
+            input_bucket=input_bucket,
+            input_key=input_key,
+            input_version=input_version,
+            output_bucket=output_bucket,
+            output_prefix=output_prefix,
+            n_pages=n_pages,
+            size=size,
+            projection=projection,
+            sync_kwargs=dict(),
+            async_kwargs=dict(),
+        )
+
+    def analyze_expense(
+        self,
+        input_bucket: str,
+        input_key: str,
+        input_version: T.Optional[str] = None,
+        output_bucket: T.Optional[str] = None,
+        output_prefix: T.Optional[str] = None,
+        n_pages: T.Optional[int] = None,
+        size: T.Optional[int] = None,
+        projection: T.Optional["Projection"] = None,
+    ) -> RouteResult:
+        """
+        Run the expense analysis through ``analyze_expense`` or
+        ``start_expense_analysis``. See :meth:`analyze_document`
+        for the parameters.
+        """
+        return self._run(
+            api=RoutableApiEnum.expense_analysis,
+            input_bucket=input_bucket,
+            input_key=input_key,
+            input_version=input_version,
+            output_bucket=output_bucket,
+            output_prefix=output_prefix,
+            n_pages=n_pages,
+            size=size,
+            projection=projection,
+            sync_kwargs=dict(),
+            async_kwargs=dict(),
+        )
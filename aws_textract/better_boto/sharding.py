@@ -0,0 +1,405 @@
+# -*- coding: utf-8 -*-
+
+"""
+Split a large PDF into page range shards, run one Textract async job per
+shard in parallel, then merge the results back into one response.
+
+One async job on a 3,000 pages PDF finishes much later than several smaller
+jobs running in parallel, and it may hit the page limit of the API. This module:
+
+1. downloads the input PDF, splits it into ``pages_per_shard`` pages chunks
+   and uploads each chunk to S3.
+2. starts one ``start_xyz()`` job per chunk, the ``DocumentLocation`` and
+   ``OutputConfig`` are built by :func:`~aws_textract.better_boto.async_api.preprocess_input_output_config`.
+3. waits on all jobs together.
+4. merges the results into one response, the ``Page`` numbers are shifted
+   by the first page of each shard, and the block ``Id`` that collide across
+   shards are rewritten, so the callers see one document.
+
+Splitting a PDF requires ``pypdf``, or pass your own ``splitter``.
+
+Usage example::
+
+    sharded_job = start_sharded_job(
+        textract_client=boto3.client("textract"),
+        s3_client=boto3.client("s3"),
+        api=ShardableApiEnum.document_analysis,
+        input_bucket="my-input-bucket",
+        input_key="my-folder/large.pdf",
+        output_bucket="my-output-bucket",
+        output_prefix="my-folder/textract-output",
+        pages_per_shard=200,
+        FeatureTypes=["TABLES", "FORMS"],
+    )
+    wait_sharded_job_to_succeed(textract_client, sharded_job)
+    res = get_sharded_result(textract_client, sharded_job)
+"""
+
+import typing as T
+import io
+import enum
+import time
+import uuid
+import dataclasses
+import concurrent.futures
+
+from ..vendor.waiter import Waiter
+from .. import instrumentation as instr
+from ..clients import check_pool_size
+from ..instrumentation import EventNameEnum
+from .async_api import preprocess_input_output_config
+from .async_api import get_document_analysis
+from .async_api import get_document_text_detection
+from .async_api import get_lending_analysis
+from .async_api import JobStatusEnum
+
+if T.TYPE_CHECKING:  # pragma: no cover
+    from mypy_boto3_s3 import S3Client
+    from mypy_boto3_textract import TextractClient
+    from ..response.projection import Projection
+
+
+class ShardableApiEnum(str, enum.Enum):
+    """
+    The async APIs that can be sharded by page range. The expense analysis
+    is not included, its ``ExpenseIndex`` is already per receipt.
+    """
+
+    document_analysis = "document_analysis"
+    document_text_detection = "document_text_detection"
+    lending_analysis = "lending_analysis"
+
+
+_API_KEY = {
+    ShardableApiEnum.document_analysis: "Blocks",
+    ShardableApiEnum.document_text_detection: "Blocks",
+    ShardableApiEnum.lending_analysis: "Results",
+}
+
+
+def split_pdf(
+    body: bytes,
+    pages_per_shard: int,
+) -> T.List[bytes]:
+    """
+    Split a PDF into chunks of ``pages_per_shard`` pages, the last chunk
+    may have fewer pages. Requires ``pypdf``.
+
+    :param body: the content of the PDF file.
+    :param pages_per_shard: number of pages in each chunk.
+
+    :return: the content of the chunk PDF files.
+    """
+    from pypdf import PdfReader, PdfWriter
+
+    reader = PdfReader(io.BytesIO(body))
+    n_pages = len(reader.pages)
+    shards = list()
+    for start in range(0, n_pages, pages_per_shard):
+        writer = PdfWriter()
+        for i in range(start, min(start + pages_per_shard, n_pages)):
+            writer.add_page(reader.pages[i])
+        buffer = io.BytesIO()
+        writer.write(buffer)
+        shards.append(buffer.getvalue())
+    return shards
+
+
+@dataclasses.dataclass
+class Shard:
+    """
+    One page range chunk of the input document and its Textract job.
+
+    :param index: the 0 based shard index.
+    :param first_page: the page number in the original document of the first
+        page of this shard, 1 based.
+    :param input_bucket: the bucket of the chunk PDF.
+    :param input_key: the key of the chunk PDF.
+    :param output_bucket: the OutputConfig["S3Bucket"] of the job.
+    :param output_prefix: the OutputConfig["S3Prefix"] of the job.
+    :param job_id: the Textract job id.
+    """
+
+    index: int = dataclasses.field()
+    first_page: int = dataclasses.field()
+    input_bucket: str = dataclasses.field()
+    input_key: str = dataclasses.field()
+    output_bucket: str = dataclasses.field()
+    output_prefix: str = dataclasses.field()
+    job_id: T.Optional[str] = dataclasses.field(default=None)
+
+
+@dataclasses.dataclass
+class ShardedJob:
+    """
+    A group of Textract jobs that process the page range shards of one document.
+
+    :param api: which async API is used.
+    :param shards: the shards, in page order.
+    """
+
+    api: ShardableApiEnum = dataclasses.field()
+    shards: T.List[Shard] = dataclasses.field(default_factory=list)
+
+    @property
+    def job_ids(self) -> T.List[str]:
+        return [shard.job_id for shard in self.shards]
+
+
+def _get_shard_key(shard_prefix: str, input_key: str, index: int) -> str:
+    stem = input_key.rsplit("/", 1)[-1].rsplit(".", 1)[0]
+    return f"{shard_prefix}/{stem}-{index + 1:04d}.pdf"
+
+
+def start_sharded_job(
+    textract_client: "TextractClient",
+    s3_client: "S3Client",
+    api: T.Union[ShardableApiEnum, str],
+    input_bucket: str,
+    input_key: str,
+    output_bucket: str,
+    output_prefix: str,
+    input_version: T.Optional[str] = None,
+    pages_per_shard: int = 200,
+    shard_bucket: T.Optional[str] = None,
+    shard_prefix: T.Optional[str] = None,
+    splitter: T.Callable[[bytes, int], T.List[bytes]] = split_pdf,
+    max_workers: T.Optional[int] = None,
+    **kwargs,
+) -> ShardedJob:
+    """
+    Split the input PDF into page range shards, upload them to S3, and start
+    one Textract async job per shard in parallel.
+
+    :param textract_client: the boto3 Textract client.
+    :param s3_client: the boto3 S3 client.
+    :param api: which async API to use, see :class:`ShardableApiEnum`.
+    :param input_bucket: input document bucket
+    :param input_key: input document key
+    :param output_bucket: output bucket
+    :param output_prefix: output prefix, it should not have '/' at the end
+    :param input_version: if S3 bucket has versioning, specify the version id
+    :param pages_per_shard: number of pages in each shard.
+    :param shard_bucket: the bucket to upload the shards to,
+        default is the ``output_bucket``.
+    :param shard_prefix: the prefix to upload the shards to,
+        default is ``${output_prefix}/shards``.
+    :param splitter: a callable that takes the document content and
+        ``pages_per_shard``, returns the content of the shards,
+        default is :func:`split_pdf`.
+    :param max_workers: number of threads to upload and start the jobs.
+    :param kwargs: other arguments of the ``start_xyz()`` API, for example
+        ``FeatureTypes``, ``NotificationChannel``.
+    """
+    api = ShardableApiEnum(api)
+    output_prefix = output_prefix.rstrip("/")
+    if shard_bucket is None:
+        shard_bucket = output_bucket
+    if shard_prefix is None:
+        shard_prefix = f"{output_prefix}/shards"
+    shard_prefix = shard_prefix.rstrip("/")
+
+    get_object_kwargs = dict(Bucket=input_bucket, Key=input_key)
+    if input_version:
+        get_object_kwargs["VersionId"] = input_version
+    body = s3_client.get_object(**get_object_kwargs)["Body"].read()
+    chunks = splitter(body, pages_per_shard)
+    del body
+
+    sharded_job = ShardedJob(api=api)
+    for index in range(len(chunks)):
+        sharded_job.shards.append(
+            Shard(
+                index=index,
+                first_page=index * pages_per_shard + 1,
+                input_bucket=shard_bucket,
+                input_key=_get_shard_key(shard_prefix, input_key, index),
+                output_bucket=output_bucket,
+                output_prefix=output_prefix,
+            )
+        )
+    start_api = getattr(textract_client, f"start_{api.value}")
+    check_pool_size(s3_client, max_workers)
+    check_pool_size(textract_client, max_workers)
+
+    def start_one(shard: Shard, chunk: bytes):
+        s3_client.put_object(
+            Bucket=shard.input_bucket,
+            Key=shard.input_key,
+            Body=chunk,
+            ContentType="application/pdf",
+        )
+        document_location, output_config = preprocess_input_output_config(
+            input_bucket=shard.input_bucket,
+            input_key=shard.input_key,
+            input_version=None,
+            output_bucket=shard.output_bucket,
+            output_prefix=shard.output_prefix,
+        )
+        res = instr.call_with_instrumentation(
+            start_api,
+            latency_event=EventNameEnum.API_CALL_LATENCY,
+            throttle_event=EventNameEnum.API_THROTTLE,
+            operation=f"start_{api.value}",
+            DocumentLocation=document_location,
+            OutputConfig=output_config,
+            **kwargs,
+        )
+        shard.job_id = res["JobId"]
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = [
+            executor.submit(start_one, shard, chunk)
+            for shard, chunk in zip(sharded_job.shards, chunks)
+        ]
+        for future in futures:
+            future.result()
+    return sharded_job
+
+
+def wait_sharded_job_to_succeed(
+    textract_client: "TextractClient",
+    sharded_job: ShardedJob,
+    delays: int = 5,
+    timeout: int = 600,
+    verbose: bool = True,
+):
+    """
+    Wait for all jobs of the sharded job to succeed. Each polling round only
+    checks the jobs that are still in progress. Raise an exception as soon as
+    any job fails.
+    """
+    operation = f"get_{sharded_job.api.value}"
+    get_api = getattr(textract_client, operation)
+    pending = list(sharded_job.job_ids)
+    start = time.perf_counter()
+    status = JobStatusEnum.IN_PROGRESS.value
+    try:
+        for _ in Waiter(delays=delays, timeout=timeout, verbose=verbose):
+            still_pending = list()
+            for job_id in pending:
+                res = instr.call_with_instrumentation(
+                    get_api,
+                    latency_event=EventNameEnum.API_CALL_LATENCY,
+                    throttle_event=EventNameEnum.API_THROTTLE,
+                    operation=operation,
+                    JobId=job_id,
+                    MaxResults=1,
+                )
+                instr.emit_counter(EventNameEnum.WAIT_POLL, operation=operation)
+                job_status = res["JobStatus"]
+                if job_status in [JobStatusEnum.FAILED]:
+                    status = job_status
+                    raise Exception(f"Job failed: {res}")
+                elif job_status not in [JobStatusEnum.SUCCEEDED]:
+                    still_pending.append(job_id)
+            pending = still_pending
+            if not pending:
+                status = JobStatusEnum.SUCCEEDED.value
+                return
+    except TimeoutError:
+        status = "TIMEOUT"
+        raise
+    finally:
+        instr.emit_timing(
+            EventNameEnum.WAIT_TIME,
+            time.perf_counter() - start,
+            operation=operation,
+            status=status,
+        )
+
+
+def _make_block_ids_unique(
+    blocks: T.List[dict],
+    seen: T.Set[str],
+    salt: str,
+):
+    """
+    Rewrite the ``Id`` (and the ``Relationships`` that point to it) of the
+    blocks whose ``Id`` is already in ``seen``, then add all ids to ``seen``.
+    """
+    mapper = dict()
+    for block in blocks:
+        block_id = block["Id"]
+        if block_id in seen:
+            mapper[block_id] = str(uuid.uuid5(uuid.NAMESPACE_OID, f"{salt}/{block_id}"))
+    if mapper:
+        for block in blocks:
+            block["Id"] = mapper.get(block["Id"], block["Id"])
+            for rel in block.get("Relationships", []):
+                rel["Ids"] = [mapper.get(id_, id_) for id_ in rel["Ids"]]
+    seen.update(block["Id"] for block in blocks)
+
+
+def merge_sharded_responses(
+    api: T.Union[ShardableApiEnum, str],
+    responses: T.List[dict],
+    first_pages: T.List[int],
+) -> dict:
+    """
+    Merge the responses of the shards into one response, as if the whole
+    document was processed by one job. The responses are modified in place.
+
+    :param api: which async API the responses come from.
+    :param responses: the ``get_xyz()`` or ``merge_xyz_result()`` response
+        of each shard, in page order.
+    :param first_pages: the page number in the original document of the
+        first page of each shard.
+    """
+    key = _API_KEY[ShardableApiEnum(api)]
+    seen = set()
+    merged = None
+    n_pages = 0
+    for index, (res, first_page) in enumerate(zip(responses, first_pages)):
+        offset = first_page - 1
+        items = res.get(key, [])
+        for item in items:
+            if "Page" in item:
+                item["Page"] += offset
+        if key == "Blocks" and items and "Id" in items[0]:
+            _make_block_ids_unique(items, seen, salt=str(index))
+        for warning in res.get("Warnings", []):
+            warning["Pages"] = [page + offset for page in warning.get("Pages", [])]
+        n_pages = max(n_pages, offset + res["DocumentMetadata"]["Pages"])
+        if merged is None:
+            merged = res
+        else:
+            merged[key].extend(items)
+            if "Warnings" in res:
+                merged.setdefault("Warnings", []).extend(res["Warnings"])
+    if merged is not None:
+        merged["DocumentMetadata"]["Pages"] = n_pages
+    return merged
+
+
+def get_sharded_result(
+    textract_client: "TextractClient",
+    sharded_job: ShardedJob,
+    projection: T.Optional["Projection"] = None,
+) -> dict:
+    """
+    Get the result of all jobs of the sharded job, and merge them into one
+    response with :func:`merge_sharded_responses`.
+
+    :param projection: see :class:`~aws_textract.response.projection.Projection`,
+        not used by the lending analysis.
+    """
+    api = sharded_job.api
+    responses = list()
+    for shard in sharded_job.shards:
+        if api is ShardableApiEnum.document_analysis:
+            res = get_document_analysis(
+                textract_client, shard.job_id, projection=projection
+            )
+        elif api is ShardableApiEnum.document_text_detection:
+            res = get_document_text_detection(
+                textract_client, shard.job_id, projection=projection
+            )
+        else:
+            res = get_lending_analysis(textract_client, shard.job_id)
+        responses.append(res)
+    return merge_sharded_responses(
+        api=api,
+        responses=responses,
+        first_pages=[shard.first_page for shard in sharded_job.shards],
+    )
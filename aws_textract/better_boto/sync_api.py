@@ -0,0 +1,283 @@
+# -*- coding: utf-8 -*-
+
+"""
+Human friendly version of Amazon Textract sync operations.
+
+For single page PNG / JPEG (or single page PDF) inputs, the async
+``start_xyz()`` -> poll -> ``get_xyz()`` round trip adds several seconds of
+latency. The sync ``analyze_document``, ``detect_document_text`` and
+``analyze_expense`` API returns the result in one call. This module sends
+many such documents through the sync API with a bounded thread pool and a
+shared client, and returns the responses in the same shape as the
+``get_xyz()`` functions in :mod:`aws_textract.better_boto.async_api`, so
+downstream code such as ``blocks_to_text`` works unchanged.
+
+The throttled calls are retried by the boto3 client according to its retry
+config. Create the client with :class:`~aws_textract.clients.ClientFactory`,
+its ``adaptive`` retry mode also slows down all the threads sharing the
+client when the account is throttled.
+
+Usage example::
+
+    result = batch_analyze_document(
+        textract_client=ClientFactory(max_workers=8).get_textract_client(),
+        documents=[
+            {"S3Object": {"Bucket": "my-bucket", "Name": "receipt-1.png"}},
+            Path("receipt-2.jpg").read_bytes(),
+        ],
+        feature_types=["TABLES", "FORMS"],
+        max_workers=8,
+    )
+    for res in result.responses:
+        if res is not None:
+            print(blocks_to_text(res["Blocks"]))
+"""
+
+import typing as T
+import dataclasses
+import concurrent.futures
+
+from .. import instrumentation as instr
+from ..clients import check_pool_size
+from ..instrumentation import EventNameEnum
+from .async_api import JobStatusEnum
+
+if T.TYPE_CHECKING:  # pragma: no cover
+    from mypy_boto3_textract import TextractClient
+    from mypy_boto3_textract.type_defs import GetDocumentAnalysisResponseTypeDef
+    from mypy_boto3_textract.type_defs import GetDocumentTextDetectionResponseTypeDef
+    from mypy_boto3_textract.type_defs import GetExpenseAnalysisResponseTypeDef
+    from ..response.projection import Projection
+
+#: the Textract ``Document`` parameter, or the raw bytes of the document.
+T_DOCUMENT = T.Union[bytes, dict]
+
+
+def to_document_param(document: T_DOCUMENT) -> dict:
+    """
+    Convert the document bytes to the ``Document`` parameter of the sync API.
+    A dict is considered as the ``Document`` parameter already, for example
+    ``{"S3Object": {"Bucket": "my-bucket", "Name": "doc.png"}}``.
+    """
+    if isinstance(document, (bytes, bytearray)):
+        return {"Bytes": bytes(document)}
+    return document
+
+
+def _call_sync_api(
+    api: T.Callable,
+    operation: str,
+    key: str,
+    document: T_DOCUMENT,
+    projection: T.Optional["Projection"] = None,
+    **kwargs,
+) -> dict:
+    """
+    Call the sync API, then convert the response to the ``get_xyz()`` shape.
+    """
+    res = instr.call_with_instrumentation(
+        api,
+        latency_event=EventNameEnum.API_CALL_LATENCY,
+        throttle_event=EventNameEnum.API_THROTTLE,
+        operation=operation,
+        Document=to_document_param(document),
+        **kwargs,
+    )
+    # the sync API has no job, it either succeeds or raises
+    res["JobStatus"] = JobStatusEnum.SUCCEEDED.value
+    if projection is not None and key in res:
+        res[key] = projection.project_items(key, res[key])
+    return res
+
+
+def analyze_document(
+    textract_client: "TextractClient",
+    document: T_DOCUMENT,
+    feature_types: T.Iterable[str] = ("TABLES", "FORMS"),
+    projection: T.Optional["Projection"] = None,
+    **kwargs,
+) -> "GetDocumentAnalysisResponseTypeDef":
+    """
+    Analyze a single page document with the sync ``analyze_document`` API,
+    the response has the same shape as ``get_document_analysis()``.
+
+    :param textract_client: the boto3 Textract client.
+    :param document: the document bytes, or the ``Document`` parameter.
+    :param feature_types: the ``FeatureTypes`` parameter.
+    :param projection: see :class:`~aws_textract.response.projection.Projection`.
+    :param kwargs: other arguments of the ``analyze_document`` API, for example
+        ``QueriesConfig``.
+    """
+    return _call_sync_api(
+        textract_client.analyze_document,
+        operation="analyze_document",
+        key="Blocks",
+        document=document,
+        projection=projection,
+        FeatureTypes=list(feature_types),
+        **kwargs,
+    )
+
+
+def detect_document_text(
+    textract_client: "TextractClient",
+    document: T_DOCUMENT,
+    projection: T.Optional["Projection"] = None,
+    **kwargs,
+) -> "GetDocumentTextDetectionResponseTypeDef":
+    """
+    Detect the text of a single page document with the sync
+    ``detect_document_text`` API, the response has the same shape as
+    ``get_document_text_detection()``.
+
+    :param textract_client: the boto3 Textract client.
+    :param document: the document bytes, or the ``Document`` parameter.
+    :param projection: see :class:`~aws_textract.response.projection.Projection`.
+    """
+    return _call_sync_api(
+        textract_client.detect_document_text,
+        operation="detect_document_text",
+        key="Blocks",
+        document=document,
+        projection=projection,
+        **kwargs,
+    )
+
+
+def analyze_expense(
+    textract_client: "TextractClient",
+    document: T_DOCUMENT,
+    projection: T.Optional["Projection"] = None,
+    **kwargs,
+) -> "GetExpenseAnalysisResponseTypeDef":
+    """
+    Analyze a single page invoice or receipt with the sync ``analyze_expense``
+    API, the response has the same shape as ``get_expense_analysis()``.
+
+    :param textract_client: the boto3 Textract client.
+    :param document: the document bytes, or the ``Document`` parameter.
+    :param projection: see :class:`~aws_textract.response.projection.Projection`.
+    """
+    return _call_sync_api(
+        textract_client.analyze_expense,
+        operation="analyze_expense",
+        key="ExpenseDocuments",
+        document=document,
+        projection=projection,
+        **kwargs,
+    )
+
+
+@dataclasses.dataclass
+class SyncBatchResult:
+    """
+    The result of a ``batch_xyz()`` call.
+
+    :param responses: the response of each document, in the input order,
+        None if the document failed.
+    :param errors: the input index to exception mapping of the failed documents.
+    """
+
+    responses: T.List[T.Optional[dict]] = dataclasses.field(default_factory=list)
+    errors: T.Dict[int, Exception] = dataclasses.field(default_factory=dict)
+
+    @property
+    def n_succeeded(self) -> int:
+        return len(self.responses) - len(self.errors)
+
+
+def _batch(
+    func: T.Callable,
+    textract_client: "TextractClient",
+    documents: T.Iterable[T_DOCUMENT],
+    max_workers: int,
+    **kwargs,
+) -> SyncBatchResult:
+    documents = list(documents)
+    result = SyncBatchResult(responses=[None] * len(documents))
+    # the boto3 client is thread safe, all threads share it
+    check_pool_size(textract_client, max_workers)
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+        future_to_index = {
+            executor.submit(func, textract_client, document, **kwargs): index
+            for index, document in enumerate(documents)
+        }
+        for future in concurrent.futures.as_completed(future_to_index):
+            index = future_to_index[future]
+            error = future.exception()
+            if error is None:
+                result.responses[index] = future.result()
+            else:
+                result.errors[index] = error
+    return result
+
+
+def batch_analyze_document(
+    textract_client: "TextractClient",
+    documents: T.Iterable[T_DOCUMENT],
+    feature_types: T.Iterable[str] = ("TABLES", "FORMS"),
+    max_workers: int = 8,
+    projection: T.Optional["Projection"] = None,
+    **kwargs,
+) -> SyncBatchResult:
+    """
+    Run :func:`analyze_document` on many single page documents in parallel.
+
+    :param max_workers: the max number of concurrent API calls, keep it under
+        the transactions per second quota of your account.
+    """
+    return _batch(
+        analyze_document,
+        textract_client=textract_client,
+        documents=documents,
+        max_workers=max_workers,
+        feature_types=tuple(feature_types),
+        projection=projection,
+        **kwargs,
+    )
+
+
+def batch_detect_document_text(
+    textract_client: "TextractClient",
+    documents: T.Iterable[T_DOCUMENT],
+    max_workers: int = 8,
+    projection: T.Optional["Projection"] = None,
+    **kwargs,
+) -> SyncBatchResult:
+    """
+    Run :func:`detect_document_text` on many single page documents in parallel.
+
+    :param max_workers: the max number of concurrent API calls, keep it under
+        the transactions per second quota of your account.
+    """
+    return _batch(
+        detect_document_text,
+        textract_client=textract_client,
+        documents=documents,
+        max_workers=max_workers,
+        projection=projection,
+        **kwargs,
+    )
+
+
+def batch_analyze_expense(
+    textract_client: "TextractClient",
+    documents: T.Iterable[T_DOCUMENT],
+    max_workers: int = 8,
+    projection: T.Optional["Projection"] = None,
+    **kwargs,
+) -> SyncBatchResult:
+    """
+    Run :func:`analyze_expense` on many single page documents in parallel.
+
+    :param max_workers: the max number of concurrent API calls, keep it under
+        the transactions per second quota of your account.
+    """
+    return _batch(
+        analyze_expense,
+        textract_client=textract_client,
+        documents=documents,
+        max_workers=max_workers,
+        projection=projection,
+        **kwargs,
+    )
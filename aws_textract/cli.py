@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+
+"""
+Command line interface.
+
+Usage example::
+
+    # build a text corpus from the Textract outputs listed in sources.txt,
+    # one S3 output directory or local merged JSON file per line
+    python -m aws_textract.cli corpus \\
+        --output /data/corpus \\
+        --sources-file sources.txt \\
+        --chunk-size 200 \\
+        --workers 16
+"""
+
+import typing as T
+import sys
+import argparse
+
+
+def _read_sources(args: argparse.Namespace) -> T.List[str]:
+    sources = list(args.sources)
+    if args.sources_file:
+        with open(args.sources_file, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if line and not line.startswith("#"):
+                    sources.append(line)
+    return sources
+
+
+def _corpus(args: argparse.Namespace) -> int:
+    from .response.corpus import build_text_corpus
+
+    sources = _read_sources(args)
+    if not sources:
+        print("no sources given", file=sys.stderr)
+        return 1
+    result = build_text_corpus(
+        sources=sources,
+        dir_output=args.output,
+        output_format=args.format,
+        chunk_size=args.chunk_size,
+        max_workers=args.workers,
+        verbose=not args.quiet,
+    )
+    print(
+        f"done: {result.n_documents} docs, {result.n_pages} pages "
+        f"in {result.elapsed:.1f} seconds ({result.docs_per_second:.1f} docs/s), "
+        f"{len(result.shards)} shards written, "
+        f"{len(result.skipped_shards)} shards skipped, "
+        f"{len(result.failed)} failed"
+    )
+    for source, error in result.failed.items():
+        print(f"failed: {source}: {error}", file=sys.stderr)
+    return 2 if result.failed else 0
+
+
+def make_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="aws_textract")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    corpus = subparsers.add_parser(
+        "corpus",
+        help="convert many Textract outputs to sharded text / JSONL files",
+    )
+    corpus.add_argument(
+        "sources",
+        nargs="*",
+        help="S3 Textract output directories or local merged JSON files",
+    )
+    corpus.add_argument(
+        "--sources-file",
+        help="a file that lists one source per line",
+    )
+    corpus.add_argument("--output", required=True, help="the output directory")
+    corpus.add_argument("--format", default="jsonl", choices=["jsonl", "txt"])
+    corpus.add_argument(
+        "--chunk-size",
+        type=int,
+        default=100,
+        help="number of sources in each work unit and output shard",
+    )
+    corpus.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="number of worker processes, default is the CPU count",
+    )
+    corpus.add_argument("--quiet", action="store_true", help="don't print progress")
+    corpus.set_defaults(func=_corpus)
+    return parser
+
+
+def main(argv: T.Optional[T.List[str]] = None) -> int:
+    args = make_parser().parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,208 @@
+# -*- coding: utf-8 -*-
+
+"""
+Pooled boto3 clients for the parallel helpers.
+
+A botocore client keeps at most ``max_pool_connections`` (default 10) HTTP
+connections. When more threads share one client, the extra requests wait for
+a free connection and urllib3 logs "Connection pool is full, discarding
+connection". :class:`ClientFactory` creates the clients through
+``boto_session_manager.BotoSesManager`` with a connection pool sized to the
+number of workers, the ``adaptive`` retry mode (client side rate limiting on
+throttles) and TCP keep-alive. The clients are cached and created once per
+process, boto3 clients are thread safe, so all threads share them.
+
+The factory only holds plain settings, it is picklable, so
+``factory.get_s3_client`` can be the ``s3_client_factory`` of the process pool
+helpers, each worker process creates its own client.
+
+The thread pool helpers (the sharded listing, the sharded job starter and the
+sync batch APIs) call :func:`check_pool_size` with the client you give them and
+warn if its pool is smaller than the number of threads.
+
+Usage example::
+
+    factory = ClientFactory(max_workers=32, region_name="us-east-1")
+    keys = list_output_keys(
+        s3_client=factory.get_s3_client(),
+        s3bucket="my-bucket",
+        s3prefix="textract-output",
+        max_workers=32,
+    )
+    result = batch_detect_document_text(
+        textract_client=factory.get_textract_client(),
+        documents=documents,
+        max_workers=32,
+    )
+"""
+
+import typing as T
+import os
+import warnings
+import threading
+import dataclasses
+
+if T.TYPE_CHECKING:  # pragma: no cover
+    from botocore.config import Config
+    from boto_session_manager import BotoSesManager
+    from mypy_boto3_s3 import S3Client
+    from mypy_boto3_textract import TextractClient
+
+#: botocore default ``max_pool_connections``
+DEFAULT_MAX_POOL_CONNECTIONS = 10
+
+
+def get_thread_pool_size(max_workers: T.Optional[int] = None) -> int:
+    """
+    The number of threads of ``ThreadPoolExecutor(max_workers=max_workers)``.
+    """
+    if max_workers is None:
+        return min(32, (os.cpu_count() or 1) + 4)
+    return max_workers
+
+
+def get_client_config(
+    max_workers: T.Optional[int] = None,
+    retry_mode: str = "adaptive",
+    max_attempts: int = 10,
+    tcp_keepalive: bool = True,
+    **kwargs,
+) -> "Config":
+    """
+    Create the botocore client config for ``max_workers`` threads.
+
+    :param max_workers: number of threads sharing the client, the pool has at
+        least this many connections. None means the default thread pool size.
+    :param retry_mode: "legacy" | "standard" | "adaptive".
+    :param max_attempts: the max number of attempts, including the first call.
+    :param tcp_keepalive: keep the idle connections alive.
+    :param kwargs: other arguments of ``botocore.config.Config``.
+    """
+    from botocore.config import Config
+
+    return Config(
+        max_pool_connections=max(
+            DEFAULT_MAX_POOL_CONNECTIONS,
+            get_thread_pool_size(max_workers),
+        ),
+        retries={"mode": retry_mode, "max_attempts": max_attempts},
+        tcp_keepalive=tcp_keepalive,
+        **kwargs,
+    )
+
+
+@dataclasses.dataclass
+class ClientFactory:
+    """
+    Create and cache the pooled boto3 clients, see :func:`get_client_config`.
+
+    :param max_workers: number of threads sharing each client.
+    :param profile_name: the AWS CLI profile, None means the default
+        credential chain.
+    :param region_name: None means the default region.
+    :param retry_mode: see :func:`get_client_config`.
+    :param max_attempts: see :func:`get_client_config`.
+    :param tcp_keepalive: see :func:`get_client_config`.
+    """
+
+    max_workers: T.Optional[int] = dataclasses.field(default=None)
+    profile_name: T.Optional[str] = dataclasses.field(default=None)
+    region_name: T.Optional[str] = dataclasses.field(default=None)
+    retry_mode: str = dataclasses.field(default="adaptive")
+    max_attempts: int = dataclasses.field(default=10)
+    tcp_keepalive: bool = dataclasses.field(default=True)
+
+    def __post_init__(self):
+        self._lock = threading.Lock()
+        self._pid: T.Optional[int] = None
+        self._bsm: T.Optional["BotoSesManager"] = None
+
+    def __getstate__(self) -> dict:
+        # the session, the clients and the lock don't cross processes
+        return {
+            field.name: getattr(self, field.name)
+            for field in dataclasses.fields(self)
+        }
+
+    def __setstate__(self, state: dict):
+        self.__dict__.update(state)
+        self.__post_init__()
+
+    @property
+    def config(self) -> "Config":
+        return get_client_config(
+            max_workers=self.max_workers,
+            retry_mode=self.retry_mode,
+            max_attempts=self.max_attempts,
+            tcp_keepalive=self.tcp_keepalive,
+        )
+
+    def _get_bsm(self) -> "BotoSesManager":
+        # a forked child process must not reuse the parent's connections
+        if self._bsm is None or self._pid != os.getpid():
+            from boto_session_manager import BotoSesManager
+
+            # BotoSesManager.get_client() ignores its own keyword arguments
+            # when default_client_kwargs is empty, so set both
+            kwargs = dict(default_client_kwargs=dict(config=self.config))
+            if self.profile_name is not None:
+                kwargs["profile_name"] = self.profile_name
+            if self.region_name is not None:
+                kwargs["region_name"] = self.region_name
+            self._bsm = BotoSesManager(**kwargs)
+            self._pid = os.getpid()
+        return self._bsm
+
+    @property
+    def bsm(self) -> "BotoSesManager":
+        """
+        The boto session manager of the current process.
+        """
+        with self._lock:
+            return self._get_bsm()
+
+    def get_client(self, service_name: str):
+        """
+        Get the cached client of the service, thread safe.
+        """
+        # boto3 session is not thread safe, create the client under the lock
+        with self._lock:
+            return self._get_bsm().get_client(service_name, config=self.config)
+
+    def get_s3_client(self) -> "S3Client":
+        return self.get_client("s3")
+
+    def get_textract_client(self) -> "TextractClient":
+        return self.get_client("textract")
+
+
+def get_pool_size(client) -> T.Optional[int]:
+    """
+    The ``max_pool_connections`` of a boto3 client, None if it is not a
+    boto3 client.
+    """
+    try:
+        return client.meta.config.max_pool_connections
+    except AttributeError:
+        return None
+
+
+def check_pool_size(client, max_workers: T.Optional[int] = None) -> bool:
+    """
+    Warn if the connection pool of the client is smaller than the number of
+    threads that share it.
+
+    :return: True if the pool is large enough, or the pool size is unknown.
+    """
+    pool_size = get_pool_size(client)
+    n_threads = get_thread_pool_size(max_workers)
+    if pool_size is None or pool_size >= n_threads:
+        return True
+    warnings.warn(
+        f"{n_threads} threads share a client with max_pool_connections = "
+        f"{pool_size}, the requests will wait for a free connection. "
+        f"Create the client with aws_textract.clients.ClientFactory"
+        f"(max_workers={n_threads}).",
+        stacklevel=3,
+    )
+    return False
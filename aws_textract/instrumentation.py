@@ -0,0 +1,357 @@
+# -*- coding: utf-8 -*-
+
+"""
+Lightweight instrumentation hooks.
+
+The Textract API calls, the job polling and the S3 output merging emit
+structured timing and counter :class:`Event`. Register one or more
+:class:`Hook` to receive them. When no hook is registered, the instrumented
+code paths skip the timing entirely, so the overhead is one truthiness check.
+
+Usage example::
+
+    import logging
+    from aws_textract.instrumentation import (
+        LoggingHook,
+        MetricsRegistryHook,
+        use_hooks,
+    )
+
+    registry = MetricsRegistryHook()
+    with use_hooks(registry, LoggingHook()):
+        res = merge_document_analysis_result(s3_client, s3dir)
+    print(registry.render())
+"""
+
+import typing as T
+import enum
+import time
+import logging
+import threading
+import contextlib
+import dataclasses
+
+
+class EventNameEnum(str, enum.Enum):
+    """
+    All the event names emitted by this package.
+    """
+
+    # textract API
+    API_CALL_LATENCY = "textract_api_call_latency_seconds"
+    API_THROTTLE = "textract_api_throttle_total"
+    GET_RESULT_PAGES = "textract_get_result_pages_total"
+    # job polling
+    WAIT_POLL = "textract_wait_poll_total"
+    WAIT_TIME = "textract_wait_time_seconds"
+    # S3 output merging
+    S3_LIST_LATENCY = "s3_list_latency_seconds"
+    S3_GET_LATENCY = "s3_get_latency_seconds"
+    S3_BYTES_DOWNLOADED = "s3_bytes_downloaded_total"
+    S3_THROTTLE = "s3_throttle_total"
+    JSON_PARSE_TIME = "json_parse_time_seconds"
+    MERGE_PARTS = "merge_parts_total"
+
+
+class EventKindEnum(str, enum.Enum):
+    TIMING = "timing"
+    COUNTER = "counter"
+
+
+@dataclasses.dataclass(frozen=True)
+class Event:
+    """
+    A structured instrumentation event.
+
+    :param name: the event name, one of :class:`EventNameEnum`.
+    :param kind: timing (value is seconds) or counter (value is the increment).
+    :param value: the measured value.
+    :param tags: extra dimensions, for example ``{"operation": "get_document_analysis"}``.
+    """
+
+    name: str = dataclasses.field()
+    kind: str = dataclasses.field()
+    value: float = dataclasses.field()
+    tags: T.Dict[str, str] = dataclasses.field(default_factory=dict)
+
+
+class Hook:
+    """
+    Base class of the instrumentation hook. Override :meth:`on_event`.
+    Hooks may be called from multiple threads concurrently.
+    """
+
+    def on_event(self, event: Event):  # pragma: no cover
+        raise NotImplementedError
+
+
+# copy on write, so the emitters can read it without a lock
+_hooks: T.Tuple[Hook, ...] = tuple()
+_hooks_lock = threading.Lock()
+
+
+def register_hook(hook: Hook):
+    """
+    Start sending events to the hook.
+    """
+    global _hooks
+    with _hooks_lock:
+        if hook not in _hooks:
+            _hooks = _hooks + (hook,)
+
+
+def unregister_hook(hook: Hook):
+    """
+    Stop sending events to the hook.
+    """
+    global _hooks
+    with _hooks_lock:
+        _hooks = tuple(h for h in _hooks if h is not hook)
+
+
+@contextlib.contextmanager
+def use_hooks(*hooks: Hook):
+    """
+    Register the hooks in a ``with`` block.
+    """
+    for hook in hooks:
+        register_hook(hook)
+    try:
+        yield
+    finally:
+        for hook in hooks:
+            unregister_hook(hook)
+
+
+def is_enabled() -> bool:
+    """
+    Whether there is any registered hook. The instrumented code uses it to
+    skip the measurement.
+    """
+    return bool(_hooks)
+
+
+def emit(
+    name: EventNameEnum,
+    kind: EventKindEnum,
+    value: float,
+    **tags: str,
+):
+    """
+    Send an event to all registered hooks. A failed hook never breaks the
+    instrumented code.
+    """
+    if not _hooks:
+        return
+    event = Event(name=name.value, kind=kind.value, value=value, tags=tags)
+    for hook in _hooks:
+        try:
+            hook.on_event(event)
+        except Exception:  # pragma: no cover
+            logging.getLogger(__name__).exception("instrumentation hook failed")
+
+
+def emit_timing(name: EventNameEnum, seconds: float, **tags: str):
+    emit(name, EventKindEnum.TIMING, seconds, **tags)
+
+
+def emit_counter(name: EventNameEnum, value: float = 1, **tags: str):
+    emit(name, EventKindEnum.COUNTER, value, **tags)
+
+
+THROTTLING_ERROR_CODES = {
+    "ThrottlingException",
+    "ProvisionedThroughputExceededException",
+    "LimitExceededException",
+    "TooManyRequestsException",
+    "RequestLimitExceeded",
+    "SlowDown",
+}
+
+
+def is_throttling_error(e: Exception) -> bool:
+    """
+    Check if the exception is a botocore ``ClientError`` caused by throttling.
+    """
+    try:
+        return e.response["Error"]["Code"] in THROTTLING_ERROR_CODES
+    except (AttributeError, KeyError, TypeError):
+        return False
+
+
+def call_with_instrumentation(
+    func: T.Callable,
+    latency_event: EventNameEnum,
+    throttle_event: EventNameEnum,
+    operation: str,
+    **kwargs,
+):
+    """
+    Call ``func(**kwargs)``, emit its latency and count throttling errors.
+    """
+    if not _hooks:
+        return func(**kwargs)
+    start = time.perf_counter()
+    try:
+        return func(**kwargs)
+    except Exception as e:
+        if is_throttling_error(e):
+            emit_counter(throttle_event, operation=operation)
+        raise
+    finally:
+        emit_timing(latency_event, time.perf_counter() - start, operation=operation)
+
+
+# ------------------------------------------------------------------------------
+# Adapters
+# ------------------------------------------------------------------------------
+class LoggingHook(Hook):
+    """
+    Log every event as one line, for example::
+
+        textract_api_call_latency_seconds timing=0.153211 operation=get_document_analysis
+
+    :param logger: the logger to use, default is ``aws_textract.instrumentation``.
+    :param level: the log level.
+    """
+
+    def __init__(
+        self,
+        logger: T.Optional[logging.Logger] = None,
+        level: int = logging.DEBUG,
+    ):
+        self.logger = logger or logging.getLogger(__name__)
+        self.level = level
+
+    def on_event(self, event: Event):
+        if self.logger.isEnabledFor(self.level):
+            tags = " ".join(f"{k}={v}" for k, v in sorted(event.tags.items()))
+            self.logger.log(
+                self.level,
+                "%s %s=%s %s",
+                event.name,
+                event.kind,
+                event.value,
+                tags,
+                extra={"event": dataclasses.asdict(event)},
+            )
+
+
+#: the default histogram buckets in seconds, the same as the Prometheus client.
+DEFAULT_BUCKETS = (
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.075,
+    0.1,
+    0.25,
+    0.5,
+    0.75,
+    1.0,
+    2.5,
+    5.0,
+    7.5,
+    10.0,
+    float("inf"),
+)
+
+T_LABELS = T.Tuple[T.Tuple[str, str], ...]
+
+
+@dataclasses.dataclass
+class Histogram:
+    buckets: T.Tuple[float, ...] = dataclasses.field()
+    counts: T.List[int] = dataclasses.field()
+    sum: float = dataclasses.field(default=0.0)
+    count: int = dataclasses.field(default=0)
+
+    def observe(self, value: float):
+        self.sum += value
+        self.count += 1
+        for i, upper in enumerate(self.buckets):
+            if value <= upper:
+                self.counts[i] += 1
+
+
+class MetricsRegistryHook(Hook):
+    """
+    A Prometheus style in-memory metrics registry. Counter events are summed
+    into counters, timing events are observed into histograms. Each unique
+    combination of event name and tags is a time series.
+
+    :param buckets: the upper bounds of the histogram buckets.
+    """
+
+    def __init__(self, buckets: T.Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counters: T.Dict[str, T.Dict[T_LABELS, float]] = dict()
+        self.histograms: T.Dict[str, T.Dict[T_LABELS, Histogram]] = dict()
+        self._lock = threading.Lock()
+
+    def on_event(self, event: Event):
+        labels = tuple(sorted(event.tags.items()))
+        with self._lock:
+            if event.kind == EventKindEnum.COUNTER.value:
+                series = self.counters.setdefault(event.name, dict())
+                series[labels] = series.get(labels, 0) + event.value
+            else:
+                series = self.histograms.setdefault(event.name, dict())
+                try:
+                    histogram = series[labels]
+                except KeyError:
+                    histogram = Histogram(
+                        buckets=self.buckets, counts=[0] * len(self.buckets)
+                    )
+                    series[labels] = histogram
+                histogram.observe(event.value)
+
+    def get_counter(self, name: EventNameEnum, **tags: str) -> float:
+        """
+        Get the current value of a counter time series, 0 if not exists.
+        """
+        return self.counters.get(name.value, {}).get(tuple(sorted(tags.items())), 0)
+
+    def get_histogram(
+        self,
+        name: EventNameEnum,
+        **tags: str,
+    ) -> T.Optional[Histogram]:
+        """
+        Get the histogram of a timing time series, None if not exists.
+        """
+        return self.histograms.get(name.value, {}).get(tuple(sorted(tags.items())))
+
+    def reset(self):
+        with self._lock:
+            self.counters.clear()
+            self.histograms.clear()
+
+    def render(self) -> str:
+        """
+        Render all metrics in the Prometheus text exposition format.
+        """
+
+        def fmt_labels(labels: T_LABELS, extra: T.Optional[T_LABELS] = None) -> str:
+            labels = labels + (extra or ())
+            if not labels:
+                return ""
+            return "{" + ",".join(f'{k}="{v}"' for k, v in labels) + "}"
+
+        lines = list()
+        with self._lock:
+            for name, series in sorted(self.counters.items()):
+                lines.append(f"# TYPE {name} counter")
+                for labels, value in sorted(series.items()):
+                    lines.append(f"{name}{fmt_labels(labels)} {value}")
+            for name, series in sorted(self.histograms.items()):
+                lines.append(f"# TYPE {name} histogram")
+                for labels, histogram in sorted(series.items()):
+                    for upper, count in zip(histogram.buckets, histogram.counts):
+                        le = "+Inf" if upper == float("inf") else str(upper)
+                        lines.append(
+                            f"{name}_bucket{fmt_labels(labels, (('le', le),))} {count}"
+                        )
+                    lines.append(f"{name}_sum{fmt_labels(labels)} {histogram.sum}")
+                    lines.append(f"{name}_count{fmt_labels(labels)} {histogram.count}")
+        return "\n".join(lines) + "\n"
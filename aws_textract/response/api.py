@@ -1,10 +1,82 @@
 # -*- coding: utf-8 -*-
 
+import typing as T
+
 from .contants import BlockTypeEnum
 from .utils import blocks_to_text
 from .utils import split_blocks_by_page
-from .merge import get_textract_output_s3dir
-from .merge import merge_document_analysis_result
-from .merge import merge_document_text_detection_result
-from .merge import merge_expense_analysis_result
-from .merge import merge_lending_analysis_result
+from .expense import ExpenseTables
+from .expense import ExpenseTableBuilder
+from .expense import expense_documents_to_tables
+from .expense import iter_expense_table_batches
+from .lending import get_lending_page_type
+from .lending import LendingPageIndex
+from .queries import QueryAnswer
+from .queries import QueryResults
+from .queries import QueryMatrix
+from .text_offsets import SpanHit
+from .text_offsets import TextOffsetMap
+from .word_index import normalize_term
+from .word_index import WordHit
+from .word_index import WordIndex
+from .block_table import BLOCK_COLUMNS
+from .block_table import get_block_arrow_schema
+from .block_table import BlockTableBuilder
+from .block_table import blocks_to_record_batch
+from .block_table import iter_block_record_batches
+from .block_table import write_blocks_to_parquet
+from .geometry import BlockGeometry
+from .geometry import get_block_geometry
+from .geometry import merge_adjacent_boxes
+from .geometry import boxes_to_mask
+from .layout import LayoutNode
+from .layout import LayoutTree
+from .corpus import CorpusFormatEnum
+from .corpus import CorpusBuildResult
+from .corpus import build_text_corpus
+from .projection import MINIMAL_FIELDS
+from .projection import Projection
+from .stream import iter_json_array_items
+from .stream import iter_textract_output_items
+from .pages import PageOutput
+from .pages import iter_pages
+from .pages import iter_pages_from_s3
+from .compaction import CompressionEnum
+from .compaction import CompactedIndex
+from .compaction import encode_compacted
+from .compaction import decode_compacted
+from .compaction import compact_textract_output
+from .compaction import read_compacted_response
+from .compaction import read_compacted_index
+from .compaction import read_compacted_pages
+from .listing import group_output_keys_by_job_id
+from .listing import make_hex_shard_prefixes
+from .listing import list_output_keys
+from .listing import OutputManifest
+from .listing import build_output_manifest
+from .._lazy import lazy_module_attributes
+
+# the following modules depend on s3pathlib and boto3, import them on demand
+if T.TYPE_CHECKING:  # pragma: no cover
+    from .merge import get_textract_output_s3dir
+    from .merge import merge_document_analysis_result
+    from .merge import merge_document_text_detection_result
+    from .merge import merge_expense_analysis_result
+    from .merge import merge_lending_analysis_result
+    from .bulk import list_textract_output_by_job_id
+    from .bulk import BulkMergeResult
+    from .bulk import bulk_merge_textract_output
+
+__getattr__, __dir__ = lazy_module_attributes(
+    globals(),
+    {
+        "get_textract_output_s3dir": (".merge", "get_textract_output_s3dir"),
+        "merge_document_analysis_result": (".merge", "merge_document_analysis_result"),
+        "merge_document_text_detection_result": (".merge", "merge_document_text_detection_result"),
+        "merge_expense_analysis_result": (".merge", "merge_expense_analysis_result"),
+        "merge_lending_analysis_result": (".merge", "merge_lending_analysis_result"),
+        "list_textract_output_by_job_id": (".bulk", "list_textract_output_by_job_id"),
+        "BulkMergeResult": (".bulk", "BulkMergeResult"),
+        "bulk_merge_textract_output": (".bulk", "bulk_merge_textract_output"),
+    },
+)
@@ -0,0 +1,264 @@
+# -*- coding: utf-8 -*-
+
+"""
+Export Textract blocks to Arrow record batches and Parquet files.
+
+Loading the blocks into a data lake by dumping JSON and parsing it again in
+Spark is expensive. This module flattens the blocks of many merged responses
+(``get_document_analysis`` / ``merge_document_analysis_result`` ...) into one
+row per block with a fixed schema (:data:`BLOCK_COLUMNS`), and writes them
+to Parquet batch by batch, one or more row groups per batch, so the memory
+stays bounded no matter how many documents go into one file.
+
+Requires ``pyarrow`` for the Arrow / Parquet conversion.
+
+Usage example::
+
+    def responses():
+        for job_id in job_ids:
+            s3dir = get_textract_output_s3dir(bucket, prefix, job_id)
+            yield job_id, merge_document_analysis_result(s3_client, s3dir)
+
+    n_rows = write_blocks_to_parquet(responses(), "/tmp/blocks.parquet")
+"""
+
+import typing as T
+
+if T.TYPE_CHECKING:  # pragma: no cover
+    import pyarrow
+    from mypy_boto3_textract.type_defs import BlockTypeDef
+    from mypy_boto3_textract.type_defs import GetDocumentAnalysisResponseTypeDef
+
+#: column name -> arrow type name of the block table.
+BLOCK_COLUMNS = {
+    "document_id": "string",
+    "id": "string",
+    "page": "int32",
+    "block_type": "string",
+    "text": "string",
+    "text_type": "string",
+    "confidence": "float32",
+    "bbox_left": "float32",
+    "bbox_top": "float32",
+    "bbox_width": "float32",
+    "bbox_height": "float32",
+    "parent_id": "string",
+    "row_index": "int32",
+    "column_index": "int32",
+}
+
+
+def new_columns(columns: T.Dict[str, str]) -> T.Dict[str, list]:
+    """
+    Create the empty column lists of a ``column name -> arrow type name``
+    mapping, such as :data:`BLOCK_COLUMNS`.
+    """
+    return {name: list() for name in columns}
+
+
+def get_arrow_schema(columns: T.Dict[str, str]) -> "pyarrow.Schema":
+    """
+    The ``pyarrow.Schema`` of a ``column name -> arrow type name`` mapping.
+    """
+    import pyarrow as pa
+
+    return pa.schema([(name, getattr(pa, type_)()) for name, type_ in columns.items()])
+
+
+def columns_to_arrow_table(
+    data: T.Dict[str, list],
+    columns: T.Dict[str, str],
+) -> "pyarrow.Table":
+    """
+    Convert the column lists to a ``pyarrow.Table`` with the schema of
+    ``columns``, see :func:`get_arrow_schema`.
+    """
+    import pyarrow as pa
+
+    return pa.Table.from_pydict(data, schema=get_arrow_schema(columns))
+
+
+def get_block_arrow_schema() -> "pyarrow.Schema":
+    """
+    The ``pyarrow.Schema`` of :data:`BLOCK_COLUMNS`.
+    """
+    return get_arrow_schema(BLOCK_COLUMNS)
+
+
+def get_parent_ids(blocks: T.Iterable["BlockTypeDef"]) -> T.Dict[str, str]:
+    """
+    Get the child block id to parent block id mapping from the ``CHILD``
+    relationships. A ``WORD`` is the child of a ``LINE`` and maybe also of a
+    ``CELL`` or ``KEY_VALUE_SET``, the first parent in the block order wins,
+    which is the ``LINE`` in the Textract output.
+    """
+    mapper = dict()
+    setdefault = mapper.setdefault
+    for block in blocks:
+        for rel in block.get("Relationships", []):
+            if rel["Type"] == "CHILD":
+                parent_id = block["Id"]
+                for child_id in rel["Ids"]:
+                    setdefault(child_id, parent_id)
+    return mapper
+
+
+class BlockTableBuilder:
+    """
+    Incrementally flatten Textract blocks into columns (dict of lists),
+    one row per block.
+    """
+
+    def __init__(self):
+        self.columns: T.Dict[str, list] = new_columns(BLOCK_COLUMNS)
+
+    @property
+    def n_rows(self) -> int:
+        return len(self.columns["id"])
+
+    def add(
+        self,
+        response: T.Union[
+            "GetDocumentAnalysisResponseTypeDef",
+            T.List["BlockTypeDef"],
+        ],
+        document_id: str = "",
+    ):
+        """
+        Append the blocks of one response.
+
+        :param response: the merged response, or its ``Blocks`` list.
+        :param document_id: an identifier of the response that goes into the
+            ``document_id`` column, for example the job id or the S3 uri.
+        """
+        if isinstance(response, dict):
+            blocks = response.get("Blocks", [])
+        else:
+            blocks = response
+        parent_ids = get_parent_ids(blocks)
+
+        # bind the list.append methods once, this is the hot loop
+        columns = self.columns
+        c_document_id = columns["document_id"].append
+        c_id = columns["id"].append
+        c_page = columns["page"].append
+        c_block_type = columns["block_type"].append
+        c_text = columns["text"].append
+        c_text_type = columns["text_type"].append
+        c_confidence = columns["confidence"].append
+        c_left = columns["bbox_left"].append
+        c_top = columns["bbox_top"].append
+        c_width = columns["bbox_width"].append
+        c_height = columns["bbox_height"].append
+        c_parent_id = columns["parent_id"].append
+        c_row_index = columns["row_index"].append
+        c_column_index = columns["column_index"].append
+
+        empty = {}
+        for block in blocks:
+            block_id = block["Id"]
+            box = block.get("Geometry", empty).get("BoundingBox", empty)
+            c_document_id(document_id)
+            c_id(block_id)
+            c_page(block.get("Page", 1))
+            c_block_type(block["BlockType"])
+            c_text(block.get("Text"))
+            c_text_type(block.get("TextType"))
+            c_confidence(block.get("Confidence"))
+            c_left(box.get("Left"))
+            c_top(box.get("Top"))
+            c_width(box.get("Width"))
+            c_height(box.get("Height"))
+            c_parent_id(parent_ids.get(block_id))
+            c_row_index(block.get("RowIndex"))
+            c_column_index(block.get("ColumnIndex"))
+
+    def build(self) -> T.Dict[str, list]:
+        """
+        Return the columns and start a new empty batch.
+        """
+        columns = self.columns
+        self.columns = new_columns(BLOCK_COLUMNS)
+        return columns
+
+    def build_record_batch(self) -> "pyarrow.RecordBatch":
+        """
+        Return the columns as a ``pyarrow.RecordBatch`` and start a new empty
+        batch. Requires ``pyarrow``.
+        """
+        import pyarrow as pa
+
+        return pa.RecordBatch.from_pydict(
+            self.build(),
+            schema=get_block_arrow_schema(),
+        )
+
+
+def blocks_to_record_batch(
+    response: T.Union["GetDocumentAnalysisResponseTypeDef", T.List["BlockTypeDef"]],
+    document_id: str = "",
+) -> "pyarrow.RecordBatch":
+    """
+    Convert the blocks of one response to a ``pyarrow.RecordBatch``.
+    """
+    builder = BlockTableBuilder()
+    builder.add(response, document_id=document_id)
+    return builder.build_record_batch()
+
+
+def iter_block_record_batches(
+    responses: T.Iterable[T.Tuple[str, "GetDocumentAnalysisResponseTypeDef"]],
+    batch_size: int = 100_000,
+) -> T.Iterator["pyarrow.RecordBatch"]:
+    """
+    Convert the blocks of many responses to ``pyarrow.RecordBatch``, a batch
+    is yielded once it has at least ``batch_size`` rows.
+
+    :param responses: iterable of ``(document_id, response)``.
+    :param batch_size: the minimal number of rows in each batch, except the last one.
+    """
+    builder = BlockTableBuilder()
+    for document_id, response in responses:
+        builder.add(response, document_id=document_id)
+        if builder.n_rows >= batch_size:
+            yield builder.build_record_batch()
+    if builder.n_rows:
+        yield builder.build_record_batch()
+
+
+def write_blocks_to_parquet(
+    responses: T.Iterable[T.Tuple[str, "GetDocumentAnalysisResponseTypeDef"]],
+    path: str,
+    batch_size: int = 100_000,
+    row_group_size: T.Optional[int] = None,
+    compression: str = "zstd",
+    filesystem=None,
+) -> int:
+    """
+    Write the blocks of many responses to one Parquet file, batch by batch.
+
+    :param responses: iterable of ``(document_id, response)``, it can be
+        a generator, only one batch is held in memory at a time.
+    :param path: the output file path.
+    :param batch_size: see :func:`iter_block_record_batches`.
+    :param row_group_size: the max number of rows in each row group,
+        default is one row group per batch.
+    :param compression: the Parquet compression codec.
+    :param filesystem: an optional ``pyarrow.fs.FileSystem``, for example
+        ``pyarrow.fs.S3FileSystem``.
+
+    :return: number of rows written.
+    """
+    import pyarrow.parquet as pq
+
+    n_rows = 0
+    with pq.ParquetWriter(
+        path,
+        schema=get_block_arrow_schema(),
+        compression=compression,
+        filesystem=filesystem,
+    ) as writer:
+        for batch in iter_block_record_batches(responses, batch_size=batch_size):
+            writer.write_batch(batch, row_group_size=row_group_size)
+            n_rows += batch.num_rows
+    return n_rows
@@ -0,0 +1,324 @@
+# -*- coding: utf-8 -*-
+
+"""
+Bulk version of :mod:`aws_textract.response.merge`.
+
+The ``merge_xyz_result()`` functions handle one job id at a time, and each call
+lists the job output directory before reading the parts. When you need to
+reprocess many historical jobs (for example, a backfill), this module lists the
+whole output prefix once (sharded by key prefix so the listing runs in parallel,
+see :mod:`aws_textract.response.listing`), groups the part files by job id, then merges the jobs across a process pool and
+writes the merged responses to a partitioned local directory.
+
+The progress is recorded in a JSON lines file in the output directory, so an
+interrupted run can be resumed by calling the same function again.
+"""
+
+import typing as T
+import json
+import dataclasses
+import concurrent.futures
+from pathlib import Path
+
+from s3pathlib import S3Path
+
+from ..clients import ClientFactory
+from .merge import _merge_textract_response_parts
+from .compaction import read_compacted_response
+from .listing import HEX_SHARD_PREFIXES
+from .listing import group_output_keys_by_job_id
+from .listing import list_output_keys
+from .listing import OutputManifest
+
+if T.TYPE_CHECKING:  # pragma: no cover
+    from mypy_boto3_s3 import S3Client
+    from .projection import Projection
+
+
+PROGRESS_FILENAME = "_progress.jsonl"
+
+
+def list_textract_output_by_job_id(
+    s3_client: "S3Client",
+    s3bucket: str,
+    s3prefix: str,
+    shard_prefixes: T.Iterable[str] = HEX_SHARD_PREFIXES,
+    max_workers: T.Optional[int] = None,
+    dir_checkpoint: T.Optional[T.Union[str, Path]] = None,
+) -> T.Dict[str, T.List[str]]:
+    """
+    List all Textract output part files under the output prefix **once**,
+    and group them by job id.
+
+    The keyspace is split into shards by the leading characters of the job id,
+    each shard is listed in its own thread, see
+    :func:`~aws_textract.response.listing.list_output_keys`.
+
+    :param s3_client: the boto3 S3 client. boto3 client is thread safe.
+    :param s3bucket: the OutputConfig["S3Bucket"] in ``start_xyz()`` async API.
+    :param s3prefix: the OutputConfig["S3Prefix"] in ``start_xyz()`` async API.
+    :param shard_prefixes: the job id prefixes used to shard the listing, they
+        have to cover all job ids. Use ``("",)`` to disable sharding.
+    :param max_workers: number of listing threads.
+    :param dir_checkpoint: a local directory to checkpoint the listing
+        progress, so an interrupted listing can be resumed.
+
+    :return: a dictionary where the key is the job id and the value is the
+        sorted list of part keys.
+    """
+    keys = list_output_keys(
+        s3_client=s3_client,
+        s3bucket=s3bucket,
+        s3prefix=s3prefix,
+        shard_prefixes=shard_prefixes,
+        max_workers=max_workers,
+        dir_checkpoint=dir_checkpoint,
+    )
+    return group_output_keys_by_job_id(s3prefix.strip("/"), keys)
+
+
+@dataclasses.dataclass
+class BulkMergeResult:
+    """
+    The summary of a :func:`bulk_merge_textract_output` run.
+
+    :param succeeded: job ids merged in this run.
+    :param skipped: job ids already merged in a previous run.
+    :param failed: job id to error message mapping, failed jobs will be
+        retried in the next run.
+    """
+
+    succeeded: T.List[str] = dataclasses.field(default_factory=list)
+    skipped: T.List[str] = dataclasses.field(default_factory=list)
+    failed: T.Dict[str, str] = dataclasses.field(default_factory=dict)
+
+
+def get_partitioned_output_path(
+    dir_output: Path,
+    job_id: str,
+    n_partition_chars: int = 2,
+) -> Path:
+    """
+    Get the local path of the merged response of a job, for example
+    ``${dir_output}/3b/3b2be6c6....json``.
+    """
+    return dir_output.joinpath(job_id[:n_partition_chars], f"{job_id}.json")
+
+
+def read_progress(dir_output: Path) -> T.Dict[str, dict]:
+    """
+    Read the progress file, return the last record of each job id.
+    """
+    path = dir_output.joinpath(PROGRESS_FILENAME)
+    progress = dict()
+    if path.exists():
+        with path.open("r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if line:
+                    record = json.loads(line)
+                    progress[record["job_id"]] = record
+    return progress
+
+
+_worker_s3_client: T.Optional["S3Client"] = None
+
+
+def _init_worker(s3_client_factory: T.Callable[[], "S3Client"]):  # pragma: no cover
+    global _worker_s3_client
+    _worker_s3_client = s3_client_factory()
+
+
+def _merge_one_job(
+    s3_client: T.Optional["S3Client"],
+    s3bucket: str,
+    part_keys: T.List[str],
+    key: str,
+    path_output: str,
+    projection: T.Optional["Projection"] = None,
+    compacted_s3dir_uri: T.Optional[str] = None,
+) -> str:
+    if s3_client is None:  # pragma: no cover
+        s3_client = _worker_s3_client
+    data = None
+    if compacted_s3dir_uri is not None:
+        data = read_compacted_response(
+            s3_client=s3_client,
+            s3dir=S3Path(compacted_s3dir_uri),
+            key=key,
+            projection=projection,
+        )
+    if data is None:
+        data = _merge_textract_response_parts(
+            s3_client=s3_client,
+            s3path_list=[S3Path(s3bucket, part_key) for part_key in part_keys],
+            key=key,
+            projection=projection,
+        )
+    path = Path(path_output)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    # write to a temp file then rename, so a killed worker never leaves
+    # a half written result
+    path_tmp = path.with_name(path.name + ".tmp")
+    path_tmp.write_text(json.dumps(data), encoding="utf-8")
+    path_tmp.replace(path)
+    return path_output
+
+
+def _default_s3_client_factory() -> "S3Client":  # pragma: no cover
+    return ClientFactory().get_s3_client()
+
+
+def bulk_merge_textract_output(
+    s3_client: "S3Client",
+    s3bucket: str,
+    s3prefix: str,
+    dir_output: T.Union[str, Path],
+    key: str = "Blocks",
+    projection: T.Optional["Projection"] = None,
+    job_id_to_part_keys: T.Optional[T.Dict[str, T.List[str]]] = None,
+    manifest: T.Optional[OutputManifest] = None,
+    shard_prefixes: T.Iterable[str] = HEX_SHARD_PREFIXES,
+    dir_checkpoint: T.Optional[T.Union[str, Path]] = None,
+    n_partition_chars: int = 2,
+    max_workers: T.Optional[int] = None,
+    use_process_pool: bool = True,
+    s3_client_factory: T.Callable[[], "S3Client"] = _default_s3_client_factory,
+    verbose: bool = True,
+) -> BulkMergeResult:
+    """
+    Merge the output of all Textract jobs under the output prefix, and write
+    the merged response of each job to
+    ``${dir_output}/${job_id[:n_partition_chars]}/${job_id}.json``.
+
+    Each finished job is appended to ``${dir_output}/_progress.jsonl``.
+    Run it again after an interruption, the jobs that already succeeded are
+    skipped and the failed jobs are retried.
+
+    Usage example::
+
+        result = bulk_merge_textract_output(
+            s3_client=boto3.client("s3"),
+            s3bucket="my-output-bucket",
+            s3prefix="my-folder/textract-output",
+            dir_output="/tmp/merged",
+            key="Blocks",
+        )
+        print(result.failed)
+
+    :param s3_client: the boto3 S3 client, used to list the output prefix,
+        and to merge jobs when ``use_process_pool`` is False.
+    :param s3bucket: the OutputConfig["S3Bucket"] in ``start_xyz()`` async API.
+    :param s3prefix: the OutputConfig["S3Prefix"] in ``start_xyz()`` async API.
+    :param dir_output: the local directory to store the merged responses.
+    :param key: "Blocks" | "ExpenseDocuments" | "Results".
+    :param projection: the fields and block types to keep in the merged
+        response, see :class:`~aws_textract.response.projection.Projection`.
+    :param job_id_to_part_keys: a pre-computed job id to part keys mapping,
+        if given, the listing step is skipped.
+    :param manifest: a pre-built :class:`~aws_textract.response.listing.OutputManifest`,
+        if given, the listing step is skipped and the compacted jobs are read
+        from their compacted object.
+    :param shard_prefixes: see :func:`list_textract_output_by_job_id`.
+    :param dir_checkpoint: see :func:`list_textract_output_by_job_id`.
+    :param n_partition_chars: number of leading job id characters used as
+        the partition directory name.
+    :param max_workers: number of worker processes (or threads for listing).
+    :param use_process_pool: if False, merge the jobs serially in the current
+        process with the given ``s3_client``.
+    :param s3_client_factory: a picklable callable that creates a new S3 client
+        in each worker process, boto3 client cannot be sent across processes.
+        For example ``ClientFactory(profile_name=...).get_s3_client``, the
+        default is a :class:`~aws_textract.clients.ClientFactory` with the
+        default credentials.
+    :param verbose: whether to print the progress.
+    """
+    dir_output = Path(dir_output)
+    dir_output.mkdir(parents=True, exist_ok=True)
+    if manifest is not None:
+        job_id_to_part_keys = {
+            job_id: manifest.get_part_keys(job_id) or []
+            for job_id in manifest.job_ids
+        }
+    elif job_id_to_part_keys is None:
+        job_id_to_part_keys = list_textract_output_by_job_id(
+            s3_client=s3_client,
+            s3bucket=s3bucket,
+            s3prefix=s3prefix,
+            shard_prefixes=shard_prefixes,
+            max_workers=max_workers,
+            dir_checkpoint=dir_checkpoint,
+        )
+
+    result = BulkMergeResult()
+    progress = read_progress(dir_output)
+    todo: T.List[T.Tuple[str, T.List[str]]] = list()
+    for job_id, part_keys in sorted(job_id_to_part_keys.items()):
+        record = progress.get(job_id)
+        if record is not None and record["status"] == "succeeded":
+            result.skipped.append(job_id)
+        else:
+            todo.append((job_id, part_keys))
+
+    total = len(todo)
+    if verbose:  # pragma: no cover
+        print(
+            f"found {len(job_id_to_part_keys)} jobs, "
+            f"{len(result.skipped)} already merged, {total} to merge."
+        )
+
+    with dir_output.joinpath(PROGRESS_FILENAME).open("a", encoding="utf-8") as f:
+
+        def on_done(job_id: str, error: T.Optional[Exception]):
+            if error is None:
+                result.succeeded.append(job_id)
+                record = dict(job_id=job_id, status="succeeded")
+            else:
+                result.failed[job_id] = repr(error)
+                record = dict(job_id=job_id, status="failed", error=repr(error))
+            f.write(json.dumps(record) + "\n")
+            f.flush()
+            if verbose:  # pragma: no cover
+                done = len(result.succeeded) + len(result.failed)
+                print(f"[{done}/{total}] {record['status']}: {job_id}")
+
+        def get_kwargs(job_id: str, part_keys: T.List[str]) -> dict:
+            compacted_s3dir_uri = None
+            if manifest is not None and manifest.is_compacted(job_id):
+                compacted_s3dir_uri = (
+                    S3Path(s3bucket).joinpath(s3prefix, job_id).to_dir().uri
+                )
+            return dict(
+                s3bucket=s3bucket,
+                part_keys=part_keys,
+                key=key,
+                projection=projection,
+                compacted_s3dir_uri=compacted_s3dir_uri,
+                path_output=str(
+                    get_partitioned_output_path(dir_output, job_id, n_partition_chars)
+                ),
+            )
+
+        if use_process_pool:  # pragma: no cover
+            with concurrent.futures.ProcessPoolExecutor(
+                max_workers=max_workers,
+                initializer=_init_worker,
+                initargs=(s3_client_factory,),
+            ) as executor:
+                future_to_job_id = {
+                    executor.submit(
+                        _merge_one_job, None, **get_kwargs(job_id, part_keys)
+                    ): job_id
+                    for job_id, part_keys in todo
+                }
+                for future in concurrent.futures.as_completed(future_to_job_id):
+                    on_done(future_to_job_id[future], future.exception())
+        else:
+            for job_id, part_keys in todo:
+                try:
+                    _merge_one_job(s3_client, **get_kwargs(job_id, part_keys))
+                    on_done(job_id, None)
+                except Exception as e:
+                    on_done(job_id, e)
+
+    return result
@@ -0,0 +1,411 @@
+# -*- coding: utf-8 -*-
+
+"""
+Compact the numbered Textract output part files into one compressed object.
+
+Every read of a finished job from S3 is one LIST plus one GET per ``1``,
+``2``, ``3`` ... part file. :func:`compact_textract_output` merges the parts
+once and writes them back as a single object at
+``s3://{bucket}/{prefix}/{job_id}/.compacted``, next to the parts. The
+``merge_xyz_result()`` functions in :mod:`aws_textract.response.merge` read
+the compacted object with one GET when their LIST of the directory finds it,
+a job that was never compacted costs no extra request.
+
+The compacted object is a sequence of independently compressed frames, gzip
+or zstd, followed by a fixed size footer::
+
+    [header frame]  the top level fields except the items, JSON object
+    [item frame]    the items of one page, JSON array
+    [item frame]    ...
+    [index frame]   the byte range and page number of each frame, JSON object
+    [footer]        index offset, index length, compression, magic
+
+So a few pages can be read with ranged GETs of the footer, the index and the
+wanted frames only, see :func:`read_compacted_pages`. The items are stored in
+their original order, a page that appears in several runs has several frames.
+
+``zstd`` requires the ``zstandard`` package.
+
+Usage example::
+
+    s3dir = get_textract_output_s3dir(bucket, prefix, job_id)
+    compact_textract_output(s3_client, s3dir, key="Blocks", compression="zstd")
+    # LIST + one GET instead of LIST + N GETs
+    res = merge_document_analysis_result(s3_client, s3dir)
+    # pages 3 and 4 only, 3 ranged GETs
+    res = read_compacted_pages(s3_client, s3dir, pages=[3, 4])
+"""
+
+import typing as T
+import enum
+import gzip
+import json
+import struct
+import dataclasses
+
+from .. import instrumentation as instr
+from ..instrumentation import EventNameEnum
+
+if T.TYPE_CHECKING:  # pragma: no cover
+    from s3pathlib import S3Path
+    from mypy_boto3_s3 import S3Client
+    from .projection import Projection
+
+
+COMPACTED_BASENAME = ".compacted"
+
+_MAGIC = b"TXC1"
+# index offset, index length, compression, magic
+_FOOTER = struct.Struct("<QQ4s4s")
+
+
+class CompressionEnum(str, enum.Enum):
+    gzip = "gzip"
+    zstd = "zstd"
+
+
+def _compress(data: bytes, compression: CompressionEnum) -> bytes:
+    if compression is CompressionEnum.gzip:
+        return gzip.compress(data, compresslevel=6, mtime=0)
+    else:
+        import zstandard
+
+        return zstandard.ZstdCompressor(level=3).compress(data)
+
+
+def _decompress(data: bytes, compression: CompressionEnum) -> bytes:
+    if compression is CompressionEnum.gzip:
+        return gzip.decompress(data)
+    else:
+        import zstandard
+
+        return zstandard.ZstdDecompressor().decompress(data)
+
+
+def get_item_page(item: dict) -> int:
+    """
+    The page number of a ``Blocks`` or ``Results`` item, the ``ExpenseIndex``
+    of an ``ExpenseDocuments`` item.
+    """
+    try:
+        return item["Page"]
+    except KeyError:
+        return item.get("ExpenseIndex", 0)
+
+
+def get_compacted_s3path(s3dir: "S3Path") -> T.Tuple[str, str]:
+    """
+    The bucket and key of the compacted object of a Textract output directory.
+    """
+    return s3dir.bucket, f"{s3dir.key}{COMPACTED_BASENAME}"
+
+
+@dataclasses.dataclass
+class CompactedIndex:
+    """
+    The index of a compacted object.
+
+    :param key: "Blocks" | "ExpenseDocuments" | "Results".
+    :param compression: the :class:`CompressionEnum` value.
+    :param header: the ``(offset, length)`` of the header frame.
+    :param frames: the ``{"page", "offset", "length", "count"}`` of each item
+        frame, in the original item order.
+    :param n_items: the total number of items.
+    """
+
+    key: str = dataclasses.field()
+    compression: str = dataclasses.field()
+    header: T.List[int] = dataclasses.field()
+    frames: T.List[dict] = dataclasses.field(default_factory=list)
+    n_items: int = dataclasses.field(default=0)
+
+    @property
+    def pages(self) -> T.List[int]:
+        return sorted({frame["page"] for frame in self.frames})
+
+    def to_dict(self) -> dict:
+        return dataclasses.asdict(self)
+
+
+def encode_compacted(
+    response: dict,
+    key: str,
+    compression: T.Union[CompressionEnum, str] = CompressionEnum.gzip,
+) -> bytes:
+    """
+    Encode a merged response into the compacted object bytes.
+
+    :param response: the merged response.
+    :param key: "Blocks" | "ExpenseDocuments" | "Results".
+    :param compression: see :class:`CompressionEnum`.
+    """
+    compression = CompressionEnum(compression)
+    chunks = list()
+    offset = 0
+
+    def add_frame(obj) -> T.Tuple[int, int]:
+        nonlocal offset
+        frame = _compress(json.dumps(obj).encode("utf-8"), compression)
+        chunks.append(frame)
+        start, offset = offset, offset + len(frame)
+        return start, len(frame)
+
+    header = {k: v for k, v in response.items() if k != key}
+    index = CompactedIndex(
+        key=key,
+        compression=compression.value,
+        header=list(add_frame(header)),
+    )
+    items = response.get(key, [])
+    i = 0
+    while i < len(items):
+        # one frame per run of items on the same page
+        page = get_item_page(items[i])
+        j = i + 1
+        while j < len(items) and get_item_page(items[j]) == page:
+            j += 1
+        frame_offset, frame_length = add_frame(items[i:j])
+        index.frames.append(
+            {
+                "page": page,
+                "offset": frame_offset,
+                "length": frame_length,
+                "count": j - i,
+            }
+        )
+        i = j
+    index.n_items = len(items)
+    index_offset, index_length = add_frame(index.to_dict())
+    chunks.append(
+        _FOOTER.pack(index_offset, index_length, compression.value.encode(), _MAGIC)
+    )
+    return b"".join(chunks)
+
+
+def _parse_footer(footer: bytes) -> T.Tuple[int, int, CompressionEnum]:
+    index_offset, index_length, compression, magic = _FOOTER.unpack(footer)
+    if magic != _MAGIC:
+        raise ValueError("not a compacted Textract output object")
+    return index_offset, index_length, CompressionEnum(compression.decode())
+
+
+def _decode_index(data: bytes, compression: CompressionEnum) -> CompactedIndex:
+    return CompactedIndex(**json.loads(_decompress(data, compression)))
+
+
+def decode_compacted(
+    body: bytes,
+    projection: T.Optional["Projection"] = None,
+) -> dict:
+    """
+    Decode the compacted object bytes back into the merged response.
+
+    :param projection: if given, each frame is projected right after it is
+        decoded, see :class:`~aws_textract.response.projection.Projection`.
+    """
+    index_offset, index_length, compression = _parse_footer(body[-_FOOTER.size :])
+    index = _decode_index(
+        body[index_offset : index_offset + index_length], compression
+    )
+    offset, length = index.header
+    response = json.loads(_decompress(body[offset : offset + length], compression))
+    key = index.key
+    items = list()
+    for frame in index.frames:
+        offset, length = frame["offset"], frame["length"]
+        frame_items = json.loads(
+            _decompress(body[offset : offset + length], compression)
+        )
+        if projection is not None:
+            frame_items = projection.project_items(key, frame_items)
+        items.extend(frame_items)
+    response[key] = items
+    return response
+
+
+def _get_object_bytes(
+    s3_client: "S3Client",
+    bucket: str,
+    key: str,
+    range_: T.Optional[str] = None,
+) -> bytes:
+    kwargs = dict(Bucket=bucket, Key=key)
+    if range_ is not None:
+        kwargs["Range"] = range_
+    res = instr.call_with_instrumentation(
+        s3_client.get_object,
+        latency_event=EventNameEnum.S3_GET_LATENCY,
+        throttle_event=EventNameEnum.S3_THROTTLE,
+        operation="get_object",
+        **kwargs,
+    )
+    body = res["Body"].read()
+    if instr.is_enabled():
+        instr.emit_counter(EventNameEnum.S3_BYTES_DOWNLOADED, len(body))
+    return body
+
+
+def _is_not_found(e: Exception) -> bool:
+    try:
+        return e.response["Error"]["Code"] in ("NoSuchKey", "404")
+    except (AttributeError, KeyError, TypeError):
+        return False
+
+
+def compact_textract_output(
+    s3_client: "S3Client",
+    s3dir: "S3Path",
+    key: str,
+    compression: T.Union[CompressionEnum, str] = CompressionEnum.gzip,
+    delete_parts: bool = False,
+) -> CompactedIndex:
+    """
+    Merge the numbered part files of a finished job and write them back as
+    one compacted object at ``${s3dir}/.compacted``.
+
+    :param s3_client: the boto3 S3 client.
+    :param s3dir: the S3 directory where the Textract response files are
+        stored, see :func:`~aws_textract.response.merge.get_textract_output_s3dir`.
+    :param key: "Blocks" | "ExpenseDocuments" | "Results".
+    :param compression: see :class:`CompressionEnum`.
+    :param delete_parts: whether to delete the part files after the compacted
+        object is written. The ``merge_xyz_result()`` functions only work with
+        the compacted object after that.
+
+    :return: the index of the compacted object.
+    """
+    from .merge import _list_output_parts
+    from .merge import _merge_textract_response_parts
+
+    s3path_list = _list_output_parts(s3_client, s3dir)
+    response = _merge_textract_response_parts(
+        s3_client=s3_client,
+        s3path_list=s3path_list,
+        key=key,
+    )
+    body = encode_compacted(response, key=key, compression=compression)
+    bucket, compacted_key = get_compacted_s3path(s3dir)
+    s3_client.put_object(
+        Bucket=bucket,
+        Key=compacted_key,
+        Body=body,
+        ContentType="application/octet-stream",
+    )
+    if delete_parts:
+        for s3path in s3path_list:
+            s3_client.delete_object(Bucket=s3path.bucket, Key=s3path.key)
+    index_offset, index_length, compression = _parse_footer(body[-_FOOTER.size :])
+    return _decode_index(body[index_offset : index_offset + index_length], compression)
+
+
+def read_compacted_response(
+    s3_client: "S3Client",
+    s3dir: "S3Path",
+    key: str,
+    projection: T.Optional["Projection"] = None,
+) -> T.Optional[dict]:
+    """
+    Read the merged response from the compacted object with one GET.
+
+    :return: the merged response, None if the job output is not compacted.
+    """
+    bucket, compacted_key = get_compacted_s3path(s3dir)
+    try:
+        body = _get_object_bytes(s3_client, bucket, compacted_key)
+    except Exception as e:
+        if _is_not_found(e):
+            return None
+        raise
+    response = decode_compacted(body, projection=projection)
+    if key not in response:
+        raise ValueError(f"the compacted object of {s3dir.uri} has no {key!r}")
+    return response
+
+
+def read_compacted_index(
+    s3_client: "S3Client",
+    s3dir: "S3Path",
+) -> CompactedIndex:
+    """
+    Read the index of the compacted object with two ranged GETs.
+    """
+    bucket, compacted_key = get_compacted_s3path(s3dir)
+    footer = _get_object_bytes(
+        s3_client, bucket, compacted_key, f"bytes=-{_FOOTER.size}"
+    )
+    index_offset, index_length, compression = _parse_footer(footer)
+    data = _get_object_bytes(
+        s3_client,
+        bucket,
+        compacted_key,
+        f"bytes={index_offset}-{index_offset + index_length - 1}",
+    )
+    return _decode_index(data, compression)
+
+
+def read_compacted_pages(
+    s3_client: "S3Client",
+    s3dir: "S3Path",
+    pages: T.Iterable[int],
+    projection: T.Optional["Projection"] = None,
+    index: T.Optional[CompactedIndex] = None,
+    max_gap: int = 256 * 1024,
+) -> dict:
+    """
+    Read the items of some pages from the compacted object with ranged GETs.
+    The header frame and the wanted frames that are less than ``max_gap``
+    bytes apart are fetched in the same GET, plus two ranged GETs for the
+    index if it is not given.
+
+    :param pages: the page numbers (the ``ExpenseIndex`` for expense analysis).
+    :param projection: see :class:`~aws_textract.response.projection.Projection`.
+    :param index: the index from :func:`read_compacted_index`, reuse it to
+        read many page ranges of the same object.
+    :param max_gap: two frames closer than this are fetched in one GET, the
+        bytes in between are downloaded and dropped.
+    """
+    if index is None:
+        index = read_compacted_index(s3_client, s3dir)
+    compression = CompressionEnum(index.compression)
+    pages = set(pages)
+    header_offset, header_length = index.header
+    wanted = [(header_offset, header_length)] + [
+        (frame["offset"], frame["length"])
+        for frame in index.frames
+        if frame["page"] in pages
+    ]
+
+    # coalesce the nearby frames into spans, one GET per span
+    spans: T.List[T.List[int]] = list()  # [start, end)
+    for offset, length in wanted:
+        if spans and offset - spans[-1][1] <= max_gap:
+            spans[-1][1] = offset + length
+        else:
+            spans.append([offset, offset + length])
+    bucket, compacted_key = get_compacted_s3path(s3dir)
+    span_data = [
+        (
+            start,
+            _get_object_bytes(
+                s3_client, bucket, compacted_key, f"bytes={start}-{end - 1}"
+            ),
+        )
+        for start, end in spans
+    ]
+
+    def read_frame(offset: int, length: int):
+        for start, data in span_data:
+            if start <= offset and offset + length <= start + len(data):
+                frame = data[offset - start : offset - start + length]
+                return json.loads(_decompress(frame, compression))
+        raise ValueError("frame not fetched")  # pragma: no cover
+
+    response = read_frame(header_offset, header_length)
+    items = list()
+    for offset, length in wanted[1:]:
+        frame_items = read_frame(offset, length)
+        if projection is not None:
+            frame_items = projection.project_items(index.key, frame_items)
+        items.extend(frame_items)
+    response[index.key] = items
+    return response
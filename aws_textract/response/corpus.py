@@ -0,0 +1,303 @@
+# -*- coding: utf-8 -*-
+
+"""
+Build a plain text corpus from many Textract outputs with a process pool.
+
+Turning a million archived Textract outputs into text with ``blocks_to_text``
+in one process is bound by the JSON decoding. :func:`build_text_corpus` splits
+the sources into chunks (work units), decodes and linearizes each chunk in
+a worker process, and writes each chunk to its own output shard, so it scales
+with the number of CPU cores. Only the ``LINE`` blocks are kept right after
+each output part is decoded (see :class:`~aws_textract.response.projection.Projection`).
+
+A source can be:
+
+- an S3 Textract output directory ``s3://bucket/prefix/job_id/``, the numbered
+  parts are merged on the fly.
+- a local JSON file of the merged response, for example the output of
+  :func:`~aws_textract.response.bulk.bulk_merge_textract_output`.
+
+The output shards are ``${dir_output}/part-00000.jsonl``, ``part-00001.jsonl``
+... A shard is written to a temp file and renamed when complete, the existing
+shards are skipped, so an interrupted run can be resumed by running it again
+with the same sources and ``chunk_size``.
+
+Usage example::
+
+    result = build_text_corpus(
+        sources=["s3://my-bucket/textract-output/3b2b.../", "/data/merged/a1.json"],
+        dir_output="/data/corpus",
+        chunk_size=200,
+    )
+    print(result.docs_per_second)
+
+Or from the command line::
+
+    python -m aws_textract.cli corpus --output /data/corpus --sources-file sources.txt
+"""
+
+import typing as T
+import os
+import json
+import time
+import enum
+import dataclasses
+import concurrent.futures
+from pathlib import Path
+
+from ..clients import ClientFactory
+from .projection import Projection
+from .utils import blocks_to_text
+
+if T.TYPE_CHECKING:  # pragma: no cover
+    from mypy_boto3_s3 import S3Client
+
+
+class CorpusFormatEnum(str, enum.Enum):
+    """
+    - ``jsonl``: one ``{"source": ..., "pages": ..., "text": ...}`` per line.
+    - ``txt``: the text of each document followed by a form feed ``\\f`` line.
+    """
+
+    jsonl = "jsonl"
+    txt = "txt"
+
+
+_LINE_PROJECTION = Projection(fields=["BlockType", "Text"], block_types=["LINE"])
+
+
+def chunk_sources(
+    sources: T.Iterable[str],
+    chunk_size: int,
+) -> T.List[T.List[str]]:
+    """
+    Split the sources into work units of ``chunk_size`` sources.
+    """
+    sources = list(sources)
+    return [sources[i : i + chunk_size] for i in range(0, len(sources), chunk_size)]
+
+
+def get_shard_path(
+    dir_output: Path,
+    chunk_index: int,
+    output_format: CorpusFormatEnum,
+) -> Path:
+    return dir_output.joinpath(f"part-{chunk_index:05d}.{output_format.value}")
+
+
+def load_source_response(
+    source: str,
+    s3_client: T.Optional["S3Client"] = None,
+) -> dict:
+    """
+    Load the response of a source, only the ``LINE`` blocks are kept.
+    """
+    if source.startswith("s3://"):
+        from s3pathlib import S3Path
+        from .merge import _merge_textract_response
+
+        return _merge_textract_response(
+            s3_client=s3_client,
+            s3dir=S3Path(source).to_dir(),
+            key="Blocks",
+            projection=_LINE_PROJECTION,
+        )
+    else:
+        res = json.loads(Path(source).read_bytes())
+        res["Blocks"] = _LINE_PROJECTION.project_blocks(res.get("Blocks", []))
+        return res
+
+
+@dataclasses.dataclass
+class ChunkStats:
+    """
+    The statistics of one processed chunk.
+    """
+
+    chunk_index: int = dataclasses.field()
+    n_documents: int = dataclasses.field(default=0)
+    n_pages: int = dataclasses.field(default=0)
+    n_chars: int = dataclasses.field(default=0)
+    failed: T.Dict[str, str] = dataclasses.field(default_factory=dict)
+
+
+_worker_s3_client: T.Optional["S3Client"] = None
+_worker_s3_client_factory: T.Optional[T.Callable[[], "S3Client"]] = None
+
+
+def _init_worker(
+    s3_client_factory: T.Optional[T.Callable[[], "S3Client"]],
+):  # pragma: no cover
+    global _worker_s3_client_factory
+    _worker_s3_client_factory = s3_client_factory
+
+
+def _get_worker_s3_client() -> T.Optional["S3Client"]:  # pragma: no cover
+    # create the client on the first S3 source, local files don't need it
+    global _worker_s3_client
+    if _worker_s3_client is None and _worker_s3_client_factory is not None:
+        _worker_s3_client = _worker_s3_client_factory()
+    return _worker_s3_client
+
+
+def _process_chunk(
+    chunk_index: int,
+    sources: T.List[str],
+    path_output: str,
+    output_format: CorpusFormatEnum,
+    s3_client: T.Optional["S3Client"] = None,
+) -> ChunkStats:
+    stats = ChunkStats(chunk_index=chunk_index)
+    path = Path(path_output)
+    path_tmp = path.with_name(path.name + ".tmp")
+    with path_tmp.open("w", encoding="utf-8") as f:
+        for source in sources:
+            try:
+                if s3_client is None and source.startswith("s3://"):
+                    s3_client = _get_worker_s3_client()
+                res = load_source_response(source, s3_client=s3_client)
+            except Exception as e:
+                stats.failed[source] = repr(e)
+                continue
+            text = blocks_to_text(res["Blocks"])
+            n_pages = res.get("DocumentMetadata", {}).get("Pages", 0)
+            if output_format is CorpusFormatEnum.jsonl:
+                record = {"source": source, "pages": n_pages, "text": text}
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+            else:
+                f.write(text + "\n\f\n")
+            stats.n_documents += 1
+            stats.n_pages += n_pages
+            stats.n_chars += len(text)
+    path_tmp.replace(path)
+    return stats
+
+
+@dataclasses.dataclass
+class CorpusBuildResult:
+    """
+    The summary of a :func:`build_text_corpus` run.
+
+    :param n_documents: number of documents written in this run.
+    :param n_pages: number of pages written in this run.
+    :param n_chars: number of characters written in this run.
+    :param elapsed: seconds.
+    :param shards: the output shards written in this run.
+    :param skipped_shards: the output shards already exist, not processed.
+    :param failed: source to error message mapping. A failed source doesn't
+        fail its shard, re-run the failed sources with another ``dir_output``.
+    """
+
+    n_documents: int = dataclasses.field(default=0)
+    n_pages: int = dataclasses.field(default=0)
+    n_chars: int = dataclasses.field(default=0)
+    elapsed: float = dataclasses.field(default=0.0)
+    shards: T.List[str] = dataclasses.field(default_factory=list)
+    skipped_shards: T.List[str] = dataclasses.field(default_factory=list)
+    failed: T.Dict[str, str] = dataclasses.field(default_factory=dict)
+
+    @property
+    def docs_per_second(self) -> float:
+        return self.n_documents / self.elapsed if self.elapsed else 0.0
+
+    @property
+    def pages_per_second(self) -> float:
+        return self.n_pages / self.elapsed if self.elapsed else 0.0
+
+    def add(self, stats: ChunkStats):
+        self.n_documents += stats.n_documents
+        self.n_pages += stats.n_pages
+        self.n_chars += stats.n_chars
+        self.failed.update(stats.failed)
+
+
+def _default_s3_client_factory() -> "S3Client":  # pragma: no cover
+    return ClientFactory().get_s3_client()
+
+
+def build_text_corpus(
+    sources: T.Iterable[str],
+    dir_output: T.Union[str, Path],
+    output_format: T.Union[CorpusFormatEnum, str] = CorpusFormatEnum.jsonl,
+    chunk_size: int = 100,
+    max_workers: T.Optional[int] = None,
+    use_process_pool: bool = True,
+    s3_client: T.Optional["S3Client"] = None,
+    s3_client_factory: T.Optional[
+        T.Callable[[], "S3Client"]
+    ] = _default_s3_client_factory,
+    verbose: bool = True,
+) -> CorpusBuildResult:
+    """
+    Convert many Textract outputs to text, one output shard per chunk of sources.
+
+    :param sources: the S3 output directories and / or local merged JSON files.
+    :param dir_output: the local directory to store the output shards.
+    :param output_format: see :class:`CorpusFormatEnum`.
+    :param chunk_size: number of sources in each work unit (and output shard).
+    :param max_workers: number of worker processes, default is the CPU count.
+    :param use_process_pool: if False, process the chunks serially in the
+        current process with the given ``s3_client``.
+    :param s3_client: the S3 client used when ``use_process_pool`` is False.
+    :param s3_client_factory: a picklable callable that creates a new S3 client
+        in each worker process. None if all sources are local files. For
+        example ``ClientFactory(profile_name=...).get_s3_client``, the default
+        is a :class:`~aws_textract.clients.ClientFactory` with the default
+        credentials.
+    :param verbose: whether to print the progress and throughput.
+    """
+    output_format = CorpusFormatEnum(output_format)
+    dir_output = Path(dir_output)
+    dir_output.mkdir(parents=True, exist_ok=True)
+    chunks = chunk_sources(sources, chunk_size)
+
+    result = CorpusBuildResult()
+    todo = list()
+    for chunk_index, chunk in enumerate(chunks):
+        path = get_shard_path(dir_output, chunk_index, output_format)
+        if path.exists():
+            result.skipped_shards.append(str(path))
+        else:
+            todo.append((chunk_index, chunk, str(path)))
+
+    start = time.perf_counter()
+
+    def on_done(stats: ChunkStats, path: str):
+        result.add(stats)
+        result.shards.append(path)
+        result.elapsed = time.perf_counter() - start
+        if verbose:  # pragma: no cover
+            print(
+                f"[{len(result.shards)}/{len(todo)} shards] "
+                f"{result.n_documents} docs, {result.n_pages} pages, "
+                f"{result.docs_per_second:.1f} docs/s, "
+                f"{result.pages_per_second:.1f} pages/s, "
+                f"{len(result.failed)} failed"
+            )
+
+    if use_process_pool:  # pragma: no cover
+        if max_workers is None:
+            max_workers = os.cpu_count()
+        with concurrent.futures.ProcessPoolExecutor(
+            max_workers=max_workers,
+            initializer=_init_worker,
+            initargs=(s3_client_factory,),
+        ) as executor:
+            future_to_path = {
+                executor.submit(
+                    _process_chunk, chunk_index, chunk, path, output_format
+                ): path
+                for chunk_index, chunk, path in todo
+            }
+            for future in concurrent.futures.as_completed(future_to_path):
+                on_done(future.result(), future_to_path[future])
+    else:
+        for chunk_index, chunk, path in todo:
+            stats = _process_chunk(
+                chunk_index, chunk, path, output_format, s3_client=s3_client
+            )
+            on_done(stats, path)
+
+    result.shards.sort()
+    result.elapsed = time.perf_counter() - start
+    return result
@@ -0,0 +1,255 @@
+# -*- coding: utf-8 -*-
+
+"""
+Flatten the nested ``ExpenseDocuments`` of the expense analysis response into
+columnar tables.
+
+The ``get_expense_analysis`` / ``merge_expense_analysis_result`` response looks
+like ``ExpenseDocuments -> SummaryFields / LineItemGroups -> LineItems ->
+LineItemExpenseFields``. This module walks the structure once and appends the
+values to column lists (dict of lists), which can be loaded by
+``pyarrow.table()``, ``pandas.DataFrame()`` or ``polars.DataFrame()`` without
+another copy of the nested dict.
+
+Usage example::
+
+    builder = ExpenseTableBuilder()
+    for job_id, res in responses:
+        builder.add(res, document_id=job_id)
+    tables = builder.build()
+    tables.summary_fields["value"]  # list of str
+    summary_table, line_item_table = tables.to_arrow()
+"""
+
+import typing as T
+import dataclasses
+
+from .block_table import new_columns, columns_to_arrow_table
+
+if T.TYPE_CHECKING:  # pragma: no cover
+    import pyarrow
+    from mypy_boto3_textract.type_defs import GetExpenseAnalysisResponseTypeDef
+    from mypy_boto3_textract.type_defs import ExpenseDocumentTypeDef
+
+#: column name -> arrow type name of the summary field table.
+SUMMARY_FIELD_COLUMNS = {
+    "document_id": "string",
+    "expense_index": "int32",
+    "page": "int32",
+    "type": "string",
+    "type_confidence": "float32",
+    "label": "string",
+    "label_confidence": "float32",
+    "value": "string",
+    "value_confidence": "float32",
+    "currency": "string",
+    "group_types": "string",
+    "group_id": "string",
+}
+
+#: column name -> arrow type name of the line item table.
+LINE_ITEM_COLUMNS = {
+    "document_id": "string",
+    "expense_index": "int32",
+    "line_item_group_index": "int32",
+    "line_item_index": "int32",
+    "page": "int32",
+    "type": "string",
+    "type_confidence": "float32",
+    "label": "string",
+    "label_confidence": "float32",
+    "value": "string",
+    "value_confidence": "float32",
+    "currency": "string",
+}
+
+
+@dataclasses.dataclass
+class ExpenseTables:
+    """
+    The columnar representation of many expense documents.
+
+    :param summary_fields: one row per ``SummaryFields`` item, the columns are
+        :data:`SUMMARY_FIELD_COLUMNS`.
+    :param line_items: one row per ``LineItemExpenseFields`` item, the columns
+        are :data:`LINE_ITEM_COLUMNS`. Use ``(document_id, expense_index,
+        line_item_group_index, line_item_index)`` to pivot back to one row per
+        line item.
+    """
+
+    summary_fields: T.Dict[str, list] = dataclasses.field(
+        default_factory=lambda: new_columns(SUMMARY_FIELD_COLUMNS)
+    )
+    line_items: T.Dict[str, list] = dataclasses.field(
+        default_factory=lambda: new_columns(LINE_ITEM_COLUMNS)
+    )
+
+    @property
+    def n_summary_fields(self) -> int:
+        return len(self.summary_fields["document_id"])
+
+    @property
+    def n_line_items(self) -> int:
+        return len(self.line_items["document_id"])
+
+    def to_arrow(self) -> T.Tuple["pyarrow.Table", "pyarrow.Table"]:
+        """
+        Convert to the summary field and line item ``pyarrow.Table`` with
+        a fixed schema. Requires ``pyarrow``.
+        """
+        return (
+            columns_to_arrow_table(self.summary_fields, SUMMARY_FIELD_COLUMNS),
+            columns_to_arrow_table(self.line_items, LINE_ITEM_COLUMNS),
+        )
+
+
+class ExpenseTableBuilder:
+    """
+    Incrementally flatten expense documents into :class:`ExpenseTables`.
+    """
+
+    def __init__(self):
+        self.tables = ExpenseTables()
+
+    def add(
+        self,
+        response: T.Union[
+            "GetExpenseAnalysisResponseTypeDef",
+            T.List["ExpenseDocumentTypeDef"],
+        ],
+        document_id: str = "",
+    ):
+        """
+        Append the expense documents of one response.
+
+        :param response: the ``get_expense_analysis`` or
+            ``merge_expense_analysis_result`` response, or its
+            ``ExpenseDocuments`` list.
+        :param document_id: an identifier of the response that goes into the
+            ``document_id`` column, for example the job id or the S3 uri.
+        """
+        if isinstance(response, dict):
+            expense_documents = response.get("ExpenseDocuments", [])
+        else:
+            expense_documents = response
+
+        summary = self.tables.summary_fields
+        s_document_id = summary["document_id"].append
+        s_expense_index = summary["expense_index"].append
+        s_page = summary["page"].append
+        s_type = summary["type"].append
+        s_type_confidence = summary["type_confidence"].append
+        s_label = summary["label"].append
+        s_label_confidence = summary["label_confidence"].append
+        s_value = summary["value"].append
+        s_value_confidence = summary["value_confidence"].append
+        s_currency = summary["currency"].append
+        s_group_types = summary["group_types"].append
+        s_group_id = summary["group_id"].append
+
+        line_items = self.tables.line_items
+        l_document_id = line_items["document_id"].append
+        l_expense_index = line_items["expense_index"].append
+        l_group_index = line_items["line_item_group_index"].append
+        l_item_index = line_items["line_item_index"].append
+        l_page = line_items["page"].append
+        l_type = line_items["type"].append
+        l_type_confidence = line_items["type_confidence"].append
+        l_label = line_items["label"].append
+        l_label_confidence = line_items["label_confidence"].append
+        l_value = line_items["value"].append
+        l_value_confidence = line_items["value_confidence"].append
+        l_currency = line_items["currency"].append
+
+        empty = {}
+        for expense_document in expense_documents:
+            expense_index = expense_document.get("ExpenseIndex")
+            for field in expense_document.get("SummaryFields", []):
+                type_ = field.get("Type", empty)
+                label = field.get("LabelDetection", empty)
+                value = field.get("ValueDetection", empty)
+                group_properties = field.get("GroupProperties")
+                s_document_id(document_id)
+                s_expense_index(expense_index)
+                s_page(field.get("PageNumber"))
+                s_type(type_.get("Text"))
+                s_type_confidence(type_.get("Confidence"))
+                s_label(label.get("Text"))
+                s_label_confidence(label.get("Confidence"))
+                s_value(value.get("Text"))
+                s_value_confidence(value.get("Confidence"))
+                s_currency(field.get("Currency", empty).get("Code"))
+                if group_properties:
+                    group = group_properties[0]
+                    s_group_types(",".join(group.get("Types", [])))
+                    s_group_id(group.get("Id"))
+                else:
+                    s_group_types(None)
+                    s_group_id(None)
+            for group in expense_document.get("LineItemGroups", []):
+                group_index = group.get("LineItemGroupIndex")
+                for item_index, line_item in enumerate(
+                    group.get("LineItems", []), start=1
+                ):
+                    for field in line_item.get("LineItemExpenseFields", []):
+                        type_ = field.get("Type", empty)
+                        label = field.get("LabelDetection", empty)
+                        value = field.get("ValueDetection", empty)
+                        l_document_id(document_id)
+                        l_expense_index(expense_index)
+                        l_group_index(group_index)
+                        l_item_index(item_index)
+                        l_page(field.get("PageNumber"))
+                        l_type(type_.get("Text"))
+                        l_type_confidence(type_.get("Confidence"))
+                        l_label(label.get("Text"))
+                        l_label_confidence(label.get("Confidence"))
+                        l_value(value.get("Text"))
+                        l_value_confidence(value.get("Confidence"))
+                        l_currency(field.get("Currency", empty).get("Code"))
+
+    @property
+    def n_rows(self) -> int:
+        return self.tables.n_summary_fields + self.tables.n_line_items
+
+    def build(self) -> ExpenseTables:
+        """
+        Return the tables and start a new empty batch.
+        """
+        tables = self.tables
+        self.tables = ExpenseTables()
+        return tables
+
+
+def expense_documents_to_tables(
+    response: "GetExpenseAnalysisResponseTypeDef",
+    document_id: str = "",
+) -> ExpenseTables:
+    """
+    Flatten one expense analysis response into columnar tables.
+    """
+    builder = ExpenseTableBuilder()
+    builder.add(response, document_id=document_id)
+    return builder.build()
+
+
+def iter_expense_table_batches(
+    responses: T.Iterable[T.Tuple[str, "GetExpenseAnalysisResponseTypeDef"]],
+    batch_size: int = 100_000,
+) -> T.Iterator[ExpenseTables]:
+    """
+    Flatten many expense analysis responses into batches of columnar tables,
+    a batch is yielded once it has at least ``batch_size`` rows (summary
+    fields + line item fields), so the memory stays bounded when loading
+    millions of receipts.
+
+    :param responses: iterable of ``(document_id, response)``.
+    :param batch_size: the minimal number of rows in each batch, except the last one.
+    """
+    builder = ExpenseTableBuilder()
+    for document_id, response in responses:
+        builder.add(response, document_id=document_id)
+        if builder.n_rows >= batch_size:
+            yield builder.build()
+    if builder.n_rows:
+        yield builder.build()
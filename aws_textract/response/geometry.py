@@ -0,0 +1,300 @@
+# -*- coding: utf-8 -*-
+
+"""
+Vectorized conversion of the Textract block geometry to pixel coordinates.
+
+Textract ``Geometry`` is normalized to 0 ~ 1 of the page width and height.
+Drawing overlays or redacting a document by looping over the blocks and
+multiplying each ``BoundingBox`` in Python costs several dict lookups per
+block. :func:`get_block_geometry` reads the geometry of all the blocks into
+NumPy arrays once, then the pixel conversion, box merging and masking are a
+few array operations for the whole document.
+
+Requires ``numpy``.
+
+Usage example::
+
+    geometry = get_block_geometry(res["Blocks"], block_types=["WORD"])
+    # the page size of each page from your rasterizer, or one size for all
+    boxes = geometry.to_pixel_boxes({1: (1700, 2200), 2: (1700, 2200)}, as_int=True)
+    # redact the words that match, merged into one box per run of words
+    selected = geometry.select([i for i, t in enumerate(geometry.texts) if is_pii(t)])
+    merged, pages = merge_adjacent_boxes(
+        selected.to_pixel_boxes((1700, 2200)), selected.pages
+    )
+    for page in np.unique(pages):
+        mask = boxes_to_mask(merged[pages == page], width=1700, height=2200)
+"""
+
+import typing as T
+import dataclasses
+
+if T.TYPE_CHECKING:  # pragma: no cover
+    import numpy as np
+    from mypy_boto3_textract.type_defs import BlockTypeDef
+
+#: a single ``(width, height)`` for all pages, a page number to
+#: ``(width, height)`` mapping, or a ``(n_pages, 2)`` array of page 1, 2, ...
+T_PAGE_SIZES = T.Union[
+    T.Tuple[float, float],
+    T.Dict[int, T.Tuple[float, float]],
+    "np.ndarray",
+]
+
+
+def get_page_size_array(
+    pages: "np.ndarray",
+    page_sizes: T_PAGE_SIZES,
+) -> "np.ndarray":
+    """
+    The ``(width, height)`` of the page of each block, a ``(n, 2)`` array.
+
+    Raise ``ValueError`` if ``page_sizes`` has no size for some of the pages.
+    """
+    import numpy as np
+
+    pages = np.asarray(pages)
+    if isinstance(page_sizes, dict):
+        missing = [
+            int(page) for page in np.unique(pages) if int(page) not in page_sizes
+        ]
+        if missing:
+            raise ValueError(f"no page size for the pages {missing}")
+        if len(pages) == 0:
+            return np.zeros((0, 2), dtype=np.float64)
+        lookup = np.zeros((int(pages.max()) + 1, 2), dtype=np.float64)
+        for page, size in page_sizes.items():
+            if 0 <= page < len(lookup):
+                lookup[page] = size
+        return lookup[pages]
+    page_sizes = np.asarray(page_sizes, dtype=np.float64)
+    if page_sizes.ndim == 1:
+        return np.broadcast_to(page_sizes, (len(pages), 2))
+    unique = np.unique(pages)
+    missing = unique[(unique < 1) | (unique > len(page_sizes))]
+    if len(missing):
+        raise ValueError(
+            f"no page size for the pages {missing.tolist()}, "
+            f"the array has the sizes of page 1 to {len(page_sizes)}"
+        )
+    return page_sizes[pages - 1]
+
+
+@dataclasses.dataclass
+class BlockGeometry:
+    """
+    The geometry of many blocks as arrays, row ``i`` is the ``i`` th block.
+
+    :param ids: the block ``Id``.
+    :param block_types: the ``BlockType``.
+    :param texts: the ``Text``, None if the block has no text.
+    :param pages: ``(n,)`` int array, the ``Page``.
+    :param boxes: ``(n, 4)`` float array, the normalized
+        ``Left, Top, Width, Height`` of the ``BoundingBox``.
+    :param polygons: ``(n, k, 2)`` float array, the normalized ``X, Y`` of the
+        ``Polygon`` points, padded with ``nan`` if the blocks have different
+        number of points.
+    """
+
+    ids: T.List[str] = dataclasses.field()
+    block_types: T.List[str] = dataclasses.field()
+    texts: T.List[T.Optional[str]] = dataclasses.field()
+    pages: "np.ndarray" = dataclasses.field()
+    boxes: "np.ndarray" = dataclasses.field()
+    polygons: "np.ndarray" = dataclasses.field()
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def select(
+        self,
+        index: T.Union[T.Sequence[int], "np.ndarray"],
+    ) -> "BlockGeometry":
+        """
+        Select the rows by integer index or boolean mask.
+        """
+        import numpy as np
+
+        index = np.asarray(index)
+        if index.dtype == bool:
+            index = np.flatnonzero(index)
+        return BlockGeometry(
+            ids=[self.ids[i] for i in index],
+            block_types=[self.block_types[i] for i in index],
+            texts=[self.texts[i] for i in index],
+            pages=self.pages[index],
+            boxes=self.boxes[index],
+            polygons=self.polygons[index],
+        )
+
+    def to_pixel_boxes(
+        self,
+        page_sizes: T_PAGE_SIZES,
+        as_int: bool = False,
+    ) -> "np.ndarray":
+        """
+        The bounding boxes in pixels, a ``(n, 4)`` array of ``x0, y0, x1, y1``.
+
+        :param page_sizes: the page size in pixels, see :data:`T_PAGE_SIZES`.
+        :param as_int: round outward to int pixels, the box always covers
+            the whole block, which is what a redaction needs.
+        """
+        import numpy as np
+
+        sizes = get_page_size_array(self.pages, page_sizes)
+        scale = np.concatenate([sizes, sizes], axis=1)
+        boxes = self.boxes.copy()
+        boxes[:, 2:] += boxes[:, :2]  # width, height -> x1, y1
+        boxes *= scale
+        if as_int:
+            boxes[:, :2] = np.floor(boxes[:, :2])
+            boxes[:, 2:] = np.ceil(boxes[:, 2:])
+            return boxes.astype(np.int64)
+        return boxes
+
+    def to_pixel_polygons(self, page_sizes: T_PAGE_SIZES) -> "np.ndarray":
+        """
+        The polygons in pixels, a ``(n, k, 2)`` array of ``x, y``.
+        """
+        sizes = get_page_size_array(self.pages, page_sizes)
+        return self.polygons * sizes[:, None, :]
+
+
+def get_block_geometry(
+    blocks: T.Union[dict, T.Iterable["BlockTypeDef"]],
+    block_types: T.Optional[T.Iterable[str]] = None,
+) -> BlockGeometry:
+    """
+    Read the geometry of the blocks into arrays, in one pass.
+
+    :param blocks: the Textract blocks, or a response that has ``Blocks``.
+    :param block_types: only keep these block types, for example ``["WORD"]``.
+    """
+    import numpy as np
+
+    if isinstance(blocks, dict):
+        blocks = blocks.get("Blocks", [])
+    if block_types is not None:
+        block_types = {getattr(t, "value", t) for t in block_types}
+
+    ids = list()
+    types = list()
+    texts = list()
+    pages = list()
+    boxes = list()
+    polygons = list()
+    empty = {}
+    for block in blocks:
+        if block_types is not None and block["BlockType"] not in block_types:
+            continue
+        geometry = block.get("Geometry", empty)
+        box = geometry.get("BoundingBox", empty)
+        ids.append(block["Id"])
+        types.append(block["BlockType"])
+        texts.append(block.get("Text"))
+        pages.append(block.get("Page", 1))
+        boxes.append(
+            (
+                box.get("Left", np.nan),
+                box.get("Top", np.nan),
+                box.get("Width", np.nan),
+                box.get("Height", np.nan),
+            )
+        )
+        polygons.append([(p["X"], p["Y"]) for p in geometry.get("Polygon", [])])
+
+    n_points = max((len(polygon) for polygon in polygons), default=0)
+    polygon_array = np.full((len(polygons), n_points, 2), np.nan, dtype=np.float64)
+    for i, polygon in enumerate(polygons):
+        if polygon:
+            polygon_array[i, : len(polygon)] = polygon
+    return BlockGeometry(
+        ids=ids,
+        block_types=types,
+        texts=texts,
+        pages=np.asarray(pages, dtype=np.int64),
+        boxes=np.asarray(boxes, dtype=np.float64).reshape(-1, 4),
+        polygons=polygon_array,
+    )
+
+
+def merge_adjacent_boxes(
+    boxes: "np.ndarray",
+    pages: "np.ndarray",
+    max_gap: float = 1.0,
+    min_vertical_overlap: float = 0.5,
+) -> T.Tuple["np.ndarray", "np.ndarray"]:
+    """
+    Merge each run of consecutive boxes that sit next to each other on the
+    same text line into one box, for example the words of a redacted phrase.
+    The boxes should be in reading order, which is the Textract block order.
+
+    Two consecutive boxes are adjacent if they are on the same page, their
+    vertical overlap is at least ``min_vertical_overlap`` of the shorter box,
+    and the horizontal gap is at most ``max_gap`` times the taller box height.
+
+    :param boxes: ``(n, 4)`` array of ``x0, y0, x1, y1``, see
+        :meth:`BlockGeometry.to_pixel_boxes`.
+    :param pages: ``(n,)`` array, the page of each box.
+
+    :return: the merged ``(m, 4)`` boxes and the ``(m,)`` page of each box.
+    """
+    import numpy as np
+
+    boxes = np.asarray(boxes)
+    pages = np.asarray(pages)
+    if len(boxes) == 0:
+        return boxes.reshape(0, 4), pages
+    prev, curr = boxes[:-1], boxes[1:]
+    height_prev = prev[:, 3] - prev[:, 1]
+    height_curr = curr[:, 3] - curr[:, 1]
+    overlap = np.minimum(prev[:, 3], curr[:, 3]) - np.maximum(prev[:, 1], curr[:, 1])
+    gap = curr[:, 0] - prev[:, 2]
+    adjacent = (
+        (pages[1:] == pages[:-1])
+        & (overlap >= min_vertical_overlap * np.minimum(height_prev, height_curr))
+        & (gap <= max_gap * np.maximum(height_prev, height_curr))
+        & (gap >= -np.maximum(height_prev, height_curr))
+    )
+    # the first box of each run
+    starts = np.flatnonzero(np.concatenate([[True], ~adjacent]))
+    merged = np.empty((len(starts), 4), dtype=boxes.dtype)
+    merged[:, 0] = np.minimum.reduceat(boxes[:, 0], starts)
+    merged[:, 1] = np.minimum.reduceat(boxes[:, 1], starts)
+    merged[:, 2] = np.maximum.reduceat(boxes[:, 2], starts)
+    merged[:, 3] = np.maximum.reduceat(boxes[:, 3], starts)
+    return merged, pages[starts]
+
+
+def boxes_to_mask(
+    boxes: "np.ndarray",
+    width: int,
+    height: int,
+) -> "np.ndarray":
+    """
+    Rasterize pixel boxes of one page into a boolean ``(height, width)`` mask,
+    for example the region to black out.
+
+    :param boxes: ``(n, 4)`` array of ``x0, y0, x1, y1`` in pixels.
+    """
+    import numpy as np
+
+    mask = np.zeros((height, width), dtype=bool)
+    boxes = np.asarray(boxes)
+    if len(boxes) == 0:
+        return mask
+    boxes = np.clip(
+        np.rint(boxes).astype(np.int64),
+        0,
+        [width, height, width, height],
+    )
+    # mark +1 at the top left and -1 past the bottom right corners, the 2D
+    # cumulative sum is positive inside any box
+    diff = np.zeros((height + 1, width + 1), dtype=np.int32)
+    x0, y0, x1, y1 = boxes.T
+    np.add.at(diff, (y0, x0), 1)
+    np.add.at(diff, (y0, x1), -1)
+    np.add.at(diff, (y1, x0), -1)
+    np.add.at(diff, (y1, x1), 1)
+    mask[:] = diff.cumsum(axis=0).cumsum(axis=1)[:height, :width] > 0
+    return mask
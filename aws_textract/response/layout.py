@@ -0,0 +1,311 @@
+# -*- coding: utf-8 -*-
+
+"""
+Build a section tree of a document from the ``LAYOUT_*`` blocks.
+
+The layout analysis returns flat ``LAYOUT_*`` blocks in reading order, each
+has ``CHILD`` relationships to its ``LINE`` blocks (``LAYOUT_LIST`` has
+``CHILD`` relationships to its ``LAYOUT_TEXT`` items). :class:`LayoutTree`
+turns them into a section tree::
+
+    root
+    └── LAYOUT_TITLE
+        ├── LAYOUT_TEXT
+        ├── LAYOUT_SECTION_HEADER
+        │   ├── LAYOUT_TEXT
+        │   ├── LAYOUT_LIST
+        │   │   ├── LAYOUT_TEXT
+        │   │   └── LAYOUT_TEXT
+        │   ├── LAYOUT_TABLE
+        │   └── LAYOUT_FIGURE
+        └── LAYOUT_SECTION_HEADER
+            └── ...
+
+The tree is built in one pass over the blocks with precomputed id and parent
+maps. The nodes are numbered in pre-order, so a subtree is a contiguous
+range of :attr:`LayoutTree.nodes`, and the text under a section is a slice
+join, no tree walk and no rescan of the blocks. The page header, footer and
+page number are not part of the tree.
+
+Usage example::
+
+    tree = LayoutTree.from_blocks(res["Blocks"])
+    for section in tree.find_sections("Terms and Conditions"):
+        print(tree.get_text(section))
+    for section in tree.iter_sections():
+        chunk = tree.get_text(section, include_subsections=False)
+"""
+
+import typing as T
+import dataclasses
+
+from .contants import BlockTypeEnum
+
+if T.TYPE_CHECKING:  # pragma: no cover
+    from mypy_boto3_textract.type_defs import BlockTypeDef
+
+
+#: the layout block types that are not part of the document body.
+PAGE_FURNITURE_TYPES = frozenset(
+    {
+        BlockTypeEnum.LAYOUT_HEADER.value,
+        BlockTypeEnum.LAYOUT_FOOTER.value,
+        BlockTypeEnum.LAYOUT_PAGE_NUMBER.value,
+    }
+)
+
+_LAYOUT_TYPES = frozenset(
+    block_type.value
+    for block_type in BlockTypeEnum
+    if block_type.value.startswith("LAYOUT_")
+)
+
+#: the section level of the heading block types, the content blocks are
+#: always attached to the innermost open section.
+HEADING_LEVELS = {
+    BlockTypeEnum.LAYOUT_TITLE.value: 1,
+    BlockTypeEnum.LAYOUT_SECTION_HEADER.value: 2,
+}
+
+ROOT = "ROOT"
+
+
+def normalize_heading(text: str) -> str:
+    """
+    Normalize a heading for matching: case fold, collapse the whitespaces,
+    strip the trailing colon.
+    """
+    return " ".join(text.casefold().split()).rstrip(":").strip()
+
+
+@dataclasses.dataclass(eq=False)
+class LayoutNode:
+    """
+    A node in the :class:`LayoutTree`.
+
+    :param block_type: the ``LAYOUT_*`` block type, or ``ROOT``.
+    :param block_id: the ``Id`` of the layout block, None for the root.
+    :param page: the page number, 0 for the root.
+    :param text: the text of the ``LINE`` blocks directly under this layout
+        block, joined by newline.
+    :param line_ids: the ``Id`` of the ``LINE`` blocks directly under this
+        layout block.
+    :param children: the child nodes, in reading order.
+    :param parent: the parent node, None for the root.
+    :param start: the pre-order index of this node in :attr:`LayoutTree.nodes`.
+    :param end: the pre-order index after the last node in this subtree.
+    """
+
+    block_type: str = dataclasses.field()
+    block_id: T.Optional[str] = dataclasses.field(default=None)
+    page: int = dataclasses.field(default=0)
+    text: str = dataclasses.field(default="")
+    line_ids: T.List[str] = dataclasses.field(default_factory=list)
+    children: T.List["LayoutNode"] = dataclasses.field(
+        default_factory=list, repr=False
+    )
+    parent: T.Optional["LayoutNode"] = dataclasses.field(default=None, repr=False)
+    start: int = dataclasses.field(default=0)
+    end: int = dataclasses.field(default=0)
+
+    @property
+    def is_heading(self) -> bool:
+        return self.block_type in HEADING_LEVELS
+
+    @property
+    def level(self) -> int:
+        if self.block_type == ROOT:
+            return 0
+        return HEADING_LEVELS.get(self.block_type, len(HEADING_LEVELS) + 1)
+
+
+class LayoutTree:
+    """
+    The section tree of one document, see the module docstring.
+    Use :meth:`from_blocks` to create it.
+
+    :param root: the root node.
+    """
+
+    def __init__(self, root: LayoutNode):
+        self.root = root
+        #: all nodes in pre-order, the root is the first one.
+        self.nodes: T.List[LayoutNode] = list()
+        self._texts: T.List[str] = list()
+        self._heading_index: T.Dict[str, T.List[LayoutNode]] = dict()
+        self._index()
+
+    def _index(self):
+        nodes = self.nodes
+        stack = [(self.root, False)]
+        while stack:
+            node, visited = stack.pop()
+            if visited:
+                node.end = len(nodes)
+                continue
+            node.start = len(nodes)
+            nodes.append(node)
+            stack.append((node, True))
+            for child in reversed(node.children):
+                stack.append((child, False))
+        self._texts = [node.text for node in nodes]
+        for node in nodes:
+            if node.is_heading:
+                key = normalize_heading(node.text)
+                self._heading_index.setdefault(key, []).append(node)
+
+    @classmethod
+    def from_blocks(
+        cls,
+        blocks: T.Iterable["BlockTypeDef"],
+        exclude_types: T.Iterable[str] = PAGE_FURNITURE_TYPES,
+    ) -> "LayoutTree":
+        """
+        Build the tree from the blocks of one document (all pages).
+
+        :param blocks: the Textract blocks, analyzed with the ``LAYOUT`` feature.
+        :param exclude_types: the layout block types to leave out, default is
+            the page header, footer and page number.
+        """
+        blocks = list(blocks)
+        exclude_types = {getattr(t, "value", t) for t in exclude_types}
+        id_to_block: T.Dict[str, dict] = dict()
+        # layout block id -> its parent layout block id, e.g. the list items
+        layout_parent: T.Dict[str, str] = dict()
+        for block in blocks:
+            id_to_block[block["Id"]] = block
+        for block in blocks:
+            if block["BlockType"] in _LAYOUT_TYPES:
+                for child_id in _iter_child_ids(block):
+                    child = id_to_block.get(child_id)
+                    if child is not None and child["BlockType"] in _LAYOUT_TYPES:
+                        layout_parent[child_id] = block["Id"]
+
+        # the top level layout blocks in reading order, the PAGE children
+        # order if available. The layout blocks not reached from any PAGE,
+        # e.g. the PAGE Relationships are projected away, follow in the block
+        # order, then the stable sort puts them back to their page.
+        ordered = list()
+        reached: T.Set[str] = set()
+        for block in blocks:
+            if block["BlockType"] == BlockTypeEnum.PAGE.value:
+                for child_id in _iter_child_ids(block):
+                    if child_id in id_to_block and child_id not in reached:
+                        reached.add(child_id)
+                        ordered.append(id_to_block[child_id])
+        ordered.extend(
+            block
+            for block in blocks
+            if block["BlockType"] in _LAYOUT_TYPES and block["Id"] not in reached
+        )
+        ordered.sort(key=lambda block: block.get("Page", 1))
+        top_level = [
+            block
+            for block in ordered
+            if block["BlockType"] in _LAYOUT_TYPES
+            and block["BlockType"] not in exclude_types
+            and block["Id"] not in layout_parent
+        ]
+
+        def make_node(block: dict, parent: LayoutNode) -> LayoutNode:
+            node = LayoutNode(
+                block_type=block["BlockType"],
+                block_id=block["Id"],
+                page=block.get("Page", 1),
+                parent=parent,
+            )
+            texts = list()
+            for child_id in _iter_child_ids(block):
+                child = id_to_block.get(child_id)
+                if child is None:
+                    continue
+                if child["BlockType"] == BlockTypeEnum.LINE.value:
+                    texts.append(child.get("Text", ""))
+                    node.line_ids.append(child_id)
+                elif child["BlockType"] in _LAYOUT_TYPES:
+                    node.children.append(make_node(child, node))
+            node.text = "\n".join(texts)
+            return node
+
+        root = LayoutNode(block_type=ROOT)
+        stack = [root]  # the open sections, innermost last
+        for block in top_level:
+            level = HEADING_LEVELS.get(block["BlockType"])
+            if level is None:
+                parent = stack[-1]
+                parent.children.append(make_node(block, parent))
+            else:
+                while stack[-1].level >= level:
+                    stack.pop()
+                parent = stack[-1]
+                node = make_node(block, parent)
+                parent.children.append(node)
+                stack.append(node)
+        return cls(root)
+
+    # --- queries ---
+    def iter_subtree(self, node: LayoutNode) -> T.List[LayoutNode]:
+        """
+        The node and all its descendants in pre-order.
+        """
+        return self.nodes[node.start : node.end]
+
+    def get_text(
+        self,
+        node: T.Optional[LayoutNode] = None,
+        include_heading: bool = True,
+        include_subsections: bool = True,
+    ) -> str:
+        """
+        The text under a node, in reading order.
+
+        :param node: the node, default is the root (the whole document body).
+        :param include_heading: whether to include the text of the node itself.
+        :param include_subsections: if False, stop at the first child heading,
+            only the text that belongs to this section directly is returned.
+        """
+        if node is None:
+            node = self.root
+        start = node.start if include_heading else node.start + 1
+        end = node.end
+        if not include_subsections:
+            for child in node.children:
+                if child.is_heading:
+                    end = child.start
+                    break
+        return "\n".join(text for text in self._texts[start:end] if text)
+
+    def iter_sections(self) -> T.Iterator[LayoutNode]:
+        """
+        Iterate all the title and section header nodes in reading order.
+        """
+        for node in self.nodes:
+            if node.is_heading:
+                yield node
+
+    def find_sections(self, heading: str) -> T.List[LayoutNode]:
+        """
+        Find the title or section header nodes by heading text, case
+        insensitive.
+        """
+        return list(self._heading_index.get(normalize_heading(heading), []))
+
+    def get_section_text(
+        self,
+        heading: str,
+        include_heading: bool = False,
+    ) -> T.Optional[str]:
+        """
+        The text under the first section that has the heading, for example
+        ``tree.get_section_text("Terms and Conditions")``. None if not found.
+        """
+        sections = self._heading_index.get(normalize_heading(heading))
+        if not sections:
+            return None
+        return self.get_text(sections[0], include_heading=include_heading)
+
+
+def _iter_child_ids(block: dict) -> T.Iterator[str]:
+    for rel in block.get("Relationships", []):
+        if rel["Type"] == "CHILD":
+            yield from rel["Ids"]
@@ -0,0 +1,154 @@
+# -*- coding: utf-8 -*-
+
+"""
+Lending analysis response utilities.
+"""
+
+import typing as T
+from array import array
+
+if T.TYPE_CHECKING:  # pragma: no cover
+    from mypy_boto3_textract.type_defs import LendingResultTypeDef
+
+
+def get_lending_page_type(
+    result: "LendingResultTypeDef",
+) -> T.Tuple[T.Optional[str], T.Optional[str]]:
+    """
+    Get the most confident page type and the page number within the
+    sub document (for example, the 2nd page of a bank statement) of a lending
+    analysis result.
+
+    :param result: an item of ``get_lending_analysis(...)["Results"]``.
+
+    :return: (page type, page number within the sub document).
+    """
+    classification = result.get("PageClassification", {})
+    page_types = classification.get("PageType", [])
+    if page_types:
+        page_type = max(page_types, key=lambda x: x.get("Confidence", 0))["Value"]
+    else:
+        page_type = None
+    page_numbers = classification.get("PageNumber", [])
+    if page_numbers:
+        page_number = max(page_numbers, key=lambda x: x.get("Confidence", 0))["Value"]
+    else:
+        page_number = None
+    return page_type, page_number
+
+
+class LendingPageIndex:
+    """
+    A compact document type -> page number index of a lending package, built
+    incrementally as the pages arrive, see
+    :func:`~aws_textract.better_boto.async_api.iter_lending_analysis`.
+
+    The index is keyed by page number, the page type of each page is stored
+    as a 2 bytes code and its page number within the sub document as a 4 bytes
+    integer. The pages can arrive in any order, adding a page again overwrites
+    it, and the queries always return the pages in page order.
+    """
+
+    _NO_TYPE = 0xFFFF
+
+    def __init__(self):
+        self._types: T.List[str] = list()
+        self._type_to_code: T.Dict[str, int] = dict()
+        # page type code of page 1, 2, 3, ...
+        self._page_type_codes = array("H")
+        # page number within the sub document of page 1, 2, 3, ..., 0 if unknown
+        self._page_numbers = array("I")
+
+    def add(self, result: "LendingResultTypeDef") -> T.Optional[str]:
+        """
+        Add a lending analysis result (one page) to the index, replace the
+        previous result of the same page.
+
+        :return: the page type.
+        """
+        page = result["Page"]
+        page_type, page_number = get_lending_page_type(result)
+        if len(self._page_type_codes) < page:
+            n = page - len(self._page_type_codes)
+            self._page_type_codes.extend([self._NO_TYPE] * n)
+            self._page_numbers.extend([0] * n)
+        if page_number is not None and page_number.isdigit():
+            self._page_numbers[page - 1] = int(page_number)
+        else:
+            self._page_numbers[page - 1] = 0
+        if page_type is None:
+            self._page_type_codes[page - 1] = self._NO_TYPE
+            return None
+        try:
+            code = self._type_to_code[page_type]
+        except KeyError:
+            code = len(self._types)
+            self._types.append(page_type)
+            self._type_to_code[page_type] = code
+        self._page_type_codes[page - 1] = code
+        return page_type
+
+    @property
+    def n_pages(self) -> int:
+        """
+        The largest page number seen so far.
+        """
+        return len(self._page_type_codes)
+
+    def page_types(self) -> T.List[str]:
+        """
+        All document types in the order of first appearance.
+        """
+        return list(self._types)
+
+    def pages(self, page_type: str) -> T.List[int]:
+        """
+        The page numbers (1-based) of the given document type, in page order.
+        """
+        code = self._type_to_code.get(page_type)
+        if code is None:
+            return []
+        return [
+            page
+            for page, page_code in enumerate(self._page_type_codes, start=1)
+            if page_code == code
+        ]
+
+    def get_page_type(self, page: int) -> T.Optional[str]:
+        """
+        The document type of the given page, None if unknown yet.
+        """
+        try:
+            code = self._page_type_codes[page - 1]
+        except IndexError:
+            return None
+        if code == self._NO_TYPE:
+            return None
+        return self._types[code]
+
+    def documents(self, page_type: str) -> T.List[T.List[int]]:
+        """
+        Split the pages of the given document type into sub documents, for
+        example two W-2 forms of two pages each: ``[[1, 2], [7, 8]]``.
+        """
+        documents = list()
+        previous = None
+        for page in self.pages(page_type):
+            # a sub document starts at its page number 1, or when the
+            # previous page of the same type is not adjacent
+            if previous != page - 1 or self._page_numbers[page - 1] == 1:
+                documents.append([page])
+            else:
+                documents[-1].append(page)
+            previous = page
+        return documents
+
+    def to_dict(self) -> T.Dict[str, T.List[int]]:
+        """
+        Document type -> page numbers mapping.
+        """
+        mapper = {page_type: list() for page_type in self._types}
+        for page, code in enumerate(self._page_type_codes, start=1):
+            if code != self._NO_TYPE:
+                mapper[self._types[code]].append(page)
+        return mapper
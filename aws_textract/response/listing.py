@@ -0,0 +1,338 @@
+# -*- coding: utf-8 -*-
+
+"""
+Sharded, resumable listing of the Textract output prefix.
+
+A backfill over a prefix with millions of output objects spends hours in
+one paginated ``list_objects_v2`` stream. :func:`list_output_keys` splits the
+keyspace by the leading characters of the job id (the job id is a hex
+string), lists the shards concurrently, and optionally checkpoints the
+continuation token of each shard after every page, so an interrupted listing
+resumes where it stopped instead of starting over.
+
+:func:`build_output_manifest` groups the listed keys into an
+:class:`OutputManifest`, the job id to part keys mapping. Pass it to the
+``merge_xyz_result()`` functions (``manifest=...``) or to
+:func:`~aws_textract.response.bulk.bulk_merge_textract_output`, they use the
+part keys from the manifest and skip their own listing.
+
+Usage example::
+
+    manifest = build_output_manifest(
+        s3_client=boto3.client("s3"),
+        s3bucket="my-output-bucket",
+        s3prefix="my-folder/textract-output",
+        shard_prefixes=make_hex_shard_prefixes(2),  # 256 shards
+        dir_checkpoint="/tmp/listing-checkpoint",
+    )
+    manifest.write("/tmp/manifest.json")
+    ...
+    manifest = OutputManifest.read("/tmp/manifest.json")
+    s3dir = get_textract_output_s3dir(bucket, prefix, job_id)
+    res = merge_document_analysis_result(s3_client, s3dir, manifest=manifest)
+"""
+
+import typing as T
+import json
+import itertools
+import dataclasses
+import concurrent.futures
+from pathlib import Path
+
+from .. import instrumentation as instr
+from ..clients import check_pool_size
+from ..instrumentation import EventNameEnum
+from .compaction import COMPACTED_BASENAME
+
+if T.TYPE_CHECKING:  # pragma: no cover
+    from mypy_boto3_s3 import S3Client
+
+
+S3_ACCESS_CHECK = ".s3_access_check"
+
+#: Textract job id is a 64 characters hex string, so by default we shard the
+#: listing by the first character of the job id.
+HEX_SHARD_PREFIXES = tuple("0123456789abcdef")
+
+
+def make_hex_shard_prefixes(n_chars: int = 1) -> T.Tuple[str, ...]:
+    """
+    All hex strings of ``n_chars`` characters, ``16 ** n_chars`` shards.
+    """
+    return tuple(
+        "".join(chars)
+        for chars in itertools.product("0123456789abcdef", repeat=n_chars)
+    )
+
+
+def _normalize_prefix(s3prefix: str) -> str:
+    s3prefix = s3prefix.strip("/")
+    return f"{s3prefix}/" if s3prefix else ""
+
+
+def group_output_keys_by_job_id(
+    s3prefix: str,
+    keys: T.Iterable[str],
+) -> T.Dict[str, T.List[str]]:
+    """
+    Group the S3 object keys under the Textract output prefix by job id.
+    The ``.s3_access_check`` file and any key that is not a numbered part file
+    are ignored. Part keys of each job are sorted by 1, 2, 3 ...
+
+    :param s3prefix: the OutputConfig["S3Prefix"] in ``start_xyz()`` async API.
+    :param keys: the S3 object keys under the output prefix.
+
+    :return: a dictionary where the key is the job id and the value is the
+        sorted list of part keys.
+    """
+    if s3prefix and not s3prefix.endswith("/"):
+        s3prefix = s3prefix + "/"
+    n = len(s3prefix)
+    mapper: T.Dict[str, T.List[str]] = dict()
+    for key in keys:
+        if not key.startswith(s3prefix):
+            continue
+        parts = key[n:].split("/")
+        if len(parts) != 2:
+            continue
+        job_id, basename = parts
+        if basename == S3_ACCESS_CHECK or not basename.isdigit():
+            continue
+        try:
+            mapper[job_id].append(key)
+        except KeyError:
+            mapper[job_id] = [key]
+    for job_id, part_keys in mapper.items():
+        part_keys.sort(key=lambda x: int(x.rsplit("/", 1)[1]))
+    return mapper
+
+
+class _ShardCheckpoint:
+    """
+    The checkpoint of one shard: the listed keys are appended to
+    ``shard-${prefix}.keys`` after each page, then the continuation token is
+    saved to ``shard-${prefix}.json``. A crash between the two steps only
+    causes the last page to be listed again, the keys are de-duplicated.
+    """
+
+    def __init__(self, dir_checkpoint: Path, shard: str):
+        name = f"shard-{shard}" if shard else "shard-_all"
+        self.path_keys = dir_checkpoint.joinpath(f"{name}.keys")
+        self.path_state = dir_checkpoint.joinpath(f"{name}.json")
+
+    def read_state(self) -> dict:
+        if self.path_state.exists():
+            return json.loads(self.path_state.read_text(encoding="utf-8"))
+        return {"token": None, "done": False}
+
+    def write_state(self, token: T.Optional[str], done: bool):
+        path_tmp = self.path_state.with_name(self.path_state.name + ".tmp")
+        path_tmp.write_text(json.dumps({"token": token, "done": done}), encoding="utf-8")
+        path_tmp.replace(self.path_state)
+
+    def append_keys(self, keys: T.List[str]):
+        with self.path_keys.open("a", encoding="utf-8") as f:
+            for key in keys:
+                f.write(key + "\n")
+
+    def read_keys(self) -> T.List[str]:
+        if not self.path_keys.exists():
+            return []
+        with self.path_keys.open("r", encoding="utf-8") as f:
+            return [line.rstrip("\n") for line in f if line.strip()]
+
+
+def _list_shard(
+    s3_client: "S3Client",
+    s3bucket: str,
+    prefix: str,
+    checkpoint: T.Optional[_ShardCheckpoint] = None,
+    page_size: int = 1000,
+) -> T.List[str]:
+    """
+    List all keys under the prefix with ``list_objects_v2``, resume from
+    the checkpoint if given.
+    """
+    keys: T.List[str] = list()
+    token = None
+    if checkpoint is not None:
+        state = checkpoint.read_state()
+        keys = checkpoint.read_keys()
+        if state["done"]:
+            return keys
+        token = state["token"]
+    while True:
+        kwargs = dict(Bucket=s3bucket, Prefix=prefix, MaxKeys=page_size)
+        if token:
+            kwargs["ContinuationToken"] = token
+        res = instr.call_with_instrumentation(
+            s3_client.list_objects_v2,
+            latency_event=EventNameEnum.S3_LIST_LATENCY,
+            throttle_event=EventNameEnum.S3_THROTTLE,
+            operation="list_objects_v2",
+            **kwargs,
+        )
+        page_keys = [obj["Key"] for obj in res.get("Contents", [])]
+        keys.extend(page_keys)
+        token = res.get("NextContinuationToken") if res.get("IsTruncated") else None
+        if checkpoint is not None:
+            checkpoint.append_keys(page_keys)
+            checkpoint.write_state(token, done=token is None)
+        if token is None:
+            return keys
+
+
+def list_output_keys(
+    s3_client: "S3Client",
+    s3bucket: str,
+    s3prefix: str,
+    shard_prefixes: T.Iterable[str] = HEX_SHARD_PREFIXES,
+    max_workers: T.Optional[int] = None,
+    dir_checkpoint: T.Optional[T.Union[str, Path]] = None,
+    page_size: int = 1000,
+) -> T.List[str]:
+    """
+    List all object keys under the Textract output prefix, one thread per
+    shard of the keyspace.
+
+    :param s3_client: the boto3 S3 client. boto3 client is thread safe.
+    :param s3bucket: the OutputConfig["S3Bucket"] in ``start_xyz()`` async API.
+    :param s3prefix: the OutputConfig["S3Prefix"] in ``start_xyz()`` async API.
+    :param shard_prefixes: the job id prefixes used to shard the listing, they
+        have to cover all job ids, see :func:`make_hex_shard_prefixes`.
+        Use ``("",)`` to disable sharding.
+    :param max_workers: number of listing threads.
+    :param dir_checkpoint: if given, the progress of each shard is saved in
+        this local directory, call the function again with the same arguments
+        to resume an interrupted listing. Delete the directory to list again
+        from scratch.
+    :param page_size: the ``MaxKeys`` of each ``list_objects_v2`` call.
+
+    :return: the de-duplicated keys, sorted.
+    """
+    check_pool_size(s3_client, max_workers)
+    root = _normalize_prefix(s3prefix)
+    if dir_checkpoint is not None:
+        dir_checkpoint = Path(dir_checkpoint)
+        dir_checkpoint.mkdir(parents=True, exist_ok=True)
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = [
+            executor.submit(
+                _list_shard,
+                s3_client,
+                s3bucket,
+                f"{root}{shard}",
+                None
+                if dir_checkpoint is None
+                else _ShardCheckpoint(dir_checkpoint, shard),
+                page_size,
+            )
+            for shard in shard_prefixes
+        ]
+        keys = set()
+        for future in futures:
+            keys.update(future.result())
+    return sorted(keys)
+
+
+@dataclasses.dataclass
+class OutputManifest:
+    """
+    The job id to part keys mapping of a Textract output prefix.
+
+    :param s3bucket: the OutputConfig["S3Bucket"].
+    :param s3prefix: the OutputConfig["S3Prefix"].
+    :param job_id_to_part_keys: job id to the sorted "1", "2", "3" ... part keys.
+    :param compacted_job_ids: the jobs that have a compacted object, see
+        :mod:`aws_textract.response.compaction`.
+    """
+
+    s3bucket: str = dataclasses.field()
+    s3prefix: str = dataclasses.field()
+    job_id_to_part_keys: T.Dict[str, T.List[str]] = dataclasses.field(
+        default_factory=dict
+    )
+    compacted_job_ids: T.List[str] = dataclasses.field(default_factory=list)
+
+    def __post_init__(self):
+        self._compacted = set(self.compacted_job_ids)
+
+    @property
+    def job_ids(self) -> T.List[str]:
+        return sorted(set(self.job_id_to_part_keys) | self._compacted)
+
+    def is_compacted(self, job_id: str) -> bool:
+        return job_id in self._compacted
+
+    def get_part_keys(self, job_id: str) -> T.Optional[T.List[str]]:
+        """
+        The part keys of the job, None if the job is not in the manifest.
+        """
+        return self.job_id_to_part_keys.get(job_id)
+
+    @classmethod
+    def from_keys(
+        cls,
+        s3bucket: str,
+        s3prefix: str,
+        keys: T.Iterable[str],
+    ) -> "OutputManifest":
+        keys = list(keys)
+        root = _normalize_prefix(s3prefix)
+        n = len(root)
+        compacted_job_ids = sorted(
+            key[n:].split("/")[0]
+            for key in keys
+            if key.startswith(root)
+            and key[n:].count("/") == 1
+            and key.endswith("/" + COMPACTED_BASENAME)
+        )
+        return cls(
+            s3bucket=s3bucket,
+            s3prefix=s3prefix,
+            job_id_to_part_keys=group_output_keys_by_job_id(root, keys),
+            compacted_job_ids=compacted_job_ids,
+        )
+
+    def to_dict(self) -> dict:
+        return {
+            "s3bucket": self.s3bucket,
+            "s3prefix": self.s3prefix,
+            "job_id_to_part_keys": self.job_id_to_part_keys,
+            "compacted_job_ids": self.compacted_job_ids,
+        }
+
+    def write(self, path: T.Union[str, Path]):
+        path = Path(path)
+        path_tmp = path.with_name(path.name + ".tmp")
+        path_tmp.write_text(json.dumps(self.to_dict()), encoding="utf-8")
+        path_tmp.replace(path)
+
+    @classmethod
+    def read(cls, path: T.Union[str, Path]) -> "OutputManifest":
+        return cls(**json.loads(Path(path).read_text(encoding="utf-8")))
+
+
+def build_output_manifest(
+    s3_client: "S3Client",
+    s3bucket: str,
+    s3prefix: str,
+    shard_prefixes: T.Iterable[str] = HEX_SHARD_PREFIXES,
+    max_workers: T.Optional[int] = None,
+    dir_checkpoint: T.Optional[T.Union[str, Path]] = None,
+    page_size: int = 1000,
+) -> OutputManifest:
+    """
+    List the Textract output prefix (see :func:`list_output_keys`) and build
+    the :class:`OutputManifest`.
+    """
+    keys = list_output_keys(
+        s3_client=s3_client,
+        s3bucket=s3bucket,
+        s3prefix=s3prefix,
+        shard_prefixes=shard_prefixes,
+        max_workers=max_workers,
+        dir_checkpoint=dir_checkpoint,
+        page_size=page_size,
+    )
+    return OutputManifest.from_keys(s3bucket, s3prefix, keys)
@@ -9,14 +9,21 @@ a way to get the response from the S3 bucket where the Textract async API stores
 
 import typing as T
 import json
+import time
 from s3pathlib import S3Path
 
+from .. import instrumentation as instr
+from ..instrumentation import EventNameEnum
+from .compaction import COMPACTED_BASENAME, read_compacted_response
+
 if T.TYPE_CHECKING:  # pragma: no cover
     from mypy_boto3_s3 import S3Client
     from mypy_boto3_textract.type_defs import GetDocumentAnalysisResponseTypeDef
     from mypy_boto3_textract.type_defs import GetDocumentTextDetectionResponseTypeDef
     from mypy_boto3_textract.type_defs import GetExpenseAnalysisResponseTypeDef
     from mypy_boto3_textract.type_defs import GetLendingAnalysisResponseTypeDef
+    from .projection import Projection
+    from .listing import OutputManifest
 
 
 def get_textract_output_s3dir(
@@ -36,10 +43,51 @@ def get_textract_output_s3dir(
     return S3Path(f"s3://{s3bucket}/").joinpath(s3prefix).joinpath(job_id).to_dir()
 
 
+def _list_output_dir(
+    s3_client: "S3Client",
+    s3dir: S3Path,
+) -> T.Tuple[T.List[S3Path], bool]:
+    """
+    List the Textract output directory once.
+
+    :return: the numbered "1", "2", "3" ... part files, and whether the
+        ``.compacted`` object exists.
+    """
+    enabled = instr.is_enabled()
+    if enabled:
+        start = time.perf_counter()
+    s3path_list = list()
+    is_compacted = False
+    for s3path in s3dir.iter_objects(bsm=s3_client):
+        basename = s3path.basename
+        if basename.isdigit():
+            s3path_list.append(s3path)
+        elif basename == COMPACTED_BASENAME:
+            is_compacted = True
+    if enabled:
+        instr.emit_timing(EventNameEnum.S3_LIST_LATENCY, time.perf_counter() - start)
+    return s3path_list, is_compacted
+
+
+def _list_output_parts(
+    s3_client: "S3Client",
+    s3dir: S3Path,
+) -> T.List[S3Path]:
+    """
+    List the numbered "1", "2", "3" ... part files in the Textract output
+    directory, the ``.s3_access_check`` and ``.compacted`` files are excluded.
+    """
+    return _list_output_dir(s3_client, s3dir)[0]
+
+
 def _merge_textract_response(
     s3_client: "S3Client",
     s3dir: S3Path,
     key: str,
+    projection: T.Optional["Projection"] = None,
+    stream: bool = False,
+    use_compacted: bool = True,
+    manifest: T.Optional["OutputManifest"] = None,
 ) -> dict:  # pragma: no cover
     """
     The Textract async API stores the response in multiple files in a temp
@@ -57,15 +105,110 @@ def _merge_textract_response(
         and prefix are the OutputConfig["S3Bucket"] and OutputConfig["S3Prefix"] in the
         ``start_xyz()`` async API.
     :param key: "Blocks" | "ExpenseDocuments" | "Results".
+    :param projection: see :class:`~aws_textract.response.projection.Projection`.
+    :param stream: see :func:`merge_document_analysis_result`.
+    :param use_compacted: see :func:`merge_document_analysis_result`.
+    :param manifest: see :func:`merge_document_analysis_result`.
     """
-    res = s3dir.iter_objects(bsm=s3_client).filter(
-        lambda x: x.basename != ".s3_access_check"
+    if manifest is not None:
+        job_id = s3dir.basename
+        part_keys = manifest.get_part_keys(job_id)
+        if use_compacted and manifest.is_compacted(job_id):
+            res = read_compacted_response(
+                s3_client=s3_client,
+                s3dir=s3dir,
+                key=key,
+                projection=projection,
+            )
+            if res is not None:
+                return res
+        if part_keys:
+            return _merge_textract_response_parts(
+                s3_client=s3_client,
+                s3path_list=[S3Path(s3dir.bucket, k) for k in part_keys],
+                key=key,
+                projection=projection,
+                stream=stream,
+            )
+    # the listing tells whether the compacted object exists, a job that was
+    # never compacted costs no extra GET
+    s3path_list, is_compacted = _list_output_dir(s3_client, s3dir)
+    if use_compacted and is_compacted:
+        res = read_compacted_response(
+            s3_client=s3_client,
+            s3dir=s3dir,
+            key=key,
+            projection=projection,
+        )
+        if res is not None:
+            return res
+    return _merge_textract_response_parts(
+        s3_client=s3_client,
+        s3path_list=s3path_list,
+        key=key,
+        projection=projection,
+        stream=stream,
     )
+
+
+def _merge_textract_response_parts(
+    s3_client: "S3Client",
+    s3path_list: T.Iterable[S3Path],
+    key: str,
+    projection: T.Optional["Projection"] = None,
+    stream: bool = False,
+) -> dict:  # pragma: no cover
+    """
+    Merge the given list of Textract output part files into one dict. The
+    caller is responsible for listing the parts (and excluding the
+    ``.s3_access_check`` file). The parts are sorted by 1, 2, 3 ... before merging.
+
+    :param s3_client: the boto3 S3 client.
+    :param s3path_list: the S3 path of the "1", "2", "3" ... part files.
+    :param key: "Blocks" | "ExpenseDocuments" | "Results".
+    :param projection: if given, each part is projected right after it is
+        decoded, see :class:`~aws_textract.response.projection.Projection`.
+    :param stream: parse the parts incrementally, see
+        :mod:`aws_textract.response.stream`.
+    """
+    if stream:
+        from .stream import _iter_parts_items
+
+        data = dict()
+        items = list(
+            _iter_parts_items(
+                s3_client=s3_client,
+                s3path_list=s3path_list,
+                key=key,
+                projection=projection,
+                metadata=data,
+            )
+        )
+        data[key] = items
+        return data
+
     # sort by 1, 2, 3 ...
-    res = sorted(res, key=lambda x: int(x.basename), reverse=False)
+    res = sorted(s3path_list, key=lambda x: int(x.basename), reverse=False)
     data = None
     for s3path in res:
-        dct = json.loads(s3path.read_text(bsm=s3_client))
+        body = instr.call_with_instrumentation(
+            s3path.read_bytes,
+            latency_event=EventNameEnum.S3_GET_LATENCY,
+            throttle_event=EventNameEnum.S3_THROTTLE,
+            operation="get_object",
+            bsm=s3_client,
+        )
+        if instr.is_enabled():
+            instr.emit_counter(EventNameEnum.S3_BYTES_DOWNLOADED, len(body))
+            instr.emit_counter(EventNameEnum.MERGE_PARTS)
+            start = time.perf_counter()
+            dct = json.loads(body)
+            instr.emit_timing(EventNameEnum.JSON_PARSE_TIME, time.perf_counter() - start)
+        else:
+            dct = json.loads(body)
+        del body
+        if projection is not None and key in dct:
+            dct[key] = projection.project_items(key, dct[key])
         if data is None:
             data = dct
         else:
@@ -76,6 +219,10 @@ def _merge_textract_response(
 def merge_document_analysis_result(
     s3_client: "S3Client",
     s3dir: S3Path,
+    projection: T.Optional["Projection"] = None,
+    stream: bool = False,
+    use_compacted: bool = True,
+    manifest: T.Optional["OutputManifest"] = None,
 ) -> "GetDocumentAnalysisResponseTypeDef":  # pragma: no cover
     """
     The Textract async API stores the response in multiple files in a temp
@@ -92,17 +239,36 @@ def merge_document_analysis_result(
         The directory looks like "s3://{bucket}/{prefix}/{job_id}/", where the bucket
         and prefix are the OutputConfig["S3Bucket"] and OutputConfig["S3Prefix"] in the
         ``start_xyz()`` async API.
+    :param projection: the fields and block types to keep, unwanted ones are
+        dropped as each part is decoded, see :class:`~aws_textract.response.projection.Projection`.
+    :param stream: if True, read each part as a stream and parse it
+        incrementally with ``ijson``, so no whole part file is held in memory.
+        Requires ``ijson``.
+    :param use_compacted: if True, read the compacted object written by
+        :func:`~aws_textract.response.compaction.compact_textract_output`
+        with one GET when the listing finds it, otherwise read the part files.
+    :param manifest: the :class:`~aws_textract.response.listing.OutputManifest`
+        of the output prefix, if the job is in it, its part keys are used
+        directly, no listing and no compacted object probe.
     """
     return _merge_textract_response(
         s3_client=s3_client,
         s3dir=s3dir,
         key="Blocks",
+        projection=projection,
+        stream=stream,
+        use_compacted=use_compacted,
+        manifest=manifest,
     )
 
 
 def merge_document_text_detection_result(
     s3_client: "S3Client",
     s3dir: S3Path,
+    projection: T.Optional["Projection"] = None,
+    stream: bool = False,
+    use_compacted: bool = True,
+    manifest: T.Optional["OutputManifest"] = None,
 ) -> "GetDocumentTextDetectionResponseTypeDef":  # pragma: no cover
     """
     The Textract async API stores the response in multiple files in a temp
@@ -119,17 +285,36 @@ def merge_document_text_detection_result(
         The directory looks like "s3://{bucket}/{prefix}/{job_id}/", where the bucket
         and prefix are the OutputConfig["S3Bucket"] and OutputConfig["S3Prefix"] in the
         ``start_xyz()`` async API.
+    :param projection: the fields and block types to keep, unwanted ones are
+        dropped as each part is decoded, see :class:`~aws_textract.response.projection.Projection`.
+    :param stream: if True, read each part as a stream and parse it
+        incrementally with ``ijson``, so no whole part file is held in memory.
+        Requires ``ijson``.
+    :param use_compacted: if True, read the compacted object written by
+        :func:`~aws_textract.response.compaction.compact_textract_output`
+        with one GET when the listing finds it, otherwise read the part files.
+    :param manifest: the :class:`~aws_textract.response.listing.OutputManifest`
+        of the output prefix, if the job is in it, its part keys are used
+        directly, no listing and no compacted object probe.
     """
     return _merge_textract_response(
         s3_client=s3_client,
         s3dir=s3dir,
         key="Blocks",
+        projection=projection,
+        stream=stream,
+        use_compacted=use_compacted,
+        manifest=manifest,
     )
 
 
 def merge_expense_analysis_result(
     s3_client: "S3Client",
     s3dir: S3Path,
+    projection: T.Optional["Projection"] = None,
+    stream: bool = False,
+    use_compacted: bool = True,
+    manifest: T.Optional["OutputManifest"] = None,
 ) -> "GetExpenseAnalysisResponseTypeDef":  # pragma: no cover
     """
     The Textract async API stores the response in multiple files in a temp
@@ -146,17 +331,35 @@ def merge_expense_analysis_result(
         The directory looks like "s3://{bucket}/{prefix}/{job_id}/", where the bucket
         and prefix are the OutputConfig["S3Bucket"] and OutputConfig["S3Prefix"] in the
         ``start_xyz()`` async API.
+    :param projection: the fields and block types to keep, unwanted ones are
+        dropped as each part is decoded, see :class:`~aws_textract.response.projection.Projection`.
+    :param stream: if True, read each part as a stream and parse it
+        incrementally with ``ijson``, so no whole part file is held in memory.
+        Requires ``ijson``.
+    :param use_compacted: if True, read the compacted object written by
+        :func:`~aws_textract.response.compaction.compact_textract_output`
+        with one GET when the listing finds it, otherwise read the part files.
+    :param manifest: the :class:`~aws_textract.response.listing.OutputManifest`
+        of the output prefix, if the job is in it, its part keys are used
+        directly, no listing and no compacted object probe.
     """
     return _merge_textract_response(
         s3_client=s3_client,
         s3dir=s3dir,
         key="ExpenseDocuments",
+        projection=projection,
+        stream=stream,
+        use_compacted=use_compacted,
+        manifest=manifest,
     )
 
 
 def merge_lending_analysis_result(
     s3_client: "S3Client",
     s3dir: S3Path,
+    stream: bool = False,
+    use_compacted: bool = True,
+    manifest: T.Optional["OutputManifest"] = None,
 ) -> "GetLendingAnalysisResponseTypeDef":  # pragma: no cover
     """
     The Textract async API stores the response in multiple files in a temp
@@ -173,9 +376,21 @@ def merge_lending_analysis_result(
         The directory looks like "s3://{bucket}/{prefix}/{job_id}/", where the bucket
         and prefix are the OutputConfig["S3Bucket"] and OutputConfig["S3Prefix"] in the
         ``start_xyz()`` async API.
+    :param stream: if True, read each part as a stream and parse it
+        incrementally with ``ijson``, so no whole part file is held in memory.
+        Requires ``ijson``.
+    :param use_compacted: if True, read the compacted object written by
+        :func:`~aws_textract.response.compaction.compact_textract_output`
+        with one GET when the listing finds it, otherwise read the part files.
+    :param manifest: the :class:`~aws_textract.response.listing.OutputManifest`
+        of the output prefix, if the job is in it, its part keys are used
+        directly, no listing and no compacted object probe.
     """
     return _merge_textract_response(
         s3_client=s3_client,
         s3dir=s3dir,
         key="Results",
+        stream=stream,
+        use_compacted=use_compacted,
+        manifest=manifest,
     )
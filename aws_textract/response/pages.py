@@ -0,0 +1,129 @@
+# -*- coding: utf-8 -*-
+
+"""
+Emit the text and blocks of each page as soon as the page is complete.
+
+:func:`~aws_textract.response.utils.blocks_to_text` needs the full block list,
+so a preview waits until every page of the document is retrieved and merged.
+Textract returns the blocks in page order, in both the ``get_xyz()`` API
+pagination and the S3 output parts. :func:`iter_pages` consumes the blocks
+as they arrive and yields a :class:`PageOutput` each time a page is known to
+be complete, which is when the first block of a later page arrives. The time
+to the first page only depends on the size of the first page, not on the
+length of the document.
+
+Sources:
+
+- any iterable of blocks, see :func:`iter_pages`.
+- the S3 output parts, parsed incrementally, see :func:`iter_pages_from_s3`.
+- the ``get_xyz()`` API pages, see
+  :func:`~aws_textract.better_boto.async_api.iter_document_text_detection_pages`
+  and :func:`~aws_textract.better_boto.async_api.iter_document_analysis_pages`.
+
+Usage example::
+
+    for page in iter_pages_from_s3(s3_client, s3dir):
+        ui.show_preview(page.page, page.text)
+        save_json(f"page-{page.page}.json", page.to_dict())
+"""
+
+import typing as T
+import dataclasses
+
+from .utils import blocks_to_text
+from .stream import iter_textract_output_items
+
+if T.TYPE_CHECKING:  # pragma: no cover
+    from s3pathlib import S3Path
+    from mypy_boto3_s3 import S3Client
+    from mypy_boto3_textract.type_defs import BlockTypeDef
+    from .projection import Projection
+
+
+@dataclasses.dataclass
+class PageOutput:
+    """
+    The output of one complete page.
+
+    :param page: the page number.
+    :param blocks: the blocks of the page, in the original order.
+    """
+
+    page: int = dataclasses.field()
+    blocks: T.List["BlockTypeDef"] = dataclasses.field(default_factory=list)
+
+    @property
+    def text(self) -> str:
+        """
+        The ``LINE`` texts of the page joined by newline, the same as
+        :func:`~aws_textract.response.utils.blocks_to_text` of the page.
+        """
+        return blocks_to_text(self.blocks)
+
+    def to_dict(self) -> dict:
+        """
+        The structured JSON of the page,
+        ``{"Page": ..., "Text": ..., "Blocks": [...]}``.
+        """
+        return {"Page": self.page, "Text": self.text, "Blocks": self.blocks}
+
+
+def iter_pages(
+    blocks: T.Iterable["BlockTypeDef"],
+) -> T.Iterator[PageOutput]:
+    """
+    Group a stream of blocks into pages, yield a page once the first block of
+    another page arrives, and the last page when the stream ends.
+
+    The blocks are expected in page order, as Textract returns them. A block
+    without ``Page`` belongs to page 1. If the stream goes back to an earlier
+    page, that run of blocks is yielded as another :class:`PageOutput` with
+    the same page number.
+    """
+    current: T.Optional[PageOutput] = None
+    for block in blocks:
+        page = block.get("Page", 1)
+        if current is None:
+            current = PageOutput(page=page)
+        elif page != current.page:
+            yield current
+            current = PageOutput(page=page)
+        current.blocks.append(block)
+    if current is not None:
+        yield current
+
+
+def iter_pages_from_s3(
+    s3_client: "S3Client",
+    s3dir: "S3Path",
+    projection: T.Optional["Projection"] = None,
+    metadata: T.Optional[dict] = None,
+    backend: T.Optional[str] = None,
+) -> T.Iterator[PageOutput]:
+    """
+    Stream the Textract output parts in the S3 directory, in order, and yield
+    each page once it is complete. Only the blocks of the current page are
+    held in memory.
+
+    Requires ``ijson``, see
+    :func:`~aws_textract.response.stream.iter_textract_output_items`.
+
+    :param s3_client: the boto3 S3 client.
+    :param s3dir: the S3 directory where the Textract response files are
+        stored, see :func:`~aws_textract.response.merge.get_textract_output_s3dir`.
+    :param projection: if given, each block is projected right after it is
+        parsed, see :class:`~aws_textract.response.projection.Projection`.
+    :param metadata: if given, the other top level fields of the first part
+        (``DocumentMetadata``, ``JobStatus`` ...) are stored in this dict.
+    :param backend: the ijson backend name.
+    """
+    return iter_pages(
+        iter_textract_output_items(
+            s3_client=s3_client,
+            s3dir=s3dir,
+            key="Blocks",
+            projection=projection,
+            metadata=metadata,
+            backend=backend,
+        )
+    )
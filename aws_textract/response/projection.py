@@ -0,0 +1,157 @@
+# -*- coding: utf-8 -*-
+
+"""
+Projection (field pruning) and block type filtering of Textract blocks.
+
+Most consumers only need a few fields of each block, but a full block carries
+the ``Polygon``, ``Confidence``, ``EntityTypes`` ... as well. Pass a
+:class:`Projection` to the ``get_xyz()`` and ``merge_xyz_result()`` functions,
+unwanted fields and block types are dropped as soon as each paginator page or
+output part is decoded, before the pages are accumulated.
+
+Usage example::
+
+    res = get_document_analysis(
+        textract_client,
+        job_id,
+        projection=Projection.minimal(block_types=["PAGE", "LINE", "WORD"]),
+    )
+"""
+
+import typing as T
+import dataclasses
+
+if T.TYPE_CHECKING:  # pragma: no cover
+    from mypy_boto3_textract.type_defs import BlockTypeDef
+
+
+#: the fields that most consumers need.
+MINIMAL_FIELDS = (
+    "BlockType",
+    "Id",
+    "Page",
+    "Text",
+    "Relationships",
+    "Geometry.BoundingBox",
+)
+
+
+@dataclasses.dataclass(frozen=True)
+class Projection:
+    """
+    Which fields and block types to keep.
+
+    :param fields: the block fields to keep, None to keep all fields. Use
+        a dotted path to keep only some sub fields of a dict field, for example
+        ``"Geometry.BoundingBox"`` keeps the bounding box but not the polygon.
+    :param block_types: the ``BlockType`` to keep, None to keep all block types.
+    :param relationship_types: the relationship ``Type`` to keep (for example
+        ``CHILD``, ``VALUE``, ``ANSWER``), None to keep all relationships.
+    """
+
+    fields: T.Optional[T.Tuple[str, ...]] = dataclasses.field(default=None)
+    block_types: T.Optional[T.FrozenSet[str]] = dataclasses.field(default=None)
+    relationship_types: T.Optional[T.FrozenSet[str]] = dataclasses.field(
+        default=None
+    )
+
+    def __post_init__(self):
+        # normalize the user input (list, set, enum) to hashable str tuples / sets
+        if self.fields is not None:
+            object.__setattr__(self, "fields", tuple(self.fields))
+        if self.block_types is not None:
+            object.__setattr__(
+                self,
+                "block_types",
+                frozenset(getattr(t, "value", t) for t in self.block_types),
+            )
+        if self.relationship_types is not None:
+            object.__setattr__(
+                self, "relationship_types", frozenset(self.relationship_types)
+            )
+        top: T.List[str] = list()
+        nested: T.Dict[str, T.List[str]] = dict()
+        for field in self.fields or ():
+            if "." in field:
+                parent, child = field.split(".", 1)
+                nested.setdefault(parent, []).append(child)
+            else:
+                top.append(field)
+        # a field that is kept as a whole doesn't need the nested projection
+        for field in top:
+            nested.pop(field, None)
+        object.__setattr__(self, "_top", tuple(top))
+        object.__setattr__(
+            self, "_nested", tuple((k, tuple(v)) for k, v in nested.items())
+        )
+
+    @classmethod
+    def minimal(
+        cls,
+        block_types: T.Optional[T.Iterable[str]] = None,
+    ) -> "Projection":
+        """
+        Keep ``BlockType``, ``Id``, ``Page``, ``Text``, the ``CHILD``
+        relationships and the bounding box.
+        """
+        return cls(
+            fields=MINIMAL_FIELDS,
+            block_types=block_types,
+            relationship_types={"CHILD"},
+        )
+
+    def project_blocks(
+        self,
+        blocks: T.Iterable["BlockTypeDef"],
+    ) -> T.List["BlockTypeDef"]:
+        """
+        Return a new list of the projected blocks.
+        """
+        block_types = self.block_types
+        relationship_types = self.relationship_types
+        if self.fields is None and relationship_types is None:
+            if block_types is None:
+                return list(blocks)
+            return [block for block in blocks if block["BlockType"] in block_types]
+
+        top = self._top
+        nested = self._nested
+        keep_all = self.fields is None
+        projected = list()
+        append = projected.append
+        for block in blocks:
+            if block_types is not None and block["BlockType"] not in block_types:
+                continue
+            if keep_all:
+                new_block = dict(block)
+            else:
+                new_block = {k: block[k] for k in top if k in block}
+                for parent, children in nested:
+                    value = block.get(parent)
+                    if value is not None:
+                        new_block[parent] = {k: value[k] for k in children if k in value}
+            if relationship_types is not None and "Relationships" in new_block:
+                new_block["Relationships"] = [
+                    rel
+                    for rel in new_block["Relationships"]
+                    if rel["Type"] in relationship_types
+                ]
+            append(new_block)
+        return projected
+
+    def project_items(self, key: str, items: T.List[dict]) -> T.List[dict]:
+        """
+        Project the paginated items of a response.
+
+        :param key: "Blocks" | "ExpenseDocuments" | "Results".
+        :param items: the ``response[key]`` list.
+        """
+        if key == "Blocks":
+            return self.project_blocks(items)
+        elif key == "ExpenseDocuments":
+            for item in items:
+                if "Blocks" in item:
+                    item["Blocks"] = self.project_blocks(item["Blocks"])
+            return items
+        else:  # lending analysis results don't have blocks
+            return items
@@ -0,0 +1,258 @@
+# -*- coding: utf-8 -*-
+
+"""
+Pair the ``QUERY`` blocks with their ``QUERY_RESULT`` answers.
+
+With the ``QUERIES`` feature, the document analysis response has a ``QUERY``
+block per query per page, its ``ANSWER`` relationship points to the
+``QUERY_RESULT`` blocks. :class:`QueryResults` resolves the relationships of a
+merged response in one pass with an id index, instead of scanning the block
+list once per query, and groups the answers by alias and by page.
+:class:`QueryMatrix` collects the best answer of each alias across many
+documents into an alias x document matrix for downstream scoring.
+
+Usage example::
+
+    results = QueryResults.from_blocks(res["Blocks"])
+    results.best("INVOICE_NUMBER").text
+    results.by_page()[2]
+
+    matrix = QueryMatrix.from_responses(
+        (job_id, merge_document_analysis_result(s3_client, s3dir))
+        for job_id, s3dir in jobs
+    )
+    matrix.get("INVOICE_NUMBER", job_id)
+    matrix.confidence_row("INVOICE_NUMBER")  # one float per document
+"""
+
+import typing as T
+import dataclasses
+from array import array
+
+from .contants import BlockTypeEnum
+
+if T.TYPE_CHECKING:  # pragma: no cover
+    import numpy as np
+    from mypy_boto3_textract.type_defs import BlockTypeDef
+
+
+@dataclasses.dataclass
+class QueryAnswer:
+    """
+    One answer of a query.
+
+    :param alias: the query ``Alias``, or the query text if it has no alias.
+    :param query: the query text.
+    :param text: the answer text.
+    :param confidence: the answer confidence, 0 ~ 100.
+    :param page: the page of the answer.
+    :param block_id: the ``Id`` of the ``QUERY_RESULT`` block.
+    """
+
+    alias: str = dataclasses.field()
+    query: str = dataclasses.field()
+    text: str = dataclasses.field()
+    confidence: float = dataclasses.field()
+    page: int = dataclasses.field()
+    block_id: str = dataclasses.field()
+
+
+class QueryResults:
+    """
+    The answers of all queries of one document, use :meth:`from_blocks`.
+
+    :param answers: all answers in the block order.
+    :param aliases: all query aliases in the order of first appearance,
+        including the ones without answer.
+    """
+
+    def __init__(self, answers: T.List[QueryAnswer], aliases: T.List[str]):
+        self.answers = answers
+        self.aliases = aliases
+        self._by_alias: T.Dict[str, T.List[QueryAnswer]] = {a: [] for a in aliases}
+        for answer in answers:
+            self._by_alias[answer.alias].append(answer)
+        for alias_answers in self._by_alias.values():
+            alias_answers.sort(key=lambda x: -x.confidence)
+
+    @classmethod
+    def from_blocks(
+        cls,
+        blocks: T.Union[dict, T.Iterable["BlockTypeDef"]],
+    ) -> "QueryResults":
+        """
+        :param blocks: the blocks of a ``get_document_analysis`` response
+            with the ``QUERIES`` feature, or the response itself.
+        """
+        if isinstance(blocks, dict):
+            blocks = blocks.get("Blocks", [])
+        query_blocks = list()
+        results: T.Dict[str, dict] = dict()
+        for block in blocks:
+            block_type = block["BlockType"]
+            if block_type == BlockTypeEnum.QUERY_RESULT.value:
+                results[block["Id"]] = block
+            elif block_type == BlockTypeEnum.QUERY.value:
+                query_blocks.append(block)
+
+        answers = list()
+        aliases = dict()  # ordered set
+        for block in query_blocks:
+            query = block.get("Query", {})
+            text = query.get("Text", "")
+            alias = query.get("Alias") or text
+            aliases[alias] = None
+            for rel in block.get("Relationships", []):
+                if rel["Type"] != "ANSWER":
+                    continue
+                for result_id in rel["Ids"]:
+                    result = results.get(result_id)
+                    if result is None:
+                        continue
+                    answers.append(
+                        QueryAnswer(
+                            alias=alias,
+                            query=text,
+                            text=result.get("Text", ""),
+                            confidence=result.get("Confidence", 0.0),
+                            page=result.get("Page", block.get("Page", 1)),
+                            block_id=result_id,
+                        )
+                    )
+        return cls(answers=answers, aliases=list(aliases))
+
+    def by_alias(self) -> T.Dict[str, T.List[QueryAnswer]]:
+        """
+        Alias -> answers mapping, the most confident answer first. An alias
+        without answer maps to an empty list.
+        """
+        return {alias: list(answers) for alias, answers in self._by_alias.items()}
+
+    def by_page(self) -> T.Dict[int, T.List[QueryAnswer]]:
+        """
+        Page -> answers mapping, in the block order.
+        """
+        mapper: T.Dict[int, T.List[QueryAnswer]] = dict()
+        for answer in self.answers:
+            mapper.setdefault(answer.page, []).append(answer)
+        return dict(sorted(mapper.items()))
+
+    def best(self, alias: str) -> T.Optional[QueryAnswer]:
+        """
+        The most confident answer of the alias across all pages, None if
+        the query has no answer.
+        """
+        answers = self._by_alias.get(alias)
+        return answers[0] if answers else None
+
+
+class QueryMatrix:
+    """
+    The best answer of each alias in each document, stored alias-major: the
+    confidences in one ``array("f")`` (``nan`` if no answer), the answer texts
+    in one list, use :meth:`from_responses`.
+
+    :param aliases: the row labels.
+    :param document_ids: the column labels.
+    """
+
+    def __init__(
+        self,
+        aliases: T.List[str],
+        document_ids: T.List[str],
+        texts: T.List[T.Optional[str]],
+        confidences: array,
+    ):
+        self.aliases = aliases
+        self.document_ids = document_ids
+        self.texts = texts
+        self.confidences = confidences
+        self._alias_to_row = {alias: i for i, alias in enumerate(aliases)}
+        self._document_to_col = {d: i for i, d in enumerate(document_ids)}
+
+    @classmethod
+    def from_responses(
+        cls,
+        responses: T.Iterable[T.Tuple[str, T.Union[dict, QueryResults]]],
+        aliases: T.Optional[T.Iterable[str]] = None,
+    ) -> "QueryMatrix":
+        """
+        :param responses: iterable of ``(document_id, response)``, the
+            response can also be a :class:`QueryResults`.
+        :param aliases: the rows, default is all aliases seen in the order of
+            first appearance.
+        """
+        document_ids = list()
+        best_by_document = list()
+        seen_aliases = dict()  # ordered set
+        for document_id, response in responses:
+            if not isinstance(response, QueryResults):
+                response = QueryResults.from_blocks(response)
+            document_ids.append(document_id)
+            best_by_document.append(
+                {alias: response.best(alias) for alias in response.aliases}
+            )
+            for alias in response.aliases:
+                seen_aliases[alias] = None
+        aliases = list(seen_aliases) if aliases is None else list(aliases)
+
+        nan = float("nan")
+        texts = list()
+        confidences = array("f")
+        for alias in aliases:
+            for best in best_by_document:
+                answer = best.get(alias)
+                if answer is None:
+                    texts.append(None)
+                    confidences.append(nan)
+                else:
+                    texts.append(answer.text)
+                    confidences.append(answer.confidence)
+        return cls(
+            aliases=aliases,
+            document_ids=document_ids,
+            texts=texts,
+            confidences=confidences,
+        )
+
+    @property
+    def shape(self) -> T.Tuple[int, int]:
+        return len(self.aliases), len(self.document_ids)
+
+    def _offset(self, alias: str, document_id: str) -> int:
+        row = self._alias_to_row[alias]
+        return row * len(self.document_ids) + self._document_to_col[document_id]
+
+    def get(self, alias: str, document_id: str) -> T.Optional[str]:
+        """
+        The best answer text, None if no answer.
+        """
+        return self.texts[self._offset(alias, document_id)]
+
+    def get_confidence(self, alias: str, document_id: str) -> float:
+        return self.confidences[self._offset(alias, document_id)]
+
+    def text_row(self, alias: str) -> T.List[T.Optional[str]]:
+        """
+        The best answer text of the alias in each document.
+        """
+        n = len(self.document_ids)
+        start = self._alias_to_row[alias] * n
+        return self.texts[start : start + n]
+
+    def confidence_row(self, alias: str) -> array:
+        """
+        The best answer confidence of the alias in each document.
+        """
+        n = len(self.document_ids)
+        start = self._alias_to_row[alias] * n
+        return self.confidences[start : start + n]
+
+    def to_numpy(self) -> "np.ndarray":
+        """
+        The ``(n_aliases, n_documents)`` confidence matrix, requires ``numpy``.
+        The buffer is shared, no copy.
+        """
+        import numpy as np
+
+        return np.frombuffer(self.confidences, dtype=np.float32).reshape(self.shape)
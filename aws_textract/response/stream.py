@@ -0,0 +1,205 @@
+# -*- coding: utf-8 -*-
+
+"""
+Incremental (streaming) JSON parsing of the Textract output part files.
+
+A Textract output part file can be tens of MB. ``json.loads`` needs the whole
+raw body in memory, then builds the whole dict. This module reads the S3
+object body as a stream with the `ijson <https://pypi.org/project/ijson/>`_
+parser, and yields one ``Blocks`` / ``ExpenseDocuments`` / ``Results`` item at
+a time, so the peak memory of parsing scales with one item, not one part file.
+ijson automatically uses its C (yajl2) backend when it is available, the
+items are built in C, the speed is close to ``json.loads``. Collecting the top
+level metadata of the first part costs a slower parse of that part, see
+:func:`iter_json_array_items`.
+
+Requires ``ijson``.
+
+Usage example::
+
+    s3dir = get_textract_output_s3dir(bucket, prefix, job_id)
+    for block in iter_textract_output_items(s3_client, s3dir, key="Blocks"):
+        ...
+"""
+
+import typing as T
+import collections
+
+from .. import instrumentation as instr
+from ..instrumentation import EventNameEnum
+
+if T.TYPE_CHECKING:  # pragma: no cover
+    from s3pathlib import S3Path
+    from mypy_boto3_s3 import S3Client
+    from .projection import Projection
+
+
+def _get_ijson_backend(backend: T.Optional[str] = None):
+    import ijson
+
+    # the backend module, the top level ijson module lacks the basecoro API
+    return ijson.get_backend(ijson.backend if backend is None else backend)
+
+
+def iter_json_array_items(
+    fileobj: T.BinaryIO,
+    key: str,
+    metadata: T.Optional[dict] = None,
+    backend: T.Optional[str] = None,
+) -> T.Iterator[dict]:
+    """
+    Parse a JSON object from a binary file like object incrementally, yield
+    the items of its top level ``key`` array one by one.
+
+    The items are built by the ijson backend (in C with ``yajl2_c``), never
+    event by event in Python, so it is about as fast as ``json.loads``.
+
+    :param fileobj: a binary file like object that has a ``read(size)`` method,
+        for example the ``get_object()["Body"]`` of boto3 S3 client.
+    :param key: "Blocks" | "ExpenseDocuments" | "Results".
+    :param metadata: if given, the other top level fields (``DocumentMetadata``,
+        ``JobStatus`` ...) are stored in this dict once they are parsed. The
+        items are still yielded one by one, but the parser has to go through
+        the prefix of every event, which is 2 to 3 times slower, only pass it
+        for the first part.
+    :param backend: the ijson backend name, for example ``"yajl2_c"``,
+        ``"python"``. By default, ijson picks the fastest available one.
+    """
+    ijson = _get_ijson_backend(backend)
+    if metadata is None:
+        yield from ijson.items(fileobj, f"{key}.item", use_float=True)
+    else:
+        yield from _iter_items_and_metadata(ijson, fileobj, key, metadata)
+
+
+def _iter_items_and_metadata(
+    ijson,
+    fileobj: T.BinaryIO,
+    key: str,
+    metadata: dict,
+    buf_size: int = 64 * 1024,
+) -> T.Iterator[dict]:
+    """
+    Split the prefixed events of one pass: the events inside the ``key``
+    array go to the item builder, the others go to the top level field
+    builder. Both builders are the ijson backend ones.
+    """
+    from ijson.utils import sendable_list
+
+    inner = f"{key}."
+    events = sendable_list()
+    items = sendable_list()
+    fields = sendable_list()
+    parser = ijson.parse_coro(events, use_float=True)
+    send_item_event = ijson.items_basecoro(items, f"{key}.item").send
+    send_field_event = ijson.kvitems_basecoro(fields, "").send
+    # call a C function on every event, without a Python loop
+    consume = collections.deque(maxlen=0).extend
+    while True:
+        chunk = fileobj.read(buf_size)
+        if chunk:
+            parser.send(chunk)
+        else:
+            parser.close()
+        if events:
+            # the array is one contiguous run of events, a chunk that starts
+            # and ends inside it has nothing else
+            if events[0][0].startswith(inner) and events[-1][0].startswith(inner):
+                consume(map(send_item_event, events))
+            else:
+                for event in events:
+                    if event[0].startswith(inner):
+                        send_item_event(event)
+                    else:
+                        # the key itself arrives as an empty array
+                        send_field_event(event)
+            del events[:]
+        if fields:
+            for field, value in fields:
+                if field != key:
+                    metadata[field] = value
+            del fields[:]
+        if items:
+            yield from items
+            del items[:]
+        if not chunk:
+            break
+
+
+def _iter_parts_items(
+    s3_client: "S3Client",
+    s3path_list: T.Iterable["S3Path"],
+    key: str,
+    projection: T.Optional["Projection"] = None,
+    metadata: T.Optional[dict] = None,
+    backend: T.Optional[str] = None,
+) -> T.Iterator[dict]:
+    """
+    Stream the items of the given part files, in the 1, 2, 3 ... order.
+    The ``metadata`` is taken from the first part.
+    """
+    s3path_list = sorted(s3path_list, key=lambda x: int(x.basename))
+    for i, s3path in enumerate(s3path_list):
+        res = instr.call_with_instrumentation(
+            s3_client.get_object,
+            latency_event=EventNameEnum.S3_GET_LATENCY,
+            throttle_event=EventNameEnum.S3_THROTTLE,
+            operation="get_object",
+            Bucket=s3path.bucket,
+            Key=s3path.key,
+        )
+        if instr.is_enabled():
+            instr.emit_counter(
+                EventNameEnum.S3_BYTES_DOWNLOADED, res.get("ContentLength", 0)
+            )
+            instr.emit_counter(EventNameEnum.MERGE_PARTS)
+        body = res["Body"]
+        try:
+            items = iter_json_array_items(
+                body,
+                key=key,
+                metadata=metadata if i == 0 else None,
+                backend=backend,
+            )
+            if projection is None:
+                yield from items
+            else:
+                for item in items:
+                    yield from projection.project_items(key, [item])
+        finally:
+            body.close()
+
+
+def iter_textract_output_items(
+    s3_client: "S3Client",
+    s3dir: "S3Path",
+    key: str,
+    projection: T.Optional["Projection"] = None,
+    metadata: T.Optional[dict] = None,
+    backend: T.Optional[str] = None,
+) -> T.Iterator[dict]:
+    """
+    Stream the ``key`` items of all the Textract output part files in the S3
+    directory, without holding any whole part file in memory.
+
+    :param s3_client: the boto3 S3 client.
+    :param s3dir: the S3 directory where the Textract response files are
+        stored, see :func:`~aws_textract.response.merge.get_textract_output_s3dir`.
+    :param key: "Blocks" | "ExpenseDocuments" | "Results".
+    :param projection: if given, each item is projected right after it is
+        parsed, see :class:`~aws_textract.response.projection.Projection`.
+    :param metadata: if given, the other top level fields of the first part
+        (``DocumentMetadata``, ``JobStatus`` ...) are stored in this dict.
+    :param backend: the ijson backend name, see :func:`iter_json_array_items`.
+    """
+    s3path_list = s3dir.iter_objects(bsm=s3_client).filter(
+        lambda x: x.basename.isdigit()
+    )
+    return _iter_parts_items(
+        s3_client=s3_client,
+        s3path_list=s3path_list,
+        key=key,
+        projection=projection,
+        metadata=metadata,
+        backend=backend,
+    )
@@ -0,0 +1,201 @@
+# -*- coding: utf-8 -*-
+
+"""
+Extract the text together with a character offset -> block map.
+
+:func:`~aws_textract.response.utils.blocks_to_text` returns only the text, so
+mapping an entity found by an NLP stage back to its ``WORD`` / ``LINE``
+blocks, page and bounding box means rescanning all the blocks.
+:class:`TextOffsetMap` is built in the same pass that builds the text. It
+stores the ``[start, end)`` character range, page and bounding box of every
+``LINE`` and ``WORD`` in flat typed arrays sorted by offset, so a span lookup
+is a binary search, ``O(log n)`` plus the number of blocks in the span.
+
+The text is the same as the ``blocks_to_text`` output: the ``LINE`` texts
+joined by newline.
+
+Usage example::
+
+    offset_map = TextOffsetMap.from_blocks(res["Blocks"])
+    text = offset_map.text
+    for match in re.finditer(r"\\d{3}-\\d{2}-\\d{4}", text):
+        for hit in offset_map.find_words(match.start(), match.end()):
+            print(hit.block_id, hit.page, hit.bbox)
+"""
+
+import typing as T
+import bisect
+import dataclasses
+from array import array
+
+from .contants import BlockTypeEnum
+
+if T.TYPE_CHECKING:  # pragma: no cover
+    from mypy_boto3_textract.type_defs import BlockTypeDef
+
+
+@dataclasses.dataclass(frozen=True)
+class SpanHit:
+    """
+    A block that overlaps the looked up character span.
+
+    :param block_id: the ``Id`` of the ``WORD`` or ``LINE`` block.
+    :param block_type: ``WORD`` or ``LINE``.
+    :param page: the page number.
+    :param start: the start offset of the block text in the full text.
+    :param end: the end offset (exclusive) of the block text in the full text.
+    :param bbox: the Textract ``BoundingBox`` dict (Width, Height, Left, Top).
+    """
+
+    block_id: str = dataclasses.field()
+    block_type: str = dataclasses.field()
+    page: int = dataclasses.field()
+    start: int = dataclasses.field()
+    end: int = dataclasses.field()
+    bbox: T.Dict[str, float] = dataclasses.field()
+
+
+class _BlockRanges:
+    """
+    The sorted ``[start, end)`` ranges of one block type, columnar.
+    """
+
+    def __init__(self, block_type: str):
+        self.block_type = block_type
+        self.ids: T.List[str] = list()
+        self.starts = array("I")
+        self.ends = array("I")
+        self.pages = array("I")
+        self.bbox = array("f")  # left, top, width, height
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def append(self, block: dict, start: int, end: int):
+        box = block.get("Geometry", {}).get("BoundingBox", {})
+        self.ids.append(block["Id"])
+        self.starts.append(start)
+        self.ends.append(end)
+        self.pages.append(block.get("Page", 1))
+        self.bbox.extend(
+            (
+                box.get("Left", 0.0),
+                box.get("Top", 0.0),
+                box.get("Width", 0.0),
+                box.get("Height", 0.0),
+            )
+        )
+
+    def hit(self, i: int) -> SpanHit:
+        left, top, width, height = self.bbox[i * 4 : i * 4 + 4]
+        return SpanHit(
+            block_id=self.ids[i],
+            block_type=self.block_type,
+            page=self.pages[i],
+            start=self.starts[i],
+            end=self.ends[i],
+            bbox={"Width": width, "Height": height, "Left": left, "Top": top},
+        )
+
+    def find(self, start: int, end: int) -> T.List[SpanHit]:
+        # the ranges don't overlap and are sorted, so the ends are sorted too
+        i = bisect.bisect_right(self.ends, start)
+        hits = list()
+        while i < len(self.ids) and self.starts[i] < end:
+            hits.append(self.hit(i))
+            i += 1
+        return hits
+
+
+class TextOffsetMap:
+    """
+    The text of a document and the character offset -> ``LINE`` / ``WORD``
+    block map, use :meth:`from_blocks`.
+    """
+
+    def __init__(self, text: str, lines: _BlockRanges, words: _BlockRanges):
+        self.text = text
+        self._lines = lines
+        self._words = words
+
+    @property
+    def n_lines(self) -> int:
+        return len(self._lines)
+
+    @property
+    def n_words(self) -> int:
+        return len(self._words)
+
+    @classmethod
+    def from_blocks(
+        cls,
+        blocks: T.Union[dict, T.Iterable["BlockTypeDef"]],
+    ) -> "TextOffsetMap":
+        """
+        :param blocks: the Textract blocks, or a response that has ``Blocks``.
+        """
+        if isinstance(blocks, dict):
+            blocks = blocks.get("Blocks", [])
+        blocks = list(blocks)
+        words_by_id = {
+            block["Id"]: block
+            for block in blocks
+            if block["BlockType"] == BlockTypeEnum.WORD.value
+        }
+        lines = _BlockRanges(BlockTypeEnum.LINE.value)
+        words = _BlockRanges(BlockTypeEnum.WORD.value)
+        parts = list()
+        offset = 0
+        for block in blocks:
+            if block["BlockType"] != BlockTypeEnum.LINE.value:
+                continue
+            if parts:
+                parts.append("\n")
+                offset += 1
+            line_text = block["Text"]
+            lines.append(block, offset, offset + len(line_text))
+            cursor = 0
+            for rel in block.get("Relationships", []):
+                if rel["Type"] != "CHILD":
+                    continue
+                for word_id in rel["Ids"]:
+                    word = words_by_id.get(word_id)
+                    if word is None:
+                        continue
+                    word_text = word.get("Text", "")
+                    pos = line_text.find(word_text, cursor)
+                    if pos == -1 or not word_text:
+                        continue
+                    cursor = pos + len(word_text)
+                    words.append(word, offset + pos, offset + cursor)
+            parts.append(line_text)
+            offset += len(line_text)
+        return cls(text="".join(parts), lines=lines, words=words)
+
+    def find_words(self, start: int, end: int) -> T.List[SpanHit]:
+        """
+        The ``WORD`` blocks that overlap the ``[start, end)`` character span,
+        in text order.
+        """
+        return self._words.find(start, end)
+
+    def find_lines(self, start: int, end: int) -> T.List[SpanHit]:
+        """
+        The ``LINE`` blocks that overlap the ``[start, end)`` character span,
+        in text order.
+        """
+        return self._lines.find(start, end)
+
+    def word_at(self, offset: int) -> T.Optional[SpanHit]:
+        """
+        The ``WORD`` block that contains the character, None for a space or
+        a newline.
+        """
+        hits = self._words.find(offset, offset + 1)
+        return hits[0] if hits else None
+
+    def find_pages(self, start: int, end: int) -> T.List[int]:
+        """
+        The pages that the ``[start, end)`` character span is on.
+        """
+        return sorted({hit.page for hit in self._lines.find(start, end)})
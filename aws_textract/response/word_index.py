@@ -0,0 +1,308 @@
+# -*- coding: utf-8 -*-
+
+"""
+Inverted word index for keyword search across many Textract outputs.
+
+:class:`WordIndex` maps the normalized text of every ``WORD`` block to the
+document, page, block id and bounding box where it appears. Everything is
+stored in flat typed arrays:
+
+- the word table: one row per ``WORD`` block, columns are document number
+  (``uint32``), page (``uint32``), block id (16 bytes UUID) and the bounding
+  box quantized to ``uint16`` (1 / 65535 of the page, 4 values).
+- the postings: term -> ``array("I")`` of row numbers in the word table,
+  sorted ascending.
+
+So a query never touches the original JSON, and the index can be saved to
+and loaded from a directory of binary files, then extended with new documents.
+
+Usage example::
+
+    index = WordIndex()
+    index.add_document("s3://bucket/doc1.pdf", res["Blocks"])
+    index.save("/tmp/word-index")
+
+    index = WordIndex.load("/tmp/word-index")
+    for hit in index.search("medicare wages"):
+        print(hit.document_id, hit.page, hit.block_id, hit.bbox)
+"""
+
+import typing as T
+import sys
+import json
+import uuid
+import string
+import dataclasses
+from array import array
+from pathlib import Path
+
+from .contants import BlockTypeEnum
+
+if T.TYPE_CHECKING:  # pragma: no cover
+    from mypy_boto3_textract.type_defs import BlockTypeDef
+
+
+_STRIP_CHARS = string.punctuation + "“”‘’«»…"
+_QUANT = 65535
+
+
+def normalize_term(text: str) -> str:
+    """
+    Normalize a word for indexing and querying: case fold and strip the
+    leading and trailing punctuation, ``"Wages,"`` -> ``"wages"``.
+    """
+    return text.casefold().strip(_STRIP_CHARS)
+
+
+def _quantize(value: float) -> int:
+    return min(max(int(round(value * _QUANT)), 0), _QUANT)
+
+
+def _block_id_to_bytes(block_id: str) -> bytes:
+    return uuid.UUID(block_id).bytes
+
+
+@dataclasses.dataclass(frozen=True)
+class WordHit:
+    """
+    A search hit: one ``WORD`` block.
+
+    :param document_id: the document id given to :meth:`WordIndex.add_document`.
+    :param page: the page number.
+    :param block_id: the ``Id`` of the ``WORD`` block.
+    :param term: the normalized term that matched.
+    :param bbox: the Textract ``BoundingBox`` dict (Width, Height, Left, Top),
+        with 1 / 65535 precision.
+    """
+
+    document_id: str = dataclasses.field()
+    page: int = dataclasses.field()
+    block_id: str = dataclasses.field()
+    term: str = dataclasses.field()
+    bbox: T.Dict[str, float] = dataclasses.field()
+
+
+class WordIndex:
+    """
+    A compact, persistable, append only inverted index of ``WORD`` blocks.
+    """
+
+    _FORMAT_VERSION = 1
+
+    def __init__(self):
+        self.document_ids: T.List[str] = list()
+        self._document_id_to_no: T.Dict[str, int] = dict()
+        self.postings: T.Dict[str, array] = dict()
+        # the word table
+        self._doc = array("I")
+        self._page = array("I")
+        self._bbox = array("H")  # left, top, width, height
+        self._block_id = bytearray()
+
+    @property
+    def n_documents(self) -> int:
+        return len(self.document_ids)
+
+    @property
+    def n_words(self) -> int:
+        return len(self._doc)
+
+    @property
+    def n_terms(self) -> int:
+        return len(self.postings)
+
+    def add_document(
+        self,
+        document_id: str,
+        blocks: T.Iterable["BlockTypeDef"],
+    ) -> int:
+        """
+        Index the ``WORD`` blocks of one document.
+
+        :param document_id: a unique id of the document, for example the job id
+            or the S3 uri of the input document.
+        :param blocks: the Textract blocks of the document.
+
+        :return: number of indexed words.
+        """
+        if document_id in self._document_id_to_no:
+            raise ValueError(f"document {document_id!r} is already indexed")
+        doc_no = len(self.document_ids)
+        self.document_ids.append(document_id)
+        self._document_id_to_no[document_id] = doc_no
+
+        word_type = BlockTypeEnum.WORD.value
+        postings = self.postings
+        doc_append = self._doc.append
+        page_append = self._page.append
+        bbox_extend = self._bbox.extend
+        block_id_extend = self._block_id.extend
+        word_no = len(self._doc)
+        n = 0
+        for block in blocks:
+            if block["BlockType"] != word_type:
+                continue
+            term = normalize_term(block.get("Text", ""))
+            if not term:
+                continue
+            block_id = _block_id_to_bytes(block["Id"])
+            box = block["Geometry"]["BoundingBox"]
+            doc_append(doc_no)
+            page_append(block.get("Page", 1))
+            bbox_extend(
+                (
+                    _quantize(box["Left"]),
+                    _quantize(box["Top"]),
+                    _quantize(box["Width"]),
+                    _quantize(box["Height"]),
+                )
+            )
+            block_id_extend(block_id)
+            try:
+                postings[term].append(word_no)
+            except KeyError:
+                postings[term] = array("I", [word_no])
+            word_no += 1
+            n += 1
+        return n
+
+    def _hit(self, word_no: int, term: str) -> WordHit:
+        left, top, width, height = self._bbox[word_no * 4 : word_no * 4 + 4]
+        block_id = bytes(self._block_id[word_no * 16 : word_no * 16 + 16])
+        return WordHit(
+            document_id=self.document_ids[self._doc[word_no]],
+            page=self._page[word_no],
+            block_id=str(uuid.UUID(bytes=block_id)),
+            term=term,
+            bbox={
+                "Width": width / _QUANT,
+                "Height": height / _QUANT,
+                "Left": left / _QUANT,
+                "Top": top / _QUANT,
+            },
+        )
+
+    def lookup(self, term: str) -> T.List[WordHit]:
+        """
+        Find all occurrences of a single term.
+        """
+        term = normalize_term(term)
+        return [self._hit(word_no, term) for word_no in self.postings.get(term, [])]
+
+    def search(
+        self,
+        query: str,
+        document_id: T.Optional[str] = None,
+    ) -> T.List[WordHit]:
+        """
+        Find the pages that contain **all** terms in the query, and return the
+        hits of every query term on those pages, sorted by document, page and
+        reading order.
+
+        :param query: whitespace separated terms.
+        :param document_id: if given, only search this document.
+        """
+        terms = [t for t in (normalize_term(t) for t in query.split()) if t]
+        if not terms:
+            return []
+        doc_filter = None
+        if document_id is not None:
+            doc_filter = self._document_id_to_no.get(document_id)
+            if doc_filter is None:
+                return []
+
+        doc, page = self._doc, self._page
+        # (doc_no, page) -> list of (word_no, term), per term
+        pages_per_term = list()
+        for term in dict.fromkeys(terms):
+            mapper: T.Dict[T.Tuple[int, int], T.List[T.Tuple[int, str]]] = dict()
+            for word_no in self.postings.get(term, []):
+                doc_no = doc[word_no]
+                if doc_filter is not None and doc_no != doc_filter:
+                    continue
+                mapper.setdefault((doc_no, page[word_no]), []).append((word_no, term))
+            if not mapper:
+                return []
+            pages_per_term.append(mapper)
+
+        pages = set(pages_per_term[0])
+        for mapper in pages_per_term[1:]:
+            pages.intersection_update(mapper)
+        hits = list()
+        for key in sorted(pages):
+            matches = sorted(m for mapper in pages_per_term for m in mapper[key])
+            hits.extend(self._hit(word_no, term) for word_no, term in matches)
+        return hits
+
+    def document_pages(self, query: str) -> T.Dict[str, T.List[int]]:
+        """
+        Which documents and pages mention all terms in the query.
+
+        :return: document id -> sorted page numbers.
+        """
+        mapper: T.Dict[str, T.List[int]] = dict()
+        for hit in self.search(query):
+            pages = mapper.setdefault(hit.document_id, [])
+            if not pages or pages[-1] != hit.page:
+                pages.append(hit.page)
+        return mapper
+
+    # --- persistence ---
+    def save(self, dir_index: T.Union[str, Path]):
+        """
+        Save the index to a directory, existing files are overwritten.
+        """
+        dir_index = Path(dir_index)
+        dir_index.mkdir(parents=True, exist_ok=True)
+        terms = dict()
+        postings = array("I")
+        for term, word_nos in self.postings.items():
+            terms[term] = [len(postings), len(word_nos)]
+            postings.extend(word_nos)
+        meta = {
+            "version": self._FORMAT_VERSION,
+            "byteorder": sys.byteorder,
+            "document_ids": self.document_ids,
+            "terms": terms,
+        }
+        dir_index.joinpath("postings.bin").write_bytes(postings.tobytes())
+        dir_index.joinpath("word_doc.bin").write_bytes(self._doc.tobytes())
+        dir_index.joinpath("word_page.bin").write_bytes(self._page.tobytes())
+        dir_index.joinpath("word_bbox.bin").write_bytes(self._bbox.tobytes())
+        dir_index.joinpath("word_block_id.bin").write_bytes(bytes(self._block_id))
+        # write the meta last, it marks the index as complete
+        dir_index.joinpath("meta.json").write_text(json.dumps(meta), encoding="utf-8")
+
+    @classmethod
+    def load(cls, dir_index: T.Union[str, Path]) -> "WordIndex":
+        """
+        Load the index saved by :meth:`save`.
+        """
+        dir_index = Path(dir_index)
+        meta = json.loads(dir_index.joinpath("meta.json").read_text(encoding="utf-8"))
+        if meta["version"] != cls._FORMAT_VERSION:  # pragma: no cover
+            raise ValueError(f"unsupported word index version {meta['version']}")
+        swap = meta["byteorder"] != sys.byteorder
+
+        def read_array(typecode: str, filename: str) -> array:
+            arr = array(typecode)
+            arr.frombytes(dir_index.joinpath(filename).read_bytes())
+            if swap:  # pragma: no cover
+                arr.byteswap()
+            return arr
+
+        index = cls()
+        index.document_ids = meta["document_ids"]
+        index._document_id_to_no = {
+            document_id: i for i, document_id in enumerate(index.document_ids)
+        }
+        postings = read_array("I", "postings.bin")
+        index.postings = {
+            term: postings[offset : offset + count]
+            for term, (offset, count) in meta["terms"].items()
+        }
+        index._doc = read_array("I", "word_doc.bin")
+        index._page = read_array("I", "word_page.bin")
+        index._bbox = read_array("H", "word_bbox.bin")
+        index._block_id = bytearray(dir_index.joinpath("word_block_id.bin").read_bytes())
+        return index
@@ -0,0 +1,570 @@
+# -*- coding: utf-8 -*-
+
+"""
+Local Amazon Textract / Amazon S3 simulator for offline load testing.
+
+:class:`TextractSimulator` implements the ``start_xyz()`` / ``get_xyz()`` async
+APIs of the boto3 textract client, including ``MaxResults`` / ``NextToken``
+paging, the ``IN_PROGRESS`` -> ``SUCCEEDED`` | ``FAILED`` job status transition,
+and writing the numbered output parts to :class:`InMemoryS3Client`, a stand-in
+of the boto3 s3 client. Both of them can inject latency and throttling errors
+at configured rates, so the pagination, concurrency limit and wait strategy of
+:mod:`aws_textract.better_boto.async_api` and :mod:`aws_textract.response.merge`
+can be tuned and regression tested without AWS.
+
+Usage example::
+
+    from aws_textract.tests.simulator import (
+        SimulatorConfig,
+        InMemoryS3Client,
+        TextractSimulator,
+    )
+
+    s3_client = InMemoryS3Client()
+    textract_client = TextractSimulator(
+        s3_client=s3_client,
+        config=SimulatorConfig(latency=0.05, throttle_rate=0.1, job_duration=1),
+    )
+    res = textract_client.start_document_analysis(
+        DocumentLocation={"S3Object": {"Bucket": "input", "Name": "doc.pdf"}},
+        FeatureTypes=["TABLES", "FORMS", "LAYOUT"],
+        OutputConfig={"S3Bucket": "output", "S3Prefix": "textract"},
+    )
+    job_id = res["JobId"]
+"""
+
+import typing as T
+import io
+import copy
+import json
+import time
+import random
+import hashlib
+import threading
+import dataclasses
+from datetime import datetime, timezone
+from collections import Counter
+
+from botocore.exceptions import ClientError
+
+from .synthetic import (
+    SyntheticDocumentConfig,
+    generate_document_analysis,
+    generate_document_text_detection,
+    generate_expense_analysis,
+    generate_lending_analysis,
+    split_into_output_parts,
+)
+
+
+@dataclasses.dataclass
+class SimulatorConfig:
+    """
+    :param latency: seconds added to every API call.
+    :param latency_jitter: an extra random latency between 0 and this value.
+    :param throttle_rate: the probability (0 ~ 1) that an API call raises
+        a throttling error.
+    :param failure_rate: the probability (0 ~ 1) that a job ends as ``FAILED``.
+    :param job_duration: seconds a job stays ``IN_PROGRESS``.
+    :param part_size: number of items in each numbered output part.
+    :param seed: random seed for latency, throttling and failure.
+    """
+
+    latency: float = dataclasses.field(default=0.0)
+    latency_jitter: float = dataclasses.field(default=0.0)
+    throttle_rate: float = dataclasses.field(default=0.0)
+    failure_rate: float = dataclasses.field(default=0.0)
+    job_duration: float = dataclasses.field(default=0.0)
+    part_size: int = dataclasses.field(default=1000)
+    seed: int = dataclasses.field(default=1)
+
+
+class _FaultInjector:
+    """
+    Shared latency and throttling logic of the simulated clients.
+    """
+
+    throttle_error_code: str = "ThrottlingException"
+
+    def __init__(
+        self,
+        config: T.Optional[SimulatorConfig] = None,
+        sleep: T.Callable[[float], None] = time.sleep,
+    ):
+        if config is None:
+            config = SimulatorConfig()
+        self.config = config
+        self.sleep = sleep
+        self.rng = random.Random(config.seed)
+        self.lock = threading.RLock()
+        #: number of calls per operation, including the throttled ones.
+        self.calls: T.Counter[str] = Counter()
+        #: number of throttled calls per operation.
+        self.throttles: T.Counter[str] = Counter()
+
+    def _inject(self, operation_name: str):
+        with self.lock:
+            self.calls[operation_name] += 1
+            delay = self.config.latency
+            if self.config.latency_jitter:
+                delay += self.rng.uniform(0, self.config.latency_jitter)
+            throttled = self.rng.random() < self.config.throttle_rate
+            if throttled:
+                self.throttles[operation_name] += 1
+        if delay:
+            self.sleep(delay)
+        if throttled:
+            raise _client_error(
+                code=self.throttle_error_code,
+                message="Rate exceeded",
+                operation_name=operation_name,
+            )
+
+
+def _client_error(
+    code: str,
+    message: str,
+    operation_name: str,
+    status_code: int = 400,
+) -> ClientError:
+    return ClientError(
+        error_response={
+            "Error": {"Code": code, "Message": message},
+            "ResponseMetadata": {"HTTPStatusCode": status_code},
+        },
+        operation_name=operation_name,
+    )
+
+
+class _ListObjectsV2Paginator:
+    def __init__(self, s3_client: "InMemoryS3Client"):
+        self.s3_client = s3_client
+
+    def paginate(self, PaginationConfig: T.Optional[dict] = None, **kwargs):
+        config = PaginationConfig or {}
+        max_items = config.get("MaxItems")
+        if config.get("PageSize"):
+            kwargs["MaxKeys"] = config["PageSize"]
+        if config.get("StartingToken"):
+            kwargs["ContinuationToken"] = config["StartingToken"]
+        n_items = 0
+        while True:
+            res = self.s3_client.list_objects_v2(**kwargs)
+            if max_items is not None and n_items + res["KeyCount"] >= max_items:
+                res["Contents"] = res.get("Contents", [])[: max_items - n_items]
+                yield res
+                return
+            n_items += res["KeyCount"]
+            yield res
+            if res["IsTruncated"]:
+                kwargs["ContinuationToken"] = res["NextContinuationToken"]
+            else:
+                return
+
+
+class InMemoryS3Client(_FaultInjector):
+    """
+    A thread safe in-memory stand-in of ``boto3.client("s3")``. It implements
+    the subset of the API used by this package and ``s3pathlib``:
+    ``put_object``, ``get_object`` (with ``Range``), ``head_object``,
+    ``delete_object``, ``list_objects_v2`` and its paginator.
+    """
+
+    throttle_error_code = "SlowDown"
+
+    def __init__(
+        self,
+        config: T.Optional[SimulatorConfig] = None,
+        sleep: T.Callable[[float], None] = time.sleep,
+    ):
+        super().__init__(config=config, sleep=sleep)
+        self.objects: T.Dict[T.Tuple[str, str], bytes] = dict()
+        self.last_modified: T.Dict[T.Tuple[str, str], datetime] = dict()
+
+    def _put(self, bucket: str, key: str, body: bytes):
+        """
+        Put an object without latency and throttling, used by the simulator
+        itself and for test setup.
+        """
+        with self.lock:
+            self.objects[(bucket, key)] = body
+            self.last_modified[(bucket, key)] = datetime.now(timezone.utc)
+
+    def _get(self, bucket: str, key: str, operation_name: str) -> bytes:
+        try:
+            return self.objects[(bucket, key)]
+        except KeyError:
+            raise _client_error(
+                code="NoSuchKey",
+                message="The specified key does not exist.",
+                operation_name=operation_name,
+                status_code=404,
+            )
+
+    def put_object(self, Bucket: str, Key: str, Body=b"", **kwargs) -> dict:
+        self._inject("PutObject")
+        if isinstance(Body, str):
+            Body = Body.encode("utf-8")
+        elif not isinstance(Body, bytes):
+            Body = Body.read()
+        self._put(Bucket, Key, Body)
+        return {
+            "ETag": f'"{hashlib.md5(Body).hexdigest()}"',
+            "ResponseMetadata": {"HTTPStatusCode": 200},
+        }
+
+    def get_object(
+        self,
+        Bucket: str,
+        Key: str,
+        Range: T.Optional[str] = None,
+        **kwargs,
+    ) -> dict:
+        self._inject("GetObject")
+        body = self._get(Bucket, Key, "GetObject")
+        size = len(body)
+        if Range:
+            start, end = Range.replace("bytes=", "").split("-")
+            if start == "":  # suffix range, the last N bytes
+                start, end = max(size - int(end), 0), size - 1
+            else:
+                start, end = int(start), int(end) if end else size - 1
+            body = body[start : end + 1]
+        return {
+            "Body": io.BytesIO(body),
+            "ContentLength": len(body),
+            "ETag": f'"{hashlib.md5(body).hexdigest()}"',
+            "ResponseMetadata": {"HTTPStatusCode": 200},
+        }
+
+    def head_object(self, Bucket: str, Key: str, **kwargs) -> dict:
+        self._inject("HeadObject")
+        body = self._get(Bucket, Key, "HeadObject")
+        return {
+            "ContentLength": len(body),
+            "ETag": f'"{hashlib.md5(body).hexdigest()}"',
+            "ResponseMetadata": {"HTTPStatusCode": 200},
+        }
+
+    def delete_object(self, Bucket: str, Key: str, **kwargs) -> dict:
+        self._inject("DeleteObject")
+        with self.lock:
+            self.objects.pop((Bucket, Key), None)
+            self.last_modified.pop((Bucket, Key), None)
+        return {"ResponseMetadata": {"HTTPStatusCode": 204}}
+
+    def list_objects_v2(
+        self,
+        Bucket: str,
+        Prefix: str = "",
+        Delimiter: T.Optional[str] = None,
+        MaxKeys: int = 1000,
+        ContinuationToken: T.Optional[str] = None,
+        StartAfter: T.Optional[str] = None,
+        **kwargs,
+    ) -> dict:
+        self._inject("ListObjectsV2")
+        with self.lock:
+            keys = sorted(
+                key
+                for bucket, key in self.objects
+                if bucket == Bucket and key.startswith(Prefix)
+            )
+        after = ContinuationToken or StartAfter
+        if after:
+            keys = [key for key in keys if key > after]
+        contents = list()
+        common_prefixes = list()
+        last = None
+        for key in keys:
+            if len(contents) + len(common_prefixes) >= MaxKeys:
+                break
+            last = key
+            if Delimiter and Delimiter in key[len(Prefix) :]:
+                common_prefix = (
+                    Prefix + key[len(Prefix) :].split(Delimiter, 1)[0] + Delimiter
+                )
+                if common_prefix not in common_prefixes:
+                    common_prefixes.append(common_prefix)
+                continue
+            contents.append(
+                {
+                    "Key": key,
+                    "LastModified": self.last_modified.get((Bucket, key)),
+                    "Size": len(self.objects.get((Bucket, key), b"")),
+                    "ETag": '""',
+                    "StorageClass": "STANDARD",
+                }
+            )
+        is_truncated = last is not None and last != keys[-1]
+        res = {
+            "IsTruncated": is_truncated,
+            "Name": Bucket,
+            "Prefix": Prefix,
+            "MaxKeys": MaxKeys,
+            "KeyCount": len(contents) + len(common_prefixes),
+            "ResponseMetadata": {"HTTPStatusCode": 200},
+        }
+        if contents:
+            res["Contents"] = contents
+        if common_prefixes:
+            res["CommonPrefixes"] = [{"Prefix": p} for p in common_prefixes]
+        if is_truncated:
+            res["NextContinuationToken"] = last
+        return res
+
+    def get_paginator(self, operation_name: str) -> _ListObjectsV2Paginator:
+        if operation_name != "list_objects_v2":  # pragma: no cover
+            raise NotImplementedError(operation_name)
+        return _ListObjectsV2Paginator(self)
+
+
+#: API name -> (the key of the paginated items, the default and max MaxResults)
+API_SPECS = {
+    "StartDocumentAnalysis": ("Blocks", 1000),
+    "StartDocumentTextDetection": ("Blocks", 1000),
+    "StartExpenseAnalysis": ("ExpenseDocuments", 20),
+    "StartLendingAnalysis": ("Results", 30),
+}
+
+
+def default_response_factory(api: str, kwargs: dict) -> dict:
+    """
+    Generate the merged response of a job from :mod:`aws_textract.tests.synthetic`.
+
+    :param api: the ``API`` name used in the Textract SNS notification,
+        for example ``"StartDocumentAnalysis"``.
+    :param kwargs: the keyword arguments of the ``start_xyz()`` call.
+    """
+    if api == "StartDocumentAnalysis":
+        return generate_document_analysis(SyntheticDocumentConfig(n_pages=3))
+    elif api == "StartDocumentTextDetection":
+        return generate_document_text_detection(SyntheticDocumentConfig(n_pages=3))
+    elif api == "StartExpenseAnalysis":
+        return generate_expense_analysis(n_documents=3)
+    elif api == "AnalyzeDocument":
+        return generate_document_analysis(SyntheticDocumentConfig(n_pages=1))
+    elif api == "DetectDocumentText":
+        return generate_document_text_detection(SyntheticDocumentConfig(n_pages=1))
+    elif api == "AnalyzeExpense":
+        return generate_expense_analysis(n_documents=1)
+    elif api == "StartLendingAnalysis":
+        return generate_lending_analysis(n_pages=10)
+    else:  # pragma: no cover
+        raise NotImplementedError(api)
+
+
+@dataclasses.dataclass
+class SimulatedJob:
+    job_id: str = dataclasses.field()
+    api: str = dataclasses.field()
+    kwargs: dict = dataclasses.field()
+    started_at: float = dataclasses.field()
+    will_fail: bool = dataclasses.field()
+    status: str = dataclasses.field(default="IN_PROGRESS")
+    response: T.Optional[dict] = dataclasses.field(default=None)
+
+
+class TextractSimulator(_FaultInjector):
+    """
+    A thread safe in-memory stand-in of ``boto3.client("textract")`` async APIs,
+    and the ``analyze_document`` / ``detect_document_text`` / ``analyze_expense``
+    sync APIs.
+
+    :param s3_client: the :class:`InMemoryS3Client` to write the output parts to,
+        when ``OutputConfig`` is given in ``start_xyz()``.
+    :param config: latency, throttling and job behavior.
+    :param response_factory: a callable that takes the API name and
+        the ``start_xyz()`` (or sync API) keyword arguments, returns the merged
+        response.
+    :param clock: the time source of the job status transition.
+    :param sleep: the function used to simulate latency.
+    """
+
+    def __init__(
+        self,
+        s3_client: T.Optional[InMemoryS3Client] = None,
+        config: T.Optional[SimulatorConfig] = None,
+        response_factory: T.Callable[[str, dict], dict] = default_response_factory,
+        clock: T.Callable[[], float] = time.time,
+        sleep: T.Callable[[float], None] = time.sleep,
+    ):
+        super().__init__(config=config, sleep=sleep)
+        self.s3_client = s3_client
+        self.response_factory = response_factory
+        self.clock = clock
+        self.jobs: T.Dict[str, SimulatedJob] = dict()
+        #: the SNS notification payload of finished jobs that have
+        #: ``NotificationChannel``, see :class:`~aws_textract.better_boto.async_api.TextractEvent`.
+        self.notifications: T.List[dict] = list()
+
+    # --- start_xyz ---
+    def _start(self, api: str, kwargs: dict) -> dict:
+        self._inject(api)
+        if "DocumentLocation" not in kwargs:
+            raise _client_error(
+                code="InvalidParameterException",
+                message="DocumentLocation is required",
+                operation_name=api,
+            )
+        with self.lock:
+            seq = len(self.jobs) + 1
+            job_id = hashlib.sha256(
+                f"{self.config.seed}-{seq}-{api}".encode("utf-8")
+            ).hexdigest()
+            job = SimulatedJob(
+                job_id=job_id,
+                api=api,
+                kwargs=kwargs,
+                started_at=self.clock(),
+                will_fail=self.rng.random() < self.config.failure_rate,
+            )
+            self.jobs[job_id] = job
+        return {"JobId": job_id, "ResponseMetadata": {"HTTPStatusCode": 200}}
+
+    def start_document_analysis(self, **kwargs) -> dict:
+        return self._start("StartDocumentAnalysis", kwargs)
+
+    def start_document_text_detection(self, **kwargs) -> dict:
+        return self._start("StartDocumentTextDetection", kwargs)
+
+    def start_expense_analysis(self, **kwargs) -> dict:
+        return self._start("StartExpenseAnalysis", kwargs)
+
+    def start_lending_analysis(self, **kwargs) -> dict:
+        return self._start("StartLendingAnalysis", kwargs)
+
+    # --- job status transition ---
+    def _finish(self, job: SimulatedJob):
+        """
+        Move the job out of ``IN_PROGRESS``, write the output parts and
+        the notification.
+        """
+        if job.will_fail:
+            job.status = "FAILED"
+        else:
+            job.response = self.response_factory(job.api, job.kwargs)
+            job.status = "SUCCEEDED"
+            output_config = job.kwargs.get("OutputConfig")
+            if output_config and self.s3_client is not None:
+                key, _ = API_SPECS[job.api]
+                prefix = output_config.get("S3Prefix", "").rstrip("/")
+                root = f"{prefix}/{job.job_id}/" if prefix else f"{job.job_id}/"
+                bucket = output_config["S3Bucket"]
+                self.s3_client._put(bucket, f"{root}.s3_access_check", b"")
+                parts = split_into_output_parts(
+                    job.response, key=key, max_items=self.config.part_size
+                )
+                for i, part in enumerate(parts, start=1):
+                    self.s3_client._put(
+                        bucket, f"{root}{i}", json.dumps(part).encode("utf-8")
+                    )
+        if job.kwargs.get("NotificationChannel"):
+            s3object = job.kwargs["DocumentLocation"]["S3Object"]
+            self.notifications.append(
+                {
+                    "JobId": job.job_id,
+                    "Status": job.status,
+                    "API": job.api,
+                    "JobTag": job.kwargs.get("JobTag", ""),
+                    "Timestamp": int(self.clock() * 1000),
+                    "DocumentLocation": {
+                        "S3ObjectName": s3object["Name"],
+                        "S3Bucket": s3object["Bucket"],
+                    },
+                }
+            )
+
+    def _refresh(self, job: SimulatedJob):
+        with self.lock:
+            if job.status == "IN_PROGRESS" and (
+                self.clock() - job.started_at >= self.config.job_duration
+            ):
+                self._finish(job)
+
+    def complete_all_jobs(self):
+        """
+        Finish all in progress jobs immediately, regardless of ``job_duration``.
+        """
+        with self.lock:
+            for job in self.jobs.values():
+                if job.status == "IN_PROGRESS":
+                    self._finish(job)
+
+    # --- get_xyz ---
+    def _get(
+        self,
+        operation_name: str,
+        api: str,
+        JobId: str,
+        MaxResults: T.Optional[int] = None,
+        NextToken: T.Optional[str] = None,
+    ) -> dict:
+        self._inject(operation_name)
+        job = self.jobs.get(JobId)
+        if job is None or job.api != api:
+            raise _client_error(
+                code="InvalidJobIdException",
+                message=f"Invalid job id: {JobId}",
+                operation_name=operation_name,
+            )
+        self._refresh(job)
+        if job.status == "IN_PROGRESS":
+            return {"JobStatus": job.status, "ResponseMetadata": {}}
+        if job.status == "FAILED":
+            return {
+                "JobStatus": job.status,
+                "StatusMessage": "simulated failure",
+                "ResponseMetadata": {},
+            }
+        key, max_max_results = API_SPECS[api]
+        if MaxResults is None or MaxResults > max_max_results:
+            MaxResults = max_max_results
+        items = job.response[key]
+        start = int(NextToken) if NextToken else 0
+        end = start + MaxResults
+        res = {k: v for k, v in job.response.items() if k != key}
+        res[key] = items[start:end]
+        # a fresh copy for every call, like a response decoded from the wire
+        res = copy.deepcopy(res)
+        if end < len(items):
+            res["NextToken"] = str(end)
+        res["ResponseMetadata"] = {"HTTPStatusCode": 200}
+        return res
+
+    def get_document_analysis(self, **kwargs) -> dict:
+        return self._get("GetDocumentAnalysis", "StartDocumentAnalysis", **kwargs)
+
+    def get_document_text_detection(self, **kwargs) -> dict:
+        return self._get(
+            "GetDocumentTextDetection", "StartDocumentTextDetection", **kwargs
+        )
+
+    def get_expense_analysis(self, **kwargs) -> dict:
+        return self._get("GetExpenseAnalysis", "StartExpenseAnalysis", **kwargs)
+
+    def get_lending_analysis(self, **kwargs) -> dict:
+        return self._get("GetLendingAnalysis", "StartLendingAnalysis", **kwargs)
+
+    # --- sync API ---
+    def _analyze(self, api: str, kwargs: dict) -> dict:
+        self._inject(api)
+        if not kwargs.get("Document"):
+            raise _client_error(
+                code="InvalidParameterException",
+                message="Document is required",
+                operation_name=api,
+            )
+        res = copy.deepcopy(self.response_factory(api, kwargs))
+        res.pop("JobStatus", None)  # the sync API has no job
+        res["ResponseMetadata"] = {"HTTPStatusCode": 200}
+        return res
+
+    def analyze_document(self, **kwargs) -> dict:
+        return self._analyze("AnalyzeDocument", kwargs)
+
+    def detect_document_text(self, **kwargs) -> dict:
+        return self._analyze("DetectDocumentText", kwargs)
+
+    def analyze_expense(self, **kwargs) -> dict:
+        return self._analyze("AnalyzeExpense", kwargs)
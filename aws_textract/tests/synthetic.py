@@ -0,0 +1,657 @@
+# -*- coding: utf-8 -*-
+
+"""
+Deterministic synthetic Textract response generator.
+
+It generates realistic ``get_document_analysis`` / ``get_document_text_detection``
+responses with pages, lines, words, tables, forms (key value sets) and layout
+blocks at configurable scale, so we can unit test and benchmark the package
+without calling AWS. The same ``seed`` always generates the same response.
+
+Usage example::
+
+    from aws_textract.tests.synthetic import (
+        SyntheticDocumentConfig,
+        generate_document_analysis,
+        split_into_output_parts,
+        write_output_parts_to_dir,
+    )
+
+    res = generate_document_analysis(SyntheticDocumentConfig(n_pages=100))
+    parts = split_into_output_parts(res, key="Blocks", max_items=1000)
+    write_output_parts_to_dir(parts, "/tmp/textract-output/my-job-id")
+"""
+
+import typing as T
+import json
+import copy
+import uuid
+import random
+import dataclasses
+from pathlib import Path
+
+from ..response.contants import BlockTypeEnum
+
+if T.TYPE_CHECKING:  # pragma: no cover
+    from mypy_boto3_s3 import S3Client
+    from s3pathlib import S3Path
+
+
+VOCABULARY = (
+    "the of and to in is that for on with as by this from at are be an or it "
+    "payment amount total date invoice account number name address employer "
+    "employee wages tax federal state social security medicare tips allocated "
+    "dependent care benefits nonqualified plans statutory retirement sick pay "
+    "terms conditions agreement party shall section page report balance loan "
+    "borrower lender property mortgage interest rate principal period annual"
+).split()
+
+KEYS = (
+    "Name",
+    "Address",
+    "Date",
+    "Account Number",
+    "Invoice Number",
+    "Employer ID",
+    "Total",
+    "Phone",
+)
+
+
+@dataclasses.dataclass
+class SyntheticDocumentConfig:
+    """
+    Control the shape and scale of the generated document. The total number
+    of blocks grows linearly with every ``n_xyz`` parameter.
+
+    :param n_pages: number of pages.
+    :param n_sections_per_page: number of section header + paragraph per page.
+    :param n_paragraph_lines: number of lines in each paragraph.
+    :param n_words_per_line: number of words in each paragraph line.
+    :param n_list_items: number of list items after each paragraph, 0 to disable.
+    :param n_key_values_per_page: number of key value pairs (forms) per page.
+    :param n_tables_per_page: number of tables per page.
+    :param n_table_rows: number of rows in each table.
+    :param n_table_cols: number of columns in each table.
+    :param with_forms: whether to generate KEY_VALUE_SET blocks.
+    :param with_tables: whether to generate TABLE and CELL blocks.
+    :param with_layout: whether to generate LAYOUT_* blocks.
+    :param seed: random seed.
+    """
+
+    n_pages: int = dataclasses.field(default=1)
+    n_sections_per_page: int = dataclasses.field(default=2)
+    n_paragraph_lines: int = dataclasses.field(default=5)
+    n_words_per_line: int = dataclasses.field(default=8)
+    n_list_items: int = dataclasses.field(default=3)
+    n_key_values_per_page: int = dataclasses.field(default=3)
+    n_tables_per_page: int = dataclasses.field(default=1)
+    n_table_rows: int = dataclasses.field(default=4)
+    n_table_cols: int = dataclasses.field(default=3)
+    with_forms: bool = dataclasses.field(default=True)
+    with_tables: bool = dataclasses.field(default=True)
+    with_layout: bool = dataclasses.field(default=True)
+    seed: int = dataclasses.field(default=1)
+
+    @property
+    def n_lines_per_page(self) -> int:
+        n = 4  # header, title / section header of first section, footer, page number
+        n += self.n_sections_per_page * (
+            1 + self.n_paragraph_lines + self.n_list_items
+        )
+        n += self.n_key_values_per_page
+        n += self.n_tables_per_page * (self.n_table_rows + 1)  # table + figure
+        return n
+
+
+def make_geometry(
+    left: float,
+    top: float,
+    width: float,
+    height: float,
+) -> dict:
+    """
+    Create the Textract ``Geometry`` object of an axis aligned box.
+    """
+    return {
+        "BoundingBox": {
+            "Width": width,
+            "Height": height,
+            "Left": left,
+            "Top": top,
+        },
+        "Polygon": [
+            {"X": left, "Y": top},
+            {"X": left + width, "Y": top},
+            {"X": left + width, "Y": top + height},
+            {"X": left, "Y": top + height},
+        ],
+    }
+
+
+def _union_geometry(blocks: T.List[dict]) -> dict:
+    boxes = [block["Geometry"]["BoundingBox"] for block in blocks]
+    left = min(box["Left"] for box in boxes)
+    top = min(box["Top"] for box in boxes)
+    right = max(box["Left"] + box["Width"] for box in boxes)
+    bottom = max(box["Top"] + box["Height"] for box in boxes)
+    return make_geometry(left, top, right - left, bottom - top)
+
+
+class _PageBuilder:
+    """
+    Lay out the lines of one page from top to bottom and create the blocks.
+    """
+
+    def __init__(
+        self,
+        rng: random.Random,
+        config: SyntheticDocumentConfig,
+        page: int,
+    ):
+        self.rng = rng
+        self.config = config
+        self.page = page
+        self.line_height = 0.9 / config.n_lines_per_page
+        self.cursor = 0.05
+        self.lines: T.List[dict] = list()
+        self.words: T.List[dict] = list()
+        self.others: T.List[dict] = list()
+        self.page_children: T.List[str] = list()
+
+    def new_id(self) -> str:
+        return str(uuid.UUID(int=self.rng.getrandbits(128), version=4))
+
+    def confidence(self) -> float:
+        return round(self.rng.uniform(85.0, 99.99), 4)
+
+    def random_words(self, n: int) -> T.List[str]:
+        return [self.rng.choice(VOCABULARY) for _ in range(n)]
+
+    def add_line(
+        self,
+        texts: T.List[str],
+        left: float = 0.05,
+        width: float = 0.9,
+    ) -> T.Tuple[dict, T.List[dict]]:
+        """
+        Add a LINE block and its WORD blocks at the current cursor position.
+        """
+        top = self.cursor
+        height = self.line_height * 0.8
+        self.cursor += self.line_height
+        word_width = width / max(len(texts), 1)
+        words = list()
+        for i, text in enumerate(texts):
+            word = {
+                "BlockType": BlockTypeEnum.WORD.value,
+                "Confidence": self.confidence(),
+                "Text": text,
+                "TextType": "PRINTED",
+                "Geometry": make_geometry(
+                    left + i * word_width, top, word_width * 0.9, height
+                ),
+                "Id": self.new_id(),
+                "Page": self.page,
+            }
+            words.append(word)
+        line = {
+            "BlockType": BlockTypeEnum.LINE.value,
+            "Confidence": self.confidence(),
+            "Text": " ".join(texts),
+            "Geometry": make_geometry(left, top, width, height),
+            "Id": self.new_id(),
+            "Relationships": [
+                {"Type": "CHILD", "Ids": [word["Id"] for word in words]},
+            ],
+            "Page": self.page,
+        }
+        self.lines.append(line)
+        self.words.extend(words)
+        self.page_children.append(line["Id"])
+        return line, words
+
+    def add_container(
+        self,
+        block_type: BlockTypeEnum,
+        children: T.List[dict],
+        geometry: T.Optional[dict] = None,
+        **kwargs,
+    ) -> dict:
+        """
+        Add a TABLE, KEY_VALUE_SET, LAYOUT_* block that has CHILD relationships.
+        """
+        block = {
+            "BlockType": block_type.value,
+            "Confidence": self.confidence(),
+            "Geometry": geometry if geometry else _union_geometry(children),
+            "Id": self.new_id(),
+        }
+        if children:
+            block["Relationships"] = [
+                {"Type": "CHILD", "Ids": [child["Id"] for child in children]},
+            ]
+        block.update(kwargs)
+        block["Page"] = self.page
+        self.others.append(block)
+        return block
+
+    def add_layout(
+        self,
+        block_type: BlockTypeEnum,
+        children: T.List[dict],
+        geometry: T.Optional[dict] = None,
+    ) -> T.Optional[dict]:
+        if self.config.with_layout:
+            block = self.add_container(block_type, children, geometry=geometry)
+            self.page_children.append(block["Id"])
+            return block
+
+    def add_paragraph_section(self, header_type: BlockTypeEnum, section: int):
+        config = self.config
+        line, _ = self.add_line([f"Section {self.page}.{section}"] + self.random_words(3))
+        self.add_layout(header_type, [line])
+        paragraph = [
+            self.add_line(self.random_words(config.n_words_per_line))[0]
+            for _ in range(config.n_paragraph_lines)
+        ]
+        if paragraph:
+            self.add_layout(BlockTypeEnum.LAYOUT_TEXT, paragraph)
+        items = list()
+        for i in range(config.n_list_items):
+            item, _ = self.add_line(
+                [f"{i + 1}."] + self.random_words(config.n_words_per_line - 1),
+                left=0.1,
+                width=0.85,
+            )
+            items.append(item)
+        if items and config.with_layout:
+            texts = [
+                self.add_container(BlockTypeEnum.LAYOUT_TEXT, [item]) for item in items
+            ]
+            self.add_layout(BlockTypeEnum.LAYOUT_LIST, texts)
+
+    def add_key_value(self, i: int):
+        key_text = KEYS[i % len(KEYS)].split(" ") + [":"]
+        value_text = self.random_words(2)
+        line, words = self.add_line(key_text + value_text)
+        if self.config.with_forms:
+            key_words = words[: len(key_text)]
+            value_words = words[len(key_text) :]
+            value = self.add_container(
+                BlockTypeEnum.KEY_VALUE_SET, value_words, EntityTypes=["VALUE"]
+            )
+            key = self.add_container(
+                BlockTypeEnum.KEY_VALUE_SET, key_words, EntityTypes=["KEY"]
+            )
+            key["Relationships"].insert(0, {"Type": "VALUE", "Ids": [value["Id"]]})
+            self.page_children.append(key["Id"])
+            self.page_children.append(value["Id"])
+        self.add_layout(BlockTypeEnum.LAYOUT_KEY_VALUE, [line])
+
+    def add_table(self):
+        config = self.config
+        lines = list()
+        cells = list()
+        for row in range(config.n_table_rows):
+            line, words = self.add_line(self.random_words(config.n_table_cols))
+            lines.append(line)
+            for col, word in enumerate(words):
+                cell = {
+                    "BlockType": BlockTypeEnum.CELL.value,
+                    "Confidence": self.confidence(),
+                    "RowIndex": row + 1,
+                    "ColumnIndex": col + 1,
+                    "RowSpan": 1,
+                    "ColumnSpan": 1,
+                    "Geometry": copy.deepcopy(word["Geometry"]),
+                    "Id": self.new_id(),
+                    "Relationships": [{"Type": "CHILD", "Ids": [word["Id"]]}],
+                    "EntityTypes": ["COLUMN_HEADER"] if row == 0 else [],
+                }
+                cells.append(cell)
+        if config.with_tables:
+            for cell in cells:
+                cell["Page"] = self.page
+            table = self.add_container(
+                BlockTypeEnum.TABLE,
+                cells,
+                geometry=_union_geometry(lines),
+                EntityTypes=["STRUCTURED_TABLE"],
+            )
+            self.others.extend(cells)
+            self.page_children.append(table["Id"])
+        self.add_layout(BlockTypeEnum.LAYOUT_TABLE, lines)
+        # leave one line of space for a figure below the table
+        geometry = make_geometry(0.3, self.cursor, 0.4, self.line_height * 0.8)
+        self.cursor += self.line_height
+        self.add_layout(BlockTypeEnum.LAYOUT_FIGURE, [], geometry=geometry)
+
+    def build(self) -> T.List[dict]:
+        config = self.config
+        header, _ = self.add_line(["Synthetic", "Document"], left=0.05, width=0.3)
+        self.add_layout(BlockTypeEnum.LAYOUT_HEADER, [header])
+        for section in range(config.n_sections_per_page):
+            if section == 0 and self.page == 1:
+                header_type = BlockTypeEnum.LAYOUT_TITLE
+            else:
+                header_type = BlockTypeEnum.LAYOUT_SECTION_HEADER
+            self.add_paragraph_section(header_type, section + 1)
+        for i in range(config.n_key_values_per_page):
+            self.add_key_value(i)
+        for _ in range(config.n_tables_per_page):
+            self.add_table()
+        footer, _ = self.add_line(["Confidential"], left=0.05, width=0.2)
+        self.add_layout(BlockTypeEnum.LAYOUT_FOOTER, [footer])
+        page_number, _ = self.add_line([str(self.page)], left=0.9, width=0.05)
+        self.add_layout(BlockTypeEnum.LAYOUT_PAGE_NUMBER, [page_number])
+        page_block = {
+            "BlockType": BlockTypeEnum.PAGE.value,
+            "Geometry": make_geometry(0.0, 0.0, 1.0, 1.0),
+            "Id": self.new_id(),
+            "Relationships": [{"Type": "CHILD", "Ids": self.page_children}],
+            "Page": self.page,
+        }
+        return [page_block] + self.lines + self.words + self.others
+
+
+def generate_blocks(config: SyntheticDocumentConfig) -> T.List[dict]:
+    """
+    Generate the Textract blocks of a document, ordered page by page.
+    """
+    rng = random.Random(config.seed)
+    blocks = list()
+    for page in range(1, config.n_pages + 1):
+        blocks.extend(_PageBuilder(rng=rng, config=config, page=page).build())
+    return blocks
+
+
+def generate_document_analysis(
+    config: T.Optional[SyntheticDocumentConfig] = None,
+) -> dict:
+    """
+    Generate a synthetic ``get_document_analysis`` response, all pages merged.
+    """
+    if config is None:
+        config = SyntheticDocumentConfig()
+    return {
+        "DocumentMetadata": {"Pages": config.n_pages},
+        "JobStatus": "SUCCEEDED",
+        "Blocks": generate_blocks(config),
+        "AnalyzeDocumentModelVersion": "1.0",
+    }
+
+
+def generate_document_text_detection(
+    config: T.Optional[SyntheticDocumentConfig] = None,
+) -> dict:
+    """
+    Generate a synthetic ``get_document_text_detection`` response, all pages
+    merged. Only PAGE, LINE and WORD blocks are generated.
+    """
+    if config is None:
+        config = SyntheticDocumentConfig()
+    config = dataclasses.replace(
+        config,
+        with_forms=False,
+        with_tables=False,
+        with_layout=False,
+    )
+    return {
+        "DocumentMetadata": {"Pages": config.n_pages},
+        "JobStatus": "SUCCEEDED",
+        "Blocks": generate_blocks(config),
+        "DetectDocumentTextModelVersion": "1.0",
+    }
+
+
+EXPENSE_SUMMARY_FIELD_TYPES = (
+    "VENDOR_NAME",
+    "VENDOR_ADDRESS",
+    "INVOICE_RECEIPT_ID",
+    "INVOICE_RECEIPT_DATE",
+    "SUBTOTAL",
+    "TAX",
+    "TOTAL",
+)
+
+EXPENSE_LINE_ITEM_FIELD_TYPES = (
+    "ITEM",
+    "QUANTITY",
+    "UNIT_PRICE",
+    "PRICE",
+)
+
+LENDING_PAGE_TYPES = (
+    "W2",
+    "PAYSLIPS",
+    "BANK_STATEMENT",
+    "1040",
+    "IDENTITY_DOCUMENT",
+    "MORTGAGE_STATEMENT",
+)
+
+
+def _make_detection(
+    rng: random.Random,
+    text: str,
+    top: float,
+) -> dict:
+    return {
+        "Text": text,
+        "Geometry": make_geometry(0.1, top, 0.3, 0.02),
+        "Confidence": round(rng.uniform(85.0, 99.99), 4),
+    }
+
+
+def generate_expense_analysis(
+    n_documents: int = 1,
+    n_line_items: int = 5,
+    seed: int = 1,
+) -> dict:
+    """
+    Generate a synthetic ``get_expense_analysis`` response, all pages merged.
+    Each expense document is one page with the common summary fields and one
+    line item group. The ``Blocks`` of the expense documents are omitted.
+
+    :param n_documents: number of expense documents (receipts / invoices).
+    :param n_line_items: number of line items in each expense document.
+    """
+    rng = random.Random(seed)
+    expense_documents = list()
+    for index in range(1, n_documents + 1):
+        summary_fields = list()
+        for i, type_ in enumerate(EXPENSE_SUMMARY_FIELD_TYPES):
+            if type_ in ("SUBTOTAL", "TAX", "TOTAL"):
+                value = f"{rng.uniform(1, 1000):.2f}"
+            else:
+                value = " ".join(rng.choice(VOCABULARY) for _ in range(2))
+            summary_fields.append(
+                {
+                    "Type": {"Text": type_, "Confidence": 99.0},
+                    "LabelDetection": _make_detection(
+                        rng, type_.replace("_", " ").title(), 0.02 * i
+                    ),
+                    "ValueDetection": _make_detection(rng, value, 0.02 * i),
+                    "PageNumber": index,
+                }
+            )
+        line_items = list()
+        for i in range(n_line_items):
+            values = {
+                "ITEM": " ".join(rng.choice(VOCABULARY) for _ in range(3)),
+                "QUANTITY": str(rng.randint(1, 10)),
+                "UNIT_PRICE": f"{rng.uniform(1, 100):.2f}",
+                "PRICE": f"{rng.uniform(1, 1000):.2f}",
+            }
+            line_items.append(
+                {
+                    "LineItemExpenseFields": [
+                        {
+                            "Type": {"Text": type_, "Confidence": 99.0},
+                            "ValueDetection": _make_detection(
+                                rng, values[type_], 0.3 + 0.02 * i
+                            ),
+                            "PageNumber": index,
+                        }
+                        for type_ in EXPENSE_LINE_ITEM_FIELD_TYPES
+                    ]
+                }
+            )
+        expense_documents.append(
+            {
+                "ExpenseIndex": index,
+                "SummaryFields": summary_fields,
+                "LineItemGroups": [
+                    {"LineItemGroupIndex": 1, "LineItems": line_items},
+                ],
+            }
+        )
+    return {
+        "DocumentMetadata": {"Pages": n_documents},
+        "JobStatus": "SUCCEEDED",
+        "ExpenseDocuments": expense_documents,
+        "AnalyzeExpenseModelVersion": "1.0",
+    }
+
+
+def generate_lending_analysis(
+    n_pages: int = 10,
+    n_fields_per_page: int = 5,
+    seed: int = 1,
+) -> dict:
+    """
+    Generate a synthetic ``get_lending_analysis`` response, all pages merged.
+    Consecutive pages are grouped into sub documents of the same page type.
+
+    :param n_pages: number of pages in the lending package.
+    :param n_fields_per_page: number of lending fields extracted on each page.
+    """
+    rng = random.Random(seed)
+    results = list()
+    page_type = rng.choice(LENDING_PAGE_TYPES)
+    page_number = 1
+    for page in range(1, n_pages + 1):
+        # start a new sub document from time to time
+        if page > 1 and rng.random() < 0.3:
+            page_type = rng.choice(LENDING_PAGE_TYPES)
+            page_number = 1
+        fields = [
+            {
+                "Type": f"{page_type}_FIELD_{i + 1}",
+                "KeyDetection": _make_detection(rng, f"Field {i + 1}", 0.05 * i),
+                "ValueDetections": [
+                    _make_detection(rng, rng.choice(VOCABULARY), 0.05 * i),
+                ],
+            }
+            for i in range(n_fields_per_page)
+        ]
+        results.append(
+            {
+                "Page": page,
+                "PageClassification": {
+                    "PageType": [
+                        {
+                            "Value": page_type,
+                            "Confidence": round(rng.uniform(85.0, 99.99), 4),
+                        }
+                    ],
+                    "PageNumber": [{"Value": str(page_number), "Confidence": 99.0}],
+                },
+                "Extractions": [
+                    {
+                        "LendingDocument": {
+                            "LendingFields": fields,
+                            "SignatureDetections": [],
+                        }
+                    }
+                ],
+            }
+        )
+        page_number += 1
+    return {
+        "DocumentMetadata": {"Pages": n_pages},
+        "JobStatus": "SUCCEEDED",
+        "Results": results,
+        "AnalyzeLendingModelVersion": "1.0",
+    }
+
+
+def split_into_output_parts(
+    response: dict,
+    key: str = "Blocks",
+    max_items: int = 1000,
+) -> T.List[dict]:
+    """
+    Split a merged response into the numbered output parts that the Textract
+    async API writes to S3. Every part carries the same metadata.
+
+    :param response: the merged response.
+    :param key: "Blocks" | "ExpenseDocuments" | "Results".
+    :param max_items: maximum number of items in each part.
+    """
+    items = response[key]
+    metadata = {k: v for k, v in response.items() if k not in (key, "NextToken")}
+    parts = list()
+    for i in range(0, max(len(items), 1), max_items):
+        part = dict(metadata)
+        part[key] = items[i : i + max_items]
+        parts.append(part)
+    return parts
+
+
+def write_output_parts_to_dir(
+    parts: T.List[dict],
+    dir_output: T.Union[str, Path],
+):
+    """
+    Write the output parts to a local directory as ``1``, ``2``, ``3`` ...
+    files, along with the ``.s3_access_check`` file.
+    """
+    dir_output = Path(dir_output)
+    dir_output.mkdir(parents=True, exist_ok=True)
+    dir_output.joinpath(".s3_access_check").write_text("")
+    for i, part in enumerate(parts, start=1):
+        dir_output.joinpath(str(i)).write_text(json.dumps(part))
+
+
+def write_output_parts_to_s3(
+    s3_client: "S3Client",
+    s3dir: "S3Path",
+    parts: T.List[dict],
+):
+    """
+    Write the output parts to S3 (or the S3 stand-in) as ``1``, ``2``, ``3`` ...
+    objects, along with the ``.s3_access_check`` object, the same layout as
+    the Textract async API output.
+
+    :param s3dir: the ``get_textract_output_s3dir()`` of the job.
+    """
+    s3dir.joinpath(".s3_access_check").write_text("", bsm=s3_client)
+    for i, part in enumerate(parts, start=1):
+        s3dir.joinpath(str(i)).write_text(json.dumps(part), bsm=s3_client)
+
+
+def make_paginated_get_api(
+    response: dict,
+    key: str = "Blocks",
+    default_max_results: int = 1000,
+) -> T.Callable[..., dict]:
+    """
+    Create a stub of the ``textract_client.get_xyz()`` API that serves the
+    given merged response page by page, following the ``MaxResults`` and
+    ``NextToken`` protocol.
+    """
+    items = response[key]
+    metadata = {k: v for k, v in response.items() if k != key}
+
+    def api(JobId: str, MaxResults: T.Optional[int] = None, NextToken: str = None):
+        start = int(NextToken) if NextToken else 0
+        end = start + (MaxResults or default_max_results)
+        res = dict(metadata)
+        res[key] = items[start:end]
+        if end < len(items):
+            res["NextToken"] = str(end)
+        return res
+
+    return api
@@ -0,0 +1,47 @@
+# -*- coding: utf-8 -*-
+
+"""
+Benchmark suite for the hot paths of the package, powered by ``pytest-benchmark``.
+
+Run it from the project root::
+
+    pytest benchmarks --benchmark-only
+    # save a baseline, then compare later runs against it
+    pytest benchmarks --benchmark-only --benchmark-autosave
+    pytest benchmarks --benchmark-only --benchmark-compare --benchmark-compare-fail=mean:10%
+
+All inputs are generated by :mod:`aws_textract.tests.synthetic`, so the
+numbers are comparable across runs and machines.
+"""
+
+import json
+
+import pytest
+from s3pathlib import S3Path
+
+from aws_textract.tests.synthetic import (
+    SyntheticDocumentConfig,
+    generate_document_analysis,
+    split_into_output_parts,
+)
+from aws_textract.tests.simulator import InMemoryS3Client
+
+
+@pytest.fixture(scope="session", params=[10, 100], ids=lambda n: f"{n}pages")
+def document_analysis(request) -> dict:
+    return generate_document_analysis(SyntheticDocumentConfig(n_pages=request.param))
+
+
+@pytest.fixture(scope="session")
+def output_parts(document_analysis):
+    """
+    The document analysis response stored as numbered S3 output parts.
+    """
+    s3_client = InMemoryS3Client()
+    s3dir = S3Path("s3://bucket/output/job-id/")
+    s3path_list = list()
+    for i, part in enumerate(split_into_output_parts(document_analysis), start=1):
+        s3path = s3dir.joinpath(str(i))
+        s3_client._put(s3path.bucket, s3path.key, json.dumps(part).encode("utf-8"))
+        s3path_list.append(s3path)
+    return s3_client, s3path_list
@@ -0,0 +1,22 @@
+# -*- coding: utf-8 -*-
+
+import pytest
+
+from aws_textract.better_boto.async_api import _get_result
+from aws_textract.tests.synthetic import make_paginated_get_api
+
+
+@pytest.mark.parametrize("max_results", [100, 1000])
+def test_get_result_pagination(benchmark, document_analysis, max_results):
+    api = make_paginated_get_api(document_analysis, key="Blocks")
+
+    def run():
+        return _get_result(
+            api=api,
+            job_id="job-id",
+            key="Blocks",
+            max_results=max_results,
+        )
+
+    res = benchmark(run)
+    assert len(res["Blocks"]) == len(document_analysis["Blocks"])
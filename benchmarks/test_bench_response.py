@@ -0,0 +1,90 @@
+# -*- coding: utf-8 -*-
+
+import io
+import json
+import time
+
+import pytest
+
+from aws_textract.response.stream import iter_json_array_items
+from aws_textract.response.utils import blocks_to_text, split_blocks_by_page
+from aws_textract.response.merge import _merge_textract_response_parts
+
+
+def test_blocks_to_text(benchmark, document_analysis):
+    blocks = document_analysis["Blocks"]
+    text = benchmark(blocks_to_text, blocks)
+    assert text
+
+
+def test_split_blocks_by_page(benchmark, document_analysis):
+    blocks = document_analysis["Blocks"]
+    mapper = benchmark(split_blocks_by_page, blocks)
+    assert len(mapper) == document_analysis["DocumentMetadata"]["Pages"]
+
+
+def test_merge_textract_response_parts(benchmark, document_analysis, output_parts):
+    s3_client, s3path_list = output_parts
+    res = benchmark(
+        _merge_textract_response_parts,
+        s3_client=s3_client,
+        s3path_list=s3path_list,
+        key="Blocks",
+    )
+    assert len(res["Blocks"]) == len(document_analysis["Blocks"])
+
+
+def _parse_with_json_loads(raw: bytes) -> list:
+    return json.loads(raw)["Blocks"]
+
+
+def _parse_with_stream(raw: bytes, metadata=None) -> list:
+    return list(iter_json_array_items(io.BytesIO(raw), "Blocks", metadata=metadata))
+
+
+def _best_of(func, n: int = 5) -> float:
+    elapsed = list()
+    for _ in range(n):
+        start = time.perf_counter()
+        func()
+        elapsed.append(time.perf_counter() - start)
+    return min(elapsed)
+
+
+def _check_stream_speed(benchmark, raw: bytes, max_ratio: float):
+    """
+    The streaming parser must stay close to ``json.loads`` with the C backend,
+    building the items in Python event by event is about 4 times slower.
+    """
+    import ijson
+
+    if ijson.backend != "yajl2_c" or benchmark.disabled:  # pragma: no cover
+        return
+    baseline = _best_of(lambda: _parse_with_json_loads(raw))
+    assert benchmark.stats.stats.min < max_ratio * baseline
+
+
+@pytest.mark.benchmark(group="parse_part")
+def test_parse_part_json_loads(benchmark, document_analysis):
+    raw = json.dumps(document_analysis).encode("utf-8")
+    blocks = benchmark(_parse_with_json_loads, raw)
+    assert len(blocks) == len(document_analysis["Blocks"])
+
+
+@pytest.mark.benchmark(group="parse_part")
+def test_parse_part_stream(benchmark, document_analysis):
+    pytest.importorskip("ijson")
+    raw = json.dumps(document_analysis).encode("utf-8")
+    blocks = benchmark(_parse_with_stream, raw)
+    assert len(blocks) == len(document_analysis["Blocks"])
+    _check_stream_speed(benchmark, raw, max_ratio=3)
+
+
+@pytest.mark.benchmark(group="parse_part")
+def test_parse_part_stream_with_metadata(benchmark, document_analysis):
+    pytest.importorskip("ijson")
+    raw = json.dumps(document_analysis).encode("utf-8")
+    blocks = benchmark(lambda: _parse_with_stream(raw, metadata={}))
+    assert len(blocks) == len(document_analysis["Blocks"])
+    # the prefixed events of every item go through the splitter
+    _check_stream_speed(benchmark, raw, max_ratio=6)
@@ -0,0 +1,26 @@
+# -*- coding: utf-8 -*-
+
+import pytest
+
+from aws_textract.tests.simulator import (
+    SimulatorConfig,
+    InMemoryS3Client,
+    TextractSimulator,
+)
+
+
+@pytest.fixture
+def s3_client() -> InMemoryS3Client:
+    """
+    An in-memory stand-in of ``boto3.client("s3")``.
+    """
+    return InMemoryS3Client()
+
+
+@pytest.fixture
+def textract_client(s3_client) -> TextractSimulator:
+    """
+    A stand-in of ``boto3.client("textract")`` that writes the output parts
+    to the ``s3_client`` fixture. Jobs succeed immediately, no latency.
+    """
+    return TextractSimulator(s3_client=s3_client, config=SimulatorConfig(part_size=100))
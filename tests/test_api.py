@@ -10,6 +10,9 @@ def test():
     _ = api.better_boto.get_document_text_detection
     _ = api.better_boto.get_expense_analysis
     _ = api.better_boto.get_lending_analysis
+    _ = api.better_boto.iter_lending_analysis
+    _ = api.better_boto.iter_document_analysis_pages
+    _ = api.better_boto.iter_document_text_detection_pages
     _ = api.better_boto.JobStatusEnum
     _ = api.better_boto.wait_document_analysis_job_to_succeed
     _ = api.better_boto.wait_document_text_detection_job_to_succeed
@@ -18,6 +21,44 @@ def test():
     _ = api.better_boto.wait_for_lending_analysis_job_to_succeed
     _ = api.better_boto.TextractDocumentLocation
     _ = api.better_boto.TextractEvent
+    _ = api.better_boto.to_document_param
+    _ = api.better_boto.analyze_document
+    _ = api.better_boto.detect_document_text
+    _ = api.better_boto.analyze_expense
+    _ = api.better_boto.SyncBatchResult
+    _ = api.better_boto.batch_analyze_document
+    _ = api.better_boto.batch_detect_document_text
+    _ = api.better_boto.batch_analyze_expense
+    _ = api.better_boto.RoutePathEnum
+    _ = api.better_boto.RoutableApiEnum
+    _ = api.better_boto.guess_document_format
+    _ = api.better_boto.DocumentInfo
+    _ = api.better_boto.RouteResult
+    _ = api.better_boto.TextractRouter
+    _ = api.better_boto.ShardableApiEnum
+    _ = api.better_boto.split_pdf
+    _ = api.better_boto.Shard
+    _ = api.better_boto.ShardedJob
+    _ = api.better_boto.start_sharded_job
+    _ = api.better_boto.wait_sharded_job_to_succeed
+    _ = api.better_boto.merge_sharded_responses
+    _ = api.better_boto.get_sharded_result
+    _ = api.better_boto.JobApiEnum
+    _ = api.better_boto.JobRecord
+    _ = api.better_boto.BaseJobRegistry
+    _ = api.better_boto.SqliteJobRegistry
+    _ = api.better_boto.QueueMessage
+    _ = api.better_boto.BaseQueue
+    _ = api.better_boto.InMemoryQueue
+    _ = api.better_boto.SqliteQueue
+    _ = api.better_boto.SqsQueue
+    _ = api.better_boto.BaseLedger
+    _ = api.better_boto.InMemoryLedger
+    _ = api.better_boto.SqliteLedger
+    _ = api.better_boto.parse_textract_event
+    _ = api.better_boto.StageStats
+    _ = api.better_boto.Stage
+    _ = api.better_boto.Pipeline
     _ = api.res.BlockTypeEnum
     _ = api.res.blocks_to_text
     _ = api.res.split_blocks_by_page
@@ -26,6 +67,68 @@ def test():
     _ = api.res.merge_document_text_detection_result
     _ = api.res.merge_expense_analysis_result
     _ = api.res.merge_lending_analysis_result
+    _ = api.res.group_output_keys_by_job_id
+    _ = api.res.list_textract_output_by_job_id
+    _ = api.res.BulkMergeResult
+    _ = api.res.bulk_merge_textract_output
+    _ = api.res.ExpenseTables
+    _ = api.res.ExpenseTableBuilder
+    _ = api.res.expense_documents_to_tables
+    _ = api.res.iter_expense_table_batches
+    _ = api.res.get_lending_page_type
+    _ = api.res.LendingPageIndex
+    _ = api.res.QueryAnswer
+    _ = api.res.QueryResults
+    _ = api.res.QueryMatrix
+    _ = api.res.SpanHit
+    _ = api.res.TextOffsetMap
+    _ = api.res.normalize_term
+    _ = api.res.WordHit
+    _ = api.res.WordIndex
+    _ = api.res.BLOCK_COLUMNS
+    _ = api.res.get_block_arrow_schema
+    _ = api.res.BlockTableBuilder
+    _ = api.res.blocks_to_record_batch
+    _ = api.res.iter_block_record_batches
+    _ = api.res.write_blocks_to_parquet
+    _ = api.res.BlockGeometry
+    _ = api.res.get_block_geometry
+    _ = api.res.merge_adjacent_boxes
+    _ = api.res.boxes_to_mask
+    _ = api.res.LayoutNode
+    _ = api.res.LayoutTree
+    _ = api.res.CorpusFormatEnum
+    _ = api.res.CorpusBuildResult
+    _ = api.res.build_text_corpus
+    _ = api.res.MINIMAL_FIELDS
+    _ = api.res.Projection
+    _ = api.res.iter_json_array_items
+    _ = api.res.iter_textract_output_items
+    _ = api.res.PageOutput
+    _ = api.res.iter_pages
+    _ = api.res.iter_pages_from_s3
+    _ = api.res.CompressionEnum
+    _ = api.res.CompactedIndex
+    _ = api.res.encode_compacted
+    _ = api.res.decode_compacted
+    _ = api.res.compact_textract_output
+    _ = api.res.read_compacted_response
+    _ = api.res.read_compacted_index
+    _ = api.res.read_compacted_pages
+    _ = api.res.make_hex_shard_prefixes
+    _ = api.res.list_output_keys
+    _ = api.res.OutputManifest
+    _ = api.res.build_output_manifest
+    _ = api.instrumentation.EventNameEnum
+    _ = api.instrumentation.Hook
+    _ = api.instrumentation.register_hook
+    _ = api.instrumentation.unregister_hook
+    _ = api.instrumentation.use_hooks
+    _ = api.instrumentation.LoggingHook
+    _ = api.instrumentation.MetricsRegistryHook
+    _ = api.clients.get_client_config
+    _ = api.clients.ClientFactory
+    _ = api.clients.check_pool_size
 
 
 if __name__ == "__main__":
@@ -0,0 +1,187 @@
+# -*- coding: utf-8 -*-
+
+import dataclasses
+
+import pytest
+
+from aws_textract.better_boto.async_api import JobStatusEnum, TextractEvent
+from aws_textract.better_boto.job_registry import (
+    JobApiEnum,
+    SqliteJobRegistry,
+    to_job_status,
+)
+from aws_textract.tests.simulator import SimulatorConfig, TextractSimulator
+
+DOCUMENT_LOCATION = {"S3Object": {"Bucket": "input", "Name": "docs/a.pdf"}}
+OUTPUT_CONFIG = {"S3Bucket": "output", "S3Prefix": "textract/"}
+
+
+def test_start_and_wait(tmp_path, textract_client):
+    registry = SqliteJobRegistry(tmp_path / "jobs.sqlite")
+    record = registry.start_job(
+        textract_client,
+        api=JobApiEnum.document_analysis,
+        DocumentLocation=DOCUMENT_LOCATION,
+        OutputConfig=OUTPUT_CONFIG,
+        FeatureTypes=["TABLES"],
+    )
+    assert record.status == JobStatusEnum.IN_PROGRESS.value
+    assert record.output_s3uri == f"s3://output/textract/{record.job_id}/"
+
+    # another process sees the same record
+    other = SqliteJobRegistry(tmp_path / "jobs.sqlite")
+    assert other.get(record.job_id).params["FeatureTypes"] == ["TABLES"]
+    assert [r.job_id for r in other.list_jobs(status="IN_PROGRESS")] == [record.job_id]
+
+    record = other.wait_job_to_succeed(
+        textract_client, record.job_id, delays=0, verbose=False
+    )
+    assert record.status == JobStatusEnum.SUCCEEDED.value
+    assert textract_client.calls["GetDocumentAnalysis"] == 1
+
+    # the finished status is cached, no more API call
+    registry.wait_job_to_succeed(textract_client, record.job_id, delays=0, verbose=False)
+    assert textract_client.calls["GetDocumentAnalysis"] == 1
+    assert registry.get(record.job_id).poller is None
+    assert registry.list_jobs(status="IN_PROGRESS") == []
+    # a finished status is never overwritten
+    assert registry.update_status(record.job_id, "IN_PROGRESS") is False
+
+
+def test_designated_poller(s3_client):
+    now = [1000.0]
+    clock = lambda: now[0]
+    textract_client = TextractSimulator(s3_client, SimulatorConfig(job_duration=10))
+    registry = SqliteJobRegistry(clock=clock)
+    record = registry.start_job(
+        textract_client,
+        api="document_text_detection",
+        DocumentLocation=DOCUMENT_LOCATION,
+    )
+    job_id = record.job_id
+    assert record.output_s3uri is None
+
+    # someone else holds the lease, this waiter only reads the cache
+    assert registry.try_acquire_poller(job_id, "poller-1", lease_seconds=60)
+    assert not registry.try_acquire_poller(job_id, "poller-2", lease_seconds=60)
+    with pytest.raises(TimeoutError):
+        registry.wait_job_to_succeed(
+            textract_client,
+            job_id,
+            delays=0.01,
+            timeout=0.05,
+            owner="poller-2",
+            verbose=False,
+        )
+    assert textract_client.calls["GetDocumentTextDetection"] == 0
+    assert registry.get(job_id).poller == "poller-1"
+
+    # the lease expired, take over
+    now[0] += 61
+    assert registry.try_acquire_poller(job_id, "poller-2", lease_seconds=60)
+    registry.release_poller(job_id, "poller-2")
+    assert registry.get(job_id).poller is None
+
+
+def test_update_from_event(textract_client):
+    registry = SqliteJobRegistry()
+    textract_client.start_expense_analysis(
+        DocumentLocation=DOCUMENT_LOCATION,
+        NotificationChannel={"SNSTopicArn": "arn", "RoleArn": "arn"},
+        JobTag="tag-1",
+    )
+    textract_client.complete_all_jobs()
+    event = TextractEvent.from_dict(textract_client.notifications[0])
+
+    # an unknown job is registered from the event
+    assert registry.update_from_event(event) is True
+    record = registry.get(event.JobId)
+    assert record.api == JobApiEnum.expense_analysis.value
+    assert record.params == {"JobTag": "tag-1"}
+    assert record.status == JobStatusEnum.SUCCEEDED.value
+
+    # no poll needed
+    registry.wait_job_to_succeed(textract_client, event.JobId, delays=0, verbose=False)
+    assert textract_client.calls["GetExpenseAnalysis"] == 0
+
+
+def test_register_race(tmp_path):
+    path = tmp_path / "jobs.sqlite"
+    # the SNS handler process registers the job and finishes it first
+    event_registry = SqliteJobRegistry(path)
+    event = TextractEvent.from_dict(
+        {
+            "JobId": "job-1",
+            "Status": "SUCCEEDED",
+            "API": "StartDocumentAnalysis",
+            "JobTag": "",
+            "Timestamp": 0,
+            "DocumentLocation": {"S3ObjectName": "docs/a.pdf", "S3Bucket": "input"},
+        }
+    )
+    assert event_registry.update_from_event(event) is True
+
+    # then the submitting process registers it, the status is kept
+    registry = SqliteJobRegistry(path)
+    params = dict(DocumentLocation=DOCUMENT_LOCATION, OutputConfig=OUTPUT_CONFIG)
+    record = registry.register_job("job-1", JobApiEnum.document_analysis, params)
+    assert record.status == JobStatusEnum.SUCCEEDED.value
+    assert record.params == params
+    assert record.output_s3uri == "s3://output/textract/job-1/"
+
+    # a late or duplicated event doesn't wipe the params
+    event_registry.update_from_event(event)
+    assert registry.get("job-1") == record
+
+    # put() still overwrites
+    registry.put(dataclasses.replace(record, status="IN_PROGRESS"))
+    assert registry.get("job-1").status == JobStatusEnum.IN_PROGRESS.value
+
+
+def test_update_from_error_event():
+    registry = SqliteJobRegistry()
+    event = TextractEvent.from_dict(
+        {
+            "JobId": "job-1",
+            "Status": "ERROR",
+            "API": "StartDocumentTextDetection",
+            "JobTag": "",
+            "Timestamp": 0,
+            "DocumentLocation": {"S3ObjectName": "docs/a.pdf", "S3Bucket": "input"},
+        }
+    )
+    assert registry.update_from_event(event) is True
+    record = registry.get("job-1")
+    assert record.status == JobStatusEnum.FAILED.value
+    assert record.is_finished
+    assert to_job_status("SUCCEEDED") == JobStatusEnum.SUCCEEDED.value
+    assert [r.job_id for r in registry.list_jobs(status="ERROR")] == ["job-1"]
+    with pytest.raises(ValueError):
+        to_job_status("UNKNOWN")
+
+
+def test_failed_job(s3_client):
+    textract_client = TextractSimulator(s3_client, SimulatorConfig(failure_rate=1.0))
+    registry = SqliteJobRegistry()
+    job_id = textract_client.start_document_analysis(
+        DocumentLocation=DOCUMENT_LOCATION
+    )["JobId"]
+    with pytest.raises(KeyError):
+        registry.wait_job_to_succeed(textract_client, job_id, delays=0, verbose=False)
+    with pytest.raises(Exception, match="Job failed"):
+        registry.wait_job_to_succeed(
+            textract_client,
+            job_id,
+            api=JobApiEnum.document_analysis,
+            delays=0,
+            verbose=False,
+        )
+    record = registry.get(job_id)
+    assert record.status == JobStatusEnum.FAILED.value
+    assert record.status_message == "simulated failure"
+
+
+if __name__ == "__main__":
+    from aws_textract.tests import run_cov_test
+
+    run_cov_test(__file__, "aws_textract.better_boto.job_registry", preview=False)
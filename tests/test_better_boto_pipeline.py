@@ -0,0 +1,334 @@
+# -*- coding: utf-8 -*-
+
+import json
+import time
+import threading
+
+import pytest
+
+from aws_textract.better_boto import async_api
+from aws_textract.better_boto.pipeline import (
+    QueueMessage,
+    InMemoryQueue,
+    SqliteQueue,
+    SqsQueue,
+    InMemoryLedger,
+    SqliteLedger,
+    parse_textract_event,
+    get_job_id,
+    Stage,
+    Pipeline,
+)
+
+NOTIFICATION_CHANNEL = {
+    "SNSTopicArn": "arn:aws:sns:us-east-1:111122223333:textract",
+    "RoleArn": "arn:aws:iam::111122223333:role/textract",
+}
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.mark.parametrize("backend", ["memory", "sqlite"])
+def test_queue(backend, tmp_path):
+    clock = Clock()
+    if backend == "memory":
+        queue = InMemoryQueue(clock=clock)
+    else:
+        queue = SqliteQueue(str(tmp_path / "queue.sqlite"), clock=clock)
+        assert SqliteQueue(queue.path, name="other").count() == 0
+    for i in range(3):
+        queue.send({"i": i})
+    queue.send({"i": 3}, delay_seconds=10)
+    assert queue.count() == 4
+
+    first = queue.receive(max_messages=2, visibility_timeout=5)
+    assert [m.body for m in first] == [{"i": 0}, {"i": 1}]
+    # hidden from the other consumers
+    assert [m.body for m in queue.receive(max_messages=10)] == [{"i": 2}]
+    assert queue.receive() == []
+
+    # the visibility timeout expires, another consumer receives it again
+    clock.now = 6
+    again = queue.receive(max_messages=1, visibility_timeout=5)
+    assert again[0].message_id == first[0].message_id
+    assert again[0].receive_count == 2
+    assert queue.delete(first[0]) is False  # stale receipt
+    assert queue.delete(again[0]) is True
+    assert queue.change_visibility(again[0], 0) is False
+
+    assert queue.change_visibility(first[1], 0) is True
+    assert [m.body for m in queue.receive()] == [{"i": 1}]
+    clock.now = 10
+    assert {"i": 3} in [m.body for m in queue.receive(max_messages=10)]
+    assert queue.count() == 3
+
+
+@pytest.mark.parametrize("backend", ["memory", "sqlite"])
+def test_ledger(backend):
+    ledger = InMemoryLedger() if backend == "memory" else SqliteLedger()
+    assert ledger.get("merge", "job-1") is None
+    ledger.put("merge", "job-1", [{"JobId": "job-1"}])
+    assert ledger.get("merge", "job-1") == [{"JobId": "job-1"}]
+    assert ledger.get("submit", "job-1") is None
+
+
+def test_parse_textract_event(textract_client):
+    job_id = textract_client.start_document_text_detection(
+        DocumentLocation={"S3Object": {"Bucket": "input", "Name": "a.pdf"}},
+        NotificationChannel=NOTIFICATION_CHANNEL,
+    )["JobId"]
+    textract_client.complete_all_jobs()
+    notification = textract_client.notifications[0]
+    envelope = {"Type": "Notification", "Message": json.dumps(notification)}
+    assert parse_textract_event(envelope).JobId == job_id
+    assert get_job_id(envelope) == job_id
+    assert get_job_id(notification) == job_id
+
+
+def test_pipeline(textract_client, tmp_path):
+    path = str(tmp_path / "pipeline.sqlite")
+    submit_queue = SqliteQueue(path, name="submit")
+    done_queue = SqliteQueue(path, name="done")
+    merged_queue = SqliteQueue(path, name="merged")
+    dead_queue = InMemoryQueue()
+    calls = {"submit": 0, "merge": 0}
+
+    def submit(body: dict):
+        calls["submit"] += 1
+        if body["key"] == "bad.pdf":
+            raise ValueError("unsupported document")
+        n_before = len(textract_client.notifications)
+        textract_client.start_document_text_detection(
+            DocumentLocation={"S3Object": {"Bucket": "input", "Name": body["key"]}},
+            NotificationChannel=NOTIFICATION_CHANNEL,
+        )
+        textract_client.complete_all_jobs()
+        # the Textract SNS topic delivers the notification to the done queue
+        for notification in textract_client.notifications[n_before:]:
+            done_queue.send(
+                {"Type": "Notification", "Message": json.dumps(notification)}
+            )
+
+    def merge(body: dict):
+        calls["merge"] += 1
+        event = parse_textract_event(body)
+        res = async_api.get_document_text_detection(textract_client, event.JobId)
+        return {"JobId": event.JobId, "n_blocks": len(res["Blocks"])}
+
+    stages = [
+        Stage(
+            "submit",
+            submit,
+            submit_queue,
+            key="key",
+            max_receive_count=2,
+            visibility_timeout=0,
+            dead_letter_queue=dead_queue,
+        ),
+        Stage("merge", merge, done_queue, merged_queue, concurrency=3),
+    ]
+    # another node shares the same queues and ledger
+    ledger = SqliteLedger(path)
+    pipeline = Pipeline(stages, ledger=ledger)
+
+    for key in ["a.pdf", "b.pdf", "a.pdf", "bad.pdf"]:
+        submit_queue.send({"key": key})
+    pipeline.drain()
+
+    # the duplicated a.pdf is skipped, bad.pdf is retried then dead lettered
+    assert calls == {"submit": 4, "merge": 2}
+    assert stages[0].stats.succeeded == 2
+    assert stages[0].stats.skipped == 1
+    assert stages[0].stats.failed == 2
+    assert stages[0].stats.dead_lettered == 1
+    assert dead_queue.receive()[0].body == {"key": "bad.pdf"}
+    assert submit_queue.count() == 0 and done_queue.count() == 0
+    outputs = merged_queue.receive(max_messages=10)
+    assert len(outputs) == 2
+    assert all(m.body["n_blocks"] > 0 for m in outputs)
+
+    # a redelivered notification doesn't merge the job again, the recorded
+    # output is sent again
+    done_queue.send({"JobId": outputs[0].body["JobId"]})
+    Pipeline(stages, ledger=SqliteLedger(path)).drain()
+    assert calls["merge"] == 2
+    resent = merged_queue.receive(max_messages=10)
+    assert [m.body for m in resent] == [outputs[0].body]
+    for message in outputs + resent:
+        merged_queue.delete(message)
+
+    # the consumer threads
+    submit_queue.send({"key": "c.pdf"})
+    stop = threading.Event()
+    thread = threading.Thread(target=pipeline.run, args=(stop, 0.01))
+    thread.start()
+    try:
+        for _ in range(500):
+            if merged_queue.count() == 1:
+                break
+            stop.wait(0.01)
+    finally:
+        stop.set()
+        thread.join()
+    assert calls["merge"] == 3
+    assert merged_queue.count() == 1
+
+
+def test_heartbeat():
+    queue = InMemoryQueue()
+    seen = list()
+
+    def slow(body: dict):
+        # slower than the visibility timeout, no other consumer gets it
+        time.sleep(0.5)
+        seen.append(queue.receive())
+
+    stage = Stage("slow", slow, queue, key="i", visibility_timeout=0.2)
+    assert stage.get_heartbeat_interval() == 0.1
+    queue.send({"i": 1})
+    assert Pipeline([stage]).drain() == 1
+    assert seen == [[]]
+    assert stage.stats.succeeded == 1
+    assert queue.count() == 0
+
+    # without the heartbeat the message is received again meanwhile
+    stage = Stage(
+        "slow", slow, queue, key="i", visibility_timeout=0.2, heartbeat_interval=0
+    )
+    queue.send({"i": 2})
+    Pipeline([stage]).drain(max_rounds=1)
+    assert [m.body for m in seen[-1]] == [{"i": 2}]
+
+
+def test_retry_delay():
+    clock = Clock()
+    queue = InMemoryQueue(clock=clock)
+
+    def fail(body: dict):
+        raise ValueError
+
+    stage = Stage("fail", fail, queue, key="i", retry_delay=10, max_receive_count=3)
+    pipeline = Pipeline([stage])
+    queue.send({"i": 1})
+    # hidden for 10 seconds, not the 300 seconds visibility timeout
+    assert pipeline.drain() == 1
+    clock.now = 9
+    assert pipeline.drain() == 0
+    clock.now = 10
+    assert pipeline.drain() == 1
+    # doubled on the next attempt
+    clock.now = 29
+    assert pipeline.drain() == 0
+    clock.now = 30
+    assert pipeline.drain() == 1
+    assert stage.stats.failed == 3
+    assert stage.stats.dead_lettered == 1
+    assert queue.count() == 0
+    assert stage.get_retry_delay(10) == stage.visibility_timeout
+
+
+def test_sqs_queue():
+    boto3 = pytest.importorskip("boto3")
+    from botocore.stub import Stubber
+
+    sqs_client = boto3.client(
+        "sqs",
+        region_name="us-east-1",
+        aws_access_key_id="testing",
+        aws_secret_access_key="testing",
+    )
+    queue_url = "https://sqs.us-east-1.amazonaws.com/111122223333/done"
+    queue = SqsQueue(sqs_client, queue_url)
+    with Stubber(sqs_client) as stubber:
+        stubber.add_response(
+            "send_message",
+            {"MessageId": "m-1"},
+            {
+                "QueueUrl": queue_url,
+                "MessageBody": '{"JobId": "j"}',
+                "DelaySeconds": 0,
+            },
+        )
+        stubber.add_response(
+            "receive_message",
+            {
+                "Messages": [
+                    {
+                        "MessageId": "m-1",
+                        "ReceiptHandle": "r-1",
+                        "Body": '{"JobId": "j"}',
+                        "Attributes": {"ApproximateReceiveCount": "2"},
+                    }
+                ]
+            },
+        )
+        stubber.add_response("change_message_visibility", {})
+        stubber.add_response("delete_message", {})
+        stubber.add_response(
+            "get_queue_attributes",
+            {
+                "Attributes": {
+                    "ApproximateNumberOfMessages": "3",
+                    "ApproximateNumberOfMessagesNotVisible": "1",
+                }
+            },
+        )
+        assert queue.send({"JobId": "j"}) == "m-1"
+        (message,) = queue.receive(max_messages=20)
+        assert message.body == {"JobId": "j"}
+        assert message.receive_count == 2
+        assert queue.change_visibility(message, 60) is True
+        assert queue.delete(message) is True
+        assert queue.count() == 4
+
+
+def test_sqs_queue_stale_receipt():
+    boto3 = pytest.importorskip("boto3")
+    from botocore.stub import Stubber
+    from botocore.exceptions import ClientError
+
+    sqs_client = boto3.client(
+        "sqs",
+        region_name="us-east-1",
+        aws_access_key_id="testing",
+        aws_secret_access_key="testing",
+    )
+    queue_url = "https://sqs.us-east-1.amazonaws.com/111122223333/done"
+    queue = SqsQueue(sqs_client, queue_url)
+    message = QueueMessage(
+        message_id="m-1",
+        body={"JobId": "j"},
+        receipt_handle="r-1",
+        receive_count=1,
+    )
+    with Stubber(sqs_client) as stubber:
+        # the message has been received again by another consumer
+        stubber.add_client_error(
+            "change_message_visibility",
+            service_error_code="MessageNotInflight",
+        )
+        stubber.add_client_error(
+            "delete_message",
+            service_error_code="ReceiptHandleIsInvalid",
+        )
+        stubber.add_client_error(
+            "delete_message",
+            service_error_code="AccessDenied",
+            http_status_code=403,
+        )
+        assert queue.change_visibility(message, 60) is False
+        assert queue.delete(message) is False
+        with pytest.raises(ClientError):
+            queue.delete(message)
+
+
+if __name__ == "__main__":
+    from aws_textract.tests import run_cov_test
+
+    run_cov_test(__file__, "aws_textract.better_boto.pipeline", preview=False)
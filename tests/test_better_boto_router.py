@@ -0,0 +1,179 @@
+# -*- coding: utf-8 -*-
+
+import pytest
+from botocore.exceptions import ClientError, EndpointConnectionError
+
+from aws_textract.better_boto.router import (
+    RoutePathEnum,
+    RoutableApiEnum,
+    guess_document_format,
+    DocumentInfo,
+    TextractRouter,
+    _is_path_failure,
+)
+from aws_textract.response.projection import Projection
+
+SYNC = RoutePathEnum.sync
+ASYNC = RoutePathEnum.async_
+API = RoutableApiEnum.document_analysis
+
+
+def test_guess_document_format():
+    assert guess_document_format("a/b.PNG") == "png"
+    assert guess_document_format("a/b.jpg") == "jpeg"
+    assert guess_document_format("a/b.tif") == "tiff"
+    assert guess_document_format("a/b") is None
+    assert guess_document_format("a/b.docx") is None
+
+
+def test_allowed_paths(textract_client):
+    router = TextractRouter(textract_client)
+    small = 1024
+    assert router.allowed_paths(DocumentInfo(size=small, format="png")) == [
+        ASYNC,
+        SYNC,
+    ]
+    # multi page, or unknown page count of pdf
+    assert router.allowed_paths(DocumentInfo(n_pages=3, size=small)) == [ASYNC]
+    assert router.allowed_paths(DocumentInfo(size=small, format="pdf")) == [ASYNC]
+    assert SYNC in router.allowed_paths(
+        DocumentInfo(n_pages=1, size=small, format="pdf")
+    )
+    # too large, unknown size, needs s3 output
+    assert router.allowed_paths(DocumentInfo(size=100 << 20, format="png")) == [ASYNC]
+    assert router.allowed_paths(DocumentInfo(format="png")) == [ASYNC]
+    assert router.allowed_paths(
+        DocumentInfo(size=small, format="png", needs_s3_output=True)
+    ) == [ASYNC]
+
+
+def test_adaptive_choice(textract_client):
+    router = TextractRouter(textract_client, alpha=0.5, explore_every=4)
+    info = DocumentInfo(size=1024, format="png")
+    assert router.choose(API, info) is SYNC
+    # sync gets slow, e.g. heavily throttled
+    for _ in range(5):
+        router.record(API, SYNC, 60.0)
+    assert router.expected_latency(API, SYNC) == 60.0
+    assert router.expected_latency(API, ASYNC) == 15.0
+    choices = [router.choose(API, info) for _ in range(6)]
+    assert choices.count(ASYNC) == 5
+    assert choices.count(SYNC) == 1  # exploration
+    # only one allowed path, no exploration
+    assert router.choose(API, DocumentInfo(n_pages=5)) is ASYNC
+
+
+def test_route(s3_client, textract_client):
+    s3_client.put_object(Bucket="input", Key="receipt.png", Body=b"png")
+    s3_client.put_object(Bucket="input", Key="doc.pdf", Body=b"pdf")
+    router = TextractRouter(textract_client, s3_client=s3_client, delays=0)
+
+    result = router.analyze_document(input_bucket="input", input_key="receipt.png")
+    assert result.path is SYNC
+    assert result.job_id is None
+    assert result.response["JobStatus"] == "SUCCEEDED"
+    assert router.stats[(API, SYNC)].count == 1
+
+    result = router.analyze_document(
+        input_bucket="input",
+        input_key="doc.pdf",
+        projection=Projection(block_types=["PAGE"]),
+    )
+    assert result.path is ASYNC
+    assert textract_client.jobs[result.job_id].kwargs["FeatureTypes"] == [
+        "TABLES",
+        "FORMS",
+    ]
+    assert {block["BlockType"] for block in result.response["Blocks"]} == {"PAGE"}
+
+    result = router.detect_document_text(
+        input_bucket="input",
+        input_key="receipt.png",
+        output_bucket="output",
+        output_prefix="textract",
+    )
+    assert result.path is ASYNC
+    kwargs = textract_client.jobs[result.job_id].kwargs
+    assert kwargs["OutputConfig"] == {"S3Bucket": "output", "S3Prefix": "textract"}
+
+    result = router.analyze_expense(input_bucket="input", input_key="receipt.png")
+    assert result.path is SYNC
+    assert len(result.response["ExpenseDocuments"]) == 1
+
+
+def test_route_sync_throttled(monkeypatch, s3_client, textract_client):
+    s3_client.put_object(Bucket="input", Key="receipt.png", Body=b"png")
+    router = TextractRouter(
+        textract_client,
+        s3_client=s3_client,
+        explore_every=0,
+        delays=0,
+    )
+
+    def throttled(**kwargs):
+        raise ClientError(
+            {"Error": {"Code": "ThrottlingException", "Message": "Rate exceeded"}},
+            "AnalyzeDocument",
+        )
+
+    # the sync API is still throttled after the client retries
+    monkeypatch.setattr(textract_client, "analyze_document", throttled)
+    with pytest.raises(ClientError):
+        router.analyze_document(input_bucket="input", input_key="receipt.png")
+    assert router.stats[(API, SYNC)].count == 1
+    assert router.expected_latency(API, SYNC) >= router.failure_penalty
+
+    # the next document goes to the async path
+    result = router.analyze_document(input_bucket="input", input_key="receipt.png")
+    assert result.path is ASYNC
+    assert result.response["JobStatus"] == "SUCCEEDED"
+
+
+def test_route_caller_error(monkeypatch, s3_client, textract_client):
+    s3_client.put_object(Bucket="input", Key="receipt.png", Body=b"png")
+    router = TextractRouter(
+        textract_client,
+        s3_client=s3_client,
+        explore_every=0,
+        delays=0,
+    )
+
+    def invalid(**kwargs):
+        raise ClientError(
+            {
+                "Error": {"Code": "InvalidParameterException", "Message": "bad"},
+                "ResponseMetadata": {"HTTPStatusCode": 400},
+            },
+            "AnalyzeDocument",
+        )
+
+    # a malformed document doesn't steer the traffic away from the path
+    monkeypatch.setattr(textract_client, "analyze_document", invalid)
+    with pytest.raises(ClientError):
+        router.analyze_document(input_bucket="input", input_key="receipt.png")
+    assert (API, SYNC) not in router.stats
+
+
+@pytest.mark.parametrize(
+    "error",
+    [
+        ClientError(
+            {
+                "Error": {"Code": "InternalServerError", "Message": "oops"},
+                "ResponseMetadata": {"HTTPStatusCode": 500},
+            },
+            "AnalyzeDocument",
+        ),
+        EndpointConnectionError(endpoint_url="https://textract"),
+        TimeoutError("timed out"),
+    ],
+)
+def test_is_path_failure(error):
+    assert _is_path_failure(error) is True
+    assert _is_path_failure(ValueError("bad")) is False
+
+
+if __name__ == "__main__":
+    from aws_textract.tests import run_cov_test
+
+    run_cov_test(__file__, "aws_textract.better_boto.router", preview=False)
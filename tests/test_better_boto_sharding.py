@@ -0,0 +1,146 @@
+# -*- coding: utf-8 -*-
+
+import io
+import itertools
+
+import pytest
+
+from aws_textract.better_boto.sharding import (
+    ShardableApiEnum,
+    split_pdf,
+    start_sharded_job,
+    wait_sharded_job_to_succeed,
+    get_sharded_result,
+)
+from aws_textract.response.contants import BlockTypeEnum
+from aws_textract.response.projection import Projection
+from aws_textract.tests.simulator import SimulatorConfig, TextractSimulator
+
+
+def fake_splitter(body: bytes, pages_per_shard: int):
+    # the simulator doesn't read the input, one byte per page is enough
+    return [
+        body[i : i + pages_per_shard] for i in range(0, len(body), pages_per_shard)
+    ]
+
+
+def test_split_pdf():
+    pypdf = pytest.importorskip("pypdf")
+    writer = pypdf.PdfWriter()
+    for _ in range(7):
+        writer.add_blank_page(width=72, height=72)
+    buffer = io.BytesIO()
+    writer.write(buffer)
+    shards = split_pdf(buffer.getvalue(), pages_per_shard=3)
+    assert [len(pypdf.PdfReader(io.BytesIO(b)).pages) for b in shards] == [3, 3, 1]
+
+
+def test_sharded_document_analysis(s3_client, textract_client):
+    # each simulated job returns 3 pages, the blocks have the same Ids
+    s3_client.put_object(Bucket="input", Key="docs/large.pdf", Body=b"x" * 9)
+    sharded_job = start_sharded_job(
+        textract_client=textract_client,
+        s3_client=s3_client,
+        api=ShardableApiEnum.document_analysis,
+        input_bucket="input",
+        input_key="docs/large.pdf",
+        output_bucket="output",
+        output_prefix="textract/",
+        pages_per_shard=3,
+        splitter=fake_splitter,
+        FeatureTypes=["TABLES", "FORMS"],
+    )
+    assert [shard.first_page for shard in sharded_job.shards] == [1, 4, 7]
+    assert len(set(sharded_job.job_ids)) == 3
+    assert sharded_job.shards[1].input_key == "textract/shards/large-0002.pdf"
+    for shard in sharded_job.shards:
+        job = textract_client.jobs[shard.job_id]
+        assert job.kwargs["DocumentLocation"]["S3Object"]["Name"] == shard.input_key
+        assert job.kwargs["FeatureTypes"] == ["TABLES", "FORMS"]
+        assert s3_client.get_object(Bucket="output", Key=shard.input_key)
+
+    wait_sharded_job_to_succeed(textract_client, sharded_job, delays=0, verbose=False)
+    res = get_sharded_result(textract_client, sharded_job)
+    assert res["DocumentMetadata"]["Pages"] == 9
+    assert "NextToken" not in res
+    blocks = res["Blocks"]
+    pages = [block["Page"] for block in blocks]
+    assert pages == sorted(pages)
+    assert [
+        block["Page"] for block in blocks if block["BlockType"] == BlockTypeEnum.PAGE
+    ] == list(range(1, 10))
+    # ids are unique and relationships still resolve
+    ids = {block["Id"] for block in blocks}
+    assert len(ids) == len(blocks)
+    id_to_page = {block["Id"]: block["Page"] for block in blocks}
+    for block in blocks:
+        for rel in block.get("Relationships", []):
+            for id_ in rel["Ids"]:
+                assert id_to_page[id_] == block["Page"]
+
+    res = get_sharded_result(
+        textract_client,
+        sharded_job,
+        projection=Projection(fields=["BlockType", "Page"], block_types=["PAGE"]),
+    )
+    assert res["Blocks"] == [{"BlockType": "PAGE", "Page": i} for i in range(1, 10)]
+
+
+def test_sharded_lending_analysis(s3_client, textract_client):
+    s3_client.put_object(Bucket="input", Key="loan.pdf", Body=b"x" * 20)
+    sharded_job = start_sharded_job(
+        textract_client=textract_client,
+        s3_client=s3_client,
+        api="lending_analysis",
+        input_bucket="input",
+        input_key="loan.pdf",
+        output_bucket="output",
+        output_prefix="textract",
+        pages_per_shard=10,
+        splitter=fake_splitter,
+    )
+    wait_sharded_job_to_succeed(textract_client, sharded_job, delays=0, verbose=False)
+    res = get_sharded_result(textract_client, sharded_job)
+    assert res["DocumentMetadata"]["Pages"] == 20
+    assert [result["Page"] for result in res["Results"]] == list(range(1, 21))
+
+
+def test_wait_sharded_job_to_succeed(s3_client):
+    s3_client.put_object(Bucket="input", Key="large.pdf", Body=b"x" * 9)
+    kwargs = dict(
+        s3_client=s3_client,
+        api=ShardableApiEnum.document_analysis,
+        input_bucket="input",
+        input_key="large.pdf",
+        output_bucket="output",
+        output_prefix="textract",
+        pages_per_shard=3,
+        splitter=fake_splitter,
+    )
+
+    # every call to the clock takes one second, the jobs take ten
+    ticks = itertools.count()
+    textract_client = TextractSimulator(
+        config=SimulatorConfig(job_duration=10),
+        clock=lambda: next(ticks),
+    )
+    sharded_job = start_sharded_job(textract_client=textract_client, **kwargs)
+    wait_sharded_job_to_succeed(textract_client, sharded_job, delays=0, verbose=False)
+    assert all(
+        textract_client.jobs[job_id].status == "SUCCEEDED"
+        for job_id in sharded_job.job_ids
+    )
+    assert textract_client.calls["GetDocumentAnalysis"] > len(sharded_job.job_ids)
+
+    textract_client = TextractSimulator(config=SimulatorConfig(failure_rate=1.0))
+    sharded_job = start_sharded_job(textract_client=textract_client, **kwargs)
+    with pytest.raises(Exception, match="Job failed"):
+        wait_sharded_job_to_succeed(
+            textract_client, sharded_job, delays=0, verbose=False
+        )
+
+
+if __name__ == "__main__":
+    from aws_textract.tests import run_cov_test
+
+    run_cov_test(__file__, "aws_textract.better_boto.sharding", preview=False)
@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+
+import pytest
+from botocore.exceptions import ClientError
+
+from aws_textract.better_boto import sync_api
+from aws_textract.response.projection import Projection
+from aws_textract.response.utils import blocks_to_text
+from aws_textract.tests.simulator import SimulatorConfig, TextractSimulator
+
+
+def test_to_document_param():
+    assert sync_api.to_document_param(b"abc") == {"Bytes": b"abc"}
+    document = {"S3Object": {"Bucket": "bucket", "Name": "a.png"}}
+    assert sync_api.to_document_param(document) is document
+
+
+def test_analyze_document(textract_client):
+    res = sync_api.analyze_document(textract_client, b"png", feature_types=["TABLES"])
+    assert res["JobStatus"] == "SUCCEEDED"
+    assert res["DocumentMetadata"]["Pages"] == 1
+    assert blocks_to_text(res["Blocks"])
+    assert textract_client.calls["AnalyzeDocument"] == 1
+
+    res = sync_api.detect_document_text(
+        textract_client,
+        b"png",
+        projection=Projection(block_types=["LINE"]),
+    )
+    assert {block["BlockType"] for block in res["Blocks"]} == {"LINE"}
+
+    res = sync_api.analyze_expense(textract_client, b"png")
+    assert len(res["ExpenseDocuments"]) == 1
+
+
+def test_batch(textract_client):
+    documents = [b"png"] * 20
+    result = sync_api.batch_analyze_document(textract_client, documents, max_workers=4)
+    assert result.n_succeeded == 20
+    assert all(res["JobStatus"] == "SUCCEEDED" for res in result.responses)
+
+    result = sync_api.batch_analyze_expense(textract_client, [b"png", b"png"])
+    assert result.n_succeeded == 2
+
+    # a failed document doesn't break the batch
+    result = sync_api.batch_analyze_document(textract_client, [b"png", {}])
+    assert result.n_succeeded == 1
+    assert result.errors[1].response["Error"]["Code"] == "InvalidParameterException"
+
+
+def test_batch_throttled():
+    # the retries belong to the client config, a throttling error that the
+    # client gives up on is reported once, not retried again
+    textract_client = TextractSimulator(
+        config=SimulatorConfig(throttle_rate=0.3, seed=3),
+        sleep=lambda x: None,
+    )
+    result = sync_api.batch_detect_document_text(
+        textract_client, [b"png"] * 20, max_workers=4
+    )
+    n_throttled = textract_client.throttles["DetectDocumentText"]
+    assert n_throttled > 0
+    assert len(result.errors) == n_throttled
+    assert textract_client.calls["DetectDocumentText"] == 20
+    assert all(
+        error.response["Error"]["Code"] == "ThrottlingException"
+        for error in result.errors.values()
+    )
+
+    textract_client = TextractSimulator(config=SimulatorConfig(throttle_rate=1.0))
+    with pytest.raises(ClientError):
+        sync_api.detect_document_text(textract_client, b"png")
+    assert textract_client.calls["DetectDocumentText"] == 1
+
+
+if __name__ == "__main__":
+    from aws_textract.tests import run_cov_test
+
+    run_cov_test(__file__, "aws_textract.better_boto.sync_api", preview=False)
@@ -0,0 +1,85 @@
+# -*- coding: utf-8 -*-
+
+import os
+import pickle
+import threading
+
+import pytest
+
+from aws_textract.clients import (
+    get_client_config,
+    ClientFactory,
+    get_pool_size,
+    check_pool_size,
+)
+from aws_textract.better_boto import sync_api
+
+
+@pytest.fixture
+def fake_credentials(monkeypatch):
+    monkeypatch.setenv("AWS_ACCESS_KEY_ID", "testing")
+    monkeypatch.setenv("AWS_SECRET_ACCESS_KEY", "testing")
+    monkeypatch.setenv("AWS_DEFAULT_REGION", "us-east-1")
+
+
+def test_get_client_config():
+    config = get_client_config(max_workers=64)
+    assert config.max_pool_connections == 64
+    assert config.retries == {"mode": "adaptive", "max_attempts": 10}
+    assert config.tcp_keepalive is True
+    # never smaller than the botocore default
+    assert get_client_config(max_workers=2).max_pool_connections == 10
+    config = get_client_config(retry_mode="standard", connect_timeout=5)
+    assert config.retries["mode"] == "standard"
+    assert config.connect_timeout == 5
+
+
+def test_client_factory(fake_credentials):
+    factory = ClientFactory(max_workers=50)
+    s3_client = factory.get_s3_client()
+    assert get_pool_size(s3_client) == 50
+    assert s3_client.meta.config.retries["mode"] == "adaptive"
+    assert factory.get_s3_client() is s3_client
+    assert factory.get_textract_client().meta.service_model.service_name == "textract"
+
+    # all threads get the same client
+    clients = list()
+    threads = [
+        threading.Thread(target=lambda: clients.append(factory.get_s3_client()))
+        for _ in range(8)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert all(client is s3_client for client in clients)
+
+    # picklable, the copy creates its own session and clients
+    copy = pickle.loads(pickle.dumps(factory.get_s3_client))()
+    assert copy is not s3_client
+    assert get_pool_size(copy) == 50
+
+    # a forked child process creates new clients
+    factory._pid = -1
+    assert factory.get_s3_client() is not s3_client
+    assert factory._pid == os.getpid()
+
+
+def test_check_pool_size(fake_credentials, s3_client):
+    small = ClientFactory(max_workers=4).get_s3_client()
+    assert check_pool_size(small, 10) is True
+    with pytest.warns(UserWarning, match="max_pool_connections = 10"):
+        assert check_pool_size(small, 32) is False
+    # not a boto3 client, can't tell
+    assert get_pool_size(s3_client) is None
+    assert check_pool_size(s3_client, 100) is True
+    # the threaded helpers check the pool of the given client
+    textract_client = ClientFactory().get_textract_client()
+    with pytest.warns(UserWarning):
+        sync_api.batch_detect_document_text(textract_client, [], max_workers=64)
+
+
+if __name__ == "__main__":
+    from aws_textract.tests import run_cov_test
+
+    run_cov_test(__file__, "aws_textract.clients", preview=False)
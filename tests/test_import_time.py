@@ -0,0 +1,107 @@
+# -*- coding: utf-8 -*-
+
+"""
+Cold start regression test, based on ``python -X importtime``.
+"""
+
+import sys
+import typing as T
+import subprocess
+
+import pytest
+
+HEAVY_MODULES = ["s3pathlib", "boto3", "botocore"]
+
+#: the optional dependencies of the new subsystems, they must not be
+#: in ``sys.modules`` after the lightweight imports.
+SUBSYSTEM_MODULES = ["sqlite3", "numpy", "pyarrow"]
+
+#: the cumulative import time budget of ``aws_textract.api`` in microseconds,
+#: it is about 10 times of the measured value on a laptop, only catches
+#: a heavy dependency sneaking back into the eager import path.
+BUDGET_US = 200_000
+
+
+def import_time(code: str) -> dict:
+    """
+    Run the code in a fresh interpreter, return the module name to
+    cumulative import time (in microseconds) mapping.
+    """
+    res = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    mapper = dict()
+    for line in res.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|")
+        try:
+            mapper[name.strip()] = int(cumulative)
+        except ValueError:  # the header line
+            pass
+    return mapper
+
+
+def loaded_modules(code: str) -> T.Set[str]:
+    """
+    Run the code in a fresh interpreter, return the names in ``sys.modules``.
+    """
+    res = subprocess.run(
+        [sys.executable, "-c", f"{code}; import sys; print(' '.join(sys.modules))"],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return set(res.stdout.split())
+
+
+@pytest.mark.parametrize(
+    "code",
+    [
+        "import aws_textract.api",
+        "import aws_textract.api as a; a.better_boto.TextractEvent",
+        "import aws_textract.api as a; a.res.blocks_to_text",
+        "import aws_textract.api as a; a.res.split_blocks_by_page",
+    ],
+)
+def test_lightweight_import(code: str):
+    mapper = import_time(code)
+    for module in HEAVY_MODULES:
+        assert module not in mapper, f"{code!r} imports {module!r}"
+    assert mapper["aws_textract.api"] < BUDGET_US
+    # the sub api modules pulled in by the lazy attributes are measured too
+    for name in ["aws_textract.better_boto.api", "aws_textract.response.api"]:
+        if name in mapper:
+            assert mapper[name] < BUDGET_US, f"{code!r} imports {name!r} slowly"
+
+    modules = loaded_modules(code)
+    for module in SUBSYSTEM_MODULES:
+        assert module not in modules, f"{code!r} imports {module!r}"
+
+
+def test_lazy_attribute():
+    mapper = import_time("import aws_textract.api as a; a.res.merge_document_analysis_result")
+    assert "s3pathlib" in mapper
+    modules = loaded_modules("import aws_textract.api as a; a.better_boto.SqliteJobRegistry")
+    assert "sqlite3" in modules
+
+    import aws_textract.api as api
+
+    assert "better_boto" in dir(api)
+    assert "SqliteJobRegistry" in dir(api.better_boto)
+    with pytest.raises(AttributeError):
+        _ = api.better_boto.not_exists
+    assert "merge_document_analysis_result" in dir(api.res)
+    with pytest.raises(AttributeError):
+        _ = api.not_exists
+    with pytest.raises(AttributeError):
+        _ = api.res.not_exists
+
+
+if __name__ == "__main__":
+    from aws_textract.tests import run_cov_test
+
+    run_cov_test(__file__, "aws_textract._lazy", preview=False)
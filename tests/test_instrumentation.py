@@ -0,0 +1,122 @@
+# -*- coding: utf-8 -*-
+
+import logging
+
+import pytest
+
+from aws_textract import instrumentation as instr
+from aws_textract.instrumentation import (
+    EventNameEnum,
+    LoggingHook,
+    MetricsRegistryHook,
+    use_hooks,
+)
+from aws_textract.better_boto import async_api
+from aws_textract.response import merge
+from aws_textract.tests.simulator import SimulatorConfig, TextractSimulator
+
+DOCUMENT_LOCATION = {"S3Object": {"Bucket": "input", "Name": "doc.pdf"}}
+
+
+def test_no_hook():
+    assert instr.is_enabled() is False
+    # no hook, no error
+    instr.emit_counter(EventNameEnum.WAIT_POLL)
+
+
+def test_metrics_registry(s3_client, textract_client, caplog):
+    registry = MetricsRegistryHook()
+    job_id = textract_client.start_document_analysis(
+        DocumentLocation=DOCUMENT_LOCATION,
+        OutputConfig={"S3Bucket": "output", "S3Prefix": "textract"},
+    )["JobId"]
+    with caplog.at_level(logging.DEBUG, logger="aws_textract.instrumentation"):
+        with use_hooks(registry, LoggingHook()):
+            assert instr.is_enabled()
+            async_api.wait_document_analysis_job_to_succeed(
+                textract_client, job_id, delays=0.01, timeout=1, verbose=False
+            )
+            res = async_api.get_document_analysis(textract_client, job_id, 100)
+            s3dir = merge.get_textract_output_s3dir("output", "textract", job_id)
+            merge.merge_document_analysis_result(s3_client, s3dir)
+    assert instr.is_enabled() is False
+
+    n_pages = (len(res["Blocks"]) + 99) // 100
+    op = "get_document_analysis"
+    assert registry.get_counter(EventNameEnum.WAIT_POLL, operation=op) == 1
+    assert registry.get_counter(EventNameEnum.GET_RESULT_PAGES, operation=op) == n_pages
+    histogram = registry.get_histogram(EventNameEnum.API_CALL_LATENCY, operation=op)
+    assert histogram.count == 1 + n_pages
+    assert registry.get_counter(EventNameEnum.MERGE_PARTS) == n_pages
+    assert registry.get_counter(EventNameEnum.S3_BYTES_DOWNLOADED) > 0
+    assert registry.get_histogram(EventNameEnum.JSON_PARSE_TIME).count == n_pages
+    assert registry.get_histogram(EventNameEnum.S3_LIST_LATENCY).count == 1
+
+    text = registry.render()
+    assert f'textract_wait_poll_total{{operation="{op}"}} 1' in text
+    assert "# TYPE json_parse_time_seconds histogram" in text
+    assert 'json_parse_time_seconds_bucket{le="+Inf"}' in text
+    assert "textract_get_result_pages_total" in caplog.text
+
+
+def test_throttle():
+    registry = MetricsRegistryHook()
+    textract_client = TextractSimulator(config=SimulatorConfig(throttle_rate=1.0))
+    with use_hooks(registry):
+        try:
+            async_api.get_document_text_detection(textract_client, "job-id")
+        except Exception:
+            pass
+    assert (
+        registry.get_counter(
+            EventNameEnum.API_THROTTLE, operation="get_document_text_detection"
+        )
+        == 1
+    )
+
+
+def test_wait_time_on_timeout():
+    registry = MetricsRegistryHook()
+    textract_client = TextractSimulator(config=SimulatorConfig(job_duration=60))
+    job_id = textract_client.start_document_text_detection(
+        DocumentLocation=DOCUMENT_LOCATION,
+    )["JobId"]
+    op = "get_document_text_detection"
+    with use_hooks(registry):
+        with pytest.raises(TimeoutError):
+            async_api.wait_document_text_detection_job_to_succeed(
+                textract_client, job_id, delays=0.01, timeout=0.03, verbose=False
+            )
+    histogram = registry.get_histogram(
+        EventNameEnum.WAIT_TIME, operation=op, status="TIMEOUT"
+    )
+    assert histogram.count == 1
+
+
+def test_hook_registered_while_listing(s3_client, textract_client, monkeypatch):
+    job_id = textract_client.start_document_analysis(
+        DocumentLocation=DOCUMENT_LOCATION,
+        OutputConfig={"S3Bucket": "output", "S3Prefix": "textract"},
+    )["JobId"]
+    textract_client.complete_all_jobs()
+    s3dir = merge.get_textract_output_s3dir("output", "textract", job_id)
+    registry = MetricsRegistryHook()
+    iter_objects = type(s3dir).iter_objects
+
+    def register_then_iter(self, *args, **kwargs):
+        instr.register_hook(registry)
+        return iter_objects(self, *args, **kwargs)
+
+    monkeypatch.setattr(type(s3dir), "iter_objects", register_then_iter)
+    try:
+        s3path_list, _ = merge._list_output_dir(s3_client, s3dir)
+    finally:
+        instr.unregister_hook(registry)
+    assert len(s3path_list) > 0
+    assert registry.get_histogram(EventNameEnum.S3_LIST_LATENCY) is None
+
+
+if __name__ == "__main__":
+    from aws_textract.tests import run_cov_test
+
+    run_cov_test(__file__, "aws_textract.instrumentation", preview=False)
@@ -0,0 +1,93 @@
+# -*- coding: utf-8 -*-
+
+import pytest
+
+from aws_textract.response.block_table import (
+    BLOCK_COLUMNS,
+    get_parent_ids,
+    BlockTableBuilder,
+    blocks_to_record_batch,
+    iter_block_record_batches,
+    write_blocks_to_parquet,
+)
+from aws_textract.tests.synthetic import (
+    SyntheticDocumentConfig,
+    generate_document_analysis,
+)
+
+
+def make_responses(n: int):
+    for i in range(n):
+        yield f"doc-{i}", generate_document_analysis(
+            SyntheticDocumentConfig(n_pages=2, seed=i)
+        )
+
+
+def test_block_table_builder():
+    res = generate_document_analysis(SyntheticDocumentConfig(n_pages=2))
+    blocks = res["Blocks"]
+    builder = BlockTableBuilder()
+    builder.add(res, document_id="doc-1")
+    assert builder.n_rows == len(blocks)
+    columns = builder.build()
+    assert builder.n_rows == 0
+    assert list(columns) == list(BLOCK_COLUMNS)
+    assert {len(v) for v in columns.values()} == {len(blocks)}
+
+    parent_ids = get_parent_ids(blocks)
+    id_to_block = {block["Id"]: block for block in blocks}
+    for i, block in enumerate(blocks):
+        assert columns["id"][i] == block["Id"]
+        assert columns["page"][i] == block["Page"]
+        assert columns["block_type"][i] == block["BlockType"]
+        assert columns["text"][i] == block.get("Text")
+        assert columns["bbox_left"][i] == block["Geometry"]["BoundingBox"]["Left"]
+        parent_id = columns["parent_id"][i]
+        if block["BlockType"] == "PAGE":
+            assert parent_id is None
+        elif block["BlockType"] == "WORD":
+            assert id_to_block[parent_id]["BlockType"] == "LINE"
+        assert parent_id == parent_ids.get(block["Id"])
+    cell_rows = [
+        row for row, type_ in zip(columns["row_index"], columns["block_type"])
+        if type_ == "CELL"
+    ]
+    config = SyntheticDocumentConfig()
+    assert set(cell_rows) == set(range(1, config.n_table_rows + 1))
+
+
+def test_arrow_and_parquet(tmp_path):
+    pa = pytest.importorskip("pyarrow")
+    pq = pytest.importorskip("pyarrow.parquet")
+
+    res = generate_document_analysis(SyntheticDocumentConfig(n_pages=1))
+    batch = blocks_to_record_batch(res["Blocks"], document_id="doc-1")
+    assert batch.num_rows == len(res["Blocks"])
+    assert batch.schema.field("page").type == pa.int32()
+    assert batch.schema.field("confidence").type == pa.float32()
+
+    batches = list(iter_block_record_batches(make_responses(5), batch_size=1000))
+    n_rows = sum(len(res["Blocks"]) for _, res in make_responses(5))
+    assert sum(batch.num_rows for batch in batches) == n_rows
+    assert all(batch.num_rows >= 1000 for batch in batches[:-1])
+
+    path = tmp_path / "blocks.parquet"
+    assert (
+        write_blocks_to_parquet(
+            make_responses(5), str(path), batch_size=1000, row_group_size=500
+        )
+        == n_rows
+    )
+    parquet_file = pq.ParquetFile(str(path))
+    assert parquet_file.metadata.num_rows == n_rows
+    assert parquet_file.metadata.num_row_groups > len(batches)
+    table = parquet_file.read(columns=["document_id", "block_type", "text"])
+    assert table.column("document_id").unique().to_pylist() == [
+        f"doc-{i}" for i in range(5)
+    ]
+
+
+if __name__ == "__main__":
+    from aws_textract.tests import run_cov_test
+
+    run_cov_test(__file__, "aws_textract.response.block_table", preview=False)
@@ -0,0 +1,113 @@
+# -*- coding: utf-8 -*-
+
+import json
+from pathlib import Path
+
+from aws_textract.response import merge
+from aws_textract.response.bulk import (
+    PROGRESS_FILENAME,
+    group_output_keys_by_job_id,
+    get_partitioned_output_path,
+    read_progress,
+    bulk_merge_textract_output,
+)
+from aws_textract.response.compaction import compact_textract_output
+from aws_textract.response.listing import build_output_manifest
+from aws_textract.tests.synthetic import (
+    SyntheticDocumentConfig,
+    generate_document_analysis,
+    split_into_output_parts,
+    write_output_parts_to_s3,
+)
+
+
+def test_group_output_keys_by_job_id():
+    keys = [
+        "output/.s3_access_check",
+        "output/job2/.s3_access_check",
+        "output/job2/1",
+        "output/job1/10",
+        "output/job1/2",
+        "output/job1/1",
+        "output/job1/.s3_access_check",
+        "output/job1/sub/1",
+        "another/job3/1",
+    ]
+    assert group_output_keys_by_job_id("output/", keys) == {
+        "job1": ["output/job1/1", "output/job1/2", "output/job1/10"],
+        "job2": ["output/job2/1"],
+    }
+    assert group_output_keys_by_job_id("output", keys) == group_output_keys_by_job_id(
+        "output/", keys
+    )
+    assert group_output_keys_by_job_id("", ["job3/1", "job3/.s3_access_check"]) == {
+        "job3": ["job3/1"],
+    }
+
+
+def test_get_partitioned_output_path():
+    path = get_partitioned_output_path(Path("/tmp"), "3b2be6c6", n_partition_chars=2)
+    assert path == Path("/tmp/3b/3b2be6c6.json")
+
+
+def test_bulk_merge_textract_output(s3_client, tmp_path):
+    responses = dict()
+    for job_id in ["a1", "b2", "c3"]:
+        res = generate_document_analysis(SyntheticDocumentConfig(n_pages=2))
+        s3dir = merge.get_textract_output_s3dir("output", "textract", job_id)
+        write_output_parts_to_s3(
+            s3_client, s3dir, split_into_output_parts(res, max_items=50)
+        )
+        responses[job_id] = res
+    # a corrupted part fails the job, the other jobs go on
+    s3_client.put_object(Bucket="output", Key="textract/c3/2", Body=b"{")
+
+    kwargs = dict(
+        s3_client=s3_client,
+        s3bucket="output",
+        s3prefix="textract",
+        dir_output=tmp_path,
+        max_workers=2,
+        use_process_pool=False,
+        verbose=False,
+    )
+    result = bulk_merge_textract_output(**kwargs)
+    assert result.succeeded == ["a1", "b2"]
+    assert list(result.failed) == ["c3"]
+    for job_id in result.succeeded:
+        path = get_partitioned_output_path(tmp_path, job_id, n_partition_chars=2)
+        assert json.loads(path.read_text()) == responses[job_id]
+    assert read_progress(tmp_path)["c3"]["status"] == "failed"
+
+    # resume, only the failed job is merged again
+    s3dir = merge.get_textract_output_s3dir("output", "textract", "c3")
+    write_output_parts_to_s3(
+        s3_client, s3dir, split_into_output_parts(responses["c3"], max_items=50)
+    )
+    s3_client.calls.clear()
+    result = bulk_merge_textract_output(**kwargs)
+    assert result.skipped == ["a1", "b2"]
+    assert result.succeeded == ["c3"]
+    assert result.failed == {}
+    n_parts = len(split_into_output_parts(responses["c3"], max_items=50))
+    assert s3_client.calls["GetObject"] == n_parts
+    assert {r["status"] for r in read_progress(tmp_path).values()} == {"succeeded"}
+    lines = tmp_path.joinpath(PROGRESS_FILENAME).read_text().splitlines()
+    assert len(lines) == 4
+
+    # the compacted job of a manifest is read from the compacted object
+    compact_textract_output(s3_client, s3dir, key="Blocks", delete_parts=True)
+    manifest = build_output_manifest(s3_client, "output", "textract")
+    dir_output = tmp_path.joinpath("manifest")
+    result = bulk_merge_textract_output(
+        **dict(kwargs, dir_output=dir_output, manifest=manifest)
+    )
+    assert result.succeeded == ["a1", "b2", "c3"]
+    path = get_partitioned_output_path(dir_output, "c3", n_partition_chars=2)
+    assert json.loads(path.read_text()) == responses["c3"]
+
+
+if __name__ == "__main__":
+    from aws_textract.tests import run_cov_test
+
+    run_cov_test(__file__, "aws_textract.response.bulk", preview=False)
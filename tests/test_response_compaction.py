@@ -0,0 +1,112 @@
+# -*- coding: utf-8 -*-
+
+import pytest
+
+from aws_textract.response import merge
+from aws_textract.response.projection import Projection
+from aws_textract.response.compaction import (
+    COMPACTED_BASENAME,
+    encode_compacted,
+    decode_compacted,
+    compact_textract_output,
+    read_compacted_index,
+    read_compacted_pages,
+)
+from aws_textract.tests.synthetic import (
+    SyntheticDocumentConfig,
+    generate_document_analysis,
+    generate_expense_analysis,
+    split_into_output_parts,
+    write_output_parts_to_s3,
+)
+
+
+def write_parts(s3_client, response, key: str, job_id: str):
+    parts = split_into_output_parts(response, key=key, max_items=150)
+    s3dir = merge.get_textract_output_s3dir("output", "textract", job_id)
+    write_output_parts_to_s3(s3_client, s3dir, parts)
+    return s3dir
+
+
+@pytest.mark.parametrize("compression", ["gzip", "zstd"])
+def test_encode_decode(compression):
+    if compression == "zstd":
+        pytest.importorskip("zstandard")
+    response = generate_document_analysis(SyntheticDocumentConfig(n_pages=3))
+    body = encode_compacted(response, key="Blocks", compression=compression)
+    assert decode_compacted(body) == response
+    projection = Projection.minimal(block_types=["LINE"])
+    res = decode_compacted(body, projection=projection)
+    assert res["Blocks"] == projection.project_blocks(response["Blocks"])
+
+
+def test_merge_not_compacted(s3_client):
+    response = generate_document_analysis(SyntheticDocumentConfig(n_pages=4))
+    s3dir = write_parts(s3_client, response, "Blocks", "job-0")
+    n_parts = sum(
+        1
+        for bucket, key in s3_client.objects
+        if key.startswith(s3dir.key) and key.rsplit("/", 1)[1].isdigit()
+    )
+    # no GET probes a compacted object that doesn't exist
+    s3_client.calls.clear()
+    res = merge.merge_document_analysis_result(s3_client, s3dir)
+    assert res["Blocks"] == response["Blocks"]
+    assert s3_client.calls["GetObject"] == n_parts
+    assert s3_client.calls["ListObjectsV2"] == 1
+
+
+def test_compact_and_merge(s3_client):
+    response = generate_document_analysis(SyntheticDocumentConfig(n_pages=4))
+    s3dir = write_parts(s3_client, response, "Blocks", "job-1")
+    expected = merge.merge_document_analysis_result(s3_client, s3dir)
+
+    index = compact_textract_output(s3_client, s3dir, key="Blocks")
+    assert index.pages == [1, 2, 3, 4]
+    assert index.n_items == len(expected["Blocks"])
+    assert s3_client.objects[("output", f"{s3dir.key}{COMPACTED_BASENAME}")]
+
+    # one LIST finds the compacted object, one GET reads it
+    s3_client.calls.clear()
+    assert merge.merge_document_analysis_result(s3_client, s3dir) == expected
+    assert s3_client.calls["GetObject"] == 1
+    assert s3_client.calls["ListObjectsV2"] == 1
+
+    # the part files are still readable, the compacted object is ignored
+    res = merge.merge_document_analysis_result(s3_client, s3dir, use_compacted=False)
+    assert res == expected
+
+    # read some pages with ranged GETs
+    res = read_compacted_pages(s3_client, s3dir, pages=[2, 3])
+    assert res["Blocks"] == [b for b in expected["Blocks"] if b["Page"] in (2, 3)]
+    assert res["DocumentMetadata"] == expected["DocumentMetadata"]
+
+    index = read_compacted_index(s3_client, s3dir)
+    s3_client.calls.clear()
+    res = read_compacted_pages(s3_client, s3dir, pages=[4], index=index, max_gap=0)
+    assert res["Blocks"] == [b for b in expected["Blocks"] if b["Page"] == 4]
+    assert s3_client.calls["GetObject"] == 2  # header and page 4
+
+
+def test_compact_expense_and_delete_parts(s3_client):
+    response = generate_expense_analysis(n_documents=3, n_line_items=10)
+    s3dir = write_parts(s3_client, response, "ExpenseDocuments", "job-2")
+    index = compact_textract_output(
+        s3_client, s3dir, key="ExpenseDocuments", delete_parts=True
+    )
+    assert index.pages == [1, 2, 3]
+    keys = [key for bucket, key in s3_client.objects if key.startswith(s3dir.key)]
+    assert sorted(k.rsplit("/", 1)[1] for k in keys) == [
+        ".compacted",
+        ".s3_access_check",
+    ]
+    res = merge.merge_expense_analysis_result(s3_client, s3dir)
+    assert res["ExpenseDocuments"] == response["ExpenseDocuments"]
+    with pytest.raises(ValueError):
+        merge.merge_document_analysis_result(s3_client, s3dir)
+
+
+if __name__ == "__main__":
+    from aws_textract.tests import run_cov_test
+
+    run_cov_test(__file__, "aws_textract.response.compaction", preview=False)
@@ -0,0 +1,120 @@
+# -*- coding: utf-8 -*-
+
+import json
+
+from aws_textract.cli import main
+from aws_textract.response import merge
+from aws_textract.response.corpus import (
+    chunk_sources,
+    build_text_corpus,
+)
+from aws_textract.response.utils import blocks_to_text
+from aws_textract.tests.synthetic import (
+    SyntheticDocumentConfig,
+    generate_document_analysis,
+    split_into_output_parts,
+    write_output_parts_to_s3,
+)
+
+
+def test_chunk_sources():
+    assert chunk_sources("abcde", 2) == [["a", "b"], ["c", "d"], ["e"]]
+
+
+def test_build_text_corpus(tmp_path, s3_client):
+    expected = dict()
+    sources = list()
+    for i in range(5):
+        res = generate_document_analysis(SyntheticDocumentConfig(n_pages=2, seed=i))
+        if i % 2:
+            path = tmp_path.joinpath("merged", f"{i}.json")
+            path.parent.mkdir(exist_ok=True)
+            path.write_text(json.dumps(res))
+            source = str(path)
+        else:
+            s3dir = merge.get_textract_output_s3dir("output", "textract", f"job-{i}")
+            parts = split_into_output_parts(res, key="Blocks", max_items=100)
+            write_output_parts_to_s3(s3_client, s3dir, parts)
+            source = s3dir.uri
+        sources.append(source)
+        expected[source] = blocks_to_text(res["Blocks"])
+    sources.append(str(tmp_path / "not-exists.json"))
+
+    dir_output = tmp_path / "corpus"
+    result = build_text_corpus(
+        sources,
+        dir_output,
+        chunk_size=2,
+        use_process_pool=False,
+        s3_client=s3_client,
+        verbose=False,
+    )
+    assert result.n_documents == 5
+    assert result.n_pages == 10
+    assert list(result.failed) == [sources[-1]]
+    assert [p.rsplit("/", 1)[-1] for p in result.shards] == [
+        "part-00000.jsonl",
+        "part-00001.jsonl",
+        "part-00002.jsonl",
+    ]
+    records = [
+        json.loads(line)
+        for path in result.shards
+        for line in open(path, encoding="utf-8")
+    ]
+    assert {record["source"]: record["text"] for record in records} == expected
+
+    # resume, all shards exist
+    result = build_text_corpus(
+        sources, dir_output, chunk_size=2, use_process_pool=False, verbose=False
+    )
+    assert result.n_documents == 0
+    assert len(result.skipped_shards) == 3
+
+    # process pool and txt format with the local files
+    local_sources = [s for s in sources[:-1] if not s.startswith("s3://")]
+    result = build_text_corpus(
+        local_sources,
+        tmp_path / "corpus-txt",
+        output_format="txt",
+        chunk_size=1,
+        max_workers=2,
+        s3_client_factory=None,
+        verbose=False,
+    )
+    assert result.n_documents == 2
+    texts = [open(path, encoding="utf-8").read() for path in result.shards]
+    assert texts == [expected[source] + "\n\f\n" for source in local_sources]
+
+
+def test_cli(tmp_path, capsys):
+    res = generate_document_analysis(SyntheticDocumentConfig(n_pages=1))
+    path = tmp_path / "1.json"
+    path.write_text(json.dumps(res))
+    sources_file = tmp_path / "sources.txt"
+    sources_file.write_text(f"# comment\n{path}\n")
+    dir_output = tmp_path / "corpus"
+    assert (
+        main(
+            [
+                "corpus",
+                "--output",
+                str(dir_output),
+                "--sources-file",
+                str(sources_file),
+                "--workers",
+                "1",
+                "--quiet",
+            ]
+        )
+        == 0
+    )
+    assert "done: 1 docs" in capsys.readouterr().out
+    assert dir_output.joinpath("part-00000.jsonl").exists()
+    assert main(["corpus", "--output", str(dir_output)]) == 1
+
+
+if __name__ == "__main__":
+    from aws_textract.tests import run_cov_test
+
+    run_cov_test(__file__, "aws_textract.response.corpus", preview=False)
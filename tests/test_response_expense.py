@@ -0,0 +1,75 @@
+# -*- coding: utf-8 -*-
+
+import pytest
+
+from aws_textract.response.expense import (
+    SUMMARY_FIELD_COLUMNS,
+    LINE_ITEM_COLUMNS,
+    expense_documents_to_tables,
+    iter_expense_table_batches,
+)
+from aws_textract.tests.synthetic import generate_expense_analysis
+
+
+def test_expense_documents_to_tables():
+    res = generate_expense_analysis(n_documents=2, n_line_items=3)
+    tables = expense_documents_to_tables(res, document_id="job-1")
+    assert list(tables.summary_fields) == list(SUMMARY_FIELD_COLUMNS)
+    assert list(tables.line_items) == list(LINE_ITEM_COLUMNS)
+    # all columns have the same length
+    assert {len(v) for v in tables.summary_fields.values()} == {tables.n_summary_fields}
+    assert {len(v) for v in tables.line_items.values()} == {tables.n_line_items}
+
+    n_summary = sum(len(doc["SummaryFields"]) for doc in res["ExpenseDocuments"])
+    assert tables.n_summary_fields == n_summary
+    assert tables.n_line_items == 2 * 3 * 4
+
+    doc = res["ExpenseDocuments"][1]
+    field = doc["SummaryFields"][0]
+    i = tables.summary_fields["expense_index"].index(2)
+    assert tables.summary_fields["document_id"][i] == "job-1"
+    assert tables.summary_fields["type"][i] == field["Type"]["Text"]
+    assert tables.summary_fields["value"][i] == field["ValueDetection"]["Text"]
+
+    field = doc["LineItemGroups"][0]["LineItems"][2]["LineItemExpenseFields"][1]
+    i = tables.line_items["line_item_index"].index(3, tables.n_line_items // 2)
+    assert tables.line_items["expense_index"][i] == 2
+    assert tables.line_items["type"][i + 1] == field["Type"]["Text"]
+    assert tables.line_items["value"][i + 1] == field["ValueDetection"]["Text"]
+
+    # accept the ExpenseDocuments list too
+    assert (
+        expense_documents_to_tables(res["ExpenseDocuments"], "job-1").line_items
+        == tables.line_items
+    )
+
+
+def test_iter_expense_table_batches():
+    responses = [
+        (f"job-{i}", generate_expense_analysis(n_documents=1, n_line_items=2, seed=i))
+        for i in range(10)
+    ]
+    batches = list(iter_expense_table_batches(responses, batch_size=30))
+    # each response has 7 summary fields + 8 line item fields
+    assert [batch.n_summary_fields + batch.n_line_items for batch in batches] == [
+        30,
+        30,
+        30,
+        30,
+        30,
+    ]
+    assert batches[-1].summary_fields["document_id"][-1] == "job-9"
+
+
+def test_to_arrow():
+    pa = pytest.importorskip("pyarrow")
+    res = generate_expense_analysis(n_documents=2, n_line_items=3)
+    summary, line_items = expense_documents_to_tables(res).to_arrow()
+    assert summary.num_rows == 14
+    assert line_items.schema.field("value_confidence").type == pa.float32()
+
+
+if __name__ == "__main__":
+    from aws_textract.tests import run_cov_test
+
+    run_cov_test(__file__, "aws_textract.response.expense", preview=False)
@@ -0,0 +1,123 @@
+# -*- coding: utf-8 -*-
+
+import pytest
+
+from aws_textract.tests.synthetic import (
+    SyntheticDocumentConfig,
+    generate_document_analysis,
+)
+
+np = pytest.importorskip("numpy")
+
+from aws_textract.response.geometry import (
+    get_page_size_array,
+    get_block_geometry,
+    merge_adjacent_boxes,
+    boxes_to_mask,
+)
+
+
+def test_get_block_geometry():
+    res = generate_document_analysis(SyntheticDocumentConfig(n_pages=3))
+    blocks = res["Blocks"]
+    words = [b for b in blocks if b["BlockType"] == "WORD"]
+    geometry = get_block_geometry(res, block_types=["WORD"])
+    assert len(geometry) == len(words)
+    assert geometry.ids == [b["Id"] for b in words]
+    assert geometry.texts[0] == words[0]["Text"]
+    assert geometry.polygons.shape == (len(words), 4, 2)
+
+    page_sizes = {1: (1000, 2000), 2: (500, 500), 3: (1000, 2000)}
+    boxes = geometry.to_pixel_boxes(page_sizes)
+    polygons = geometry.to_pixel_polygons(page_sizes)
+    for i in [0, len(words) // 2, len(words) - 1]:
+        box = words[i]["Geometry"]["BoundingBox"]
+        width, height = page_sizes[words[i]["Page"]]
+        expected = [
+            box["Left"] * width,
+            box["Top"] * height,
+            (box["Left"] + box["Width"]) * width,
+            (box["Top"] + box["Height"]) * height,
+        ]
+        assert np.allclose(boxes[i], expected)
+        assert np.allclose(polygons[i, 0], expected[:2])
+        assert np.allclose(polygons[i, 2], expected[2:])
+
+    # the same result for one size or an array of sizes
+    assert np.allclose(
+        geometry.to_pixel_boxes((1000, 2000)),
+        geometry.to_pixel_boxes(np.array([(1000, 2000)] * 3)),
+    )
+    int_boxes = geometry.to_pixel_boxes((1000, 2000), as_int=True)
+    float_boxes = geometry.to_pixel_boxes((1000, 2000))
+    assert int_boxes.dtype == np.int64
+    assert (int_boxes[:, :2] <= float_boxes[:, :2]).all()
+    assert (int_boxes[:, 2:] >= float_boxes[:, 2:]).all()
+
+    page_2 = geometry.select(geometry.pages == 2)
+    assert set(page_2.pages.tolist()) == {2}
+    assert page_2.ids == [b["Id"] for b in words if b["Page"] == 2]
+
+
+def test_get_page_size_array():
+    pages = np.array([1, 3, 3])
+    sizes = get_page_size_array(pages, {1: (10, 20), 3: (30, 40), 9: (1, 1)})
+    assert sizes.tolist() == [[10, 20], [30, 40], [30, 40]]
+    assert get_page_size_array(np.array([], dtype=int), {}).shape == (0, 2)
+    # a page without size is an error, not a zero size box
+    with pytest.raises(ValueError, match=r"\[2\]"):
+        get_page_size_array(np.array([1, 2]), {1: (10, 20)})
+    with pytest.raises(ValueError, match=r"\[5\]"):
+        get_page_size_array(np.array([1, 5]), {1: (10, 20)})
+
+    array = np.array([(10, 20), (30, 40)])
+    assert get_page_size_array(pages[:1], array).tolist() == [[10, 20]]
+    assert get_page_size_array(pages, (10, 20)).shape == (3, 2)
+    with pytest.raises(ValueError, match=r"\[3\]"):
+        get_page_size_array(pages, array)
+    # page 0 doesn't wrap to the last row
+    with pytest.raises(ValueError, match=r"\[0\]"):
+        get_page_size_array(np.array([0, 1]), array)
+
+
+def test_merge_adjacent_boxes():
+    # the table cells are far apart, they are not merged, leave them out
+    config = SyntheticDocumentConfig(n_pages=2, n_tables_per_page=0)
+    res = generate_document_analysis(config)
+    blocks = res["Blocks"]
+    n_lines = sum(1 for b in blocks if b["BlockType"] == "LINE")
+    geometry = get_block_geometry(blocks, block_types=["WORD"])
+    boxes = geometry.to_pixel_boxes((1000, 1000))
+    merged, pages = merge_adjacent_boxes(boxes, geometry.pages)
+    # the words of a line are merged into the line box
+    assert len(merged) == n_lines
+    lines = get_block_geometry(blocks, block_types=["LINE"])
+    line_boxes = lines.to_pixel_boxes((1000, 1000))
+    # the synthetic line box has some trailing space after the last word
+    assert np.allclose(merged[:, [0, 1, 3]], line_boxes[:, [0, 1, 3]])
+    assert (merged[:, 2] <= line_boxes[:, 2]).all()
+    assert (pages == lines.pages).all()
+
+    # two words far apart on the same line are not merged
+    boxes = np.array([[0, 0, 10, 10], [12, 0, 20, 10], [100, 0, 110, 10]])
+    merged, pages = merge_adjacent_boxes(boxes, np.array([1, 1, 1]))
+    assert merged.tolist() == [[0, 0, 20, 10], [100, 0, 110, 10]]
+    merged, pages = merge_adjacent_boxes(np.empty((0, 4)), np.empty(0))
+    assert merged.shape == (0, 4)
+
+
+def test_boxes_to_mask():
+    mask = boxes_to_mask(np.array([[1, 1, 3, 2], [2, 0, 4, 3], [8, 8, 20, 20]]), 10, 10)
+    assert mask.shape == (10, 10)
+    expected = np.zeros((10, 10), dtype=bool)
+    expected[1:2, 1:3] = True
+    expected[0:3, 2:4] = True
+    expected[8:, 8:] = True
+    assert (mask == expected).all()
+    assert not boxes_to_mask(np.empty((0, 4)), 5, 5).any()
+
+
+if __name__ == "__main__":
+    from aws_textract.tests import run_cov_test
+
+    run_cov_test(__file__, "aws_textract.response.geometry", preview=False)
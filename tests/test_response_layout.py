@@ -0,0 +1,130 @@
+# -*- coding: utf-8 -*-
+
+from aws_textract.response.contants import BlockTypeEnum
+from aws_textract.response.layout import LayoutTree
+from aws_textract.tests.synthetic import (
+    SyntheticDocumentConfig,
+    generate_document_analysis,
+)
+
+
+def get_line_texts(blocks) -> dict:
+    return {b["Id"]: b["Text"] for b in blocks if b["BlockType"] == "LINE"}
+
+
+def test_layout_tree():
+    config = SyntheticDocumentConfig(n_pages=2)
+    blocks = generate_document_analysis(config)["Blocks"]
+    tree = LayoutTree.from_blocks(blocks)
+
+    # root -> title -> section headers
+    assert len(tree.root.children) == 1
+    title = tree.root.children[0]
+    assert title.block_type == BlockTypeEnum.LAYOUT_TITLE.value
+    assert title.text.startswith("Section 1.1")
+    sections = list(tree.iter_sections())
+    assert [s.text.split(" ")[1] for s in sections] == ["1.1", "1.2", "2.1", "2.2"]
+    assert all(s.parent is title for s in sections[1:])
+    assert [s.page for s in sections] == [1, 1, 2, 2]
+
+    # the content is attached to the innermost section
+    section = sections[1]
+    types = [child.block_type for child in section.children]
+    assert types[:2] == [
+        BlockTypeEnum.LAYOUT_TEXT.value,
+        BlockTypeEnum.LAYOUT_LIST.value,
+    ]
+    assert types.count(BlockTypeEnum.LAYOUT_KEY_VALUE.value) == 3
+    assert BlockTypeEnum.LAYOUT_TABLE.value in types
+    assert BlockTypeEnum.LAYOUT_FIGURE.value in types
+
+    # nested list items
+    layout_list = section.children[1]
+    assert len(layout_list.children) == config.n_list_items
+    assert layout_list.text == ""
+    assert layout_list.children[0].text.startswith("1.")
+
+    # page furniture is excluded
+    all_types = {node.block_type for node in tree.nodes}
+    assert BlockTypeEnum.LAYOUT_HEADER.value not in all_types
+    assert BlockTypeEnum.LAYOUT_FOOTER.value not in all_types
+    assert BlockTypeEnum.LAYOUT_PAGE_NUMBER.value not in all_types
+
+    # pre-order ranges
+    for node in tree.nodes:
+        subtree = tree.iter_subtree(node)
+        assert subtree[0] is node
+        for child in node.children:
+            assert node.start < child.start < child.end <= node.end
+
+    # every line of the body is in the tree exactly once
+    line_texts = get_line_texts(blocks)
+    line_ids = [i for node in tree.nodes for i in node.line_ids]
+    assert len(line_ids) == len(set(line_ids))
+    assert len(line_ids) == len(line_texts) - 3 * config.n_pages
+
+
+def test_layout_tree_text_query():
+    blocks = generate_document_analysis(SyntheticDocumentConfig(n_pages=2))["Blocks"]
+    tree = LayoutTree.from_blocks(blocks)
+    sections = list(tree.iter_sections())
+    section = sections[2]
+
+    found = tree.find_sections("  " + section.text.upper() + ":")
+    assert found == [section]
+    assert tree.find_sections("not a heading") == []
+
+    text = tree.get_section_text(section.text)
+    assert not text.startswith("Section")
+    assert text == tree.get_text(section, include_heading=False)
+    assert text.split("\n")[0] == section.children[0].text.split("\n")[0]
+    assert tree.get_section_text("not a heading") is None
+
+    # the title section has sub sections
+    title = sections[0]
+    own = tree.get_text(title, include_subsections=False)
+    full = tree.get_text(title)
+    assert own.startswith(title.text)
+    assert "Section 1.2" not in own
+    assert "Section 1.2" in full
+    assert full == tree.get_text()
+
+
+def test_layout_tree_without_page_block():
+    blocks = generate_document_analysis()["Blocks"]
+    blocks = [b for b in blocks if b["BlockType"] != "PAGE"]
+    tree = LayoutTree.from_blocks(blocks, exclude_types=[])
+    types = [node.block_type for node in tree.root.children]
+    assert types[0] == BlockTypeEnum.LAYOUT_HEADER.value
+    assert BlockTypeEnum.LAYOUT_TITLE.value in types
+
+
+def test_layout_tree_page_without_relationships():
+    config = SyntheticDocumentConfig(n_pages=3)
+    blocks = generate_document_analysis(config)["Blocks"]
+    expected = LayoutTree.from_blocks(blocks).get_text()
+
+    # the PAGE Relationships are projected away
+    projected = [
+        {k: v for k, v in b.items() if k != "Relationships"}
+        if b["BlockType"] == "PAGE"
+        else b
+        for b in blocks
+    ]
+    assert LayoutTree.from_blocks(projected).get_text() == expected
+
+    # only the second page lost its layout children
+    second_page_id = [b["Id"] for b in blocks if b["BlockType"] == "PAGE"][1]
+    partial = [
+        {k: v for k, v in b.items() if k != "Relationships"}
+        if b["Id"] == second_page_id
+        else b
+        for b in blocks
+    ]
+    assert LayoutTree.from_blocks(partial).get_text() == expected
+
+
+if __name__ == "__main__":
+    from aws_textract.tests import run_cov_test
+
+    run_cov_test(__file__, "aws_textract.response.layout", preview=False)
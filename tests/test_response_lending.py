@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*-
+
+from aws_textract.better_boto.async_api import (
+    get_lending_analysis,
+    iter_lending_analysis,
+)
+from aws_textract.response.lending import (
+    get_lending_page_type,
+    LendingPageIndex,
+)
+from aws_textract.tests.synthetic import generate_lending_analysis
+
+
+def make_result(page: int, page_type: str, page_number: str) -> dict:
+    return {
+        "Page": page,
+        "PageClassification": {
+            "PageType": [
+                {"Value": "OTHER", "Confidence": 10.0},
+                {"Value": page_type, "Confidence": 90.0},
+            ],
+            "PageNumber": [{"Value": page_number, "Confidence": 99.0}],
+        },
+    }
+
+
+def test_lending_page_index():
+    assert get_lending_page_type(make_result(1, "W2", "1")) == ("W2", "1")
+    assert get_lending_page_type({"Page": 1}) == (None, None)
+
+    index = LendingPageIndex()
+    for result in [
+        make_result(1, "W2", "1"),
+        make_result(2, "W2", "2"),
+        make_result(3, "BANK_STATEMENT", "1"),
+        make_result(4, "W2", "1"),
+        make_result(6, "W2", "2"),  # page 5 is not classified yet
+    ]:
+        index.add(result)
+    assert index.page_types() == ["W2", "BANK_STATEMENT"]
+    assert index.pages("W2") == [1, 2, 4, 6]
+    assert index.pages("PAYSLIPS") == []
+    assert index.documents("W2") == [[1, 2], [4], [6]]
+    assert index.to_dict() == {"W2": [1, 2, 4, 6], "BANK_STATEMENT": [3]}
+    assert index.n_pages == 6
+    assert index.get_page_type(3) == "BANK_STATEMENT"
+    assert index.get_page_type(5) is None
+    assert index.get_page_type(7) is None
+
+    # a late page goes to its place in the page order
+    index.add(make_result(5, "W2", "1"))
+    assert index.get_page_type(5) == "W2"
+    assert index.pages("W2") == [1, 2, 4, 5, 6]
+    assert index.documents("W2") == [[1, 2], [4], [5, 6]]
+
+    # a page added again replaces the previous result
+    index.add(make_result(5, "W2", "2"))
+    index.add(make_result(2, "W2", "2"))
+    assert index.pages("W2") == [1, 2, 4, 5, 6]
+    assert index.documents("W2") == [[1, 2], [4, 5, 6]]
+    index.add(make_result(4, "BANK_STATEMENT", "2"))
+    assert index.to_dict() == {"W2": [1, 2, 5, 6], "BANK_STATEMENT": [3, 4]}
+    assert index.documents("BANK_STATEMENT") == [[3, 4]]
+    assert index.documents("W2") == [[1, 2], [5, 6]]  # page 4 is not W2 anymore
+    index.add({"Page": 3})
+    assert index.get_page_type(3) is None
+    assert index.pages("BANK_STATEMENT") == [4]
+
+
+def test_iter_lending_analysis(textract_client):
+    job_id = textract_client.start_lending_analysis(
+        DocumentLocation={"S3Object": {"Bucket": "input", "Name": "doc.pdf"}},
+    )["JobId"]
+    index = LendingPageIndex()
+    iterator = iter_lending_analysis(textract_client, job_id, max_results=3, index=index)
+    first = next(iterator)
+    # the first page is available after one API call
+    assert textract_client.calls["GetLendingAnalysis"] == 1
+    assert index.get_page_type(first["Page"]) is not None
+    results = [first] + list(iterator)
+    assert textract_client.calls["GetLendingAnalysis"] == 4
+
+    expected = get_lending_analysis(textract_client, job_id)["Results"]
+    assert results == expected
+    assert sorted(sum(index.to_dict().values(), [])) == list(range(1, 11))
+
+    expected_index = LendingPageIndex()
+    for result in generate_lending_analysis(n_pages=10)["Results"]:
+        expected_index.add(result)
+    assert index.to_dict() == expected_index.to_dict()
+
+
+if __name__ == "__main__":
+    from aws_textract.tests import run_cov_test
+
+    run_cov_test(__file__, "aws_textract.response.lending", preview=False)
@@ -0,0 +1,151 @@
+# -*- coding: utf-8 -*-
+
+import json
+import hashlib
+
+import pytest
+
+from aws_textract.response import merge
+from aws_textract.response.bulk import bulk_merge_textract_output
+from aws_textract.response.compaction import compact_textract_output
+from aws_textract.response.listing import (
+    make_hex_shard_prefixes,
+    list_output_keys,
+    OutputManifest,
+    build_output_manifest,
+)
+from aws_textract.tests.synthetic import (
+    SyntheticDocumentConfig,
+    generate_document_analysis,
+    split_into_output_parts,
+    write_output_parts_to_s3,
+)
+
+
+def make_job_id(i: int) -> str:
+    return hashlib.sha256(str(i).encode("utf-8")).hexdigest()
+
+
+@pytest.fixture
+def job_ids(s3_client):
+    job_ids = [make_job_id(i) for i in range(6)]
+    for i, job_id in enumerate(job_ids):
+        response = generate_document_analysis(SyntheticDocumentConfig(seed=i))
+        parts = split_into_output_parts(response, key="Blocks", max_items=100)
+        s3dir = merge.get_textract_output_s3dir("output", "textract", job_id)
+        write_output_parts_to_s3(s3_client, s3dir, parts)
+    return job_ids
+
+
+def all_keys(s3_client):
+    return sorted(key for bucket, key in s3_client.objects if bucket == "output")
+
+
+def test_make_hex_shard_prefixes():
+    assert len(make_hex_shard_prefixes(2)) == 256
+    assert make_hex_shard_prefixes(1)[:3] == ("0", "1", "2")
+
+
+def test_list_output_keys(s3_client, job_ids):
+    expected = all_keys(s3_client)
+    for shard_prefixes in [make_hex_shard_prefixes(1), ("",)]:
+        keys = list_output_keys(
+            s3_client, "output", "textract/", shard_prefixes=shard_prefixes, page_size=3
+        )
+        assert keys == expected
+
+
+def test_list_output_keys_resume(tmp_path, s3_client, job_ids):
+    expected = all_keys(s3_client)
+    list_objects_v2 = s3_client.list_objects_v2
+    n_calls = [0]
+
+    def flaky_list_objects_v2(**kwargs):
+        n_calls[0] += 1
+        if n_calls[0] > 5:
+            raise ConnectionError("interrupted")
+        return list_objects_v2(**kwargs)
+
+    s3_client.list_objects_v2 = flaky_list_objects_v2
+    with pytest.raises(ConnectionError):
+        list_output_keys(
+            s3_client,
+            "output",
+            "textract",
+            shard_prefixes=("",),
+            dir_checkpoint=tmp_path,
+            page_size=4,
+        )
+    state = json.loads(tmp_path.joinpath("shard-_all.json").read_text())
+    assert state["done"] is False and state["token"]
+
+    # resume from the 6th page
+    s3_client.list_objects_v2 = list_objects_v2
+    s3_client.calls.clear()
+    keys = list_output_keys(
+        s3_client,
+        "output",
+        "textract",
+        shard_prefixes=("",),
+        dir_checkpoint=tmp_path,
+        page_size=4,
+    )
+    assert keys == expected
+    n_pages = (len(expected) + 3) // 4
+    assert s3_client.calls["ListObjectsV2"] == n_pages - 5
+
+    # all done, no more listing
+    s3_client.calls.clear()
+    keys = list_output_keys(
+        s3_client, "output", "textract", shard_prefixes=("",), dir_checkpoint=tmp_path
+    )
+    assert keys == expected
+    assert s3_client.calls["ListObjectsV2"] == 0
+
+
+def test_output_manifest(tmp_path, s3_client, job_ids):
+    s3dir = merge.get_textract_output_s3dir("output", "textract", job_ids[0])
+    compact_textract_output(s3_client, s3dir, key="Blocks", delete_parts=True)
+
+    manifest = build_output_manifest(s3_client, "output", "textract")
+    assert manifest.job_ids == sorted(job_ids)
+    assert manifest.compacted_job_ids == [job_ids[0]]
+    assert manifest.get_part_keys(job_ids[0]) is None
+    part_keys = manifest.get_part_keys(job_ids[1])
+    assert part_keys[0] == f"textract/{job_ids[1]}/1"
+
+    path = tmp_path.joinpath("manifest.json")
+    manifest.write(path)
+    manifest = OutputManifest.read(path)
+    assert manifest.is_compacted(job_ids[0])
+
+    # merge with the manifest, no listing
+    for job_id in job_ids[:2]:
+        s3dir = merge.get_textract_output_s3dir("output", "textract", job_id)
+        expected = merge.merge_document_analysis_result(s3_client, s3dir)
+        s3_client.calls.clear()
+        res = merge.merge_document_analysis_result(s3_client, s3dir, manifest=manifest)
+        assert res == expected
+        assert s3_client.calls["ListObjectsV2"] == 0
+    assert s3_client.calls["GetObject"] == len(part_keys)
+
+    # bulk merge with the manifest
+    dir_output = tmp_path.joinpath("merged")
+    result = bulk_merge_textract_output(
+        s3_client=s3_client,
+        s3bucket="output",
+        s3prefix="textract",
+        dir_output=dir_output,
+        manifest=manifest,
+        use_process_pool=False,
+        verbose=False,
+    )
+    assert sorted(result.succeeded) == sorted(job_ids)
+    path = dir_output.joinpath(job_ids[0][:2], f"{job_ids[0]}.json")
+    assert json.loads(path.read_text())["Blocks"]
+
+
+if __name__ == "__main__":
+    from aws_textract.tests import run_cov_test
+
+    run_cov_test(__file__, "aws_textract.response.listing", preview=False)
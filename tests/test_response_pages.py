@@ -0,0 +1,98 @@
+# -*- coding: utf-8 -*-
+
+import pytest
+
+from aws_textract.better_boto import async_api
+from aws_textract.response import merge
+from aws_textract.response.utils import blocks_to_text, split_blocks_by_page
+from aws_textract.response.projection import Projection
+from aws_textract.response.pages import iter_pages, iter_pages_from_s3
+from aws_textract.tests.synthetic import (
+    SyntheticDocumentConfig,
+    generate_document_analysis,
+    split_into_output_parts,
+    write_output_parts_to_s3,
+)
+
+
+def test_iter_pages():
+    res = generate_document_analysis(SyntheticDocumentConfig(n_pages=3))
+    blocks = res["Blocks"]
+    expected = split_blocks_by_page(blocks)
+
+    emitted = list()
+
+    def stream():
+        for block in blocks:
+            yield block
+            emitted.append(block)
+
+    pages = iter_pages(stream())
+    page = next(pages)
+    # page 1 is emitted once the first block of page 2 arrives
+    assert page.page == 1
+    assert emitted[-1]["Page"] == 1
+    assert len(emitted) == len(expected[1])
+    assert page.blocks == expected[1]
+    assert page.text == blocks_to_text(expected[1])
+    assert page.to_dict()["Page"] == 1
+    assert [p.page for p in pages] == [2, 3]
+
+    assert list(iter_pages([])) == []
+    # out of order blocks are another run of the same page
+    runs = iter_pages([{"BlockType": "LINE", "Text": "a"}, {"Page": 2}, {"Page": 1}])
+    assert [p.page for p in runs] == [1, 2, 1]
+
+
+def test_iter_pages_from_s3(s3_client):
+    pytest.importorskip("ijson")
+    res = generate_document_analysis(SyntheticDocumentConfig(n_pages=3))
+    parts = split_into_output_parts(res, key="Blocks", max_items=50)
+    s3dir = merge.get_textract_output_s3dir("output", "textract", "job-1")
+    write_output_parts_to_s3(s3_client, s3dir, parts)
+    expected = split_blocks_by_page(res["Blocks"])
+
+    metadata = dict()
+    pages = iter_pages_from_s3(s3_client, s3dir, metadata=metadata)
+    page = next(pages)
+    assert page.blocks == expected[1]
+    # only the parts up to the first block of page 2 are read
+    assert s3_client.calls["GetObject"] < len(parts)
+    assert metadata["DocumentMetadata"]["Pages"] == 3
+    assert [p.page for p in pages] == [2, 3]
+
+    projection = Projection.minimal(block_types=["LINE"])
+    pages = list(iter_pages_from_s3(s3_client, s3dir, projection=projection))
+    assert [p.text for p in pages] == [blocks_to_text(expected[i]) for i in [1, 2, 3]]
+
+
+def test_iter_document_pages(textract_client):
+    for api, iter_func in [
+        ("document_analysis", async_api.iter_document_analysis_pages),
+        ("document_text_detection", async_api.iter_document_text_detection_pages),
+    ]:
+        job_id = getattr(textract_client, f"start_{api}")(
+            DocumentLocation={"S3Object": {"Bucket": "input", "Name": "a.pdf"}},
+        )["JobId"]
+        textract_client.complete_all_jobs()
+        expected = split_blocks_by_page(textract_client.jobs[job_id].response["Blocks"])
+        operation = "Get" + "".join(word.title() for word in api.split("_"))
+
+        pages = iter_func(textract_client, job_id, max_results=20)
+        page = next(pages)
+        assert page.blocks == expected[1]
+        # the first page is ready before all the API pages are fetched
+        n_calls = textract_client.calls[operation]
+        rest = list(pages)
+        assert n_calls < textract_client.calls[operation]
+        assert [p.page for p in rest] == sorted(expected)[1:]
+
+        projection = Projection.minimal(block_types=["LINE"])
+        pages = list(iter_func(textract_client, job_id, projection=projection))
+        assert {b["BlockType"] for p in pages for b in p.blocks} == {"LINE"}
+
+
+if __name__ == "__main__":
+    from aws_textract.tests import run_cov_test
+
+    run_cov_test(__file__, "aws_textract.response.pages", preview=False)
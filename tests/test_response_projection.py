@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+
+import json
+
+from aws_textract.better_boto import async_api
+from aws_textract.response import merge
+from aws_textract.response.contants import BlockTypeEnum
+from aws_textract.response.projection import Projection
+from aws_textract.response.utils import blocks_to_text
+from aws_textract.tests.synthetic import (
+    SyntheticDocumentConfig,
+    generate_document_analysis,
+)
+
+
+def test_project_blocks():
+    blocks = generate_document_analysis(SyntheticDocumentConfig(n_pages=2))["Blocks"]
+
+    # no projection, copy of the list
+    assert Projection().project_blocks(blocks) == blocks
+
+    projection = Projection(block_types=[BlockTypeEnum.PAGE, BlockTypeEnum.LINE])
+    projected = projection.project_blocks(blocks)
+    assert {block["BlockType"] for block in projected} == {"PAGE", "LINE"}
+    assert projected[0] is blocks[0]
+
+    projection = Projection.minimal()
+    projected = projection.project_blocks(blocks)
+    assert len(projected) == len(blocks)
+    assert blocks_to_text(projected) == blocks_to_text(blocks)
+    for block in projected:
+        assert set(block).issubset(
+            {"BlockType", "Id", "Page", "Text", "Relationships", "Geometry"}
+        )
+        assert list(block["Geometry"]) == ["BoundingBox"]
+        for rel in block.get("Relationships", []):
+            assert rel["Type"] == "CHILD"
+    # the original blocks are not modified
+    assert "Polygon" in blocks[0]["Geometry"]
+    assert len(json.dumps(projected)) < len(json.dumps(blocks)) * 0.6
+
+    projection = Projection(fields=["Id", "Geometry", "Geometry.Polygon"])
+    assert projection.project_blocks(blocks[:1]) == [
+        {"Id": blocks[0]["Id"], "Geometry": blocks[0]["Geometry"]}
+    ]
+
+
+def test_projection_in_get_and_merge(s3_client, textract_client):
+    job_id = textract_client.start_document_analysis(
+        DocumentLocation={"S3Object": {"Bucket": "input", "Name": "doc.pdf"}},
+        OutputConfig={"S3Bucket": "output", "S3Prefix": "textract"},
+    )["JobId"]
+    projection = Projection.minimal(block_types=["PAGE", "LINE", "WORD"])
+    full = async_api.get_document_analysis(textract_client, job_id, max_results=100)
+    expected = projection.project_blocks(full["Blocks"])
+
+    res = async_api.get_document_analysis(
+        textract_client, job_id, max_results=100, projection=projection
+    )
+    assert res["Blocks"] == expected
+    assert res["DocumentMetadata"] == full["DocumentMetadata"]
+
+    s3dir = merge.get_textract_output_s3dir("output", "textract", job_id)
+    res = merge.merge_document_analysis_result(s3_client, s3dir, projection=projection)
+    assert res["Blocks"] == expected
+
+
+if __name__ == "__main__":
+    from aws_textract.tests import run_cov_test
+
+    run_cov_test(__file__, "aws_textract.response.projection", preview=False)
@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*-
+
+import math
+
+import pytest
+
+from aws_textract.response.queries import QueryResults, QueryMatrix
+from aws_textract.tests.synthetic import generate_document_analysis
+
+
+def add_query(blocks: list, page: int, text: str, alias, answers):
+    result_ids = list()
+    for i, (answer, confidence) in enumerate(answers):
+        result_id = f"qr-{page}-{text}-{i}"
+        result_ids.append(result_id)
+        blocks.append(
+            {
+                "BlockType": "QUERY_RESULT",
+                "Id": result_id,
+                "Text": answer,
+                "Confidence": confidence,
+                "Page": page,
+            }
+        )
+    query = {"Text": text, "Pages": [str(page)]}
+    if alias:
+        query["Alias"] = alias
+    block = {
+        "BlockType": "QUERY",
+        "Id": f"q-{page}-{text}",
+        "Query": query,
+        "Page": page,
+    }
+    if result_ids:
+        block["Relationships"] = [{"Type": "ANSWER", "Ids": result_ids}]
+    blocks.insert(0, block)
+
+
+def make_response(invoice_number: str, total=None) -> dict:
+    res = generate_document_analysis()
+    blocks = res["Blocks"]
+    question = "What is the invoice number?"
+    answers = [(invoice_number, 90.0), ("other", 40.0)]
+    add_query(blocks, 1, question, "INVOICE_NUMBER", answers)
+    answers = [(invoice_number + "-2", 95.0)]
+    add_query(blocks, 2, question, "INVOICE_NUMBER", answers)
+    answers = [] if total is None else [(total, 80.0)]
+    add_query(blocks, 1, "What is the total?", None, answers)
+    return res
+
+
+def test_query_results():
+    results = QueryResults.from_blocks(make_response("INV-1"))
+    assert results.aliases == ["What is the total?", "INVOICE_NUMBER"]
+    by_alias = results.by_alias()
+    assert [a.text for a in by_alias["INVOICE_NUMBER"]] == ["INV-1-2", "INV-1", "other"]
+    assert by_alias["What is the total?"] == []
+    assert results.best("INVOICE_NUMBER").page == 2
+    assert results.best("What is the total?") is None
+    assert results.best("unknown") is None
+    by_page = results.by_page()
+    assert list(by_page) == [1, 2]
+    assert [a.text for a in by_page[1]] == ["INV-1", "other"]
+    assert by_page[1][0].query == "What is the invoice number?"
+
+
+def test_query_matrix():
+    matrix = QueryMatrix.from_responses(
+        [
+            ("doc-1", make_response("A")),
+            ("doc-2", QueryResults.from_blocks(make_response("B", total="$10"))),
+        ]
+    )
+    assert matrix.shape == (2, 2)
+    assert matrix.get("INVOICE_NUMBER", "doc-2") == "B-2"
+    assert matrix.get("What is the total?", "doc-1") is None
+    assert matrix.get("What is the total?", "doc-2") == "$10"
+    assert math.isnan(matrix.get_confidence("What is the total?", "doc-1"))
+    assert matrix.text_row("INVOICE_NUMBER") == ["A-2", "B-2"]
+    assert list(matrix.confidence_row("INVOICE_NUMBER")) == [95.0, 95.0]
+
+    matrix = QueryMatrix.from_responses(
+        [("doc-1", make_response("A"))], aliases=["INVOICE_NUMBER", "MISSING"]
+    )
+    assert matrix.text_row("MISSING") == [None]
+
+    np = pytest.importorskip("numpy")
+    arr = matrix.to_numpy()
+    assert arr.shape == (2, 1)
+    assert arr[0, 0] == 95.0 and np.isnan(arr[1, 0])
+
+
+if __name__ == "__main__":
+    from aws_textract.tests import run_cov_test
+
+    run_cov_test(__file__, "aws_textract.response.queries", preview=False)
@@ -0,0 +1,111 @@
+# -*- coding: utf-8 -*-
+
+import io
+import json
+
+import pytest
+
+from aws_textract.response import merge
+from aws_textract.response.projection import Projection
+from aws_textract.response.stream import (
+    iter_json_array_items,
+    iter_textract_output_items,
+)
+from aws_textract.tests.synthetic import (
+    SyntheticDocumentConfig,
+    generate_document_analysis,
+    generate_expense_analysis,
+    split_into_output_parts,
+    write_output_parts_to_s3,
+)
+
+ijson = pytest.importorskip("ijson")
+
+
+@pytest.mark.parametrize("backend", [None, "python"])
+def test_iter_json_array_items(backend):
+    response = generate_document_analysis(SyntheticDocumentConfig(n_pages=2))
+    response["Warnings"] = [{"ErrorCode": "W1", "Pages": [1]}]
+    fileobj = io.BytesIO(json.dumps(response).encode("utf-8"))
+    metadata = dict()
+    blocks = list(
+        iter_json_array_items(fileobj, "Blocks", metadata=metadata, backend=backend)
+    )
+    assert blocks == response["Blocks"]
+    expected = dict(response)
+    expected.pop("Blocks")
+    assert metadata == expected
+
+    # without metadata
+    fileobj = io.BytesIO(json.dumps(response).encode("utf-8"))
+    assert list(iter_json_array_items(fileobj, "Blocks")) == response["Blocks"]
+
+
+def test_merge_stream(s3_client):
+    response = generate_document_analysis(SyntheticDocumentConfig(n_pages=3))
+    parts = split_into_output_parts(response, key="Blocks", max_items=200)
+    s3dir = merge.get_textract_output_s3dir("output", "textract", "job-1")
+    write_output_parts_to_s3(s3_client, s3dir, parts)
+
+    expected = merge.merge_document_analysis_result(s3_client, s3dir)
+    res = merge.merge_document_analysis_result(s3_client, s3dir, stream=True)
+    assert res == expected
+
+    projection = Projection.minimal(block_types=["LINE"])
+    res = merge.merge_document_analysis_result(
+        s3_client, s3dir, projection=projection, stream=True
+    )
+    assert res["Blocks"] == projection.project_blocks(expected["Blocks"])
+
+    metadata = dict()
+    blocks = iter_textract_output_items(s3_client, s3dir, "Blocks", metadata=metadata)
+    assert next(blocks) == expected["Blocks"][0]
+    assert metadata["DocumentMetadata"] == expected["DocumentMetadata"]
+    assert len(list(blocks)) == len(expected["Blocks"]) - 1
+
+    # expense
+    response = generate_expense_analysis(n_documents=5)
+    parts = split_into_output_parts(response, key="ExpenseDocuments", max_items=2)
+    s3dir = merge.get_textract_output_s3dir("output", "textract", "job-2")
+    write_output_parts_to_s3(s3_client, s3dir, parts)
+    assert merge.merge_expense_analysis_result(
+        s3_client, s3dir, stream=True
+    ) == merge.merge_expense_analysis_result(s3_client, s3dir)
+
+
+class ReadCounter(io.BytesIO):
+    def __init__(self, data: bytes):
+        super().__init__(data)
+        self.n_read = 0
+
+    def read(self, size: int = -1) -> bytes:
+        chunk = super().read(size)
+        self.n_read += len(chunk)
+        return chunk
+
+
+@pytest.mark.parametrize("backend", [None, "python"])
+def test_stream_with_metadata(backend):
+    # the first items are yielded before the rest of the array is read, the
+    # metadata before the array is ready by then, the one after it at the end
+    response = generate_document_analysis(SyntheticDocumentConfig(n_pages=10))
+    assert list(response)[-1] == "AnalyzeDocumentModelVersion"
+    raw = json.dumps(response).encode("utf-8")
+    fileobj = ReadCounter(raw)
+    metadata = dict()
+    blocks = iter_json_array_items(fileobj, "Blocks", metadata=metadata, backend=backend)
+    assert next(blocks) == response["Blocks"][0]
+    assert fileobj.n_read < len(raw) // 2
+    assert metadata == {
+        "DocumentMetadata": response["DocumentMetadata"],
+        "JobStatus": response["JobStatus"],
+    }
+    assert [next(blocks)] + list(blocks) == response["Blocks"][1:]
+    assert metadata["AnalyzeDocumentModelVersion"] == "1.0"
+    assert "Blocks" not in metadata
+
+
+if __name__ == "__main__":
+    from aws_textract.tests import run_cov_test
+
+    run_cov_test(__file__, "aws_textract.response.stream", preview=False)
@@ -0,0 +1,54 @@
+# -*- coding: utf-8 -*-
+
+from aws_textract.response.utils import blocks_to_text
+from aws_textract.response.text_offsets import TextOffsetMap
+from aws_textract.tests.synthetic import (
+    SyntheticDocumentConfig,
+    generate_document_analysis,
+)
+
+
+def test_text_offset_map():
+    res = generate_document_analysis(SyntheticDocumentConfig(n_pages=3))
+    blocks = res["Blocks"]
+    offset_map = TextOffsetMap.from_blocks(res)
+    text = offset_map.text
+    assert text == blocks_to_text(blocks)
+
+    lines = [b for b in blocks if b["BlockType"] == "LINE"]
+    words = {b["Id"]: b for b in blocks if b["BlockType"] == "WORD"}
+    assert offset_map.n_lines == len(lines)
+    assert offset_map.n_words == len(words)
+
+    # every word maps back to its own text, page and box
+    for hit in offset_map.find_words(0, len(text)):
+        word = words[hit.block_id]
+        assert text[hit.start : hit.end] == word["Text"]
+        assert hit.page == word["Page"]
+        assert abs(hit.bbox["Left"] - word["Geometry"]["BoundingBox"]["Left"]) < 1e-6
+
+    # a span across the line break hits the last word and the next line
+    line_1, line_2 = offset_map.find_lines(0, len(lines[0]["Text"]) + 2)
+    assert line_1.block_id == lines[0]["Id"]
+    assert line_2.block_id == lines[1]["Id"]
+    assert line_2.start == line_1.end + 1
+    hits = offset_map.find_words(line_1.end - 1, line_2.start + 1)
+    assert text[hits[0].start : hits[0].end] == lines[0]["Text"].split(" ")[-1]
+    assert hits[-1].start == line_2.start
+
+    word = offset_map.word_at(1)
+    assert word.start == 0
+    assert offset_map.word_at(line_1.end) is None  # the newline
+    assert offset_map.find_words(len(text), len(text) + 5) == []
+    assert offset_map.find_pages(0, len(text)) == [1, 2, 3]
+    assert offset_map.find_pages(0, 1) == [1]
+
+    empty = TextOffsetMap.from_blocks([])
+    assert empty.text == ""
+    assert empty.word_at(0) is None
+
+
+if __name__ == "__main__":
+    from aws_textract.tests import run_cov_test
+
+    run_cov_test(__file__, "aws_textract.response.text_offsets", preview=False)
@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+
+import pytest
+
+from aws_textract.response.word_index import normalize_term, WordIndex
+from aws_textract.tests.synthetic import (
+    SyntheticDocumentConfig,
+    generate_document_analysis,
+)
+
+
+def test_normalize_term():
+    assert normalize_term("Wages,") == "wages"
+    assert normalize_term("“Total”") == "total"
+    assert normalize_term("12.50") == "12.50"
+    assert normalize_term("...") == ""
+
+
+def get_blocks(seed: int, n_pages: int = 2):
+    return generate_document_analysis(
+        SyntheticDocumentConfig(n_pages=n_pages, seed=seed)
+    )["Blocks"]
+
+
+def test_word_index(tmp_path):
+    blocks1 = get_blocks(seed=1)
+    blocks2 = get_blocks(seed=2)
+    # the punctuation only words like ":" are not indexed
+    words1 = [
+        b for b in blocks1 if b["BlockType"] == "WORD" and normalize_term(b["Text"])
+    ]
+
+    index = WordIndex()
+    assert index.add_document("doc1", blocks1) == len(words1)
+    index.add_document("doc2", blocks2)
+    with pytest.raises(ValueError):
+        index.add_document("doc1", blocks1)
+    assert index.n_documents == 2
+
+    # single term lookup returns every occurrence with its geometry
+    word = words1[5]
+    term = normalize_term(word["Text"])
+    hits = index.lookup(word["Text"].upper())
+    expected = [
+        (doc_id, b["Id"])
+        for doc_id, blocks in [("doc1", blocks1), ("doc2", blocks2)]
+        for b in blocks
+        if b["BlockType"] == "WORD" and normalize_term(b["Text"]) == term
+    ]
+    assert [(hit.document_id, hit.block_id) for hit in hits] == expected
+    hit = [hit for hit in hits if hit.block_id == word["Id"]][0]
+    assert hit.page == word["Page"]
+    for k, v in word["Geometry"]["BoundingBox"].items():
+        assert hit.bbox[k] == pytest.approx(v, abs=1e-4)
+
+    # multi term query, all terms must be on the same page
+    hits = index.search("synthetic confidential")
+    pages = index.document_pages("synthetic confidential")
+    assert pages == {"doc1": [1, 2], "doc2": [1, 2]}
+    assert {hit.term for hit in hits} == {"synthetic", "confidential"}
+    assert index.search("synthetic confidential", document_id="doc2")[0].document_id == "doc2"
+    assert index.search("synthetic not-exists") == []
+    assert index.search("synthetic", document_id="doc3") == []
+    assert index.search("") == []
+
+    # persistence and incremental addition
+    index.save(tmp_path)
+    loaded = WordIndex.load(tmp_path)
+    assert loaded.n_words == index.n_words
+    assert loaded.search("section 1.1") == index.search("section 1.1")
+    loaded.add_document("doc3", get_blocks(seed=3))
+    assert loaded.document_pages("synthetic") == {
+        "doc1": [1, 2],
+        "doc2": [1, 2],
+        "doc3": [1, 2],
+    }
+
+
+if __name__ == "__main__":
+    from aws_textract.tests import run_cov_test
+
+    run_cov_test(__file__, "aws_textract.response.word_index", preview=False)
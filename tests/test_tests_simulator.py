@@ -0,0 +1,138 @@
+# -*- coding: utf-8 -*-
+
+import pytest
+from botocore.exceptions import ClientError
+from s3pathlib import S3Path
+
+from aws_textract.better_boto import async_api
+from aws_textract.response import merge
+from aws_textract.tests.simulator import (
+    SimulatorConfig,
+    InMemoryS3Client,
+    TextractSimulator,
+)
+
+DOCUMENT_LOCATION = {"S3Object": {"Bucket": "input", "Name": "doc.pdf"}}
+OUTPUT_CONFIG = {"S3Bucket": "output", "S3Prefix": "textract"}
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_in_memory_s3_client(s3_client):
+    s3dir = S3Path("s3://bucket/folder/")
+    for i in range(5):
+        s3dir.joinpath(str(i)).write_text(f"hello {i}", bsm=s3_client)
+    s3dir.joinpath("sub", "a.txt").write_text("a", bsm=s3_client)
+
+    s3path_list = s3dir.iter_objects(batch_size=2, bsm=s3_client).all()
+    assert [s3path.key for s3path in s3path_list] == [
+        "folder/0",
+        "folder/1",
+        "folder/2",
+        "folder/3",
+        "folder/4",
+        "folder/sub/a.txt",
+    ]
+    assert s3dir.joinpath("3").read_text(bsm=s3_client) == "hello 3"
+    res = s3_client.get_object(Bucket="bucket", Key="folder/3", Range="bytes=0-4")
+    assert res["Body"].read() == b"hello"
+    res = s3_client.list_objects_v2(Bucket="bucket", Prefix="folder/", Delimiter="/")
+    assert res["CommonPrefixes"] == [{"Prefix": "folder/sub/"}]
+    with pytest.raises(ClientError):
+        s3_client.get_object(Bucket="bucket", Key="not-exists")
+
+
+def test_job_lifecycle():
+    clock = FakeClock()
+    s3_client = InMemoryS3Client()
+    textract_client = TextractSimulator(
+        s3_client=s3_client,
+        config=SimulatorConfig(job_duration=10, part_size=100),
+        clock=clock,
+    )
+    job_id = textract_client.start_document_analysis(
+        DocumentLocation=DOCUMENT_LOCATION,
+        OutputConfig=OUTPUT_CONFIG,
+        NotificationChannel={"SNSTopicArn": "arn", "RoleArn": "arn"},
+        JobTag="my-tag",
+    )["JobId"]
+    assert len(job_id) == 64
+
+    res = textract_client.get_document_analysis(JobId=job_id)
+    assert res["JobStatus"] == "IN_PROGRESS"
+    assert textract_client.notifications == []
+
+    clock.now = 10
+    res = async_api.get_document_analysis(textract_client, job_id, max_results=100)
+    assert res["JobStatus"] == "SUCCEEDED"
+    assert "NextToken" not in res
+    expected = textract_client.jobs[job_id].response
+    assert res["Blocks"] == expected["Blocks"]
+    assert textract_client.calls["GetDocumentAnalysis"] == 1 + (
+        len(expected["Blocks"]) + 99
+    ) // 100
+
+    event = async_api.TextractEvent.from_dict(textract_client.notifications[0])
+    assert event.JobId == job_id
+    assert event.JobTag == "my-tag"
+
+    # wrong api
+    with pytest.raises(ClientError):
+        textract_client.get_document_text_detection(JobId=job_id)
+
+    # the output parts in S3 can be merged back
+    s3dir = merge.get_textract_output_s3dir("output", "textract", job_id)
+    res = merge.merge_document_analysis_result(s3_client, s3dir)
+    assert res["Blocks"] == expected["Blocks"]
+
+
+def test_wait_job_to_succeed(textract_client):
+    job_id = textract_client.start_expense_analysis(
+        DocumentLocation=DOCUMENT_LOCATION,
+    )["JobId"]
+    res = async_api.wait_expense_analysis_job_to_succeed(
+        textract_client, job_id, delays=0.01, timeout=1, verbose=False
+    )
+    assert res["JobStatus"] == "SUCCEEDED"
+    res = async_api.get_expense_analysis(textract_client, job_id, max_results=1)
+    assert len(res["ExpenseDocuments"]) == 3
+
+
+def test_failure_and_throttling():
+    textract_client = TextractSimulator(
+        config=SimulatorConfig(failure_rate=1.0),
+    )
+    job_id = textract_client.start_lending_analysis(
+        DocumentLocation=DOCUMENT_LOCATION,
+    )["JobId"]
+    with pytest.raises(Exception):
+        async_api.wait_lending_analysis_job_to_succeed(
+            textract_client, job_id, delays=0.01, timeout=1, verbose=False
+        )
+
+    textract_client = TextractSimulator(
+        config=SimulatorConfig(throttle_rate=0.5, seed=3),
+    )
+    n_throttled = 0
+    for _ in range(20):
+        try:
+            textract_client.start_document_text_detection(
+                DocumentLocation=DOCUMENT_LOCATION,
+            )
+        except ClientError as e:
+            assert e.response["Error"]["Code"] == "ThrottlingException"
+            n_throttled += 1
+    assert 0 < n_throttled < 20
+    assert textract_client.throttles["StartDocumentTextDetection"] == n_throttled
+
+
+if __name__ == "__main__":
+    from aws_textract.tests import run_cov_test
+
+    run_cov_test(__file__, "aws_textract.tests.simulator", preview=False)
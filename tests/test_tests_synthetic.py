@@ -0,0 +1,57 @@
+# -*- coding: utf-8 -*-
+
+import json
+
+from aws_textract.response.utils import split_blocks_by_page
+from aws_textract.tests.synthetic import (
+    SyntheticDocumentConfig,
+    generate_document_analysis,
+    generate_document_text_detection,
+    split_into_output_parts,
+    write_output_parts_to_dir,
+)
+
+
+def test_generate_document_analysis():
+    config = SyntheticDocumentConfig(n_pages=3)
+    res = generate_document_analysis(config)
+    # deterministic
+    assert res == generate_document_analysis(config)
+    assert res != generate_document_analysis(SyntheticDocumentConfig(n_pages=3, seed=2))
+
+    blocks = res["Blocks"]
+    assert list(split_blocks_by_page(blocks)) == [1, 2, 3]
+    block_types = {block["BlockType"] for block in blocks}
+    for block_type in ["PAGE", "LINE", "WORD", "TABLE", "CELL", "KEY_VALUE_SET"]:
+        assert block_type in block_types
+    assert "LAYOUT_TITLE" in block_types
+
+    # every CHILD id points to an existing block
+    ids = {block["Id"] for block in blocks}
+    assert len(ids) == len(blocks)
+    for block in blocks:
+        for rel in block.get("Relationships", []):
+            assert set(rel["Ids"]).issubset(ids)
+
+
+def test_generate_document_text_detection():
+    res = generate_document_text_detection(SyntheticDocumentConfig(n_pages=2))
+    assert {block["BlockType"] for block in res["Blocks"]} == {"PAGE", "LINE", "WORD"}
+
+
+def test_split_into_output_parts(tmp_path):
+    res = generate_document_analysis(SyntheticDocumentConfig(n_pages=3))
+    parts = split_into_output_parts(res, key="Blocks", max_items=100)
+    assert len(parts) == (len(res["Blocks"]) + 99) // 100
+    assert sum([part["Blocks"] for part in parts], []) == res["Blocks"]
+    assert all(part["DocumentMetadata"] == {"Pages": 3} for part in parts)
+
+    write_output_parts_to_dir(parts, tmp_path)
+    assert tmp_path.joinpath(".s3_access_check").exists()
+    assert json.loads(tmp_path.joinpath("1").read_text()) == parts[0]
+
+
+if __name__ == "__main__":
+    from aws_textract.tests import run_cov_test
+
+    run_cov_test(__file__, "aws_textract.tests.synthetic", preview=False)